@@ -3,7 +3,8 @@
 Resource limit enforcement using standard library only.
 
 Key Features:
-    - Memory usage monitoring
+    - Memory usage monitoring (current RSS from /proc/self/statm)
+    - Memory governor: producer throttling and spill requests under a budget
     - File handle tracking
     - Rate limiting with TOKEN_REMOVED bucket
     - Size limits for files and data
@@ -21,7 +22,7 @@ import os
 import sys
 import time
 from pathlib import Path
-from typing import Optional, Callable, Any, Union
+from typing import Optional, Callable, Any, Dict, List, Union
 from contextlib import contextmanager
 import threading
 
@@ -39,7 +40,10 @@ class Limits:
 
     @staticmethod
     def get_memory_usage() -> int:
-        """Get current process memory usage in bytes.
+        """Get current process memory usage (resident set size) in bytes.
+
+        Reads /proc/self/statm on Linux. Elsewhere falls back to the peak
+        resident size from getrusage, which never decreases.
 
         Returns:
             Memory usage in bytes
@@ -48,33 +52,48 @@ class Limits:
             LimitsError: If memory usage cannot be determined
         """
         try:
-            # Try using resource module (Unix)
-            if hasattr(os, 'getrusage'):
-                import resource
-                usage = resource.getrusage(resource.RUSAGE_SELF)
-                # ru_maxrss is in kilobytes on Linux, bytes on macOS
-                if sys.platform == 'darwin':
-                    return usage.ru_maxrss
-                else:
-                    return usage.ru_maxrss * 1024
-
-            # Try reading /proc/self/status (Linux)
-            elif sys.platform.startswith('linux'):
-                status_path = Path('/proc/self/status')
-                if status_path.exists():
-                    with open(status_path) as f:
-                        for line in f:
-                            if line.startswith('VmRSS:'):
-                                # Extract memory in kB
-                                parts = line.split()
-                                return int(parts[1]) * 1024
-
-            # Fallback: return 0 if we can't determine
-            return 0
+            # Current RSS: resident pages from /proc/self/statm (Linux)
+            if sys.platform.startswith('linux'):
+                try:
+                    with open('/proc/self/statm', 'rb') as f:
+                        resident_pages = int(f.read().split()[1])
+                    return resident_pages * os.sysconf('SC_PAGE_SIZE')
+                except (OSError, ValueError, IndexError):
+                    pass
+
+            return Limits.get_peak_memory_usage()
 
         except Exception as e:
             raise LimitsError(f"Failed to get memory usage: {e}") from e
 
+    @staticmethod
+    def get_peak_memory_usage() -> int:
+        """Get peak process memory usage (maximum resident set size) in bytes.
+
+        Returns:
+            Peak memory usage in bytes, or 0 if it cannot be determined
+        """
+        if hasattr(os, 'getrusage'):
+            import resource
+            usage = resource.getrusage(resource.RUSAGE_SELF)
+            # ru_maxrss is in kilobytes on Linux, bytes on macOS
+            if sys.platform == 'darwin':
+                return usage.ru_maxrss
+            return usage.ru_maxrss * 1024
+        return 0
+
+    @staticmethod
+    def get_total_memory() -> int:
+        """Get physical memory of the host in bytes.
+
+        Returns:
+            Total memory in bytes, or 0 if it cannot be determined
+        """
+        try:
+            return os.sysconf('SC_PHYS_PAGES') * os.sysconf('SC_PAGE_SIZE')
+        except (AttributeError, ValueError, OSError):
+            return 0
+
     @staticmethod
     def check_memory_limit(max_bytes: int) -> bool:
         """Check if current memory usage is under limit.
@@ -253,6 +272,171 @@ class Limits:
                 )
 
 
+class MemoryGovernor:
+    """Keep a process under a memory budget.
+
+    Samples current RSS and, when it reaches the high-water mark of the
+    budget, asks registered structures to spill to disk and holds back
+    producers until usage drops to the low-water mark. Producers call
+    throttle() before taking more work; structures that can move their
+    contents to disk register a spill callback.
+
+    A wait that times out means RSS has settled above the mark (freed memory
+    the allocator keeps, or a working set that simply needs it). The
+    governor then backs off: throttle() returns at once and relieves at
+    most once per sample interval until RSS either falls back under the
+    high-water mark or rises by rearm_step of the budget past the level it
+    settled at.
+    """
+
+    def __init__(self, budget_bytes: Optional[int] = None, high_water: float = 0.85,
+                 low_water: float = 0.70, sample_interval: float = 0.05,
+                 max_wait: float = 5.0, reader: Optional[Callable[[], int]] = None,
+                 rearm_step: float = 0.05):
+        """Initialize memory governor.
+
+        Args:
+            budget_bytes: Memory budget (default: half of physical memory)
+            high_water: Fraction of the budget at which spilling and
+                throttling start
+            low_water: Fraction of the budget at which throttled producers resume
+            sample_interval: Minimum seconds between RSS samples
+            max_wait: Longest single throttle wait in seconds; memory freed
+                by Python is not always returned to the OS, so producers
+                resume after this even if RSS stays high
+            reader: RSS source in bytes (default: Limits.get_memory_usage)
+            rearm_step: Fraction of the budget RSS must grow past the level
+                a timed-out wait left it at before producers wait again
+        """
+        if budget_bytes is None:
+            budget_bytes = Limits.get_total_memory() // 2 or 2 * 1024 ** 3
+        if budget_bytes <= 0:
+            raise LimitsError(f"Memory budget must be positive, got {budget_bytes}")
+        if not 0 < low_water <= high_water <= 1:
+            raise LimitsError(
+                f"Invalid water marks: low {low_water}, high {high_water}")
+        self.budget_bytes = budget_bytes
+        self.high_water = high_water
+        self.low_water = low_water
+        self.sample_interval = sample_interval
+        self.max_wait = max_wait
+        self._reader = reader or Limits.get_memory_usage
+        self._spillers: List[Callable[[], Any]] = []
+        self._lock = threading.Lock()
+        self._last_sample = 0.0
+        self._last_rss = 0
+        self.rearm_step = rearm_step
+        # RSS a timed-out wait could not bring down, while backing off
+        self._settled_rss: Optional[int] = None
+        self._last_relief = float('-inf')
+        self.throttle_events = 0
+        self.throttled_seconds = 0.0
+        self.spill_requests = 0
+        self.peak_rss = 0
+
+    def rss(self, fresh: bool = False) -> int:
+        """Current RSS in bytes (sampled at most every sample_interval)."""
+        now = time.monotonic()
+        if fresh or now - self._last_sample >= self.sample_interval:
+            self._last_rss = self._reader()
+            self._last_sample = now
+            self.peak_rss = max(self.peak_rss, self._last_rss)
+        return self._last_rss
+
+    def pressure(self, fresh: bool = False) -> float:
+        """RSS as a fraction of the budget."""
+        return self.rss(fresh) / self.budget_bytes
+
+    def over_budget(self) -> bool:
+        """Whether RSS has reached the high-water mark."""
+        return self.pressure() >= self.high_water
+
+    def register_spill(self, callback: Callable[[], Any]) -> None:
+        """Register a callback that moves in-memory data to disk."""
+        with self._lock:
+            self._spillers.append(callback)
+
+    def unregister_spill(self, callback: Callable[[], Any]) -> None:
+        """Remove a spill callback."""
+        with self._lock:
+            if callback in self._spillers:
+                self._spillers.remove(callback)
+
+    def relieve(self) -> None:
+        """Ask every registered structure to spill, then release freed memory."""
+        with self._lock:
+            spillers = list(self._spillers)
+        self._last_relief = time.monotonic()
+        for spill in spillers:
+            self.spill_requests += 1
+            spill()
+        import gc
+        gc.collect()
+        _release_free_heap()
+
+    def throttle(self, timeout: Optional[float] = None) -> bool:
+        """Block a producer while memory is over the high-water mark.
+
+        Args:
+            timeout: Longest wait in seconds (default: max_wait)
+
+        Returns:
+            True if memory is under the budget's high-water mark on return
+        """
+        if not self.over_budget():
+            self._settled_rss = None
+            return True
+        settled = self._settled_rss
+        if settled is not None and self._last_rss < settled + self.rearm_step * self.budget_bytes:
+            # Waiting did not help at this level; keep producers moving
+            if time.monotonic() - self._last_relief >= self.sample_interval:
+                self.relieve()
+            return False
+
+        start = time.monotonic()
+        self.throttle_events += 1
+        self.relieve()
+        deadline = start + (self.max_wait if timeout is None else timeout)
+        try:
+            while self.pressure(fresh=True) > self.low_water:
+                if time.monotonic() >= deadline:
+                    if self.pressure() < self.high_water:
+                        return True
+                    self._settled_rss = self._last_rss
+                    return False
+                time.sleep(self.sample_interval)
+            self._settled_rss = None
+            return True
+        finally:
+            self.throttled_seconds += time.monotonic() - start
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Governor statistics.
+
+        Returns:
+            Dictionary with budget, current and peak RSS, and throttling counts
+        """
+        return {
+            'budget_bytes': self.budget_bytes,
+            'rss_bytes': self._last_rss,
+            'peak_rss_bytes': self.peak_rss,
+            'throttle_events': self.throttle_events,
+            'throttled_seconds': self.throttled_seconds,
+            'spill_requests': self.spill_requests,
+        }
+
+
+def _release_free_heap() -> None:
+    """Return freed heap pages to the OS where the C library supports it (glibc)."""
+    if not sys.platform.startswith('linux'):
+        return
+    try:
+        import ctypes
+        ctypes.CDLL('libc.so.6').malloc_trim(0)
+    except (OSError, AttributeError):
+        pass
+
+
 class RateLimiter:
     """Token bucket rate limiter.
 
@@ -21,6 +21,7 @@ except ImportError:
     psutil = None  # type: ignore[assignment]
 
 from .config import load_config
+from .logging_system import Logging, RateLimitFilter
 from .container import container as global_container
 from .tool_system.registry import ToolRegistry
 from .tool_system.loader import create_tool_loader
@@ -209,6 +210,9 @@ class CoreLoader:
 
         except Exception as e:
             self.logger.error(f"[{ActionCode.FPT_STM_ERR}] Shutdown error: {e}")
+        finally:
+            # Write out every queued log record before the process exits
+            Logging.shutdown()
 
     def _apply_platform_autoconfig(self) -> Dict[str, Any]:
         """Apply system resource-based autoconfiguration."""
@@ -224,9 +228,21 @@ class CoreLoader:
         return {'cpu_cores': multiprocessing.cpu_count()}
 
 
+# Environment variable selecting log output: 'text' (default) or 'json'
+LOG_FORMAT_ENV = 'NODUPE_LOG_FORMAT'
+
+
 def bootstrap() -> 'CoreLoader':
     """Global bootstrap entry point."""
-    logging.basicConfig(level=logging.INFO, format='[%(levelname)s] %(message)s')
+    # Log output runs on a listener thread so that per-file warnings from
+    # scanning and hashing threads never wait on console or file I/O
+    Logging.setup_logging(
+        log_format='[%(levelname)s] %(message)s',
+        asynchronous=True,
+        json_output=os.environ.get(LOG_FORMAT_ENV, 'text').lower() == 'json',
+        rate_limit=RateLimitFilter(),
+        console_stream=sys.stderr
+    )
     loader = CoreLoader()
     loader.initialize()
     return loader
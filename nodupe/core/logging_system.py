@@ -2,29 +2,161 @@
 
 Structured logging utilities using standard library only.
 
+Output handlers can run on a background thread: the root logger then
+holds a single QueueHandler, so a log call on a hashing or walking
+thread only enqueues the record, and a QueueListener does the console
+and file I/O. Repeated messages from one call site (a million
+"permission denied" warnings) are rate limited before they are queued.
+
 Key Features:
     - Structured logging with configurable levels
     - File and console output
     - Log rotation support
     - Contextual logging
+    - Asynchronous output through QueueHandler/QueueListener
+    - Rate limiting and sampling of repeated messages
+    - JSON lines output
+    - Flush on shutdown
     - Standard library only (no external dependencies)
 
 Dependencies:
     - logging (standard library)
     - logging.handlers (standard library)
+    - queue (standard library)
+    - json (standard library)
 """
 
+import atexit
+import json
 import logging
 import logging.handlers
+import queue
+import threading
+import time
 from pathlib import Path
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List, TextIO, Tuple
 import sys
 
+# LogRecord attributes that are not user-supplied context
+_RECORD_ATTRIBUTES = frozenset(vars(logging.LogRecord('', 0, '', 0, '', None, None))) | {
+    'message', 'asctime', 'suppressed', '_rate_limit_passed'
+}
+
 
 class LoggingError(Exception):
     """Logging configuration error"""
 
 
+class RateLimitFilter(logging.Filter):
+    """Rate limit and sample repeated messages per call site.
+
+    Records are keyed by logger, level and source line, so a warning
+    logged in a loop over a million unreadable files counts as one
+    message however its text varies. Each key may pass `burst` records
+    per `interval` seconds; beyond that only every `sample_every`-th
+    record passes (0 drops them all). The next record that passes for a
+    key reports how many were suppressed in between. CRITICAL records
+    always pass.
+    """
+
+    def __init__(self, burst: int = 10, interval: float = 60.0, sample_every: int = 1000):
+        """Initialize the filter.
+
+        Args:
+            burst: Records per key passed unconditionally in each interval
+            interval: Window length in seconds
+            sample_every: Pass one in this many records over the burst
+                (0 = none)
+        """
+        super().__init__()
+        self.burst = burst
+        self.interval = interval
+        self.sample_every = sample_every
+        self._windows: Dict[Tuple[str, int, str, int], List[Any]] = {}
+        self._lock = threading.Lock()
+        self.suppressed_total = 0
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        # A record reaching several handlers sharing this filter counts once
+        decided = getattr(record, '_rate_limit_passed', None)
+        if decided is not None:
+            return decided
+        record._rate_limit_passed = self._decide(record)
+        return record._rate_limit_passed
+
+    def _decide(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.CRITICAL:
+            return True
+        key = (record.name, record.levelno, record.pathname, record.lineno)
+        now = time.monotonic()
+        with self._lock:
+            window = self._windows.get(key)
+            if window is None or now - window[0] >= self.interval:
+                suppressed = window[2] if window is not None else 0
+                window = [now, 0, suppressed]
+                self._windows[key] = window
+            window[1] += 1
+            excess = window[1] - self.burst
+            if excess > 0 and (not self.sample_every or excess % self.sample_every):
+                window[2] += 1
+                self.suppressed_total += 1
+                return False
+            suppressed, window[2] = window[2], 0
+        if suppressed:
+            record.suppressed = suppressed
+            record.msg = f"{record.getMessage()} [{suppressed} similar messages suppressed]"
+            record.args = None
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """Format records as one JSON object per line.
+
+    Context passed with `extra=` (and by Logging.log_with_context) becomes
+    top-level fields.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry: Dict[str, Any] = {
+            'time': time.strftime('%Y-%m-%dT%H:%M:%S', time.gmtime(record.created))
+                    + f'.{int(record.msecs):03d}Z',
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            'module': record.module,
+            'line': record.lineno,
+            'thread': record.threadName,
+        }
+        if getattr(record, 'suppressed', None):
+            entry['suppressed'] = record.suppressed
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES and key not in entry:
+                entry[key] = value
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry['exception'] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class _ContextQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that keeps extra context fields for JSON output."""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Runs on the caller's thread, before the record is enqueued: args
+        # and exc_info are rendered while they still hold the values at the
+        # time of the call, so they never cross the queue to the listener
+        message = record.getMessage()
+        if record.exc_info and not record.exc_text:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+        prepared = logging.makeLogRecord(vars(record))
+        prepared.msg = message
+        prepared.args = None
+        prepared.exc_info = None
+        prepared.stack_info = None
+        return prepared
+
+
 class Logging:
     """Handle structured logging.
 
@@ -34,6 +166,9 @@ class Logging:
 
     _loggers: Dict[str, logging.Logger] = {}
     _configured: bool = False
+    _listener: Optional[logging.handlers.QueueListener] = None
+    _output_handlers: List[logging.Handler] = []
+    _atexit_registered: bool = False
 
     @classmethod
     def setup_logging(
@@ -43,7 +178,11 @@ class Logging:
         console_output: bool = True,
         max_file_size: int = 10 * 1024 * 1024,  # 10MB
         backup_count: int = 5,
-        log_format: Optional[str] = None
+        log_format: Optional[str] = None,
+        asynchronous: bool = False,
+        json_output: bool = False,
+        rate_limit: Optional[RateLimitFilter] = None,
+        console_stream: Optional[TextIO] = None
     ) -> None:
         """Set up logging configuration.
 
@@ -54,11 +193,19 @@ class Logging:
             max_file_size: Maximum log file size in bytes before rotation
             backup_count: Number of backup log files to keep
             log_format: Custom log format string
+            asynchronous: Write output on a QueueListener thread; the root
+                logger gets a single QueueHandler
+            json_output: Write JSON lines instead of log_format
+            rate_limit: Filter for repeated messages, applied before
+                records are queued or written
+            console_stream: Stream for console output (default: sys.stdout)
 
         Raises:
             LoggingError: If logging setup fails
         """
         try:
+            cls.shutdown()
+
             # Validate log level
             numeric_level = getattr(logging, log_level.upper(), None)
             if not isinstance(numeric_level, int):
@@ -71,7 +218,7 @@ class Logging:
                     "%(filename)s:%(lineno)d - %(message)s"
                 )
 
-            formatter = logging.Formatter(log_format)
+            formatter = JsonFormatter() if json_output else logging.Formatter(log_format)
 
             # Get root logger
             root_logger = logging.getLogger()
@@ -79,13 +226,14 @@ class Logging:
 
             # Remove existing handlers
             root_logger.handlers.clear()
+            handlers: List[logging.Handler] = []
 
             # Add console handler if enabled
             if console_output:
-                console_handler = logging.StreamHandler(sys.stdout)
+                console_handler = logging.StreamHandler(console_stream or sys.stdout)
                 console_handler.setLevel(numeric_level)
                 console_handler.setFormatter(formatter)
-                root_logger.addHandler(console_handler)
+                handlers.append(console_handler)
 
             # Add file handler if log file specified
             if log_file is not None:
@@ -105,13 +253,58 @@ class Logging:
                 )
                 file_handler.setLevel(numeric_level)
                 file_handler.setFormatter(formatter)
-                root_logger.addHandler(file_handler)
+                handlers.append(file_handler)
+
+            if asynchronous:
+                log_queue: queue.Queue = queue.Queue(-1)
+                queue_handler = _ContextQueueHandler(log_queue)
+                queue_handler.setLevel(numeric_level)
+                if rate_limit is not None:
+                    queue_handler.addFilter(rate_limit)
+                root_logger.addHandler(queue_handler)
+                cls._listener = logging.handlers.QueueListener(
+                    log_queue, *handlers, respect_handler_level=True)
+                cls._listener.start()
+                cls._output_handlers = handlers
+                if not cls._atexit_registered:
+                    atexit.register(cls.shutdown)
+                    cls._atexit_registered = True
+            else:
+                for handler in handlers:
+                    if rate_limit is not None:
+                        handler.addFilter(rate_limit)
+                    root_logger.addHandler(handler)
 
             cls._configured = True
 
         except Exception as e:
             raise LoggingError(f"Failed to setup logging: {e}") from e
 
+    @classmethod
+    def shutdown(cls) -> None:
+        """Flush and stop asynchronous output.
+
+        Waits for the listener to write every queued record, then attaches
+        the output handlers to the root logger directly, so messages
+        logged later in shutdown are still written. Registered with
+        atexit when asynchronous output starts; safe to call repeatedly.
+        """
+        listener, cls._listener = cls._listener, None
+        if listener is None:
+            return
+        listener.stop()
+        root_logger = logging.getLogger()
+        for handler in list(root_logger.handlers):
+            if isinstance(handler, logging.handlers.QueueHandler):
+                root_logger.removeHandler(handler)
+                for rate_limit in handler.filters:
+                    for output in cls._output_handlers:
+                        output.addFilter(rate_limit)
+        for handler in cls._output_handlers:
+            handler.flush()
+            root_logger.addHandler(handler)
+        cls._output_handlers = []
+
     @classmethod
     def get_logger(cls, name: str) -> logging.Logger:
         """Get a logger instance.
@@ -172,9 +365,10 @@ class Logging:
         context_str = " ".join(f"{k}={v}" for k, v in context.items())
         full_message = f"{message} | {context_str}" if context else message
 
-        # Log at appropriate level
+        # Log at appropriate level; JSON output also gets the context as fields
         log_method = getattr(logger, level.lower())
-        log_method(full_message)
+        extra = {key: value for key, value in context.items() if key not in _RECORD_ATTRIBUTES}
+        log_method(full_message, extra=extra)
 
     @staticmethod
     def configure_module_logger(
@@ -285,7 +479,8 @@ def get_logger(name: str) -> logging.Logger:
 def setup_logging(
     log_file: Optional[Path] = None,
     log_level: str = "INFO",
-    console_output: bool = True
+    console_output: bool = True,
+    **options: Any
 ) -> None:
     """Convenience function to setup logging.
 
@@ -293,9 +488,12 @@ def setup_logging(
         log_file: Path to log file
         log_level: Logging level
         console_output: Enable console output
+        **options: Further Logging.setup_logging options (asynchronous,
+            json_output, rate_limit, ...)
     """
     Logging.setup_logging(
         log_file=log_file,
         log_level=log_level,
-        console_output=console_output
+        console_output=console_output,
+        **options
     )
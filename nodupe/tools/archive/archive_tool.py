@@ -6,7 +6,7 @@
 Provides archive detection and extraction capabilities as a tool.
 """
 
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Callable
 from pathlib import Path
 from nodupe.core.tool_system.base import Tool
 from .archive_logic import ArchiveHandler, ArchiveHandlerError
@@ -136,6 +136,7 @@ class ApplyTool(Tool):
             print(f"[TOOL] Found {len(duplicates)} duplicate files identified in database")
 
             files_processed = 0
+            removed_ids = []
 
             if args.action == 'list':
                 print("\nIdentified Duplicates:")
@@ -161,6 +162,7 @@ class ApplyTool(Tool):
                         else:
                             Filesystem.remove_file(path)
                             file_repo.delete_file(dup['id'])
+                            removed_ids.append(dup['id'])
                             print(f"[DELETED] {path}")
 
                     elif args.action in ['move', 'copy']:
@@ -188,6 +190,7 @@ class ApplyTool(Tool):
                                 # If moved, we might update the path in DB or remove if 'archived' implies removal from active working set.
                                 # Let's remove from DB as "processed duplicate".
                                 file_repo.delete_file(dup['id'])
+                                removed_ids.append(dup['id'])
                                 print(f"[MOVED] {path} -> {dest_path}")
 
                         elif args.action == 'copy':
@@ -206,6 +209,14 @@ class ApplyTool(Tool):
             if args.dry_run:
                 print(f"\n[TOOL] Dry run complete. Would process {files_processed} files.")
             else:
+                # Commit the removed entries; this also lets the database's
+                # maintenance scheduler shrink the file after large deletes
+                db_connection.commit()
+                # Drop removed files from the similarity index instead of
+                # leaving it to return them until the next rebuild
+                similarity_manager = container.get_service('similarity_manager')
+                if similarity_manager and removed_ids:
+                    similarity_manager.remove_vectors(removed_ids)
                 print(f"\n[TOOL] Apply complete. Processed {files_processed} files.")
 
             self._on_apply_complete(files_processed=files_processed)
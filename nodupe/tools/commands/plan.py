@@ -7,14 +7,24 @@ This tool bridges the gap between 'scan' and 'apply' by creating
 an execution plan based on duplicate detection results.
 """
 
+from nodupe.core.limits import MemoryGovernor
 from nodupe.core.tool_system.base import Tool
-from typing import Any, Dict
+from nodupe.tools.databases.connection import DatabaseConnection
+from nodupe.tools.databases.files import FileRepository
+from nodupe.tools.scanner_engine.columnar import (
+    COLUMNAR_BYTES_PER_FILE, NUMPY_AVAILABLE, assign_duplicates, load_file_columns, split_by_full_hash
+)
+from nodupe.tools.scanner_engine.external_sort import fits_in_memory, group_repository_files
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Tuple
 import argparse
 import json
 
 # Tool manager is injected by the core system
 PM = None
 
+# Files fetched, and duplicate marks written, per database round trip
+PLAN_FETCH_ROWS = 10000
+
 
 class PlanTool(Tool):
     """Plan tool implementation.
@@ -47,6 +57,25 @@ class PlanTool(Tool):
         """Get tool capabilities."""
         return {'commands': ['plan'], 'strategies': ['newest', 'oldest', 'interactive']}
 
+    @property
+    def api_methods(self) -> Dict[str, Callable[..., Any]]:
+        return {'execute_plan': self.execute_plan}
+
+    def describe_usage(self) -> str:
+        """Plain language description."""
+        return (
+            "This component looks at the files the scan found, decides which copy "
+            "of each duplicate to keep and writes the list of actions to a plan file."
+        )
+
+    def run_standalone(self, args: List[str]) -> int:
+        """Execute in stand-alone mode."""
+        parser = argparse.ArgumentParser(description=self.describe_usage())
+        subparsers = parser.add_subparsers()
+        self.register_commands(subparsers)
+        parsed = parser.parse_args(['plan'] + args)
+        return parsed.func(parsed)
+
     def _on_plan_start(self, **kwargs: Any) -> None:
         """Handle plan start event."""
         print(f"[TOOL] Planning started with strategy: {kwargs.get('strategy', 'unknown')}")
@@ -65,8 +94,109 @@ class PlanTool(Tool):
         parser.add_argument('--strategy', choices=['newest', 'oldest', 'interactive'],
                             default='newest', help='Strategy to select keeper file')
         parser.add_argument('--output', '-o', default='plan.json', help='Output plan file path')
+        parser.add_argument('--engine', choices=['auto', 'columnar', 'memory', 'external'],
+                            default='auto',
+                            help='Grouping engine: NumPy columns, Python dicts, or external '
+                                 'merge sort for inventories larger than RAM (default: auto)')
         parser.set_defaults(func=self.execute_plan)
 
+    @staticmethod
+    def _order_group(group: List[Dict[str, Any]], strategy: str) -> None:
+        """Sort a group so that the keeper comes first."""
+        if strategy == 'newest':
+            # Keep newest modified: Sort descending by mtime
+            group.sort(key=lambda x: x.get('modified_time', 0), reverse=True)
+        elif strategy == 'oldest':
+            # Keep oldest modified: Sort ascending by mtime
+            group.sort(key=lambda x: x.get('modified_time', 0))
+        else:
+            # Default/Interactive: Keep shortest path length (preferred usually)
+            group.sort(key=lambda x: len(x['path']))
+
+    def _select_engine(self, repo: Any, engine: str) -> str:
+        """Resolve 'auto' to the fastest engine that fits the memory budget."""
+        if engine != 'auto':
+            return engine
+        file_count = repo.count_files()
+        if NUMPY_AVAILABLE and fits_in_memory(file_count, bytes_per_file=COLUMNAR_BYTES_PER_FILE):
+            return 'columnar'
+        if fits_in_memory(file_count):
+            return 'memory'
+        return 'external'
+
+    def _iter_columnar_groups(self, repo: Any, strategy: str) -> Iterator[List[Dict[str, Any]]]:
+        """Yield keeper-first groups found and ordered by the columnar engine."""
+        columns = load_file_columns(repo.db)
+        print(f"[TOOL] Grouping {len(columns)} files by hash with NumPy...")
+        assignment = assign_duplicates(
+            columns, 'shortest' if strategy == 'interactive' else strategy)
+        del columns
+
+        # Fetch rows for a batch of groups at a time
+        batch: List[Tuple[int, List[int]]] = []
+        pending = 0
+        for keeper, duplicates in assignment.groups():
+            batch.append((keeper, duplicates))
+            pending += 1 + len(duplicates)
+            if pending >= PLAN_FETCH_ROWS:
+                yield from self._fetch_groups(repo, batch)
+                batch, pending = [], 0
+        yield from self._fetch_groups(repo, batch)
+
+    @staticmethod
+    def _fetch_groups(repo: Any, batch: List[Tuple[int, List[int]]]) -> Iterator[List[Dict[str, Any]]]:
+        """Turn (keeper id, duplicate ids) groups into keeper-first lists of file rows."""
+        if not batch:
+            return
+        ids = [file_id for keeper, duplicates in batch for file_id in [keeper] + duplicates]
+        rows = {row['id']: row for row in repo.get_files(ids)}
+        for keeper, duplicates in batch:
+            members = [rows[file_id] for file_id in [keeper] + duplicates if file_id in rows]
+            # Members share a 64-bit hash prefix; only equal full hashes are duplicates
+            yield from split_by_full_hash(members)
+
+    def _iter_groups(self, repo: Any, engine: str, strategy: str) -> Iterator[List[Dict[str, Any]]]:
+        """Yield groups of files with the same hash, keeper first.
+
+        Args:
+            repo: File repository
+            engine: 'columnar', 'memory', 'external' or 'auto' (columnar when
+                NumPy is installed, external when grouping every file in
+                memory would exceed the memory budget)
+            strategy: Keeper strategy
+
+        Yields:
+            Lists of file dicts sharing a hash, ordered by strategy;
+            singletons included for the in-memory engine
+        """
+        engine = self._select_engine(repo, engine)
+
+        if engine == 'columnar':
+            yield from self._iter_columnar_groups(repo, strategy)
+            return
+
+        if engine == 'external':
+            print("[TOOL] Grouping files by hash with external merge sort...")
+            groups: Iterable[List[Dict[str, Any]]] = group_repository_files(
+                repo, governor=MemoryGovernor())
+        else:
+            files = repo.get_all_files()
+            print(f"[TOOL] Grouping {len(files)} files by hash...")
+            buckets: Dict[str, List[Dict[str, Any]]] = {}
+            for f in files:
+                if not f.get('hash'):
+                    continue
+                if f['hash'] not in buckets:
+                    buckets[f['hash']] = []
+                buckets[f['hash']].append(f)
+            groups = buckets.values()
+
+        for group in groups:
+            # Sort group based on strategy
+            # The first item in sorted list will be the KEEPER (Original)
+            self._order_group(group, strategy)
+            yield group
+
     def execute_plan(self, args: argparse.Namespace) -> int:
         """Execute plan command.
 
@@ -89,50 +219,26 @@ class PlanTool(Tool):
             db = container.get_service('database')
             if not db:
                 print("[ERROR] Database service not available")
-                from nodupe.core.database.connection import DatabaseConnection
                 db = DatabaseConnection.get_instance()
 
-            from nodupe.core.database.files import FileRepository
             repo = FileRepository(db)
-            files = repo.get_all_files()
 
-            if not files:
+            if not repo.count_files():
                 print("[TOOL] No files in database to plan.")
                 return 0
 
-            # 2. Group by Hash
-            print(f"[TOOL] Grouping {len(files)} files by hash...")
-            groups = {}
-            for f in files:
-                if not f.get('hash'):
-                    continue
-                if f['hash'] not in groups:
-                    groups[f['hash']] = []
-                groups[f['hash']].append(f)
-
             action_plan = []
             stats = {"total_groups": 0, "duplicates_found": 0, "reassigned": 0}
 
-            # 3. Apply Strategy
+            # 2. Group by Hash and 3. Apply Strategy
             print(f"[TOOL] Applying strategy '{args.strategy}'...")
-            for _, group in groups.items():
+            duplicate_pairs: List[Tuple[int, int]] = []
+            for group in self._iter_groups(repo, getattr(args, 'engine', 'auto'), args.strategy):
                 if len(group) < 2:
                     continue
 
                 stats["total_groups"] += 1
 
-                # Sort group based on strategy
-                # The first item in sorted list will be the KEEPER (Original)
-                if args.strategy == 'newest':
-                    # Keep newest modified: Sort descending by mtime
-                    group.sort(key=lambda x: x.get('modified_time', 0), reverse=True)
-                elif args.strategy == 'oldest':
-                    # Keep oldest modified: Sort ascending by mtime
-                    group.sort(key=lambda x: x.get('modified_time', 0))
-                else:
-                    # Default/Interactive: Keep shortest path length (preferred usually)
-                    group.sort(key=lambda x: len(x['path']))
-
                 keeper = group[0]
                 duplicates = group[1:]
 
@@ -152,7 +258,7 @@ class PlanTool(Tool):
 
                 for dup in duplicates:
                     # Update DB to point to new keeper
-                    repo.mark_as_duplicate(dup['id'], keeper['id'])
+                    duplicate_pairs.append((dup['id'], keeper['id']))
 
                     action_plan.append({
                         "type": "DELETE",  # Or implies 'process'
@@ -161,6 +267,11 @@ class PlanTool(Tool):
                         "reason": f"Duplicate of {keeper['path']}"
                     })
 
+                if len(duplicate_pairs) >= PLAN_FETCH_ROWS:
+                    repo.batch_mark_duplicates(duplicate_pairs)
+                    duplicate_pairs = []
+            repo.batch_mark_duplicates(duplicate_pairs)
+
             # 5. Output JSON Plan
             plan_data = {
                 "metadata": {
@@ -18,16 +18,20 @@ Dependencies:
     - Core modules
 """
 
-from typing import Any, Dict
+from typing import Any, Callable, Dict, List
 import argparse
 import time
+from nodupe.core.limits import MemoryGovernor
 from nodupe.core.tool_system.base import Tool
-from nodupe.core.scan.processor import FileProcessor
-from nodupe.core.scan.walker import FileWalker
-from nodupe.core.database.files import FileRepository
-from nodupe.core.database.connection import DatabaseConnection
+from nodupe.tools.scanner_engine.processor import FileProcessor
+from nodupe.tools.scanner_engine.walker import FileWalker
+from nodupe.tools.databases.files import FileRepository
+from nodupe.tools.databases.connection import DatabaseConnection
 
 
+# Processed files per database write
+SCAN_WRITE_BATCH = 1000
+
 class ScanTool(Tool):
     """Scan tool implementation."""
 
@@ -49,6 +53,25 @@ class ScanTool(Tool):
         """Get tool capabilities."""
         return {'commands': ['scan']}
 
+    @property
+    def api_methods(self) -> Dict[str, Callable[..., Any]]:
+        return {'execute_scan': self.execute_scan}
+
+    def describe_usage(self) -> str:
+        """Plain language description."""
+        return (
+            "This component looks through folders, fingerprints every file "
+            "it finds and records them in the database so duplicates can be found."
+        )
+
+    def run_standalone(self, args: List[str]) -> int:
+        """Execute in stand-alone mode."""
+        parser = argparse.ArgumentParser(description=self.describe_usage())
+        subparsers = parser.add_subparsers()
+        self.register_commands(subparsers)
+        parsed = parser.parse_args(['scan'] + args)
+        return parsed.func(parsed)
+
     def _on_scan_start(self, **kwargs: Any) -> None:
         """Handle scan start event."""
         print(f"[TOOL] Scan started: {kwargs.get('path', 'unknown')}")
@@ -66,6 +89,9 @@ class ScanTool(Tool):
         scan_parser.add_argument('--extensions', nargs='+', help='File extensions to include')
         scan_parser.add_argument('--exclude', nargs='+', help='Directories to exclude')
         scan_parser.add_argument('--verbose', '-v', action='store_true', help='Verbose output')
+        scan_parser.add_argument('--memory-budget', type=int, metavar='MIB',
+                                 help='Memory budget in MiB; the walk pauses when it is '
+                                      'approached (default: half of physical memory)')
         scan_parser.set_defaults(func=self.execute_scan)
 
     def execute_scan(self, args: argparse.Namespace) -> int:
@@ -127,34 +153,44 @@ class ScanTool(Tool):
             def progress_callback(p: Dict[str, Any]) -> None:
                 """TODO: Document progress_callback."""
                 if args.verbose:
-                    print(
-                        f"\rScanning... {p['files_processed']} files ({p['files_per_second']:.1f} f/s)", end="", flush=True)
+                    status = f"\rScanning... {p['files_processed']} files ({p['files_per_second']:.1f} f/s)"
+                    if p.get('worker_decision'):
+                        status += f" [{p['worker_decision']}]"
+                    print(status, end="", flush=True)
 
             # 3. Process Execution
             walker = FileWalker()
-            processor = FileProcessor(walker)
+            budget = getattr(args, 'memory_budget', None)
+            governor = MemoryGovernor(budget * 1024 * 1024 if budget else None)
+            processor = FileProcessor(walker, memory_governor=governor)
 
-            all_processed_files = []
+            total_files = 0
 
             for path in args.paths:
                 print(f"[TOOL] Scanning directory: {path}")
                 self._on_scan_start(path=path)
 
-                # Process files
-                results = processor.process_files(
-                    root_path=path,
-                    file_filter=file_filter,
-                    on_progress=progress_callback
-                )
-
-                if results:
-                    print(f"\n[TOOL] Found {len(results)} files in {path}")
-                    all_processed_files.extend(results)
-
-                    # 4. Save to Database
-                    print("[TOOL] Saving to database...")
-                    count = file_repo.batch_add_files(results)
-                    print(f"[TOOL] Saved {count} records")
+                # Process files, saving them to the database in batches as
+                # they are hashed so memory stays flat on large scans
+                found = 0
+                saved = 0
+                batch: List[Dict[str, Any]] = []
+                for processed_file in processor.iter_process_files(
+                        root_path=path,
+                        file_filter=file_filter,
+                        on_progress=progress_callback):
+                    found += 1
+                    batch.append(processed_file)
+                    if len(batch) >= SCAN_WRITE_BATCH:
+                        saved += file_repo.batch_add_files(batch)
+                        batch = []
+                if batch:
+                    saved += file_repo.batch_add_files(batch)
+
+                if found:
+                    print(f"\n[TOOL] Found {found} files in {path}")
+                    print(f"[TOOL] Saved {saved} records")
+                    total_files += found
                 else:
                     print(f"\n[TOOL] No files found in {path}")
 
@@ -174,9 +210,13 @@ class ScanTool(Tool):
 
             elapsed = time.monotonic() - start_time
             print(f"\n[TOOL] Scan complete in {elapsed:.2f}s")
-            print(f"[TOOL] Total files processed: {len(all_processed_files)}")
+            print(f"[TOOL] Total files processed: {total_files}")
+            if governor.throttle_events and args.verbose:
+                stats = governor.get_stats()
+                print(f"[TOOL] Memory budget reached {stats['throttle_events']} times, "
+                      f"walk paused {stats['throttled_seconds']:.1f}s")
 
-            self._on_scan_complete(files_processed=len(all_processed_files))
+            self._on_scan_complete(files_processed=total_files)
             return 0
 
         except Exception as e:
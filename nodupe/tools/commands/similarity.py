@@ -17,9 +17,12 @@ Dependencies:
     - Core modules
 """
 
+from nodupe.core.limits import MemoryGovernor
 from nodupe.core.tool_system.base import Tool
+from nodupe.tools.scanner_engine.external_sort import fits_in_memory, group_repository_files
 import argparse
-from typing import Any, Dict
+import time
+from typing import Any, Callable, Dict, List
 
 # Tool manager is injected by the core system
 PM: Any = None
@@ -48,6 +51,26 @@ class SimilarityCommandTool(Tool):
         """Get tool capabilities."""
         return {'commands': ['similarity']}
 
+    @property
+    def api_methods(self) -> Dict[str, Callable[..., Any]]:
+        return {'execute_similarity': self.execute_similarity}
+
+    def describe_usage(self) -> str:
+        """Plain language description."""
+        return (
+            "This component finds files that look alike, by name, size, "
+            "hash, by shared passages of text (minhash) or by comparing their "
+            "content fingerprints (embeddings)."
+        )
+
+    def run_standalone(self, args: List[str]) -> int:
+        """Execute in stand-alone mode."""
+        parser = argparse.ArgumentParser(description=self.describe_usage())
+        subparsers = parser.add_subparsers()
+        self.register_commands(subparsers)
+        parsed = parser.parse_args(['similarity'] + args)
+        return parsed.func(parsed)
+
     def _on_similarity_start(self, **kwargs: Any) -> None:
         """Handle similarity start event."""
         print(f"[TOOL] Similarity search started: {kwargs.get('metric', 'unknown')}")
@@ -57,13 +80,80 @@ class SimilarityCommandTool(Tool):
         print(
             f"[TOOL] Similarity search completed: {kwargs.get('pairs_found', 0)} similar pairs found")
 
+    def _find_vector_pairs(self, db: Any, args: argparse.Namespace) -> int:
+        """Record every pair of files whose embeddings are near-duplicates.
+
+        Only the embedding matrix is loaded; with --verbose the paths of
+        the files in the pairs found are fetched afterwards.
+
+        Args:
+            db: Database connection
+            args: Command arguments
+
+        Returns:
+            Number of pairs recorded in file_relationships
+        """
+        from nodupe.tools.databases.embeddings import EmbeddingRepository
+        from nodupe.tools.similarity.all_pairs import VECTOR_RELATIONSHIP, write_pairs_as_relationships
+
+        model = getattr(args, 'model', None)
+        if not isinstance(model, str):
+            row = db.execute(
+                'SELECT model_version FROM embeddings GROUP BY model_version '
+                'ORDER BY COUNT(*) DESC LIMIT 1'
+            ).fetchone()
+            if row is None:
+                print("[TOOL] No embeddings in database; generate embeddings first.")
+                return 0
+            model = row[0]
+
+        matrix, file_ids = EmbeddingRepository(db).load_matrix(model)
+        print(f"[TOOL] Comparing {len(file_ids)} embeddings from model {model}")
+        started = int(time.time())
+        pairs = write_pairs_as_relationships(db, matrix, file_ids, args.threshold)
+        print(f"[TOOL] Found {pairs} near-duplicate pairs (stored in file_relationships)")
+
+        if pairs and getattr(args, 'verbose', False):
+            rows = db.execute(
+                '''SELECT f1.path, f2.path, r.similarity_score
+                FROM file_relationships r
+                JOIN files f1 ON f1.id = r.file1_id
+                JOIN files f2 ON f2.id = r.file2_id
+                WHERE r.relationship_type = ? AND r.created_at >= ?
+                ORDER BY r.similarity_score DESC''',
+                (VECTOR_RELATIONSHIP, started)
+            ).fetchall()
+            for path1, path2, score in rows:
+                print(f"  [SIMILAR] {path1} ~ {path2} ({score:.3f})")
+        return pairs
+
+    def _find_minhash_pairs(self, db: Any, files: List[Dict[str, Any]],
+                            args: argparse.Namespace) -> int:
+        """Record every pair of files whose text shingles mostly overlap.
+
+        Args:
+            db: Database connection
+            files: File records with id and path
+            args: Command arguments (threshold is the minimum Jaccard similarity)
+
+        Returns:
+            Number of pairs recorded in file_relationships
+        """
+        from nodupe.tools.similarity.minhash import write_minhash_relationships
+
+        print(f"[TOOL] Computing MinHash signatures for {len(files)} files")
+        pairs = write_minhash_relationships(
+            db, [(f['id'], f['path']) for f in files], args.threshold)
+        print(f"[TOOL] Found {pairs} near-duplicate pairs (stored in file_relationships)")
+        return pairs
+
     def register_commands(self, subparsers: Any) -> None:
         """Register similarity command with argument parser."""
         similarity_parser = subparsers.add_parser(
             'similarity', help='Find similar files')
         similarity_parser.add_argument(
             '--metric',
-            choices=['name', 'size', 'hash', 'content', 'vector'],
+            choices=['name', 'size', 'hash', 'content', 'vector', 'minhash'],
             default='name',
             help='Similarity metric'
         )
@@ -79,6 +169,11 @@ class SimilarityCommandTool(Tool):
             default=10,
             help='Maximum results per file'
         )
+        similarity_parser.add_argument(
+            '--model',
+            default=None,
+            help='Embedding model version for the vector metric (default: most used)'
+        )
         similarity_parser.add_argument(
             '--output',
             choices=['text', 'json', 'csv'],
@@ -113,7 +208,7 @@ class SimilarityCommandTool(Tool):
                     return 1
 
             # Validate metric is one of the allowed choices
-            valid_metrics = ['name', 'size', 'hash', 'content', 'vector']
+            valid_metrics = ['name', 'size', 'hash', 'content', 'vector', 'minhash']
             if args.metric not in valid_metrics:
                 print(f"[ERROR] Invalid metric: {args.metric}. Must be one of: {', '.join(valid_metrics)}")
                 return 1
@@ -131,40 +226,50 @@ class SimilarityCommandTool(Tool):
             if not db:
                 print("[ERROR] Database service not available (required for file access)")
                 # Attempt default connection?
-                from nodupe.core.database.connection import DatabaseConnection
+                from nodupe.tools.databases.connection import DatabaseConnection
                 db = DatabaseConnection.get_instance()
 
             # Import needed classes locally to avoid circular top-level imports if any
-            from nodupe.core.database.files import FileRepository
+            from nodupe.tools.databases.files import FileRepository
 
             repo = FileRepository(db)
-            files = repo.get_all_files()
+            file_count = repo.count_files()
 
-            if not files:
+            if not file_count:
                 print("[TOOL] No files in database to analyze.")
                 return 0
 
-            print(f"[TOOL] Analyzing {len(files)} files using metric: {args.metric}")
+            print(f"[TOOL] Analyzing {file_count} files using metric: {args.metric}")
+
+            # Hash and size groups fall back to an external merge sort when
+            # the inventory would not fit in memory; the vector metric reads
+            # only the embedding matrix
+            external = args.metric in ('hash', 'size') and not fits_in_memory(file_count)
+            needs_files = args.metric != 'vector' and not external
+            files = repo.get_all_files() if needs_files else []
 
             pairs_found = 0
 
             if args.metric in ['hash', 'size', 'name']:
-                # Use in-memory grouping for exact matches
                 field_map = {'hash': 'hash', 'size': 'size', 'name': 'name'}
                 field = field_map.get(args.metric)
 
-                # Grouping
-                groups = {}
-                for f in files:
-                    val = f.get(field)
-                    if not val:
-                        continue
-                    if val not in groups:
-                        groups[val] = []
-                    groups[val].append(f)
+                if external:
+                    groups = group_repository_files(repo, by=field, governor=MemoryGovernor())
+                else:
+                    # Use in-memory grouping for exact matches
+                    buckets: Dict[Any, List[Dict[str, Any]]] = {}
+                    for f in files:
+                        val = f.get(field)
+                        if not val:
+                            continue
+                        if val not in buckets:
+                            buckets[val] = []
+                        buckets[val].append(f)
+                    groups = iter(buckets.values())
 
                 # Detect
-                for val, group in groups.items():
+                for group in groups:
                     if len(group) > 1:
                         # Found duplicates
                         pairs_found += len(group) - 1
@@ -184,11 +289,16 @@ class SimilarityCommandTool(Tool):
                                 print(f"  [DUP] {dup['path']} == {original['path']}")
 
             elif args.metric == 'vector':
-                print("[TOOL] Vector similarity search not yet implemented (requires embedding generation)")
-                # Future: Use SimilarityManager here
+                pairs_found = self._find_vector_pairs(db, args)
+
+            elif args.metric == 'minhash':
+                pairs_found = self._find_minhash_pairs(db, files, args)
 
             print(f"[TOOL] Analysis complete.")
-            print(f"[TOOL] Marked {pairs_found} files as duplicates.")
+            if args.metric in ('vector', 'minhash'):
+                print(f"[TOOL] Found {pairs_found} near-duplicate pairs.")
+            else:
+                print(f"[TOOL] Marked {pairs_found} files as duplicates.")
 
             self._on_similarity_complete(pairs_found=pairs_found)
             return 0
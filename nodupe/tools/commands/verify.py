@@ -18,15 +18,40 @@ Key Features:
 
 Dependencies:
     - Core modules
+    - nodupe.tools.parallel.pipeline (checksum pool)
 """
 
 import argparse
 import hashlib
 from pathlib import Path
-from typing import Any, Dict, List
+from typing import Any, Callable, Dict, List, Optional, Tuple
 from nodupe.core.tool_system.base import Tool
-from nodupe.core.database.files import FileRepository
-from nodupe.core.database.connection import DatabaseConnection
+from nodupe.tools.databases.files import FileRepository
+from nodupe.tools.databases.connection import DatabaseConnection
+from nodupe.tools.parallel.pipeline import Pipeline, Stage, default_io_workers
+
+# Read size when recalculating checksums
+_HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def _recalculate_checksum(file_data: Dict[str, Any]) -> Tuple[Dict[str, Any], Optional[str], Optional[str]]:
+    """Hash one file for checksum verification (runs on the verify pool).
+
+    Returns:
+        (file_data, calculated hash or None, error message or None)
+    """
+    file_path = Path(file_data['path'])
+    # Missing files are already reported by the integrity check
+    if not file_path.exists():
+        return file_data, None, None
+    try:
+        hasher = hashlib.sha256()
+        with open(file_path, 'rb') as f:
+            while chunk := f.read(_HASH_CHUNK_SIZE):
+                hasher.update(chunk)
+        return file_data, hasher.hexdigest(), None
+    except OSError as e:
+        return file_data, None, str(e)
 
 
 class VerifyTool(Tool):
@@ -80,6 +105,26 @@ class VerifyTool(Tool):
         """Get tool capabilities."""
         return {'commands': ['verify']}
 
+    @property
+    def api_methods(self) -> Dict[str, Callable[..., Any]]:
+        return {'execute_verify': self.execute_verify}
+
+    def describe_usage(self) -> str:
+        """Plain language description."""
+        return (
+            "This component checks that the files recorded in the database "
+            "still exist, still match their recorded size and checksum, and "
+            "that duplicate records point at real originals."
+        )
+
+    def run_standalone(self, args: List[str]) -> int:
+        """Execute in stand-alone mode."""
+        parser = argparse.ArgumentParser(description=self.describe_usage())
+        subparsers = parser.add_subparsers()
+        self.register_commands(subparsers)
+        parsed = parser.parse_args(['verify'] + args)
+        return parsed.func(parsed)
+
     def _on_verify_start(self, **kwargs: Any) -> None:
         """Handle verify start event."""
         print(f"[TOOL] Verify started: {kwargs.get('mode', 'unknown')}")
@@ -401,36 +446,31 @@ class VerifyTool(Tool):
             files = file_repo.get_all_files()
             print(f"[TOOL] Verifying checksums for {len(files)} files...")
 
-            for file_data in files:
-                if not file_data['hash']:
-                    results['warnings'] += 1
+            def hashed_files():
+                for file_data in files:
+                    if not file_data['hash']:
+                        results['warnings'] += 1
+                        if args.verbose:
+                            print(f"[WARN] No hash stored for: {file_data['path']}")
+                        continue
+                    results['checks'] += 1
+                    yield file_data
+
+            # Files are hashed concurrently and reported in database order
+            pipeline = Pipeline([Stage('checksum', _recalculate_checksum, workers=default_io_workers())])
+            for file_data, file_hash, error in pipeline.run(hashed_files()):
+                file_path = file_data['path']
+                if error is not None:
+                    results['errors'] += 1
                     if args.verbose:
-                        print(f"[WARN] No hash stored for: {file_data['path']}")
-                    continue
-
-                results['checks'] += 1
-                file_path = Path(file_data['path'])
-
-                # Skip if file doesn't exist (already caught in integrity check)
-                if not file_path.exists():
+                        print(f"[ERROR] Cannot calculate hash for {file_path}: {error}")
+                elif file_hash is None:
                     results['errors'] += 1
-                    continue
-
-                # Recalculate hash and compare
-                try:
-                    with open(file_path, 'rb') as f:
-                        file_hash = hashlib.sha256(f.read()).hexdigest()
-
-                    if file_hash != file_data['hash']:
-                        results['errors'] += 1
-                        if args.verbose:
-                            print(f"[ERROR] Hash mismatch for {file_path}: "
-                                  f"stored {file_data['hash'][:8]}..., calculated {file_hash[:8]}...")
-
-                except (OSError, MemoryError) as e:
+                elif file_hash != file_data['hash']:
                     results['errors'] += 1
                     if args.verbose:
-                        print(f"[ERROR] Cannot calculate hash for {file_path}: {e}")
+                        print(f"[ERROR] Hash mismatch for {file_path}: "
+                              f"stored {file_data['hash'][:8]}..., calculated {file_hash[:8]}...")
 
             print(f"[TOOL] Checksum check: {results['checks']} files, "
                   f"{results['errors']} errors, {results['warnings']} warnings")
@@ -2,18 +2,441 @@
 Database Sharding Tool
 
 Provides database sharding functionality for horizontal data partitioning.
+
+The index is split across several SQLite files ("shards"). A ShardRouter
+decides which shard owns each file row, either by hash prefix or by scan
+root, writes each shard from its own worker thread and fans duplicate
+queries out across all shards before merging the results.
 """
 
 import sqlite3
 import os
-from typing import List, Optional, Dict, Any
+import json
+import heapq
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Dict, Any, Callable, Iterator, Tuple
 import logging
 
 from nodupe.core.tool_system import Tool, ToolMetadata
+from nodupe.tools.databases.connection import DatabaseConnection
+from nodupe.tools.databases.files import FileRepository
+from nodupe.tools.databases.schema import DatabaseSchema
 
 
 logger = logging.getLogger(__name__)
 
+SHARD_MANIFEST = "shards.json"
+SHARD_STRATEGIES = ("hash", "root")
+
+
+class ShardingError(Exception):
+    """Sharding operation error"""
+
+
+class ShardRouter:
+    """Route file rows to shard databases and fan queries out across them.
+
+    Strategies:
+        hash: rows are placed by the leading digits of their content hash, so
+            every copy of a file lands in the same shard and duplicate groups
+            can be resolved shard-locally.
+        root: rows are placed by the scan root they live under, so a whole
+            tree can be rescanned or dropped by touching a single shard.
+            Duplicates may then span shards and are found by a streaming
+            merge of the per-shard hash indexes.
+
+    Rows that cannot be placed by their strategy (no hash yet, or a path
+    outside every configured root) fall back to a CRC32 of the path.
+    """
+
+    def __init__(
+        self,
+        shard_dir: str,
+        num_shards: int = 16,
+        strategy: str = "hash",
+        roots: Optional[List[str]] = None,
+        max_workers: Optional[int] = None
+    ):
+        """Open (or create) a sharded index.
+
+        Args:
+            shard_dir: Directory holding the shard files and manifest
+            num_shards: Number of shard databases
+            strategy: Routing strategy ('hash' or 'root')
+            roots: Scan roots for the 'root' strategy (one per shard slot)
+            max_workers: Thread pool size for fan-out (None = num_shards, max 32)
+
+        Raises:
+            ShardingError: If the layout is invalid or conflicts with the
+                manifest of an existing sharded index
+        """
+        if strategy not in SHARD_STRATEGIES:
+            raise ShardingError(f"Unknown sharding strategy: {strategy}")
+        if num_shards < 1:
+            raise ShardingError("num_shards must be at least 1")
+
+        self.shard_dir = os.path.abspath(shard_dir)
+        self.num_shards = num_shards
+        self.strategy = strategy
+        self.roots = [os.path.abspath(r) for r in (roots or [])]
+        # Longest root first so nested roots win over their parents
+        self._roots_by_length = sorted(
+            enumerate(self.roots), key=lambda item: len(item[1]), reverse=True
+        )
+
+        os.makedirs(self.shard_dir, exist_ok=True)
+        self._check_manifest()
+
+        self.shard_paths = [
+            os.path.join(self.shard_dir, f"shard_{i:03d}.db") for i in range(num_shards)
+        ]
+        self._shards = [DatabaseConnection(path) for path in self.shard_paths]
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers or min(32, num_shards),
+            thread_name_prefix="shard"
+        )
+        self._closed = False
+
+        # Shard schemas are created from the pool so every worker thread
+        # opens its thread-local connection up front
+        self._fan_out(lambda idx, db: DatabaseSchema(db.get_connection()).create_schema())
+        logger.info(
+            f"Opened {num_shards} shards in {self.shard_dir} (strategy={strategy})"
+        )
+
+    # ------------------------------------------------------------------
+    # Layout
+    # ------------------------------------------------------------------
+
+    def _check_manifest(self) -> None:
+        """Write the layout manifest, or verify it matches an existing one."""
+        manifest_path = os.path.join(self.shard_dir, SHARD_MANIFEST)
+        layout = {
+            "version": 1,
+            "strategy": self.strategy,
+            "num_shards": self.num_shards,
+            "roots": self.roots,
+        }
+
+        if os.path.exists(manifest_path):
+            with open(manifest_path, "r", encoding="utf-8") as f:
+                existing = json.load(f)
+            for key in ("strategy", "num_shards", "roots"):
+                if existing.get(key) != layout[key]:
+                    raise ShardingError(
+                        f"Shard layout mismatch for '{key}': index has "
+                        f"{existing.get(key)!r}, requested {layout[key]!r}"
+                    )
+            return
+
+        with open(manifest_path, "w", encoding="utf-8") as f:
+            json.dump(layout, f, indent=2)
+
+    def _path_shard(self, path: str) -> int:
+        """Fallback placement by path digest."""
+        return zlib.crc32(path.encode("utf-8", "surrogateescape")) % self.num_shards
+
+    def shard_for_hash(self, hash_value: str) -> int:
+        """Get the shard owning a content hash under the 'hash' strategy.
+
+        Args:
+            hash_value: Hex digest (non-hex values are CRC32'd instead)
+
+        Returns:
+            Shard index
+        """
+        try:
+            return int(hash_value[:8], 16) % self.num_shards
+        except ValueError:
+            return zlib.crc32(hash_value.encode("utf-8")) % self.num_shards
+
+    def shard_for(self, path: str, hash_value: Optional[str] = None) -> int:
+        """Get the shard index a file row belongs to.
+
+        Args:
+            path: File path
+            hash_value: Optional content hash
+
+        Returns:
+            Shard index
+        """
+        if self.strategy == "hash":
+            if hash_value:
+                return self.shard_for_hash(hash_value)
+            return self._path_shard(path)
+
+        abs_path = os.path.abspath(path)
+        for slot, root in self._roots_by_length:
+            if abs_path == root or abs_path.startswith(root + os.sep):
+                return slot % self.num_shards
+        return self._path_shard(path)
+
+    # ------------------------------------------------------------------
+    # Execution helpers
+    # ------------------------------------------------------------------
+
+    def _fan_out(
+        self,
+        func: Callable[[int, DatabaseConnection], Any],
+        shard_ids: Optional[List[int]] = None
+    ) -> List[Any]:
+        """Run func(shard_index, connection) on the pool for each shard.
+
+        Returns:
+            Results in shard order
+        """
+        if self._closed:
+            raise ShardingError("Shard router is closed")
+        ids = list(range(self.num_shards)) if shard_ids is None else shard_ids
+        futures = [self._executor.submit(func, i, self._shards[i]) for i in ids]
+        return [future.result() for future in futures]
+
+    @staticmethod
+    def _row_to_file(row: Tuple[Any, ...], shard: int) -> Dict[str, Any]:
+        """Convert an (id, path, size, modified_time, hash) row to a file dict."""
+        return {
+            'id': row[0],
+            'path': row[1],
+            'size': row[2],
+            'modified_time': row[3],
+            'hash': row[4],
+            'shard': shard,
+        }
+
+    # ------------------------------------------------------------------
+    # Writes
+    # ------------------------------------------------------------------
+
+    def add_file(self, file_path: str, size: int, modified_time: int,
+                 hash_value: Optional[str] = None) -> Tuple[int, Optional[int]]:
+        """Add a single file row to its shard.
+
+        Returns:
+            Tuple of (shard index, row id within that shard)
+        """
+        shard = self.shard_for(file_path, hash_value)
+
+        def _write(_idx: int, db: DatabaseConnection) -> Optional[int]:
+            row_id = FileRepository(db).add_file(file_path, size, modified_time, hash_value)
+            db.commit()
+            return row_id
+
+        return shard, self._fan_out(_write, [shard])[0]
+
+    def batch_add_files(self, files: List[Dict[str, Any]]) -> Dict[int, int]:
+        """Route a batch of file rows and write every shard in parallel.
+
+        Each shard receives one executemany() in its own transaction, so
+        writers on different shards never contend for the same lock.
+
+        Args:
+            files: File dictionaries as accepted by FileRepository.batch_add_files
+
+        Returns:
+            Mapping of shard index to rows written
+        """
+        buckets: Dict[int, List[Dict[str, Any]]] = {}
+        for file_data in files:
+            shard = self.shard_for(file_data['path'], file_data.get('hash'))
+            buckets.setdefault(shard, []).append(file_data)
+
+        def _write(idx: int, db: DatabaseConnection) -> int:
+            try:
+                written = FileRepository(db).batch_add_files(buckets[idx])
+                db.commit()
+                return written
+            except Exception:
+                db.rollback()
+                raise
+
+        shard_ids = sorted(buckets)
+        return dict(zip(shard_ids, self._fan_out(_write, shard_ids)))
+
+    def delete_file(self, file_path: str, hash_value: Optional[str] = None) -> bool:
+        """Delete a file row by path.
+
+        Args:
+            file_path: File path
+            hash_value: Hash the row was routed with, if any
+
+        Returns:
+            True if a row was deleted
+        """
+        shard = self.shard_for(file_path, hash_value)
+
+        def _delete(_idx: int, db: DatabaseConnection) -> bool:
+            cursor = db.execute('DELETE FROM files WHERE path = ?', (file_path,))
+            db.commit()
+            return cursor.rowcount > 0
+
+        return self._fan_out(_delete, [shard])[0]
+
+    # ------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------
+
+    def count_files(self) -> int:
+        """Count file rows across all shards."""
+        return sum(self._fan_out(
+            lambda _idx, db: db.execute('SELECT COUNT(*) FROM files').fetchone()[0]
+        ))
+
+    def shard_counts(self) -> List[int]:
+        """Get the number of file rows held by each shard."""
+        return self._fan_out(
+            lambda _idx, db: db.execute('SELECT COUNT(*) FROM files').fetchone()[0]
+        )
+
+    def find_duplicates_by_hash(self, hash_value: str) -> List[Dict[str, Any]]:
+        """Find every file with the given hash.
+
+        Only the owning shard is queried under the 'hash' strategy; every
+        shard is queried otherwise.
+        """
+        shard_ids = [self.shard_for_hash(hash_value)] if self.strategy == "hash" else None
+
+        def _query(idx: int, db: DatabaseConnection) -> List[Dict[str, Any]]:
+            cursor = db.execute(
+                'SELECT id, path, size, modified_time, hash FROM files WHERE hash = ?',
+                (hash_value,)
+            )
+            return [self._row_to_file(row, idx) for row in cursor.fetchall()]
+
+        merged = [f for part in self._fan_out(_query, shard_ids) for f in part]
+        merged.sort(key=lambda f: f['path'])
+        return merged
+
+    def find_duplicate_groups(
+        self,
+        cross_shard: Optional[bool] = None,
+        batch_size: int = 500
+    ) -> List[Dict[str, Any]]:
+        """Find duplicate groups across the whole sharded index.
+
+        Args:
+            cross_shard: Also match hashes whose copies live in different
+                shards (None = only when the strategy can split them)
+            batch_size: Hashes per member lookup query
+
+        Returns:
+            List of {'hash', 'count', 'files'} groups sorted by hash
+        """
+        if cross_shard is None:
+            cross_shard = self.strategy != "hash"
+
+        if cross_shard:
+            dup_hashes = [h for h, _ in self.iter_cross_shard_duplicates()]
+        else:
+            def _local(_idx: int, db: DatabaseConnection) -> List[str]:
+                cursor = db.execute(
+                    'SELECT hash FROM files WHERE hash IS NOT NULL '
+                    'GROUP BY hash HAVING COUNT(*) > 1'
+                )
+                return [row[0] for row in cursor.fetchall()]
+
+            dup_hashes = sorted({h for part in self._fan_out(_local) for h in part})
+
+        groups: Dict[str, List[Dict[str, Any]]] = {}
+        for start in range(0, len(dup_hashes), batch_size):
+            batch = dup_hashes[start:start + batch_size]
+            placeholders = ', '.join('?' * len(batch))
+            query = (
+                'SELECT id, path, size, modified_time, hash FROM files '
+                f'WHERE hash IN ({placeholders})'
+            )
+
+            def _members(idx: int, db: DatabaseConnection) -> List[Dict[str, Any]]:
+                cursor = db.execute(query, tuple(batch))
+                return [self._row_to_file(row, idx) for row in cursor.fetchall()]
+
+            for part in self._fan_out(_members):
+                for file_info in part:
+                    groups.setdefault(file_info['hash'], []).append(file_info)
+
+        result = []
+        for hash_value in dup_hashes:
+            members = sorted(groups.get(hash_value, []), key=lambda f: f['path'])
+            if len(members) > 1:
+                result.append({'hash': hash_value, 'count': len(members), 'files': members})
+        return result
+
+    def iter_cross_shard_duplicates(self) -> Iterator[Tuple[str, int]]:
+        """Stream hashes that occur more than once across all shards.
+
+        Every shard streams (hash, count) pairs in hash order straight off
+        its hash index; the streams are k-way merged so memory stays
+        bounded by the number of shards, not the number of files.
+
+        Yields:
+            Tuples of (hash, total count) in hash order
+        """
+        if self._closed:
+            raise ShardingError("Shard router is closed")
+
+        readers = [
+            sqlite3.connect(f"file:{path}?mode=ro", uri=True, check_same_thread=False)
+            for path in self.shard_paths
+        ]
+        try:
+            streams = [
+                conn.execute(
+                    'SELECT hash, COUNT(*) FROM files WHERE hash IS NOT NULL '
+                    'GROUP BY hash ORDER BY hash'
+                )
+                for conn in readers
+            ]
+            current: Optional[str] = None
+            total = 0
+            for hash_value, count in heapq.merge(*streams, key=lambda row: row[0]):
+                if hash_value != current:
+                    if current is not None and total > 1:
+                        yield current, total
+                    current, total = hash_value, 0
+                total += count
+            if current is not None and total > 1:
+                yield current, total
+        finally:
+            for conn in readers:
+                conn.close()
+
+    def maintain(self, statement: str = "ANALYZE") -> None:
+        """Run a maintenance statement (ANALYZE, VACUUM, PRAGMA optimize) on every shard in parallel.
+
+        Args:
+            statement: Statement to run
+        """
+        def _run(_idx: int, db: DatabaseConnection) -> None:
+            conn = db.get_connection()
+            conn.commit()
+            conn.execute(statement)
+
+        self._fan_out(_run)
+
+    def close(self) -> None:
+        """Close all shard connections and stop the fan-out pool."""
+        if self._closed:
+            return
+
+        def _close(_idx: int, db: DatabaseConnection) -> None:
+            db.close()
+
+        try:
+            self._fan_out(_close)
+        finally:
+            self._closed = True
+            self._executor.shutdown(wait=True)
+            for db in self._shards:
+                db.close()
+
+    def __enter__(self) -> 'ShardRouter':
+        """Context manager entry."""
+        return self
+
+    def __exit__(self, exc_type: Any, exc_val: Any, exc_tb: Any) -> None:
+        """Context manager exit."""
+        self.close()
+
 
 class DatabaseShardingTool(Tool):
     """
@@ -21,29 +444,35 @@ class DatabaseShardingTool(Tool):
     """
 
     def __init__(self, config: Optional[Dict[str, Any]] = None):
-        """TODO: Document __init__."""
+        """Initialize the sharding tool.
+
+        Args:
+            config: Optional configuration ('db_path', 'shard_dir',
+                'num_shards', 'strategy', 'roots')
+        """
         super().__init__()
         self.config = config or {}
         self._shards = {}
+        self._router: Optional[ShardRouter] = None
         logger.info("Database sharding tool initialized")
 
     @property
     def name(self) -> str:
-        """TODO: Document name."""
+        """Tool name."""
         return "DatabaseSharding"
 
     @property
     def version(self) -> str:
-        """TODO: Document version."""
+        """Tool version."""
         return "1.0.0"
 
     @property
     def dependencies(self) -> List[str]:
-        """TODO: Document dependencies."""
+        """Tool dependencies."""
         return []
 
     def get_capabilities(self) -> dict:
-        """TODO: Document get_capabilities."""
+        """Get tool capabilities."""
         return {
             "sharding": True,
             "horizontal_partitioning": True,
@@ -52,10 +481,11 @@ class DatabaseShardingTool(Tool):
 
     @property
     def metadata(self) -> ToolMetadata:
-        """TODO: Document metadata."""
+        """Get tool metadata (ISO 19770-2 compliant)."""
         return ToolMetadata(
             name=self.name,
             version=self.version,
+            software_id=f"org.nodupe.tool.{self.name.lower()}",
             description="Database sharding functionality for horizontal data partitioning",
             author="NoDupeLabs",
             license="Apache-2.0",
@@ -63,8 +493,28 @@ class DatabaseShardingTool(Tool):
             tags=["database", "sharding", "partitioning"]
         )
 
+    @property
+    def api_methods(self) -> Dict[str, Callable[..., Any]]:
+        """Methods exposed via IPC."""
+        return {
+            'list_shards': self.list_shards,
+            'count_files': lambda: self.get_router().count_files(),
+            'find_duplicate_groups': lambda cross_shard=None: self.get_router().find_duplicate_groups(cross_shard),
+        }
+
     def create_shard(self, shard_name: str, db_path: str = None) -> str:
-        """TODO: Document create_shard."""
+        """Create a shard database with the standard index schema.
+
+        Args:
+            shard_name: Shard identifier
+            db_path: Database file path (None = next to the configured db_path)
+
+        Returns:
+            Path of the shard database
+
+        Raises:
+            ValueError: If the shard name is not a valid identifier
+        """
         if not self._is_valid_identifier(shard_name):
             raise ValueError(f"Invalid shard name: {shard_name}")
 
@@ -73,15 +523,7 @@ class DatabaseShardingTool(Tool):
 
         shard_conn = sqlite3.connect(db_path)
         try:
-            shard_conn.execute("""
-                CREATE TABLE IF NOT EXISTS shard_data (
-                    id INTEGER PRIMARY KEY,
-                    key TEXT UNIQUE,
-                    value BLOB,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            """)
-            shard_conn.commit()
+            DatabaseSchema(shard_conn).create_schema()
         finally:
             shard_conn.close()
 
@@ -89,19 +531,62 @@ class DatabaseShardingTool(Tool):
         logger.info(f"Created shard '{shard_name}' at {db_path}")
         return db_path
 
+    def get_router(self) -> ShardRouter:
+        """Get the shard router, opening it from configuration on first use.
+
+        Returns:
+            ShardRouter instance
+        """
+        if self._router is None:
+            shard_dir = self.config.get(
+                'shard_dir',
+                os.path.join(os.path.dirname(self.config.get('db_path', '.')) or '.', 'shards')
+            )
+            self._router = ShardRouter(
+                shard_dir,
+                num_shards=self.config.get('num_shards', 16),
+                strategy=self.config.get('strategy', 'hash'),
+                roots=self.config.get('roots'),
+                max_workers=self.config.get('max_workers'),
+            )
+            for path in self._router.shard_paths:
+                self._shards[os.path.splitext(os.path.basename(path))[0]] = path
+        return self._router
+
     def _is_valid_identifier(self, name: str) -> bool:
-        """TODO: Document _is_valid_identifier."""
+        """Check that a shard name is safe to use as a file name."""
         return bool(name and name.replace('_', '').replace('-', '').isalnum()
                    and not name.startswith('_') and len(name) <= 64)
 
     def list_shards(self) -> List[str]:
-        """TODO: Document list_shards."""
+        """List known shard names."""
         return list(self._shards.keys())
 
     def initialize(self, container: Any) -> None:
-        """TODO: Document initialize."""
+        """Initialize the tool."""
         logger.info("Database sharding tool initialized")
 
-    def shutdown(self, container: Any) -> None:
-        """TODO: Document shutdown."""
-        logger.info("Database sharding tool shutdown")
\ No newline at end of file
+    def shutdown(self, container: Any = None) -> None:
+        """Close the shard router if it was opened."""
+        if self._router is not None:
+            self._router.close()
+            self._router = None
+        logger.info("Database sharding tool shutdown")
+
+    def run_standalone(self, args: List[str]) -> int:
+        """Print shard layout and row counts."""
+        router = self.get_router()
+        try:
+            for path, count in zip(router.shard_paths, router.shard_counts()):
+                print(f"{path}: {count} files")
+            return 0
+        finally:
+            self.shutdown()
+
+    def describe_usage(self) -> str:
+        """Plain language description."""
+        return (
+            "This component splits the file list into several smaller databases. "
+            "Each piece can be updated and cleaned up on its own, which keeps "
+            "very large collections fast to work with."
+        )
@@ -11,6 +11,9 @@ Key Features:
     - Basic connection pooling
     - Thread-safe connection handling
     - Transaction management
+    - Optional write-aware query result cache
+    - Optional per-statement latency statistics and slow-query log
+    - Optional churn-driven maintenance (ANALYZE, optimize, incremental vacuum)
     - Error handling with resilience
 
 Dependencies:
@@ -20,8 +23,13 @@ Dependencies:
 
 import sqlite3
 import threading
+import time
 from pathlib import Path
-from typing import Optional, Any, Dict, List, Tuple, Union, TypeVar
+from typing import Optional, Any, Dict, List, Tuple, Union, TypeVar, Iterable, Set
+
+from .query_cache import QueryCache, extract_read_tables
+from .query_stats import QueryStatistics, TimedCursor
+from .maintenance import MaintenanceScheduler
 
 T = TypeVar('T')
 
@@ -50,6 +58,9 @@ class DatabaseConnection:
         else:
             self.db_path = str(Path(db_path).absolute())
         self._local = threading.local()
+        self.query_cache: Optional[QueryCache] = None
+        self.statistics: Optional[QueryStatistics] = None
+        self.maintenance: Optional[MaintenanceScheduler] = None
 
     @classmethod
     def get_instance(cls, db_path: str = "output/index.db") -> 'DatabaseConnection':
@@ -86,6 +97,10 @@ class DatabaseConnection:
                 check_same_thread=False
             )
 
+            # Must precede the first write to take effect on a new database;
+            # existing databases are converted by enable_incremental_vacuum()
+            connection.execute('PRAGMA auto_vacuum=INCREMENTAL')
+
             # Configure connection for better performance
             connection.execute('PRAGMA journal_mode=WAL')
             connection.execute('PRAGMA synchronous=NORMAL')
@@ -114,14 +129,27 @@ class DatabaseConnection:
             sqlite3.Cursor with results
         """
         conn = self.get_connection()
+        statistics = self.statistics
+        start = time.perf_counter() if statistics is not None else 0.0
         try:
             if params:
-                return conn.execute(query, params)
+                cursor = conn.execute(query, params)
             else:
-                return conn.execute(query)
+                cursor = conn.execute(query)
         except sqlite3.Error as e:
             print(f"[ERROR] Database query failed: {e}")
             raise
+        if self.query_cache is not None:
+            self._note_write(query)
+        if self.maintenance is not None and cursor.description is None:
+            self.maintenance.note_write(query, cursor.rowcount)
+        if statistics is not None:
+            elapsed = time.perf_counter() - start
+            if cursor.description is not None:
+                # Reads are charged when their rows have been fetched
+                return TimedCursor(cursor, statistics, query, params, elapsed)
+            statistics.record(query, elapsed * 1000.0, max(cursor.rowcount, 0), conn, params)
+        return cursor
 
     def executemany(
         self,
@@ -138,11 +166,25 @@ class DatabaseConnection:
             sqlite3.Cursor with results
         """
         conn = self.get_connection()
+        statistics = self.statistics
+        start = time.perf_counter() if statistics is not None else 0.0
         try:
-            return conn.executemany(query, params_list)
+            cursor = conn.executemany(query, params_list)
         except sqlite3.Error as e:
             print(f"[ERROR] Database batch query failed: {e}")
             raise
+        if self.query_cache is not None:
+            self._note_write(query)
+        if self.maintenance is not None:
+            self.maintenance.note_write(query, cursor.rowcount)
+        if statistics is not None:
+            # One entry per batch; the first parameter set is used for EXPLAIN
+            first = params_list[0] if isinstance(params_list, (list, tuple)) and params_list else None
+            statistics.record(
+                query, (time.perf_counter() - start) * 1000.0,
+                max(cursor.rowcount, 0), conn, first
+            )
+        return cursor
 
     def commit(self) -> None:
         """Commit current transaction."""
@@ -151,6 +193,9 @@ class DatabaseConnection:
         except sqlite3.Error as e:
             print(f"[ERROR] Database commit failed: {e}")
             raise
+        self._flush_pending_writes()
+        if self.maintenance is not None:
+            self.maintenance.run_if_due()
 
     def rollback(self) -> None:
         """Roll back current transaction."""
@@ -159,6 +204,121 @@ class DatabaseConnection:
         except sqlite3.Error as e:
             print(f"[ERROR] Database rollback failed: {e}")
             raise
+        self._flush_pending_writes()
+
+    def enable_query_cache(self, max_size: int = 1000, ttl_seconds: int = 3600) -> QueryCache:
+        """Cache read results of cached_fetchall() in front of this connection.
+
+        Writes issued through execute()/executemany() invalidate the tables
+        they touch; commit() and rollback() invalidate them again so no
+        thread keeps a result computed before the transaction ended. Writes
+        made on the raw sqlite3 connection bypass this tracking.
+
+        Args:
+            max_size: Maximum number of cached results
+            ttl_seconds: Time-to-live in seconds for cached results
+
+        Returns:
+            The QueryCache instance
+        """
+        if self.query_cache is None:
+            self.query_cache = QueryCache(max_size, ttl_seconds)
+        return self.query_cache
+
+    def enable_statistics(self, slow_query_ms: float = 100.0) -> QueryStatistics:
+        """Record latency and row counts for every statement run through this connection.
+
+        Statements are grouped by normalized fingerprint. Statements slower
+        than slow_query_ms are added to a slow-query log together with
+        their EXPLAIN QUERY PLAN output.
+
+        Args:
+            slow_query_ms: Slow-query threshold in milliseconds
+
+        Returns:
+            The QueryStatistics instance
+        """
+        if self.statistics is None:
+            self.statistics = QueryStatistics(slow_query_ms)
+        else:
+            self.statistics.slow_query_ms = slow_query_ms
+        return self.statistics
+
+    def enable_maintenance(self, **thresholds: Any) -> MaintenanceScheduler:
+        """Run ANALYZE, PRAGMA optimize and incremental vacuum automatically after commits.
+
+        Args:
+            **thresholds: Keyword arguments for MaintenanceScheduler
+
+        Returns:
+            The MaintenanceScheduler instance
+        """
+        if self.maintenance is None:
+            self.maintenance = MaintenanceScheduler(self, **thresholds)
+        return self.maintenance
+
+    def cached_fetchall(
+        self,
+        query: str,
+        params: Optional[Union[Tuple[Any, ...], Dict[str, Any]]] = None,
+        tables: Optional[Iterable[str]] = None
+    ) -> List[Tuple[Any, ...]]:
+        """Execute a read query and return all rows, served from the query cache when possible.
+
+        Rows are cached as tuples so callers cannot mutate a shared result.
+        Without an enabled cache this is execute(...).fetchall().
+
+        Args:
+            query: SELECT query to execute
+            params: Query parameters
+            tables: Tables the query reads (None = parsed from the query)
+
+        Returns:
+            List of result rows
+        """
+        cache = self.query_cache
+        if cache is None:
+            return self.execute(query, params).fetchall()
+
+        depends_on = extract_read_tables(query) if tables is None else frozenset(tables)
+        pending = self._pending_writes()
+        if pending and not self.get_connection().in_transaction:
+            # Transaction ended on the raw connection; publish its writes now
+            self._flush_pending_writes()
+        elif pending and ('*' in pending or not pending.isdisjoint(depends_on)):
+            # Our own uncommitted writes are visible only to this thread
+            return self.execute(query, params).fetchall()
+
+        return cache.get_or_compute(
+            query, params, lambda: self.execute(query, params).fetchall(), depends_on
+        )
+
+    def _pending_writes(self) -> Set[str]:
+        """Get tables written by this thread's open transaction."""
+        pending = getattr(self._local, 'pending_writes', None)
+        if pending is None:
+            pending = set()
+            self._local.pending_writes = pending
+        return pending
+
+    def _note_write(self, query: str) -> None:
+        """Invalidate cached results for the tables a statement modifies."""
+        tables = self.query_cache.note_write(query)
+        if tables is None:
+            self._pending_writes().add('*')
+        elif tables:
+            self._pending_writes().update(tables)
+
+    def _flush_pending_writes(self) -> None:
+        """Invalidate tables written by the transaction that just ended."""
+        pending = getattr(self._local, 'pending_writes', None)
+        if not pending or self.query_cache is None:
+            return
+        if '*' in pending:
+            self.query_cache.invalidate_all()
+        else:
+            self.query_cache.invalidate_tables(pending)
+        pending.clear()
 
     def close(self) -> None:
         """Close database connection."""
@@ -188,10 +348,18 @@ class DatabaseConnection:
                 hash TEXT,
                 is_duplicate BOOLEAN DEFAULT FALSE,
                 duplicate_of INTEGER,
+                phash INTEGER,
+                dhash INTEGER,
                 FOREIGN KEY (duplicate_of) REFERENCES files(id)
             )
         ''')
 
+        # Databases created before image fingerprinting lack the hash columns
+        file_columns = {row[1] for row in conn.execute('PRAGMA table_info(files)')}
+        for column in ('phash', 'dhash'):
+            if column not in file_columns:
+                conn.execute(f'ALTER TABLE files ADD COLUMN {column} INTEGER')
+
         # Create file indexes for better performance
         conn.execute(
             'CREATE INDEX IF NOT EXISTS idx_files_path ON files(path)')
@@ -210,17 +378,41 @@ class DatabaseConnection:
                 embedding BLOB NOT NULL,
                 model_version TEXT NOT NULL,
                 created_time INTEGER NOT NULL,
+                dimensions INTEGER NOT NULL DEFAULT 0,
                 FOREIGN KEY (file_id) REFERENCES files(id),
                 UNIQUE(file_id, model_version)
             )
         ''')
 
+        # Databases created before embeddings were stored raw lack dimensions
+        embedding_columns = {row[1] for row in conn.execute('PRAGMA table_info(embeddings)')}
+        if 'dimensions' not in embedding_columns:
+            conn.execute(
+                'ALTER TABLE embeddings ADD COLUMN dimensions INTEGER NOT NULL DEFAULT 0')
+
         # Create embedding indexes
         conn.execute(
             'CREATE INDEX IF NOT EXISTS idx_embeddings_file ON embeddings(file_id)')
         conn.execute(
             'CREATE INDEX IF NOT EXISTS idx_embeddings_model ON embeddings(model_version)')
 
+        # Create file relationships table (near-duplicate pairs) if it doesn't exist
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS file_relationships (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                file1_id INTEGER NOT NULL,
+                file2_id INTEGER NOT NULL,
+                relationship_type TEXT NOT NULL,
+                similarity_score REAL,
+                created_at INTEGER NOT NULL,
+                UNIQUE(file1_id, file2_id, relationship_type),
+                FOREIGN KEY (file1_id) REFERENCES files(id) ON DELETE CASCADE,
+                FOREIGN KEY (file2_id) REFERENCES files(id) ON DELETE CASCADE
+            )
+        ''')
+        conn.execute(
+            'CREATE INDEX IF NOT EXISTS idx_file_relationships_file2_id ON file_relationships(file2_id)')
+
         conn.commit()
 
 
@@ -6,9 +6,14 @@
 Provides SQLite-based data storage as a tool.
 """
 
+import argparse
+import json
 from typing import List, Dict, Any, Optional, Callable
 from nodupe.core.tool_system.base import Tool, ToolMetadata
 from .connection import DatabaseConnection
+from .files import FileRepository
+from .query_stats import QueryStatistics, SORT_KEYS
+from .maintenance import IndexAdvisor
 
 class StandardDatabaseTool(Tool):
     """Standard database tool (SQLite implementation)."""
@@ -45,12 +50,27 @@ class StandardDatabaseTool(Tool):
         return {
             'initialize': self.db.initialize_database,
             'get_connection': lambda: self.db,
-            'close': self.db.close
+            'close': self.db.close,
+            'list_files': self.files.get_all_files,
+            'list_duplicates': self.files.get_duplicate_files,
+            'count_files': self.files.count_files,
+            'query_cache_stats': self.db.query_cache.get_stats,
+            'query_stats': self.db.statistics.report,
+            'maintenance_status': self.db.maintenance.get_status,
+            'run_maintenance': self.db.maintenance.run,
+            'advise_indexes': lambda min_total_ms=100.0: self._index_advisor().advise(min_total_ms)
         }
 
     def __init__(self):
         """Initialize the tool."""
         self.db = DatabaseConnection()
+        # Repeated list/report requests over IPC are served from memory
+        # until a write touches the tables they read
+        self.db.enable_query_cache()
+        self.db.enable_statistics()
+        # ANALYZE after bulk loads, incremental vacuum after large deletes
+        self.db.enable_maintenance()
+        self.files = FileRepository(self.db)
 
     def initialize(self, container: Any) -> None:
         """Initialize the tool and register services."""
@@ -63,8 +83,105 @@ class StandardDatabaseTool(Tool):
 
     def shutdown(self) -> None:
         """Shutdown the tool."""
+        try:
+            self.db.statistics.save(self.db.get_connection())
+        except Exception as e:
+            import logging
+            logging.getLogger(__name__).warning(f"Failed to save query statistics: {e}")
         self.db.close()
 
+    def register_commands(self, subparsers: Any) -> None:
+        """Register the db-stats command."""
+        stats_parser = subparsers.add_parser(
+            'db-stats', help='Show which database queries take the most time')
+        stats_parser.add_argument(
+            '--top', type=int, default=20, help='Number of statements to show')
+        stats_parser.add_argument(
+            '--sort', choices=SORT_KEYS, default='total', help='Rank statements by this value')
+        stats_parser.add_argument(
+            '--json', action='store_true', help='Print the report as JSON')
+        stats_parser.add_argument(
+            '--reset', action='store_true', help='Clear saved statistics after showing them')
+        stats_parser.set_defaults(func=self.execute_db_stats)
+
+        maintain_parser = subparsers.add_parser(
+            'db-maintain', help='Tidy up the database so it stays small and fast')
+        maintain_parser.add_argument(
+            '--force', action='store_true', help='Run every maintenance task now')
+        maintain_parser.add_argument(
+            '--advise', action='store_true', help='Suggest indexes for slow queries')
+        maintain_parser.add_argument(
+            '--create-indexes', action='store_true', help='Create the suggested indexes')
+        maintain_parser.add_argument(
+            '--enable-incremental-vacuum', action='store_true',
+            help='Let the database file shrink after deletes (rewrites the file once)')
+        maintain_parser.set_defaults(func=self.execute_db_maintain)
+
+    def _collected_statistics(self) -> QueryStatistics:
+        """Saved query statistics merged with those of this process."""
+        stats = QueryStatistics.load(self.db.get_connection(), self.db.statistics.slow_query_ms)
+        stats.merge(self.db.statistics)
+        return stats
+
+    def _index_advisor(self) -> IndexAdvisor:
+        """Index advisor over all collected statistics."""
+        return IndexAdvisor(self.db, self._collected_statistics())
+
+    def execute_db_stats(self, args: argparse.Namespace) -> int:
+        """Print saved and live query statistics.
+
+        Args:
+            args: Command arguments
+        """
+        conn = self.db.get_connection()
+        stats = self._collected_statistics()
+
+        if args.json:
+            print(json.dumps(stats.report(args.top, args.sort), indent=2))
+        else:
+            print(stats.format_report(args.top, args.sort))
+
+        if args.reset:
+            self.db.statistics.reset()
+            QueryStatistics.clear_saved(conn)
+        return 0
+
+    def execute_db_maintain(self, args: argparse.Namespace) -> int:
+        """Run database maintenance and index advice.
+
+        Args:
+            args: Command arguments
+        """
+        maintenance = self.db.maintenance
+        if args.enable_incremental_vacuum:
+            modes = maintenance.enable_incremental_vacuum()
+            print(f"auto_vacuum: {modes['before']} -> {modes['after']}")
+
+        result = maintenance.run(force=args.force)
+        print(f"Maintenance tasks run: {', '.join(result['tasks']) or 'none due'}")
+        if 'pages_freed' in result:
+            print(f"Pages returned to the file system: {result['pages_freed']}")
+
+        if args.advise or args.create_indexes:
+            advisor = self._index_advisor()
+            proposals = advisor.advise()
+            if not proposals:
+                print("No index suggestions.")
+            for proposal in proposals:
+                columns = proposal['where_columns'] + [
+                    c for c in proposal['select_columns'] if c not in proposal['where_columns']
+                ]
+                print(f"{proposal['index_name']} ON {proposal['table']}({', '.join(columns)})"
+                      f"  [{proposal['total_ms']:.1f} ms, {proposal['reason']}]")
+            if args.create_indexes and proposals:
+                created = advisor.apply(proposals)
+                print(f"Created {len(created)} indexes.")
+
+        status = maintenance.get_status()
+        print(f"File size: {status['file_bytes']} bytes ({status['free_bytes']} free), "
+              f"auto_vacuum={status['auto_vacuum']}")
+        return 0
+
     def run_standalone(self, args: List[str]) -> int:
         """Stand-alone database check."""
         print(f"Database Path: {self.db.db_path}")
@@ -88,7 +205,7 @@ class StandardDatabaseTool(Tool):
         return {
             'engine': 'SQLite',
             'path': self.db.db_path,
-            'features': ['connection_pooling', 'transactions']
+            'features': ['connection_pooling', 'transactions', 'query_cache', 'maintenance']
         }
 
 def register_tool():
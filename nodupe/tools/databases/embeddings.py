@@ -8,6 +8,9 @@ handling file embedding storage and retrieval.
 
 Key Features:
     - Embedding CRUD operations
+    - Embeddings stored as raw little-endian float32 bytes
+    - Bulk loading into a single NumPy matrix (optional NumPy)
+    - Revision numbers for incremental loading
     - Model version management
     - Batch operations
     - Error handling
@@ -15,12 +18,76 @@ Key Features:
 Dependencies:
     - sqlite3 (standard library only)
     - typing (standard library only)
+    - array (standard library only)
+    - numpy (optional, for load_matrix)
 """
 
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Tuple
+from array import array
 import pickle
+import sys
 from .connection import DatabaseConnection
 
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    np = None
+    NUMPY_AVAILABLE = False
+
+# Rows fetched per round trip when streaming embeddings into a matrix
+LOAD_CHUNK_ROWS = 4096
+# Revision counter; every insert and rewrite takes a number that is never reused,
+# even after the row holding the newest revision is deleted
+_REVISION_COUNTER = '''
+    CREATE TABLE IF NOT EXISTS embedding_revision (
+        id INTEGER PRIMARY KEY CHECK (id = 1),
+        value INTEGER NOT NULL
+    )
+'''
+
+
+def encode_embedding(embedding: Any) -> Tuple[bytes, int]:
+    """Encode an embedding as raw little-endian float32 bytes.
+
+    Args:
+        embedding: Sequence of floats or a 1-D NumPy array
+
+    Returns:
+        Tuple of (bytes, dimensions)
+    """
+    if NUMPY_AVAILABLE and isinstance(embedding, np.ndarray):
+        values = np.ascontiguousarray(embedding, dtype='<f4').ravel()
+        return values.tobytes(), int(values.shape[0])
+
+    values = array('f', embedding)
+    if sys.byteorder == 'big':
+        values.byteswap()
+    return values.tobytes(), len(values)
+
+
+def decode_embedding(blob: bytes, dimensions: int) -> List[float]:
+    """Decode an embedding written by encode_embedding.
+
+    Rows written before embeddings were stored raw hold a pickle and
+    have no recorded dimensions; those are unpickled.
+
+    Args:
+        blob: Stored embedding bytes
+        dimensions: Recorded dimensions (0 for legacy rows)
+
+    Returns:
+        Embedding as a list of floats
+    """
+    if dimensions and len(blob) == dimensions * 4:
+        values = array('f')
+        values.frombytes(blob)
+        if sys.byteorder == 'big':
+            values.byteswap()
+        return values.tolist()
+    legacy = pickle.loads(blob)
+    return list(legacy.tolist() if hasattr(legacy, 'tolist') else legacy)
+
 
 class EmbeddingRepository:
     """Embedding repository for database operations.
@@ -39,6 +106,44 @@ class EmbeddingRepository:
             db_connection: Database connection instance
         """
         self.db = db_connection
+        self._has_revision = False
+
+    def _ensure_revision(self) -> None:
+        """Add the revision column and counter to databases created before them.
+
+        Existing rows are numbered by id, so they stay in insertion order,
+        and the counter starts after the newest existing revision.
+        """
+        if self._has_revision:
+            return
+        columns = {row[1] for row in self.db.execute('PRAGMA table_info(embeddings)').fetchall()}
+        if 'revision' not in columns:
+            self.db.execute('ALTER TABLE embeddings ADD COLUMN revision INTEGER NOT NULL DEFAULT 0')
+            self.db.execute('UPDATE embeddings SET revision = id')
+            self.db.execute('CREATE INDEX IF NOT EXISTS idx_embeddings_revision ON embeddings(revision)')
+        self.db.execute(_REVISION_COUNTER)
+        self.db.execute(
+            'INSERT OR IGNORE INTO embedding_revision (id, value) '
+            'SELECT 1, COALESCE(MAX(revision), 0) FROM embeddings'
+        )
+        self._has_revision = True
+
+    def _take_revisions(self, count: int) -> int:
+        """Reserve consecutive revision numbers.
+
+        The counter is bumped in the caller's transaction, so the numbers
+        commit or roll back together with the rows that use them.
+
+        Args:
+            count: Number of revisions to reserve
+
+        Returns:
+            First reserved revision
+        """
+        self._ensure_revision()
+        self.db.execute('UPDATE embedding_revision SET value = value + ? WHERE id = 1', (count,))
+        last = self.db.execute('SELECT value FROM embedding_revision WHERE id = 1').fetchone()[0]
+        return last - count + 1
 
     def add_embedding(self, file_id: int, embedding: Any, model_version: str, created_time: int) -> Optional[int]:
         """Add embedding to database.
@@ -53,15 +158,15 @@ class EmbeddingRepository:
             Embedding ID
         """
         try:
-            # Serialize embedding to bytes
-            embedding_bytes = pickle.dumps(embedding)
+            embedding_bytes, dimensions = encode_embedding(embedding)
+            revision = self._take_revisions(1)
 
             cursor = self.db.execute(
                 '''
-                INSERT INTO embeddings (file_id, embedding, model_version, created_time)
-                VALUES (?, ?, ?, ?)
+                INSERT INTO embeddings (file_id, embedding, model_version, created_time, dimensions, revision)
+                VALUES (?, ?, ?, ?, ?, ?)
                 ''',
-                (file_id, embedding_bytes, model_version, created_time)
+                (file_id, embedding_bytes, model_version, created_time, dimensions, revision)
             )
             return cursor.lastrowid
         except Exception as e:
@@ -87,7 +192,7 @@ class EmbeddingRepository:
                 return {
                     'id': row[0],
                     'file_id': row[1],
-                    'embedding': pickle.loads(row[2]),
+                    'embedding': decode_embedding(row[2], row[5] if len(row) > 5 else 0),
                     'model_version': row[3],
                     'created_time': row[4]
                 }
@@ -116,7 +221,7 @@ class EmbeddingRepository:
                 return {
                     'id': row[0],
                     'file_id': row[1],
-                    'embedding': pickle.loads(row[2]),
+                    'embedding': decode_embedding(row[2], row[5] if len(row) > 5 else 0),
                     'model_version': row[3],
                     'created_time': row[4]
                 }
@@ -135,7 +240,7 @@ class EmbeddingRepository:
             List of embeddings for the file
         """
         try:
-            cursor = self.db.execute(
+            rows = self.db.cached_fetchall(
                 'SELECT * FROM embeddings WHERE file_id = ? ORDER BY model_version',
                 (file_id,)
             )
@@ -143,11 +248,11 @@ class EmbeddingRepository:
                 {
                     'id': row[0],
                     'file_id': row[1],
-                    'embedding': pickle.loads(row[2]),
+                    'embedding': decode_embedding(row[2], row[5] if len(row) > 5 else 0),
                     'model_version': row[3],
                     'created_time': row[4]
                 }
-                for row in cursor.fetchall()
+                for row in rows
             ]
         except Exception as e:
             print(f"[ERROR] Failed to get embeddings by file: {e}")
@@ -163,7 +268,7 @@ class EmbeddingRepository:
             List of embeddings for the model
         """
         try:
-            cursor = self.db.execute(
+            rows = self.db.cached_fetchall(
                 'SELECT * FROM embeddings WHERE model_version = ? ORDER BY file_id',
                 (model_version,)
             )
@@ -171,11 +276,11 @@ class EmbeddingRepository:
                 {
                     'id': row[0],
                     'file_id': row[1],
-                    'embedding': pickle.loads(row[2]),
+                    'embedding': decode_embedding(row[2], row[5] if len(row) > 5 else 0),
                     'model_version': row[3],
                     'created_time': row[4]
                 }
-                for row in cursor.fetchall()
+                for row in rows
             ]
         except Exception as e:
             print(f"[ERROR] Failed to get embeddings by model: {e}")
@@ -184,6 +289,8 @@ class EmbeddingRepository:
     def update_embedding(self, embedding_id: int, embedding: Any) -> bool:
         """Update embedding data.
 
+        The embedding gets a new revision, so incremental loads pick it up.
+
         Args:
             embedding_id: Embedding ID
             embedding: New embedding data
@@ -192,12 +299,12 @@ class EmbeddingRepository:
             True if updated, False if not found
         """
         try:
-            # Serialize embedding to bytes
-            embedding_bytes = pickle.dumps(embedding)
+            embedding_bytes, dimensions = encode_embedding(embedding)
+            revision = self._take_revisions(1)
 
             cursor = self.db.execute(
-                'UPDATE embeddings SET embedding = ? WHERE id = ?',
-                (embedding_bytes, embedding_id)
+                'UPDATE embeddings SET embedding = ?, dimensions = ?, revision = ? WHERE id = ?',
+                (embedding_bytes, dimensions, revision, embedding_id)
             )
             return cursor.rowcount > 0
         except Exception as e:
@@ -268,16 +375,16 @@ class EmbeddingRepository:
             List of all embeddings
         """
         try:
-            cursor = self.db.execute('SELECT * FROM embeddings ORDER BY file_id, model_version')
+            rows = self.db.cached_fetchall('SELECT * FROM embeddings ORDER BY file_id, model_version')
             return [
                 {
                     'id': row[0],
                     'file_id': row[1],
-                    'embedding': pickle.loads(row[2]),
+                    'embedding': decode_embedding(row[2], row[5] if len(row) > 5 else 0),
                     'model_version': row[3],
                     'created_time': row[4]
                 }
-                for row in cursor.fetchall()
+                for row in rows
             ]
         except Exception as e:
             print(f"[ERROR] Failed to get all embeddings: {e}")
@@ -290,8 +397,8 @@ class EmbeddingRepository:
             Total embedding count
         """
         try:
-            cursor = self.db.execute('SELECT COUNT(*) FROM embeddings')
-            return cursor.fetchone()[0]
+            rows = self.db.cached_fetchall('SELECT COUNT(*) FROM embeddings')
+            return rows[0][0]
         except Exception as e:
             print(f"[ERROR] Failed to count embeddings: {e}")
             raise
@@ -306,11 +413,11 @@ class EmbeddingRepository:
             Embedding count for the model
         """
         try:
-            cursor = self.db.execute(
+            rows = self.db.cached_fetchall(
                 'SELECT COUNT(*) FROM embeddings WHERE model_version = ?',
                 (model_version,)
             )
-            return cursor.fetchone()[0]
+            return rows[0][0]
         except Exception as e:
             print(f"[ERROR] Failed to count embeddings by model: {e}")
             raise
@@ -318,6 +425,9 @@ class EmbeddingRepository:
     def batch_add_embeddings(self, embeddings: List[Dict[str, Any]]) -> int:
         """Add multiple embeddings in batch.
 
+        Entries whose embedding is None (inputs the backend failed to
+        embed) are skipped.
+
         Args:
             embeddings: List of embedding data dictionaries
 
@@ -328,27 +438,176 @@ class EmbeddingRepository:
             return 0
 
         try:
-            data = [
-                (
+            data = []
+            for emb_data in embeddings:
+                if emb_data['embedding'] is None:
+                    continue
+                embedding_bytes, dimensions = encode_embedding(emb_data['embedding'])
+                data.append((
                     emb_data['file_id'],
-                    pickle.dumps(emb_data['embedding']),
+                    embedding_bytes,
                     emb_data['model_version'],
-                    emb_data['created_time']
-                )
-                for emb_data in embeddings
-            ]
+                    emb_data['created_time'],
+                    dimensions
+                ))
 
+            if not data:
+                return 0
+            first = self._take_revisions(len(data))
             self.db.executemany(
                 '''INSERT INTO embeddings
-                (file_id, embedding, model_version, created_time)
-                VALUES (?, ?, ?, ?)''',
-                [tuple(item) for item in data]
+                (file_id, embedding, model_version, created_time, dimensions, revision)
+                VALUES (?, ?, ?, ?, ?, ?)''',
+                [row + (first + offset,) for offset, row in enumerate(data)]
             )
-            return len(embeddings)
+            return len(data)
         except Exception as e:  # pylint: disable=broad-exception-caught
             print(f"[ERROR] Failed to batch add embeddings: {e}")
             raise
 
+    def max_revision(self, model_version: str) -> int:
+        """Newest revision of a model's embeddings.
+
+        Args:
+            model_version: Model version
+
+        Returns:
+            Highest revision, 0 if the model has no embeddings
+        """
+        try:
+            self._ensure_revision()
+            cursor = self.db.execute(
+                'SELECT MAX(revision) FROM embeddings WHERE model_version = ?',
+                (model_version,)
+            )
+            return cursor.fetchone()[0] or 0
+        except Exception as e:
+            print(f"[ERROR] Failed to get embedding revision: {e}")
+            raise
+
+    def load_matrix(self, model_version: str, since: Optional[int] = None,
+                    after_revision: Optional[int] = None,
+                    until_revision: Optional[int] = None) -> Tuple[Any, Any]:
+        """Load every embedding of a model into one float32 matrix.
+
+        Rows are streamed in chunks; each chunk's blobs are joined and
+        viewed with np.frombuffer, then copied into a preallocated matrix,
+        so no per-row Python objects are built. The result can be passed
+        directly to the similarity backends.
+
+        Args:
+            model_version: Model version
+            since: Only load embeddings with created_time >= since
+            after_revision: Only load embeddings with revision > after_revision
+            until_revision: Only load embeddings with revision <= until_revision
+
+        Returns:
+            Tuple of (float32 matrix of shape (n, dimensions), int64 array
+            of file IDs aligned with the matrix rows), ordered by file ID
+
+        Raises:
+            ImportError: If NumPy is not installed
+            ValueError: If the model has embeddings of differing dimensions
+        """
+        if not NUMPY_AVAILABLE:
+            raise ImportError("NumPy is required for load_matrix")
+
+        where = 'model_version = ?'
+        params: Tuple[Any, ...] = (model_version,)
+        if since is not None:
+            where += ' AND created_time >= ?'
+            params += (since,)
+        if after_revision is not None or until_revision is not None:
+            self._ensure_revision()
+        if after_revision is not None:
+            where += ' AND revision > ?'
+            params += (after_revision,)
+        if until_revision is not None:
+            where += ' AND revision <= ?'
+            params += (until_revision,)
+
+        try:
+            count, min_dims, max_dims = self.db.execute(
+                'SELECT COUNT(*), MIN(dimensions), MAX(dimensions) '
+                f'FROM embeddings WHERE {where}',
+                params
+            ).fetchone()
+            if not count:
+                return np.empty((0, 0), dtype=np.float32), np.empty(0, dtype=np.int64)
+            if min_dims != max_dims or not max_dims:
+                raise ValueError(
+                    f"Embeddings for {model_version} have mixed or unrecorded dimensions "
+                    f"({min_dims}..{max_dims}); run migrate_legacy_embeddings() first"
+                )
+
+            dims = int(max_dims)
+            matrix = np.empty((count, dims), dtype=np.float32)
+            file_ids = np.empty(count, dtype=np.int64)
+            row_bytes = dims * 4
+
+            cursor = self.db.execute(
+                'SELECT file_id, embedding FROM embeddings '
+                f'WHERE {where} ORDER BY file_id',
+                params
+            )
+            filled = 0
+            while True:
+                rows = cursor.fetchmany(LOAD_CHUNK_ROWS)
+                if not rows:
+                    break
+                ids, blobs = zip(*rows)
+                buffer = b''.join(blobs)
+                if len(buffer) != row_bytes * len(blobs):
+                    raise ValueError(f"Corrupt embedding blob for {model_version}")
+
+                end = filled + len(rows)
+                if end > matrix.shape[0]:
+                    # Rows were added after counting
+                    matrix = np.concatenate([matrix, np.empty((end - matrix.shape[0], dims), np.float32)])
+                    file_ids = np.concatenate([file_ids, np.empty(end - file_ids.shape[0], np.int64)])
+                matrix[filled:end] = np.frombuffer(buffer, dtype='<f4').reshape(len(rows), dims)
+                file_ids[filled:end] = ids
+                filled = end
+
+            return matrix[:filled], file_ids[:filled]
+        except Exception as e:
+            print(f"[ERROR] Failed to load embedding matrix: {e}")
+            raise
+
+    def migrate_legacy_embeddings(self, batch_size: int = 1000) -> int:
+        """Rewrite pickled embeddings as raw float32 with dimensions recorded.
+
+        Args:
+            batch_size: Rows converted per statement batch
+
+        Returns:
+            Number of embeddings converted
+        """
+        try:
+            converted = 0
+            while True:
+                rows = self.db.execute(
+                    'SELECT id, embedding FROM embeddings '
+                    'WHERE dimensions IS NULL OR dimensions = 0 LIMIT ?',
+                    (batch_size,)
+                ).fetchall()
+                if not rows:
+                    break
+                updates = []
+                for embedding_id, blob in rows:
+                    embedding_bytes, dimensions = encode_embedding(decode_embedding(blob, 0))
+                    updates.append((embedding_bytes, dimensions, embedding_id))
+                self.db.executemany(
+                    'UPDATE embeddings SET embedding = ?, dimensions = ? WHERE id = ?',
+                    updates
+                )
+                self.db.commit()
+                converted += len(updates)
+            return converted
+        except Exception as e:
+            print(f"[ERROR] Failed to migrate legacy embeddings: {e}")
+            raise
+
     def clear_all_embeddings(self) -> None:
         """Clear all embeddings from database."""
         try:
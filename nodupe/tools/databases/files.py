@@ -11,6 +11,7 @@ Key Features:
     - Duplicate detection
     - File indexing
     - Batch operations
+    - Image fingerprint (pHash/dHash) columns
     - Error handling
 
 Dependencies:
@@ -18,10 +19,27 @@ Dependencies:
     - typing (standard library only)
 """
 
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Iterator, Tuple
 import time
 from .connection import DatabaseConnection
 
+# Columns holding 64-bit image fingerprints
+PERCEPTUAL_HASH_COLUMNS = ('phash', 'dhash')
+
+
+def _hash_to_column(value: Optional[int]) -> Optional[int]:
+    """Store an unsigned 64-bit hash in a signed SQLite INTEGER."""
+    if value is None:
+        return None
+    return value - (1 << 64) if value >= 1 << 63 else value
+
+
+def _hash_from_column(value: Optional[int]) -> Optional[int]:
+    """Read an unsigned 64-bit hash back from a signed SQLite INTEGER."""
+    if value is None:
+        return None
+    return value + (1 << 64) if value < 0 else value
+
 
 class FileRepository:
     """File repository for database operations.
@@ -181,6 +199,47 @@ class FileRepository:
             print(f"[ERROR] Failed to mark file as duplicate: {e}")
             raise
 
+    def mark_as_original(self, file_id: int) -> bool:
+        """Clear a file's duplicate mark.
+
+        Args:
+            file_id: File ID to mark as original
+
+        Returns:
+            True if updated, False if not found
+        """
+        try:
+            cursor = self.db.execute(
+                'UPDATE files SET is_duplicate = FALSE, duplicate_of = NULL WHERE id = ?',
+                (file_id,)
+            )
+            return cursor.rowcount > 0
+        except Exception as e:
+            print(f"[ERROR] Failed to mark file as original: {e}")
+            raise
+
+    def batch_mark_duplicates(self, pairs: List[Tuple[int, int]]) -> int:
+        """Mark multiple files as duplicates.
+
+        Args:
+            pairs: (file_id, duplicate_of) tuples
+
+        Returns:
+            Number of pairs written
+        """
+        if not pairs:
+            return 0
+
+        try:
+            self.db.executemany(
+                'UPDATE files SET is_duplicate = TRUE, duplicate_of = ? WHERE id = ?',
+                [(duplicate_of, file_id) for file_id, duplicate_of in pairs]
+            )
+            return len(pairs)
+        except Exception as e:
+            print(f"[ERROR] Failed to batch mark duplicates: {e}")
+            raise
+
     def find_duplicates_by_hash(self, hash_value: str) -> List[Dict[str, Any]]:
         """Find files with same hash.
 
@@ -191,7 +250,7 @@ class FileRepository:
             List of files with matching hash
         """
         try:
-            cursor = self.db.execute(
+            rows = self.db.cached_fetchall(
                 'SELECT * FROM files WHERE hash = ? ORDER BY path',
                 (hash_value,)
             )
@@ -205,7 +264,7 @@ class FileRepository:
                     'is_duplicate': bool(row[9]),
                     'duplicate_of': row[10]
                 }
-                for row in cursor.fetchall()
+                for row in rows
             ]
         except Exception as e:
             print(f"[ERROR] Failed to find duplicates by hash: {e}")
@@ -221,7 +280,7 @@ class FileRepository:
             List of files with matching size
         """
         try:
-            cursor = self.db.execute(
+            rows = self.db.cached_fetchall(
                 'SELECT * FROM files WHERE size = ? ORDER BY path',
                 (size,)
             )
@@ -235,7 +294,7 @@ class FileRepository:
                     'is_duplicate': bool(row[9]),
                     'duplicate_of': row[10]
                 }
-                for row in cursor.fetchall()
+                for row in rows
             ]
         except Exception as e:
             print(f"[ERROR] Failed to find duplicates by size: {e}")
@@ -248,7 +307,7 @@ class FileRepository:
             List of all files
         """
         try:
-            cursor = self.db.execute('SELECT * FROM files ORDER BY path')
+            rows = self.db.cached_fetchall('SELECT * FROM files ORDER BY path')
             return [
                 {
                     'id': row[0],
@@ -259,12 +318,84 @@ class FileRepository:
                     'is_duplicate': bool(row[9]),
                     'duplicate_of': row[10]
                 }
-                for row in cursor.fetchall()
+                for row in rows
             ]
         except Exception as e:
             print(f"[ERROR] Failed to get all files: {e}")
             raise
 
+    def get_files(self, file_ids: List[int]) -> List[Dict[str, Any]]:
+        """Get several files by ID.
+
+        Args:
+            file_ids: File IDs
+
+        Returns:
+            Files found, in the order of file_ids
+        """
+        if not file_ids:
+            return []
+
+        try:
+            found: Dict[int, Dict[str, Any]] = {}
+            # Stay under SQLite's default limit of 999 bound parameters
+            for start in range(0, len(file_ids), 900):
+                chunk = file_ids[start:start + 900]
+                placeholders = ', '.join('?' * len(chunk))
+                rows = self.db.execute(
+                    f'SELECT * FROM files WHERE id IN ({placeholders})',
+                    tuple(chunk)
+                ).fetchall()
+                for row in rows:
+                    found[row[0]] = {
+                        'id': row[0],
+                        'path': row[1],
+                        'size': row[2],
+                        'modified_time': row[3],
+                        'hash': row[8],
+                        'is_duplicate': bool(row[9]),
+                        'duplicate_of': row[10]
+                    }
+            return [found[file_id] for file_id in file_ids if file_id in found]
+        except Exception as e:
+            print(f"[ERROR] Failed to get files: {e}")
+            raise
+
+    def iter_hash_records(self, batch_size: int = 10000,
+                          hashed_only: bool = True) -> Iterator[Tuple[int, int, Optional[str]]]:
+        """Stream (id, size, hash) for every file without loading them all.
+
+        Args:
+            batch_size: Rows fetched per round trip
+            hashed_only: Skip files that have no hash yet
+
+        Yields:
+            (file_id, size, hash) tuples
+        """
+        query = 'SELECT id, size, hash FROM files'
+        if hashed_only:
+            query += " WHERE hash IS NOT NULL AND hash != ''"
+        try:
+            cursor = self.db.execute(query)
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    return
+                for row in rows:
+                    yield row[0], row[1], row[2]
+        except Exception as e:
+            print(f"[ERROR] Failed to read hash records: {e}")
+            raise
+
+    def max_hash_bytes(self) -> int:
+        """Width in bytes of the longest stored hex digest (0 if none)."""
+        try:
+            cursor = self.db.execute('SELECT MAX(length(hash)) FROM files')
+            return (cursor.fetchone()[0] or 0) // 2
+        except Exception as e:
+            print(f"[ERROR] Failed to get hash width: {e}")
+            raise
+
     def delete_file(self, file_id: int) -> bool:
         """Delete file from database.
 
@@ -291,7 +422,7 @@ class FileRepository:
             List of duplicate files
         """
         try:
-            cursor = self.db.execute(
+            rows = self.db.cached_fetchall(
                 'SELECT * FROM files WHERE is_duplicate = TRUE ORDER BY path'
             )
             return [
@@ -304,7 +435,7 @@ class FileRepository:
                     'is_duplicate': bool(row[9]),
                     'duplicate_of': row[10]
                 }
-                for row in cursor.fetchall()
+                for row in rows
             ]
         except Exception as e:
             print(f"[ERROR] Failed to get duplicate files: {e}")
@@ -317,7 +448,7 @@ class FileRepository:
             List of original files
         """
         try:
-            cursor = self.db.execute(
+            rows = self.db.cached_fetchall(
                 'SELECT * FROM files WHERE is_duplicate = FALSE ORDER BY path'
             )
             return [
@@ -330,7 +461,7 @@ class FileRepository:
                     'is_duplicate': bool(row[9]),
                     'duplicate_of': row[10]
                 }
-                for row in cursor.fetchall()
+                for row in rows
             ]
         except Exception as e:
             print(f"[ERROR] Failed to get original files: {e}")
@@ -343,8 +474,8 @@ class FileRepository:
             Total file count
         """
         try:
-            cursor = self.db.execute('SELECT COUNT(*) FROM files')
-            return cursor.fetchone()[0]
+            rows = self.db.cached_fetchall('SELECT COUNT(*) FROM files')
+            return rows[0][0]
         except Exception as e:
             print(f"[ERROR] Failed to count files: {e}")
             raise
@@ -356,8 +487,8 @@ class FileRepository:
             Duplicate file count
         """
         try:
-            cursor = self.db.execute('SELECT COUNT(*) FROM files WHERE is_duplicate = TRUE')
-            return cursor.fetchone()[0]
+            rows = self.db.cached_fetchall('SELECT COUNT(*) FROM files WHERE is_duplicate = TRUE')
+            return rows[0][0]
         except Exception as e:
             print(f"[ERROR] Failed to count duplicates: {e}")
             raise
@@ -400,6 +531,51 @@ class FileRepository:
             print(f"[ERROR] Failed to batch add files: {e}")
             raise
 
+    def batch_update_perceptual_hashes(
+            self, hashes: List[Tuple[int, Optional[int], Optional[int]]]) -> int:
+        """Store image fingerprints for many files.
+
+        Args:
+            hashes: (file_id, phash, dhash) tuples of unsigned 64-bit hashes
+
+        Returns:
+            Number of files updated
+        """
+        if not hashes:
+            return 0
+
+        try:
+            data = [
+                (_hash_to_column(phash), _hash_to_column(dhash), file_id)
+                for file_id, phash, dhash in hashes
+            ]
+            self.db.executemany('UPDATE files SET phash = ?, dhash = ? WHERE id = ?', data)
+            return len(data)
+        except Exception as e:  # pylint: disable=broad-exception-caught
+            print(f"[ERROR] Failed to update perceptual hashes: {e}")
+            raise
+
+    def get_perceptual_hashes(self, column: str = 'phash') -> List[Tuple[int, int]]:
+        """Get the image fingerprints stored so far.
+
+        Args:
+            column: 'phash' or 'dhash'
+
+        Returns:
+            List of (file_id, hash) tuples with unsigned hashes
+        """
+        if column not in PERCEPTUAL_HASH_COLUMNS:
+            raise ValueError(f"Unknown perceptual hash column: {column}")
+
+        try:
+            rows = self.db.execute(
+                f'SELECT id, {column} FROM files WHERE {column} IS NOT NULL ORDER BY id'
+            ).fetchall()
+            return [(row[0], _hash_from_column(row[1])) for row in rows]
+        except Exception as e:
+            print(f"[ERROR] Failed to get perceptual hashes: {e}")
+            raise
+
     def clear_all_files(self) -> None:
         """Clear all files from database."""
         try:
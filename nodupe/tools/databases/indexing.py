@@ -16,7 +16,7 @@ Dependencies:
 """
 
 import sqlite3
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple, Union
 
 
 class IndexingError(Exception):
@@ -242,11 +242,16 @@ class DatabaseIndexing:
         except sqlite3.Error as e:
             raise IndexingError(f"Failed to get index info for {index_name}: {e}") from e
 
-    def analyze_query(self, query: str) -> List[Dict[str, Any]]:
+    def analyze_query(
+        self,
+        query: str,
+        params: Optional[Union[Tuple[Any, ...], Dict[str, Any]]] = None
+    ) -> List[Dict[str, Any]]:
         """Analyze query execution plan.
 
         Args:
             query: SQL query to analyze
+            params: Parameters for placeholders in the query
 
         Returns:
             List of execution plan steps
@@ -256,7 +261,7 @@ class DatabaseIndexing:
         """
         try:
             cursor = self.connection.cursor()
-            cursor.execute(f"EXPLAIN QUERY PLAN {query}")
+            cursor.execute(f"EXPLAIN QUERY PLAN {query}", params or ())
 
             plan: List[Dict[str, Any]] = []
             rows = cursor.fetchall()
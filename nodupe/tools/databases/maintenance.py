@@ -0,0 +1,530 @@
+# SPDX-License-Identifier: Apache-2.0
+# Copyright (c) 2025 Allaun
+
+"""Database Maintenance Module.
+
+Automatic maintenance scheduling and index advice using standard library only.
+
+Key Features:
+    - Per-table write churn tracking (rows inserted/updated/deleted)
+    - PRAGMA optimize and bounded ANALYZE after bulk loads
+    - Incremental vacuum after large deletes (auto_vacuum=INCREMENTAL)
+    - Covering index advice from slow-query fingerprints
+
+Dependencies:
+    - sqlite3 (standard library)
+    - threading (standard library)
+    - re (standard library)
+"""
+
+from __future__ import annotations
+
+import logging
+import re
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from .indexing import DatabaseIndexing, IndexingError, create_covering_index
+from .query_cache import extract_write_tables
+from .query_stats import QueryStatistics
+
+logger = logging.getLogger(__name__)
+
+AUTO_VACUUM_MODES = {0: 'none', 1: 'full', 2: 'incremental'}
+
+_SELECT_RE = re.compile(
+    r'^select (?P<columns>.+?) from (?P<table>[a-z_][a-z0-9_]*)'
+    r'(?: where (?P<where>.+?))?'
+    r'(?: group by (?P<group>.+?))?'
+    r'(?: order by (?P<order>.+?))?'
+    r'(?: limit .+)?$'
+)
+_TERM_RE = re.compile(
+    r'^(?P<column>[a-z_][a-z0-9_]*) ?(?P<op>==|=|<=|>=|<>|<|>|is\b|in\b|between\b|like\b)'
+)
+_EQUALITY_OPS = {'=', '==', 'is', 'in'}
+_MAX_INDEX_COLUMNS = 6
+
+
+class MaintenanceError(Exception):
+    """Database maintenance operation error"""
+
+
+class MaintenanceScheduler:
+    """Run database maintenance when write churn crosses thresholds.
+
+    Writes executed through DatabaseConnection are reported with
+    note_write(); after each commit run_if_due() checks the counters and
+    runs whichever tasks are due:
+
+    - optimize: PRAGMA optimize once enough rows changed in total
+    - analyze: bounded ANALYZE of tables whose churn is large relative
+      to their size, so plans do not go stale after bulk loads
+    - incremental_vacuum: return free pages to the OS once deletes leave
+      enough of the file on the freelist
+
+    Counters are cheap to update; the checks themselves run at most once
+    per min_interval seconds.
+    """
+
+    def __init__(
+        self,
+        connection: Any,
+        optimize_rows: int = 1000,
+        analyze_fraction: float = 0.2,
+        analyze_min_rows: int = 500,
+        vacuum_free_fraction: float = 0.1,
+        vacuum_min_pages: int = 256,
+        analysis_limit: int = 1000,
+        min_interval: float = 30.0
+    ) -> None:
+        """Initialize the scheduler.
+
+        Args:
+            connection: DatabaseConnection to maintain
+            optimize_rows: Total changed rows that trigger PRAGMA optimize
+            analyze_fraction: Per-table churn, relative to its row count,
+                that triggers ANALYZE of that table
+            analyze_min_rows: Minimum per-table churn before ANALYZE
+            vacuum_free_fraction: Freelist share of the file that triggers
+                an incremental vacuum
+            vacuum_min_pages: Minimum free pages before vacuuming
+            analysis_limit: PRAGMA analysis_limit used to bound ANALYZE cost
+            min_interval: Minimum seconds between automatic checks
+        """
+        self.connection = connection
+        self.optimize_rows = optimize_rows
+        self.analyze_fraction = analyze_fraction
+        self.analyze_min_rows = analyze_min_rows
+        self.vacuum_free_fraction = vacuum_free_fraction
+        self.vacuum_min_pages = vacuum_min_pages
+        self.analysis_limit = analysis_limit
+        self.min_interval = min_interval
+
+        self._churn: Dict[str, int] = {}
+        self._deleted = 0
+        self._since_optimize = 0
+        self._schema_changed = False
+        self._last_check = 0.0
+        self._history: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+        self._run_lock = threading.Lock()
+
+    def note_write(self, query: str, rows: int) -> None:
+        """Record a write statement.
+
+        Args:
+            query: SQL statement that was executed
+            rows: Rows affected (cursor.rowcount)
+        """
+        tables = extract_write_tables(query)
+        if tables is None:
+            with self._lock:
+                self._schema_changed = True
+            return
+        if not tables:
+            return
+
+        rows = max(rows, 1)
+        is_delete = query.lstrip()[:6].lower() == 'delete'
+        with self._lock:
+            for table in tables:
+                self._churn[table] = self._churn.get(table, 0) + rows
+            self._since_optimize += rows
+            if is_delete:
+                self._deleted += rows
+
+    def get_churn(self) -> Dict[str, int]:
+        """Get rows changed per table since each table was last analyzed."""
+        with self._lock:
+            return dict(self._churn)
+
+    def run_if_due(self) -> Optional[Dict[str, Any]]:
+        """Run due maintenance tasks unless checked recently or already running.
+
+        Returns:
+            Result of run() if a check was made, otherwise None
+        """
+        now = time.monotonic()
+        with self._lock:
+            idle = not (self._since_optimize or self._deleted or self._schema_changed)
+            if idle or now - self._last_check < self.min_interval:
+                return None
+            self._last_check = now
+
+        if not self._run_lock.acquire(blocking=False):
+            return None
+        try:
+            return self._run(force=False)
+        except MaintenanceError as e:
+            logger.warning(f"Automatic database maintenance failed: {e}")
+            return None
+        finally:
+            self._run_lock.release()
+
+    def run(self, force: bool = False) -> Dict[str, Any]:
+        """Run maintenance now.
+
+        Args:
+            force: Run every task regardless of thresholds
+
+        Returns:
+            Dictionary with the tasks run and their details
+
+        Raises:
+            MaintenanceError: If a maintenance statement fails
+        """
+        with self._run_lock:
+            return self._run(force)
+
+    def _run(self, force: bool) -> Dict[str, Any]:
+        """Run due (or all) tasks; caller holds the run lock."""
+        conn = self.connection.get_connection()
+        if conn.in_transaction:
+            # Never interleave maintenance with a caller's open transaction
+            return {'tasks': [], 'skipped': 'transaction open'}
+
+        start = time.perf_counter()
+        with self._lock:
+            churn = dict(self._churn)
+            since_optimize = self._since_optimize
+            deleted = self._deleted
+            schema_changed = self._schema_changed
+
+        tasks: List[str] = []
+        details: Dict[str, Any] = {}
+        try:
+            stale = self._stale_tables(conn, churn, force)
+            if stale:
+                conn.execute(f'PRAGMA analysis_limit={int(self.analysis_limit)}')
+                for table in stale:
+                    conn.execute(f'ANALYZE "{table}"')
+                conn.commit()
+                tasks.append('analyze')
+                details['analyzed'] = stale
+
+            if force or schema_changed or since_optimize >= self.optimize_rows:
+                conn.execute('PRAGMA optimize')
+                tasks.append('optimize')
+
+            if force or deleted:
+                freed = self._incremental_vacuum(conn, force)
+                if freed is not None:
+                    tasks.append('incremental_vacuum')
+                    details['pages_freed'] = freed
+        except sqlite3.Error as e:
+            raise MaintenanceError(f"Maintenance failed: {e}") from e
+
+        with self._lock:
+            for table in stale:
+                self._churn[table] = max(0, self._churn.get(table, 0) - churn.get(table, 0))
+            if 'optimize' in tasks:
+                self._since_optimize = max(0, self._since_optimize - since_optimize)
+                self._schema_changed = False
+            if force or deleted:
+                self._deleted = max(0, self._deleted - deleted)
+
+        result = {
+            'tasks': tasks,
+            'elapsed_ms': round((time.perf_counter() - start) * 1000.0, 3),
+            **details
+        }
+        if tasks:
+            logger.info(f"Database maintenance ran {', '.join(tasks)}")
+            with self._lock:
+                self._history.append(dict(result, finished_at=int(time.time())))
+                del self._history[:-50]
+        return result
+
+    def _stale_tables(self, conn: sqlite3.Connection, churn: Dict[str, int],
+                      force: bool) -> List[str]:
+        """Get tables whose churn warrants a fresh ANALYZE."""
+        if force:
+            return sorted(_user_tables(conn))
+
+        stale = []
+        existing = _user_tables(conn)
+        for table, changed in sorted(churn.items()):
+            if table not in existing or changed < self.analyze_min_rows:
+                continue
+            rows = conn.execute(f'SELECT COUNT(*) FROM "{table}"').fetchone()[0]
+            if changed >= self.analyze_fraction * max(rows, 1):
+                stale.append(table)
+        return stale
+
+    def _incremental_vacuum(self, conn: sqlite3.Connection, force: bool) -> Optional[int]:
+        """Release free pages if enough of the file is on the freelist.
+
+        Returns:
+            Pages released, or None if nothing was done
+        """
+        mode = conn.execute('PRAGMA auto_vacuum').fetchone()[0]
+        if mode != 2:
+            return None
+        free = conn.execute('PRAGMA freelist_count').fetchone()[0]
+        total = conn.execute('PRAGMA page_count').fetchone()[0]
+        if not force and (free < self.vacuum_min_pages
+                          or free < self.vacuum_free_fraction * max(total, 1)):
+            return None
+        if free == 0:
+            return None
+        # The pragma frees one page per step; the sqlite3 module steps it
+        # only once, so run it through executescript() to completion
+        conn.executescript('PRAGMA incremental_vacuum;')
+        # In WAL mode the main file only shrinks once the log is checkpointed
+        conn.execute('PRAGMA wal_checkpoint(TRUNCATE)').fetchall()
+        return free - conn.execute('PRAGMA freelist_count').fetchone()[0]
+
+    def enable_incremental_vacuum(self) -> Dict[str, Any]:
+        """Switch an existing database to auto_vacuum=INCREMENTAL.
+
+        Requires a one-time full VACUUM, which rewrites the whole file.
+
+        Returns:
+            Dictionary with the previous and current mode
+
+        Raises:
+            MaintenanceError: If the conversion fails
+        """
+        conn = self.connection.get_connection()
+        try:
+            before = conn.execute('PRAGMA auto_vacuum').fetchone()[0]
+            if before != 2:
+                conn.commit()
+                conn.execute('PRAGMA auto_vacuum=INCREMENTAL')
+                conn.execute('VACUUM')
+            after = conn.execute('PRAGMA auto_vacuum').fetchone()[0]
+        except sqlite3.Error as e:
+            raise MaintenanceError(f"Failed to enable incremental vacuum: {e}") from e
+        return {'before': AUTO_VACUUM_MODES.get(before), 'after': AUTO_VACUUM_MODES.get(after)}
+
+    def get_status(self) -> Dict[str, Any]:
+        """Get churn counters, file usage and recent maintenance runs."""
+        conn = self.connection.get_connection()
+        page_count = conn.execute('PRAGMA page_count').fetchone()[0]
+        page_size = conn.execute('PRAGMA page_size').fetchone()[0]
+        free = conn.execute('PRAGMA freelist_count').fetchone()[0]
+        mode = conn.execute('PRAGMA auto_vacuum').fetchone()[0]
+        with self._lock:
+            return {
+                'churn': dict(self._churn),
+                'rows_since_optimize': self._since_optimize,
+                'rows_deleted': self._deleted,
+                'auto_vacuum': AUTO_VACUUM_MODES.get(mode, str(mode)),
+                'file_bytes': page_count * page_size,
+                'free_bytes': free * page_size,
+                'history': list(self._history),
+            }
+
+
+class IndexAdvisor:
+    """Propose covering indexes for expensive statements.
+
+    Uses the fingerprints and query plans collected by QueryStatistics:
+    single-table SELECTs whose plan scans the table or sorts through a
+    temporary B-tree get an index on their equality columns, then one
+    range or ORDER BY column, then the selected columns so the query
+    can be answered from the index alone.
+    """
+
+    def __init__(self, connection: Any, statistics: QueryStatistics) -> None:
+        """Initialize the advisor.
+
+        Args:
+            connection: DatabaseConnection the statistics were collected on
+            statistics: Collected query statistics
+        """
+        self.connection = connection
+        self.statistics = statistics
+
+    def advise(self, min_total_ms: float = 100.0, min_calls: int = 1) -> List[Dict[str, Any]]:
+        """Build index proposals ranked by the time their statements cost.
+
+        Args:
+            min_total_ms: Ignore statements cheaper than this in total
+            min_calls: Ignore statements run fewer times than this
+
+        Returns:
+            List of proposals with 'index_name', 'table', 'where_columns',
+            'select_columns', 'fingerprint', 'total_ms' and 'reason'
+        """
+        conn = self.connection.get_connection()
+        indexing = DatabaseIndexing(conn)
+        proposals: Dict[Tuple[str, Tuple[str, ...]], Dict[str, Any]] = {}
+
+        for stmt in self.statistics.report(top=0)['statements']:
+            if stmt['total_ms'] < min_total_ms or stmt['calls'] < min_calls:
+                continue
+            plan = stmt['plan'] or self._plan_for(indexing, stmt['fingerprint'])
+            reason = _plan_problem(plan)
+            if reason is None:
+                continue
+
+            shape = _parse_select(stmt['fingerprint'])
+            if shape is None:
+                continue
+            table, where_columns, select_columns = shape
+
+            columns = _table_columns(conn, table)
+            if not columns or not set(where_columns + select_columns) <= columns:
+                continue
+            if _has_index_prefix(indexing, table, where_columns):
+                continue
+
+            key_columns = tuple(where_columns + [c for c in select_columns if c not in where_columns])
+            if len(key_columns) > _MAX_INDEX_COLUMNS:
+                # Too wide to cover; index the filter columns only
+                select_columns = []
+                key_columns = tuple(where_columns)
+            if not key_columns:
+                continue
+
+            key = (table, key_columns)
+            if key in proposals:
+                proposals[key]['total_ms'] += stmt['total_ms']
+                continue
+            proposals[key] = {
+                'index_name': _index_name(table, key_columns),
+                'table': table,
+                'where_columns': where_columns,
+                'select_columns': select_columns,
+                'fingerprint': stmt['fingerprint'],
+                'total_ms': stmt['total_ms'],
+                'reason': reason,
+            }
+
+        return sorted(proposals.values(), key=lambda p: p['total_ms'], reverse=True)
+
+    def apply(self, proposals: List[Dict[str, Any]]) -> List[str]:
+        """Create the proposed indexes.
+
+        Args:
+            proposals: Proposals returned by advise()
+
+        Returns:
+            Names of the indexes created
+
+        Raises:
+            MaintenanceError: If an index cannot be created
+        """
+        conn = self.connection.get_connection()
+        created = []
+        for proposal in proposals:
+            try:
+                create_covering_index(
+                    conn,
+                    proposal['index_name'],
+                    proposal['table'],
+                    proposal['where_columns'],
+                    proposal['select_columns']
+                )
+                conn.execute(f'ANALYZE "{proposal["table"]}"')
+                conn.commit()
+            except (IndexingError, sqlite3.Error) as e:
+                raise MaintenanceError(
+                    f"Failed to create index {proposal['index_name']}: {e}"
+                ) from e
+            logger.info(f"Created index {proposal['index_name']} on {proposal['table']}")
+            created.append(proposal['index_name'])
+        return created
+
+    @staticmethod
+    def _plan_for(indexing: DatabaseIndexing, fingerprint: str) -> Optional[List[str]]:
+        """Get a plan for a fingerprint that was never captured as slow."""
+        params = (None,) * fingerprint.count('?')
+        try:
+            return [step['detail'] for step in indexing.analyze_query(
+                fingerprint.replace('in (?+)', 'in (?)'), params
+            )]
+        except IndexingError:
+            return None
+
+
+def _user_tables(conn: sqlite3.Connection) -> set:
+    """Get names of non-internal tables."""
+    return {
+        row[0] for row in conn.execute(
+            "SELECT name FROM sqlite_master WHERE type='table' AND name NOT LIKE 'sqlite_%'"
+        )
+    }
+
+
+def _table_columns(conn: sqlite3.Connection, table: str) -> set:
+    """Get column names of a table (lowercased)."""
+    return {row[1].lower() for row in conn.execute(f'PRAGMA table_info("{table}")')}
+
+
+def _plan_problem(plan: Optional[List[str]]) -> Optional[str]:
+    """Describe what an index would fix in a query plan, if anything."""
+    if not plan:
+        return None
+    for detail in plan:
+        upper = detail.upper()
+        if upper.startswith('SCAN ') and 'COVERING INDEX' not in upper:
+            return f"full table scan ({detail})"
+    for detail in plan:
+        if 'TEMP B-TREE' in detail.upper():
+            return f"sort without index ({detail})"
+    return None
+
+
+def _parse_select(fingerprint: str) -> Optional[Tuple[str, List[str], List[str]]]:
+    """Extract (table, index key columns, selected columns) from a simple SELECT."""
+    if ' join ' in fingerprint or ' union ' in fingerprint or '(select' in fingerprint:
+        return None
+    match = _SELECT_RE.match(fingerprint)
+    if match is None:
+        return None
+
+    equality: List[str] = []
+    ranged: List[str] = []
+    where = match.group('where')
+    if where:
+        if ' or ' in f' {where} ':
+            return None
+        for term in re.split(r' and (?![^()]*\))', where):
+            term_match = _TERM_RE.match(term.strip().strip('()'))
+            if term_match is None:
+                return None
+            column = term_match.group('column')
+            if term_match.group('op') in _EQUALITY_OPS:
+                equality.append(column)
+            else:
+                ranged.append(column)
+
+    key = list(dict.fromkeys(equality))
+    trailing = ranged[:1]
+    order = match.group('order') or match.group('group')
+    if not trailing and order:
+        first = order.split(',')[0].split()[0]
+        if re.fullmatch(r'[a-z_][a-z0-9_]*', first):
+            trailing = [first]
+    key += [c for c in trailing if c not in key]
+
+    columns = match.group('columns')
+    if columns.strip() == '*' or '(' in columns:
+        select_columns: List[str] = []
+    else:
+        select_columns = [c.strip().split(' as ')[0].strip() for c in columns.split(',')]
+        if not all(re.fullmatch(r'[a-z_][a-z0-9_]*', c) for c in select_columns):
+            select_columns = []
+    return match.group('table'), key, select_columns
+
+
+def _has_index_prefix(indexing: DatabaseIndexing, table: str, columns: List[str]) -> bool:
+    """Check whether an existing index already leads with the given columns."""
+    if not columns:
+        return False
+    for index in indexing.get_indexes(table):
+        index_columns = [c['name'].lower() for c in indexing.get_index_info(index['name'])
+                         if c.get('name')]
+        if index_columns[:len(columns)] == columns:
+            return True
+    return False
+
+
+def _index_name(table: str, columns: Tuple[str, ...]) -> str:
+    """Build a deterministic index name."""
+    return f"idx_auto_{table}_{'_'.join(columns)}"[:64]
@@ -5,6 +5,8 @@
 
 from typing import Any, Dict, List, Optional, Tuple
 
+from .query_stats import QueryStatistics
+
 
 class DatabaseQuery:
     """Database query functionality."""
@@ -80,9 +82,20 @@ class DatabasePerformance:
         }
 
     def get_metrics(self) -> Dict[str, Any]:
-        """Get performance metrics."""
+        """Get performance metrics.
+
+        Includes the per-statement report when statistics are enabled on
+        the underlying DatabaseConnection.
+        """
+        metrics = self._metrics.copy()
+        connection = getattr(self.db, 'connection', self.db)
+        statistics = getattr(connection, 'statistics', None)
+        if isinstance(statistics, QueryStatistics):
+            report = statistics.report()
+            metrics['statements'] = report['statements']
+            metrics['slow_queries'] = report['slow_queries']
         # Return in expected format with 'metrics' or 'error' key
-        return {'metrics': self._metrics.copy()}
+        return {'metrics': metrics}
 
     def record_query(self, query_time: float) -> None:
         """Record query execution time."""
@@ -8,33 +8,87 @@ Key Features:
     - Thread-safe operations
     - Cache size limits and eviction policies
     - Query normalization and deduplication
+    - Table-level invalidation via per-table generation counters
     - Standard library only (no external dependencies)
 
 Dependencies:
     - threading (standard library)
     - time (standard library)
     - typing (standard library)
-    - hashlib (standard library)
-    - json (standard library)
+    - re (standard library)
+    - functools (standard library)
 """
 
+import re
 import threading
 import time
-from typing import Optional, Dict, Any, Tuple, List
+from functools import lru_cache
+from typing import Optional, Dict, Any, Tuple, List, Callable, FrozenSet, Iterable, Union
 from collections import OrderedDict
-import hashlib
-import json
+
+# Cache key: (normalized query, hashable parameter key)
+CacheKey = Tuple[str, Any]
+# Table dependencies of an entry: ((table, generation), ...)
+TableGenerations = Tuple[Tuple[str, int], ...]
+
+_READ_TABLES_RE = re.compile(r'\b(?:from|join)\s+["`\[]?([a-z_][a-z0-9_]*)')
+_WRITE_TABLES_RE = re.compile(
+    r'^\s*(?:insert(?:\s+or\s+\w+)?\s+into|replace\s+into|update(?:\s+or\s+\w+)?|delete\s+from)'
+    r'\s+["`\[]?([a-z_][a-z0-9_]*)'
+)
+_SCHEMA_CHANGE_RE = re.compile(r'^\s*(?:drop|alter|create)\b')
 
 
 class QueryCacheError(Exception):
     """Query cache operation error"""
 
 
+@lru_cache(maxsize=2048)
+def _normalize_query(query: str) -> str:
+    """Collapse whitespace and lowercase a query (memoized per query text)."""
+    return ' '.join(query.split()).lower()
+
+
+@lru_cache(maxsize=2048)
+def extract_read_tables(query: str) -> FrozenSet[str]:
+    """Get the tables a SELECT reads from.
+
+    Args:
+        query: SQL query
+
+    Returns:
+        Set of table names referenced by FROM/JOIN clauses
+    """
+    return frozenset(_READ_TABLES_RE.findall(_normalize_query(query)))
+
+
+@lru_cache(maxsize=2048)
+def extract_write_tables(query: str) -> Optional[FrozenSet[str]]:
+    """Get the tables a statement modifies.
+
+    Args:
+        query: SQL statement
+
+    Returns:
+        Set of modified tables, an empty set for read-only statements, or
+        None for schema changes that may affect any table
+    """
+    normalized = _normalize_query(query)
+    if _SCHEMA_CHANGE_RE.match(normalized):
+        return None
+    return frozenset(_WRITE_TABLES_RE.findall(normalized))
+
+
 class QueryCache:
     """Handle query result caching operations.
 
     Provides caching of query results with validation, TTL expiration,
     and configurable cache size limits.
+
+    Every entry records the generation of each table it was computed from.
+    Writes bump the generation of the tables they touch, which makes every
+    dependent entry stale in O(1) without scanning the cache; stale entries
+    are dropped lazily the next time they are looked up.
     """
 
     def __init__(
@@ -51,14 +105,16 @@ class QueryCache:
         self.max_size = max_size
         self.ttl_seconds = ttl_seconds
 
-        # Cache storage: query_key -> (result, timestamp)
-        self._cache: OrderedDict[str, Tuple[Any, float]] = OrderedDict()
+        # Cache storage: query_key -> (result, timestamp, table generations)
+        self._cache: OrderedDict[CacheKey, Tuple[Any, float, TableGenerations]] = OrderedDict()
+        self._generations: Dict[str, int] = {}
         self._lock = threading.RLock()
         self._stats = {
             'hits': 0,
             'misses': 0,
             'evictions': 0,
-            'insertions': 0
+            'insertions': 0,
+            'invalidations': 0
         }
 
     def get_result(self, query: str, params: Optional[Dict[str, Any]] = None) -> Optional[Any]:
@@ -74,11 +130,12 @@ class QueryCache:
         with self._lock:
             query_key = self._generate_key(query, params)
 
-            if query_key not in self._cache:
+            entry = self._cache.get(query_key)
+            if entry is None:
                 self._stats['misses'] += 1
                 return None
 
-            result, timestamp = self._cache[query_key]
+            result, timestamp, depends_on = entry
 
             # Check if entry is expired
             if time.monotonic() - timestamp > self.ttl_seconds:
@@ -86,34 +143,154 @@ class QueryCache:
                 self._stats['misses'] += 1
                 return None
 
+            # Check if any table it was computed from has been written since
+            if not self._is_current(depends_on):
+                del self._cache[query_key]
+                self._stats['invalidations'] += 1
+                self._stats['misses'] += 1
+                return None
+
+            self._cache.move_to_end(query_key, last=True)
             self._stats['hits'] += 1
             return result
 
-    def set_result(self, query: str, params: Optional[Dict[str, Any]] = None, result: Any = None) -> None:
+    def set_result(
+        self,
+        query: str,
+        params: Optional[Dict[str, Any]] = None,
+        result: Any = None,
+        tables: Optional[Iterable[str]] = None,
+        generations: Optional[TableGenerations] = None
+    ) -> None:
         """Set result for a query in cache.
 
         Args:
             query: Query string
             params: Query parameters
             result: Query result to cache
+            tables: Tables the result depends on (None = parsed from the query)
+            generations: Table generations captured before the result was
+                computed (see snapshot()); defaults to the current ones
         """
         with self._lock:
             query_key = self._generate_key(query, params)
 
+            if generations is None:
+                generations = self.snapshot(
+                    extract_read_tables(query) if tables is None else tables
+                )
+            elif not self._is_current(generations):
+                # A write landed while the result was being computed
+                return
+
             # Remove oldest entry if at max size
-            if len(self._cache) >= self.max_size:
+            if query_key not in self._cache and len(self._cache) >= self.max_size:
                 self._cache.popitem(last=False)
                 self._stats['evictions'] += 1
 
             # Store with current timestamp
             timestamp = time.monotonic()
-            self._cache[query_key] = (result, timestamp)
+            self._cache[query_key] = (result, timestamp, generations)
 
             # Move to end to mark as most recently used
             self._cache.move_to_end(query_key, last=True)
 
             self._stats['insertions'] += 1
 
+    def get_or_compute(
+        self,
+        query: str,
+        params: Optional[Union[Dict[str, Any], Tuple[Any, ...]]],
+        compute: Callable[[], Any],
+        tables: Optional[Iterable[str]] = None
+    ) -> Any:
+        """Return a cached result, computing and caching it on a miss.
+
+        Table generations are captured before compute() runs, so a result
+        that raced with a write is returned but never cached.
+
+        Args:
+            query: Query string
+            params: Query parameters
+            compute: Callable producing the result on a miss
+            tables: Tables the result depends on (None = parsed from the query)
+
+        Returns:
+            Query result
+        """
+        with self._lock:
+            query_key = self._generate_key(query, params)
+            entry = self._cache.get(query_key)
+            if entry is not None:
+                result, timestamp, depends_on = entry
+                if (time.monotonic() - timestamp <= self.ttl_seconds
+                        and self._is_current(depends_on)):
+                    self._cache.move_to_end(query_key, last=True)
+                    self._stats['hits'] += 1
+                    return result
+                del self._cache[query_key]
+                self._stats['invalidations'] += 1
+            self._stats['misses'] += 1
+            generations = self.snapshot(
+                extract_read_tables(query) if tables is None else tables
+            )
+
+        result = compute()
+        self.set_result(query, params, result, generations=generations)
+        return result
+
+    def snapshot(self, tables: Iterable[str]) -> TableGenerations:
+        """Capture the current generation of each table.
+
+        Args:
+            tables: Table names
+
+        Returns:
+            Tuple of (table, generation) pairs
+        """
+        with self._lock:
+            generations = self._generations
+            # '*' is bumped by invalidate_all() so in-flight results are dropped too
+            return tuple(
+                (table, generations.get(table, 0)) for table in sorted(set(tables))
+            ) + (('*', generations.get('*', 0)),)
+
+    def invalidate_tables(self, tables: Iterable[str]) -> None:
+        """Invalidate every entry that depends on any of the given tables.
+
+        Args:
+            tables: Table names that were modified
+        """
+        with self._lock:
+            for table in tables:
+                self._generations[table] = self._generations.get(table, 0) + 1
+
+    def note_write(self, query: str) -> Optional[FrozenSet[str]]:
+        """Invalidate the tables modified by a write statement.
+
+        Schema changes invalidate the whole cache.
+
+        Args:
+            query: SQL statement that was executed
+
+        Returns:
+            Tables invalidated, or None if the whole cache was invalidated
+        """
+        tables = extract_write_tables(query)
+        if tables is None:
+            self.invalidate_all()
+        elif tables:
+            self.invalidate_tables(tables)
+        return tables
+
+    def _is_current(self, depends_on: TableGenerations) -> bool:
+        """Check that no dependency has been written since it was captured."""
+        generations = self._generations
+        for table, generation in depends_on:
+            if generations.get(table, 0) != generation:
+                return False
+        return True
+
     def invalidate(self, query: str, params: Optional[Dict[str, Any]] = None) -> bool:
         """Invalidate cache entry for a query.
 
@@ -137,6 +314,7 @@ class QueryCache:
             # Count the number of entries being cleared
             num_entries = len(self._cache)
             self._cache.clear()
+            self._generations['*'] = self._generations.get('*', 0) + 1
             # Increment evictions by the number of entries that were cleared
             self._stats['evictions'] += num_entries
 
@@ -152,7 +330,7 @@ class QueryCache:
         with self._lock:
             keys_to_remove = []
             for key in self._cache.keys():
-                if key.startswith(prefix):
+                if key[0].startswith(prefix):
                     keys_to_remove.append(key)
 
             for key in keys_to_remove:
@@ -173,9 +351,10 @@ class QueryCache:
 
             # Collect keys to remove
             keys_to_remove = []
-            for query_key, (result, timestamp) in self._cache.items():
-                # Check TTL expiration
-                if current_time - timestamp > self.ttl_seconds:
+            for query_key, (result, timestamp, depends_on) in self._cache.items():
+                # Check TTL expiration and table generations
+                if (current_time - timestamp > self.ttl_seconds
+                        or not self._is_current(depends_on)):
                     keys_to_remove.append(query_key)
 
             # Remove stale entries
@@ -254,8 +433,9 @@ class QueryCache:
         with self._lock:
             # Rough estimate: query_key string + result + timestamp + overhead
             usage = 0
-            for query_key, (result, timestamp) in self._cache.items():
-                usage += len(query_key.encode('utf-8'))  # Query key
+            for query_key, (result, timestamp, depends_on) in self._cache.items():
+                usage += len(query_key[0].encode('utf-8'))  # Query key
+                usage += len(repr(query_key[1]))  # Parameter key
                 # Estimate result size (this is a rough approximation)
                 try:
                     result_str = str(result)
@@ -267,29 +447,40 @@ class QueryCache:
 
             return usage
 
-    def _generate_key(self, query: str, params: Optional[Dict[str, Any]] = None) -> str:
+    def _generate_key(
+        self,
+        query: str,
+        params: Optional[Union[Dict[str, Any], Tuple[Any, ...]]] = None
+    ) -> CacheKey:
         """Generate a unique cache key for a query and parameters.
 
+        The key is a (normalized query, parameter tuple) pair, so lookups
+        cost one memoized normalization and a tuple hash rather than
+        serializing and digesting the parameters.
+
         Args:
             query: Query string
-            params: Query parameters
+            params: Query parameters (mapping or positional sequence)
 
         Returns:
             Unique cache key
         """
-        # Normalize query (remove extra whitespace, convert to lowercase)
-        normalized_query = ' '.join(query.split()).lower()
-
-        # Create parameter string if params exist
-        if params:
-            # Sort parameters by key for consistency
-            sorted_params = sorted(params.items())
-            params_str = json.dumps(sorted_params, sort_keys=True, default=str)
-            # Create hash of parameters to keep key manageable
-            params_hash = hashlib.md5(params_str.encode()).hexdigest()
-            return f"{normalized_query}:{params_hash}"
+        normalized_query = _normalize_query(query)
+
+        if not params:
+            return (normalized_query, None)
+
+        if isinstance(params, dict):
+            params_key: Any = tuple(sorted(params.items()))
         else:
-            return f"{normalized_query}:none"
+            params_key = tuple(params)
+
+        try:
+            hash(params_key)
+        except TypeError:
+            # Unhashable values (lists, dicts) fall back to their repr
+            params_key = repr(params_key)
+        return (normalized_query, params_key)
 
     def clear_by_query_pattern(self, pattern: str) -> int:
         """Clear cache entries that match a query pattern.
@@ -303,9 +494,7 @@ class QueryCache:
         with self._lock:
             keys_to_remove = []
             for key in self._cache.keys():
-                # Extract query part from key (before the last colon)
-                query_part = key.rsplit(':', 1)[0] if ':' in key else key
-                if pattern.lower() in query_part.lower():
+                if pattern.lower() in key[0]:
                     keys_to_remove.append(key)
 
             for key in keys_to_remove:
@@ -323,7 +512,7 @@ class QueryCache:
         with self._lock:
             queries = []
             for key in self._cache.keys():
-                query_part = key.rsplit(':', 1)[0] if ':' in key else key
+                query_part = key[0]
                 if query_part not in queries:
                     queries.append(query_part)
             return queries
@@ -0,0 +1,563 @@
+# SPDX-License-Identifier: Apache-2.0
+# Copyright (c) 2025 Allaun
+
+"""Query statistics and slow-query log.
+
+Per-statement instrumentation for DatabaseConnection using only the
+standard library.
+
+Key Features:
+    - Normalized statement fingerprints (literals and IN-lists collapsed)
+    - Call counts, rows, total/max latency per fingerprint
+    - Log-bucketed latency histograms for p50/p99
+    - Slow-query log with EXPLAIN QUERY PLAN captured automatically
+    - Persistence to the database so reports survive the process
+
+Dependencies:
+    - threading (standard library)
+    - time (standard library)
+    - re (standard library)
+    - json (standard library)
+"""
+
+import json
+import math
+import re
+import sqlite3
+import threading
+import time
+from collections import deque
+from functools import lru_cache
+from typing import Any, Deque, Dict, List, Optional, Tuple, Union
+
+from .indexing import DatabaseIndexing, IndexingError
+
+# Four buckets per power of two (<19% relative error), 1us .. ~9.5h
+_BUCKETS_PER_OCTAVE = 4
+_NUM_BUCKETS = _BUCKETS_PER_OCTAVE * 35 + 1
+
+_STRING_LITERAL_RE = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_RE = re.compile(r"\b\d+(?:\.\d+)?\b")
+_IN_LIST_RE = re.compile(r"\bin\s*\(\s*\?(?:\s*,\s*\?)+\s*\)")
+
+SORT_KEYS = ('total', 'calls', 'p99', 'rows')
+
+
+class QueryStatsError(Exception):
+    """Query statistics operation error"""
+
+
+@lru_cache(maxsize=4096)
+def fingerprint(query: str) -> str:
+    """Normalize a statement so different literal values share one entry.
+
+    Args:
+        query: SQL statement
+
+    Returns:
+        Fingerprint with literals replaced by '?' and IN-lists collapsed
+    """
+    normalized = _STRING_LITERAL_RE.sub('?', query)
+    normalized = _NUMBER_RE.sub('?', normalized)
+    normalized = ' '.join(normalized.split()).lower()
+    return _IN_LIST_RE.sub('in (?+)', normalized)
+
+
+def _bucket_index(elapsed_ms: float) -> int:
+    """Map a latency to its histogram bucket."""
+    micros = elapsed_ms * 1000.0
+    if micros < 1.0:
+        return 0
+    return min(_NUM_BUCKETS - 1, int(math.log2(micros) * _BUCKETS_PER_OCTAVE) + 1)
+
+
+def _bucket_upper_ms(index: int) -> float:
+    """Upper latency bound of a histogram bucket in milliseconds."""
+    return (2.0 ** (index / _BUCKETS_PER_OCTAVE)) / 1000.0
+
+
+class StatementStats:
+    """Accumulated statistics for one statement fingerprint."""
+
+    __slots__ = ('calls', 'total_ms', 'max_ms', 'rows', 'histogram', 'plan')
+
+    def __init__(self) -> None:
+        """Initialize empty statement statistics."""
+        self.calls = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.rows = 0
+        self.histogram: List[int] = [0] * _NUM_BUCKETS
+        self.plan: Optional[List[str]] = None
+
+    def add(self, elapsed_ms: float, rows: int) -> None:
+        """Record one execution."""
+        self.calls += 1
+        self.total_ms += elapsed_ms
+        self.rows += rows
+        if elapsed_ms > self.max_ms:
+            self.max_ms = elapsed_ms
+        self.histogram[_bucket_index(elapsed_ms)] += 1
+
+    def merge(self, other: 'StatementStats') -> None:
+        """Fold another set of statistics for the same fingerprint into this one."""
+        self.calls += other.calls
+        self.total_ms += other.total_ms
+        self.rows += other.rows
+        self.max_ms = max(self.max_ms, other.max_ms)
+        for i, count in enumerate(other.histogram):
+            self.histogram[i] += count
+        if other.plan is not None:
+            self.plan = other.plan
+
+    def percentile(self, pct: float) -> float:
+        """Estimate a latency percentile from the histogram.
+
+        Args:
+            pct: Percentile in [0, 100]
+
+        Returns:
+            Latency in milliseconds (bucket upper bound, capped at the max)
+        """
+        if self.calls == 0:
+            return 0.0
+        target = max(1, math.ceil(self.calls * pct / 100.0))
+        seen = 0
+        for index, count in enumerate(self.histogram):
+            seen += count
+            if seen >= target:
+                return min(_bucket_upper_ms(index), self.max_ms)
+        return self.max_ms
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Summarize for reports."""
+        return {
+            'calls': self.calls,
+            'total_ms': round(self.total_ms, 3),
+            'mean_ms': round(self.total_ms / self.calls, 3) if self.calls else 0.0,
+            'p50_ms': round(self.percentile(50), 3),
+            'p99_ms': round(self.percentile(99), 3),
+            'max_ms': round(self.max_ms, 3),
+            'rows': self.rows,
+            'plan': self.plan,
+        }
+
+
+class QueryStatistics:
+    """Collect per-fingerprint statement statistics and a slow-query log.
+
+    Thread-safe; one instance is shared by every thread of a
+    DatabaseConnection.
+    """
+
+    def __init__(self, slow_query_ms: float = 100.0, slow_log_size: int = 100):
+        """Initialize query statistics.
+
+        Args:
+            slow_query_ms: Statements slower than this are logged with their plan
+            slow_log_size: Maximum number of slow-query log entries kept
+        """
+        self.slow_query_ms = slow_query_ms
+        self._stats: Dict[str, StatementStats] = {}
+        self._slow_log: Deque[Dict[str, Any]] = deque(maxlen=slow_log_size)
+        self._lock = threading.Lock()
+
+    def record(
+        self,
+        query: str,
+        elapsed_ms: float,
+        rows: int = 0,
+        connection: Optional[sqlite3.Connection] = None,
+        params: Optional[Union[Tuple[Any, ...], Dict[str, Any]]] = None
+    ) -> None:
+        """Record one statement execution.
+
+        Args:
+            query: SQL statement as executed
+            elapsed_ms: Wall time including row fetching
+            rows: Rows returned (reads) or affected (writes)
+            connection: Connection to capture the plan on for slow statements
+            params: Parameters the statement ran with
+        """
+        key = fingerprint(query)
+        with self._lock:
+            stats = self._stats.get(key)
+            if stats is None:
+                stats = self._stats[key] = StatementStats()
+            stats.add(elapsed_ms, rows)
+            is_slow = elapsed_ms >= self.slow_query_ms
+            need_plan = is_slow and stats.plan is None
+
+        if not is_slow:
+            return
+
+        plan = self._explain(connection, query, params) if need_plan else None
+        with self._lock:
+            if plan is not None:
+                stats.plan = plan
+            self._slow_log.append({
+                'fingerprint': key,
+                'query': query.strip()[:1000],
+                'elapsed_ms': round(elapsed_ms, 3),
+                'rows': rows,
+                'plan': stats.plan,
+                'recorded_at': int(time.time()),
+            })
+
+    @staticmethod
+    def _explain(
+        connection: Optional[sqlite3.Connection],
+        query: str,
+        params: Optional[Union[Tuple[Any, ...], Dict[str, Any]]]
+    ) -> Optional[List[str]]:
+        """Capture EXPLAIN QUERY PLAN details for a statement."""
+        if connection is None:
+            return None
+        try:
+            plan = DatabaseIndexing(connection).analyze_query(query, params)
+        except IndexingError:
+            return None
+        return [step['detail'] for step in plan]
+
+    def get_stats(self, query: str) -> Optional[Dict[str, Any]]:
+        """Get the summary for the fingerprint of a statement.
+
+        Args:
+            query: SQL statement (any literal values)
+
+        Returns:
+            Statement summary or None if never recorded
+        """
+        with self._lock:
+            stats = self._stats.get(fingerprint(query))
+            return stats.to_dict() if stats is not None else None
+
+    def report(self, top: int = 20, sort: str = 'total') -> Dict[str, Any]:
+        """Build a report of the most expensive statements.
+
+        Args:
+            top: Number of statements to include (0 = all)
+            sort: Ranking key ('total', 'calls', 'p99' or 'rows')
+
+        Returns:
+            Dictionary with 'totals', 'statements' and 'slow_queries'
+
+        Raises:
+            QueryStatsError: If sort is not a known key
+        """
+        if sort not in SORT_KEYS:
+            raise QueryStatsError(f"Unknown sort key: {sort}")
+
+        with self._lock:
+            statements = [
+                dict(stats.to_dict(), fingerprint=key) for key, stats in self._stats.items()
+            ]
+            slow = list(self._slow_log)
+
+        sort_field = {'total': 'total_ms', 'calls': 'calls', 'p99': 'p99_ms', 'rows': 'rows'}[sort]
+        statements.sort(key=lambda s: s[sort_field], reverse=True)
+        return {
+            'totals': {
+                'statements': len(statements),
+                'calls': sum(s['calls'] for s in statements),
+                'total_ms': round(sum(s['total_ms'] for s in statements), 3),
+                'slow_threshold_ms': self.slow_query_ms,
+            },
+            'statements': statements[:top] if top else statements,
+            'slow_queries': slow,
+        }
+
+    def format_report(self, top: int = 20, sort: str = 'total') -> str:
+        """Render report() as a plain text table.
+
+        Args:
+            top: Number of statements to include
+            sort: Ranking key
+
+        Returns:
+            Report text
+        """
+        report = self.report(top, sort)
+        totals = report['totals']
+        lines = [
+            f"{totals['calls']} calls across {totals['statements']} statements, "
+            f"{totals['total_ms']:.1f} ms total",
+            "",
+            f"{'calls':>8} {'total ms':>10} {'p50 ms':>8} {'p99 ms':>8} {'rows':>10}  statement",
+        ]
+        for stmt in report['statements']:
+            lines.append(
+                f"{stmt['calls']:>8} {stmt['total_ms']:>10.1f} {stmt['p50_ms']:>8.2f} "
+                f"{stmt['p99_ms']:>8.2f} {stmt['rows']:>10}  {stmt['fingerprint'][:100]}"
+            )
+            for detail in stmt['plan'] or []:
+                lines.append(f"{'':>49}  plan: {detail}")
+
+        if report['slow_queries']:
+            lines.extend(["", f"Slow queries (>= {totals['slow_threshold_ms']} ms):"])
+            for entry in report['slow_queries'][-top:]:
+                lines.append(f"  {entry['elapsed_ms']:>10.2f} ms  {entry['fingerprint'][:100]}")
+        return "\n".join(lines)
+
+    def merge(self, other: 'QueryStatistics') -> None:
+        """Fold another collector into this one."""
+        with other._lock:
+            incoming = list(other._stats.items())
+            slow = list(other._slow_log)
+        with self._lock:
+            for key, stats in incoming:
+                self._stats.setdefault(key, StatementStats()).merge(stats)
+            self._slow_log.extend(slow)
+
+    def reset(self) -> None:
+        """Discard all collected statistics."""
+        with self._lock:
+            self._stats.clear()
+            self._slow_log.clear()
+
+    def save(self, connection: sqlite3.Connection) -> int:
+        """Merge collected statistics into the database and reset.
+
+        Statistics are kept in the query_stats and slow_queries tables so
+        reports can be produced after the process that ran the queries
+        has exited.
+
+        Args:
+            connection: Raw SQLite connection
+
+        Returns:
+            Number of fingerprints written
+
+        Raises:
+            QueryStatsError: If the statistics cannot be written
+        """
+        with self._lock:
+            pending = self._stats
+            slow = list(self._slow_log)
+            self._stats = {}
+            self._slow_log.clear()
+
+        try:
+            _create_tables(connection)
+            for key, stats in pending.items():
+                row = connection.execute(
+                    'SELECT calls, total_ms, max_ms, rows, histogram, plan '
+                    'FROM query_stats WHERE fingerprint = ?', (key,)
+                ).fetchone()
+                if row is not None:
+                    stats.merge(_stats_from_row(row))
+                connection.execute(
+                    'INSERT OR REPLACE INTO query_stats '
+                    '(fingerprint, calls, total_ms, max_ms, rows, histogram, plan, updated_at) '
+                    'VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                    (key, stats.calls, stats.total_ms, stats.max_ms, stats.rows,
+                     json.dumps(stats.histogram), json.dumps(stats.plan), int(time.time()))
+                )
+            connection.executemany(
+                'INSERT INTO slow_queries (fingerprint, query, elapsed_ms, rows, plan, recorded_at) '
+                'VALUES (?, ?, ?, ?, ?, ?)',
+                [(e['fingerprint'], e['query'], e['elapsed_ms'], e['rows'],
+                  json.dumps(e['plan']), e['recorded_at']) for e in slow]
+            )
+            connection.execute(
+                'DELETE FROM slow_queries WHERE id NOT IN '
+                '(SELECT id FROM slow_queries ORDER BY id DESC LIMIT ?)',
+                (self._slow_log.maxlen,)
+            )
+            connection.commit()
+            return len(pending)
+        except sqlite3.Error as e:
+            connection.rollback()
+            raise QueryStatsError(f"Failed to save query statistics: {e}") from e
+
+    @staticmethod
+    def clear_saved(connection: sqlite3.Connection) -> None:
+        """Delete statistics previously written by save().
+
+        Args:
+            connection: Raw SQLite connection
+        """
+        _create_tables(connection)
+        connection.execute('DELETE FROM query_stats')
+        connection.execute('DELETE FROM slow_queries')
+        connection.commit()
+
+    @classmethod
+    def load(cls, connection: sqlite3.Connection, slow_query_ms: float = 100.0) -> 'QueryStatistics':
+        """Load statistics previously written by save().
+
+        Args:
+            connection: Raw SQLite connection
+            slow_query_ms: Threshold to report with the loaded statistics
+
+        Returns:
+            QueryStatistics populated from the database (empty if none saved)
+        """
+        stats = cls(slow_query_ms)
+        try:
+            rows = connection.execute(
+                'SELECT fingerprint, calls, total_ms, max_ms, rows, histogram, plan FROM query_stats'
+            ).fetchall()
+            slow_rows = connection.execute(
+                'SELECT fingerprint, query, elapsed_ms, rows, plan, recorded_at '
+                'FROM slow_queries ORDER BY id'
+            ).fetchall()
+        except sqlite3.OperationalError:
+            # Nothing has been saved yet
+            return stats
+
+        for row in rows:
+            stats._stats[row[0]] = _stats_from_row(row[1:])
+        for row in slow_rows:
+            stats._slow_log.append({
+                'fingerprint': row[0],
+                'query': row[1],
+                'elapsed_ms': row[2],
+                'rows': row[3],
+                'plan': json.loads(row[4]) if row[4] else None,
+                'recorded_at': row[5],
+            })
+        return stats
+
+
+def _stats_from_row(row: Tuple[Any, ...]) -> StatementStats:
+    """Rebuild StatementStats from a (calls, total_ms, max_ms, rows, histogram, plan) row."""
+    stats = StatementStats()
+    stats.calls, stats.total_ms, stats.max_ms, stats.rows = row[0], row[1], row[2], row[3]
+    histogram = json.loads(row[4])
+    stats.histogram[:len(histogram)] = histogram[:_NUM_BUCKETS]
+    stats.plan = json.loads(row[5]) if row[5] else None
+    return stats
+
+
+def _create_tables(connection: sqlite3.Connection) -> None:
+    """Create the statistics tables if they do not exist."""
+    connection.execute('''
+        CREATE TABLE IF NOT EXISTS query_stats (
+            fingerprint TEXT PRIMARY KEY,
+            calls INTEGER NOT NULL,
+            total_ms REAL NOT NULL,
+            max_ms REAL NOT NULL,
+            rows INTEGER NOT NULL,
+            histogram TEXT NOT NULL,
+            plan TEXT,
+            updated_at INTEGER NOT NULL
+        )
+    ''')
+    connection.execute('''
+        CREATE TABLE IF NOT EXISTS slow_queries (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            fingerprint TEXT NOT NULL,
+            query TEXT NOT NULL,
+            elapsed_ms REAL NOT NULL,
+            rows INTEGER NOT NULL,
+            plan TEXT,
+            recorded_at INTEGER NOT NULL
+        )
+    ''')
+
+
+class TimedCursor:
+    """Cursor wrapper that charges row fetching time to its statement.
+
+    SQLite does most of the work of a SELECT while rows are stepped, so
+    latency is recorded when the result set is exhausted or the cursor
+    is released, not when execute() returns.
+    """
+
+    __slots__ = ('_cursor', '_statistics', '_query', '_params', '_elapsed', '_rows', '_done')
+
+    def __init__(
+        self,
+        cursor: sqlite3.Cursor,
+        statistics: QueryStatistics,
+        query: str,
+        params: Optional[Union[Tuple[Any, ...], Dict[str, Any]]],
+        elapsed: float
+    ):
+        """Wrap an executed cursor.
+
+        Args:
+            cursor: Cursor returned by execute()
+            statistics: Collector to record into
+            query: Statement text
+            params: Statement parameters
+            elapsed: Seconds already spent in execute()
+        """
+        self._cursor = cursor
+        self._statistics = statistics
+        self._query = query
+        self._params = params
+        self._elapsed = elapsed
+        self._rows = 0
+        self._done = False
+
+    def fetchone(self) -> Any:
+        """Fetch the next row."""
+        start = time.perf_counter()
+        row = self._cursor.fetchone()
+        self._elapsed += time.perf_counter() - start
+        if row is None:
+            self._finish()
+        else:
+            self._rows += 1
+        return row
+
+    def fetchmany(self, size: Optional[int] = None) -> List[Any]:
+        """Fetch the next batch of rows."""
+        start = time.perf_counter()
+        rows = self._cursor.fetchmany(self._cursor.arraysize if size is None else size)
+        self._elapsed += time.perf_counter() - start
+        self._rows += len(rows)
+        if not rows:
+            self._finish()
+        return rows
+
+    def fetchall(self) -> List[Any]:
+        """Fetch all remaining rows."""
+        start = time.perf_counter()
+        rows = self._cursor.fetchall()
+        self._elapsed += time.perf_counter() - start
+        self._rows += len(rows)
+        self._finish()
+        return rows
+
+    def __iter__(self) -> 'TimedCursor':
+        """Iterate over remaining rows."""
+        return self
+
+    def __next__(self) -> Any:
+        """Fetch the next row or stop."""
+        row = self.fetchone()
+        if row is None:
+            raise StopIteration
+        return row
+
+    def close(self) -> None:
+        """Record the statement and close the cursor."""
+        self._finish()
+        self._cursor.close()
+
+    def __getattr__(self, name: str) -> Any:
+        """Delegate everything else (description, lastrowid, ...) to the cursor."""
+        if name in TimedCursor.__slots__:
+            raise AttributeError(name)
+        return getattr(self._cursor, name)
+
+    def __del__(self) -> None:
+        """Record statements whose result set was not fully consumed."""
+        try:
+            self._finish()
+        except AttributeError:
+            # Construction failed before all slots were set
+            pass
+
+    def _finish(self) -> None:
+        """Record the statement once."""
+        if self._done:
+            return
+        self._done = True
+        self._statistics.record(
+            self._query, self._elapsed * 1000.0, self._rows,
+            self._cursor.connection, self._params
+        )
@@ -53,6 +53,8 @@ class DatabaseSchema:
                 status TEXT DEFAULT 'active',
                 scanned_at INTEGER NOT NULL,
                 updated_at INTEGER NOT NULL,
+                phash INTEGER,
+                dhash INTEGER,
                 FOREIGN KEY (duplicate_of) REFERENCES files(id) ON DELETE SET NULL
             )
         """,
@@ -65,10 +67,18 @@ class DatabaseSchema:
                 model_version TEXT NOT NULL,
                 created_time INTEGER NOT NULL,
                 dimensions INTEGER NOT NULL,
+                revision INTEGER NOT NULL DEFAULT 0,
                 FOREIGN KEY (file_id) REFERENCES files(id) ON DELETE CASCADE
             )
         """,
 
+        'embedding_revision': """
+            CREATE TABLE IF NOT EXISTS embedding_revision (
+                id INTEGER PRIMARY KEY CHECK (id = 1),
+                value INTEGER NOT NULL
+            )
+        """,
+
         'file_relationships': """
             CREATE TABLE IF NOT EXISTS file_relationships (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -146,6 +156,7 @@ class DatabaseSchema:
         "CREATE INDEX IF NOT EXISTS idx_embeddings_file_id ON embeddings(file_id)",
         "CREATE INDEX IF NOT EXISTS idx_embeddings_model_version ON embeddings(model_version)",
         "CREATE INDEX IF NOT EXISTS idx_embeddings_created_time ON embeddings(created_time)",
+        "CREATE INDEX IF NOT EXISTS idx_embeddings_revision ON embeddings(revision)",
 
         # File relationships indexes
         "CREATE INDEX IF NOT EXISTS idx_file_relationships_file1_id ON file_relationships(file1_id)",
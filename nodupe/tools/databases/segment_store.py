@@ -0,0 +1,413 @@
+"""Segment Store Module.
+
+Disk tier for the in-memory caches using standard library only.
+
+Entries evicted from a cache are appended to segment files; sealed
+segments are memory-mapped for reads. Each record is a fixed header, the
+key and the value, and the store keeps no per-entry Python objects for
+sealed segments: their index is a sorted array of 64-bit key hashes with a
+parallel array of record offsets and a bytearray of deleted flags, about
+17 bytes per entry, so tens of millions of spilled entries fit in a few
+hundred megabytes of index. Keys are verified on read, so a hash collision
+can only cause a miss.
+
+Deleted and overwritten records leave garbage behind; a background thread
+rewrites segments whose live fraction drops below a threshold and removes
+the old files. When the store exceeds its byte budget, the oldest segment
+is dropped whole. Contents do not outlive the store: segment files are
+removed on close.
+
+Key Features:
+    - Append-only segment files with mmap'd reads
+    - Compact sorted-array index per sealed segment
+    - Background compaction of mostly-dead segments
+    - Byte budget enforced by dropping the oldest segment
+    - Thread-safe operations
+    - Standard library only (no external dependencies)
+
+Dependencies:
+    - mmap (standard library)
+    - array, bisect (standard library)
+    - hashlib, struct (standard library)
+    - threading (standard library)
+"""
+
+import hashlib
+import mmap
+import os
+import shutil
+import struct
+import tempfile
+import threading
+from array import array
+from bisect import bisect_left
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+# Record header: key hash, key length, value length
+_RECORD = struct.Struct('<QII')
+# Segment size at which the active segment is sealed
+DEFAULT_SEGMENT_BYTES = 128 * 1024 * 1024
+# Sealed segments with less than this fraction of live bytes are compacted
+DEFAULT_COMPACT_RATIO = 0.5
+# Seconds between background compaction checks when not woken earlier
+COMPACT_INTERVAL = 30.0
+# Records moved per lock acquisition during compaction
+COMPACT_CHUNK = 1024
+
+
+class SegmentStoreError(Exception):
+    """Segment store operation error"""
+
+
+def _key_hash(key: bytes) -> int:
+    """64-bit hash of a key."""
+    return int.from_bytes(hashlib.blake2b(key, digest_size=8).digest(), 'little')
+
+
+class _Segment:
+    """One segment file: appendable while active, mmap'd once sealed."""
+
+    def __init__(self, segment_id: int, path: str):
+        self.id = segment_id
+        self.path = path
+        self.writer = open(path, 'w+b')
+        self.size = 0
+        self.live_bytes = 0
+        self.live_count = 0
+        # Active segments: key hash -> record offset
+        self.active: Optional[Dict[int, int]] = {}
+        # Sealed segments: sorted hashes, offsets and deleted flags
+        self.hashes = array('Q')
+        self.offsets = array('Q')
+        self.dead = bytearray()
+        self.map: Optional[mmap.mmap] = None
+
+    def append(self, key_hash: int, key: bytes, value: bytes) -> int:
+        """Append a record and return its offset."""
+        offset = self.size
+        record = _RECORD.pack(key_hash, len(key), len(value)) + key + value
+        self.writer.write(record)
+        self.size += len(record)
+        self.live_bytes += len(record)
+        self.live_count += 1
+        return offset
+
+    def read(self, offset: int) -> Tuple[bytes, bytes]:
+        """Read the key and value of the record at offset."""
+        if self.map is not None:
+            _, key_len, value_len = _RECORD.unpack_from(self.map, offset)
+            start = offset + _RECORD.size
+            return (self.map[start:start + key_len],
+                    self.map[start + key_len:start + key_len + value_len])
+        self.writer.flush()
+        self.writer.seek(offset)
+        _, key_len, value_len = _RECORD.unpack(self.writer.read(_RECORD.size))
+        data = self.writer.read(key_len + value_len)
+        self.writer.seek(0, os.SEEK_END)
+        return data[:key_len], data[key_len:]
+
+    def record_size(self, offset: int) -> int:
+        """Total size of the record at offset."""
+        key, value = self.read(offset)
+        return _RECORD.size + len(key) + len(value)
+
+    def seal(self) -> None:
+        """Freeze the index into sorted arrays and map the file for reads."""
+        items = sorted(self.active.items())
+        self.hashes = array('Q', (key_hash for key_hash, _ in items))
+        self.offsets = array('Q', (offset for _, offset in items))
+        self.dead = bytearray(len(items))
+        self.active = None
+        self.writer.flush()
+        if self.size:
+            self.map = mmap.mmap(self.writer.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def close(self, remove: bool = True) -> None:
+        """Close the file and optionally delete it."""
+        if self.map is not None:
+            self.map.close()
+            self.map = None
+        self.writer.close()
+        if remove:
+            try:
+                os.unlink(self.path)
+            except OSError:
+                pass
+
+
+class SegmentStore:
+    """Key-value store of bytes in append-only, mmap'd segment files."""
+
+    def __init__(
+        self,
+        directory: Optional[str] = None,
+        segment_bytes: int = DEFAULT_SEGMENT_BYTES,
+        max_bytes: Optional[int] = None,
+        compact_ratio: float = DEFAULT_COMPACT_RATIO,
+        background_compaction: bool = True
+    ):
+        """Initialize segment store.
+
+        Args:
+            directory: Directory for segment files (default: a private
+                temporary directory, removed on close)
+            segment_bytes: Size at which the active segment is sealed
+            max_bytes: Maximum bytes of segment files (None for no limit)
+            compact_ratio: Live fraction below which a segment is compacted
+            background_compaction: Run compaction on a daemon thread
+        """
+        self._owns_directory = directory is None
+        self.directory = directory or tempfile.mkdtemp(prefix='nodupe-spill-')
+        os.makedirs(self.directory, exist_ok=True)
+        self.segment_bytes = segment_bytes
+        self.max_bytes = max_bytes
+        self.compact_ratio = compact_ratio
+
+        self._lock = threading.RLock()
+        self._segments: List[_Segment] = []
+        self._next_id = 0
+        self._active = self._new_segment()
+        self._stats = {'compactions': 0, 'dropped_segments': 0}
+
+        self._closed = threading.Event()
+        self._wake = threading.Event()
+        self._compactor: Optional[threading.Thread] = None
+        if background_compaction:
+            self._compactor = threading.Thread(target=self._compact_loop,
+                                               name='segment-compactor', daemon=True)
+            self._compactor.start()
+
+    def _new_segment(self) -> _Segment:
+        """Create and register a new active segment."""
+        path = os.path.join(self.directory, f'segment-{os.getpid()}-{self._next_id:08d}.seg')
+        segment = _Segment(self._next_id, path)
+        self._next_id += 1
+        self._segments.append(segment)
+        return segment
+
+    def _find(self, key: bytes, key_hash: int) -> Optional[Tuple[_Segment, int, int]]:
+        """Locate the live record of a key.
+
+        Returns:
+            (segment, index position or -1 for the active segment, offset)
+        """
+        offset = self._active.active.get(key_hash)
+        if offset is not None and self._active.read(offset)[0] == key:
+            return self._active, -1, offset
+        for segment in reversed(self._segments):
+            if segment is self._active:
+                continue
+            position = bisect_left(segment.hashes, key_hash)
+            while position < len(segment.hashes) and segment.hashes[position] == key_hash:
+                if not segment.dead[position]:
+                    offset = segment.offsets[position]
+                    if segment.read(offset)[0] == key:
+                        return segment, position, offset
+                position += 1
+        return None
+
+    def _kill(self, segment: _Segment, position: int, offset: int, key_hash: int) -> None:
+        """Mark a located record deleted."""
+        size = segment.record_size(offset)
+        if position < 0:
+            del segment.active[key_hash]
+        else:
+            segment.dead[position] = 1
+        segment.live_bytes -= size
+        segment.live_count -= 1
+        if segment is not self._active and segment.live_bytes < self.compact_ratio * segment.size:
+            self._wake.set()
+
+    def put(self, key: bytes, value: bytes) -> None:
+        """Store a value, replacing any previous value of the key.
+
+        Args:
+            key: Key bytes
+            value: Value bytes
+        """
+        key_hash = _key_hash(key)
+        with self._lock:
+            self._delete(key, key_hash)
+            self._active.active[key_hash] = self._active.append(key_hash, key, value)
+            if self._active.size >= self.segment_bytes:
+                self._roll()
+            self._enforce_budget()
+
+    def get(self, key: bytes) -> Optional[bytes]:
+        """Read a value.
+
+        Args:
+            key: Key bytes
+
+        Returns:
+            Value bytes or None if not stored
+        """
+        with self._lock:
+            found = self._find(key, _key_hash(key))
+            if found is None:
+                return None
+            segment, _, offset = found
+            return segment.read(offset)[1]
+
+    def pop(self, key: bytes) -> Optional[bytes]:
+        """Read and delete a value.
+
+        Args:
+            key: Key bytes
+
+        Returns:
+            Value bytes or None if not stored
+        """
+        key_hash = _key_hash(key)
+        with self._lock:
+            found = self._find(key, key_hash)
+            if found is None:
+                return None
+            segment, position, offset = found
+            value = segment.read(offset)[1]
+            self._kill(segment, position, offset, key_hash)
+            return value
+
+    def delete(self, key: bytes) -> bool:
+        """Delete a value.
+
+        Args:
+            key: Key bytes
+
+        Returns:
+            True if the key was stored
+        """
+        with self._lock:
+            return self._delete(key, _key_hash(key))
+
+    def _delete(self, key: bytes, key_hash: int) -> bool:
+        """Delete a key; must be called with the lock held."""
+        found = self._find(key, key_hash)
+        if found is None:
+            return False
+        self._kill(*found, key_hash)
+        return True
+
+    def keys(self) -> Iterator[bytes]:
+        """Iterate over stored keys (a snapshot taken under the lock)."""
+        with self._lock:
+            snapshot = []
+            for segment in self._segments:
+                if segment.active is not None:
+                    offsets = list(segment.active.values())
+                else:
+                    offsets = [offset for offset, dead in zip(segment.offsets, segment.dead)
+                               if not dead]
+                snapshot.extend(segment.read(offset)[0] for offset in offsets)
+        return iter(snapshot)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return sum(segment.live_count for segment in self._segments)
+
+    def _roll(self) -> None:
+        """Seal the active segment and start a new one."""
+        sealed = self._active
+        sealed.seal()
+        self._active = self._new_segment()
+        if sealed.live_bytes < self.compact_ratio * sealed.size:
+            self._wake.set()
+
+    def _drop(self, segment: _Segment) -> None:
+        """Remove a sealed segment and its file."""
+        self._segments.remove(segment)
+        segment.close()
+
+    def _enforce_budget(self) -> None:
+        """Drop the oldest sealed segments while over the byte budget."""
+        if self.max_bytes is None:
+            return
+        while (sum(segment.size for segment in self._segments) > self.max_bytes
+               and self._segments[0] is not self._active):
+            self._drop(self._segments[0])
+            self._stats['dropped_segments'] += 1
+
+    def compact(self) -> int:
+        """Rewrite sealed segments whose live fraction is below compact_ratio.
+
+        Live records are copied into the active segment in chunks, so
+        readers and writers are only blocked briefly.
+
+        Returns:
+            Number of segments compacted
+        """
+        with self._lock:
+            victims = [segment for segment in self._segments
+                       if segment is not self._active
+                       and segment.live_bytes < self.compact_ratio * segment.size]
+        for segment in victims:
+            position = 0
+            while True:
+                with self._lock:
+                    if segment not in self._segments:
+                        break
+                    end = min(position + COMPACT_CHUNK, len(segment.offsets))
+                    for index in range(position, end):
+                        if segment.dead[index]:
+                            continue
+                        key_hash = segment.hashes[index]
+                        key, value = segment.read(segment.offsets[index])
+                        self._kill(segment, index, segment.offsets[index], key_hash)
+                        self._active.active[key_hash] = self._active.append(key_hash, key, value)
+                        if self._active.size >= self.segment_bytes:
+                            self._roll()
+                    position = end
+                    if position >= len(segment.offsets):
+                        self._drop(segment)
+                        self._stats['compactions'] += 1
+                        break
+        return len(victims)
+
+    def _compact_loop(self) -> None:
+        """Background compaction thread."""
+        while not self._closed.is_set():
+            self._wake.wait(timeout=COMPACT_INTERVAL)
+            self._wake.clear()
+            if self._closed.is_set():
+                break
+            try:
+                self.compact()
+            except (OSError, ValueError):
+                # Store closed underneath us
+                break
+
+    def clear(self) -> None:
+        """Delete every entry and segment file."""
+        with self._lock:
+            for segment in self._segments:
+                segment.close()
+            self._segments = []
+            self._active = self._new_segment()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get store statistics.
+
+        Returns:
+            Dictionary with entries, live and file bytes, segment count and
+            compaction counters
+        """
+        with self._lock:
+            stats: Dict[str, Any] = self._stats.copy()
+            stats['entries'] = sum(segment.live_count for segment in self._segments)
+            stats['live_bytes'] = sum(segment.live_bytes for segment in self._segments)
+            stats['file_bytes'] = sum(segment.size for segment in self._segments)
+            stats['segments'] = len(self._segments)
+            return stats
+
+    def close(self) -> None:
+        """Stop compaction and remove all segment files."""
+        self._closed.set()
+        self._wake.set()
+        if self._compactor is not None and self._compactor is not threading.current_thread():
+            self._compactor.join()
+        with self._lock:
+            for segment in self._segments:
+                segment.close()
+            self._segments = []
+        if self._owns_directory:
+            shutil.rmtree(self.directory, ignore_errors=True)
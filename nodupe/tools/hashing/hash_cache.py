@@ -2,12 +2,17 @@
 
 File hash caching using standard library only.
 
+With spilling enabled, entries evicted from memory are written to a disk
+tier of mmap'd segment files (see nodupe.tools.databases.segment_store)
+instead of being dropped, and are promoted back into memory when looked
+up; they are validated against the file's modification time as usual.
+
 Key Features:
     - In-memory hash caching with TTL
     - File path and modification time validation
     - Thread-safe operations
     - Cache size limits and eviction policies
-    - Persistent storage support
+    - Optional disk tier for evicted entries, promoted back on hit
     - Standard library only (no external dependencies)
 
 Dependencies:
@@ -16,14 +21,19 @@ Dependencies:
     - typing (standard library)
     - pathlib (standard library)
     - collections (standard library)
+    - struct (standard library)
 """
 
+import struct
 import threading
 import time
 from pathlib import Path
 from typing import Optional, Dict, Any, Tuple
 from collections import OrderedDict
 
+# Disk tier value header: file mtime, entry timestamp
+_SPILL_HEADER = struct.Struct('<dd')
+
 
 class HashCacheError(Exception):
     """Hash cache operation error"""
@@ -40,7 +50,10 @@ class HashCache:
         self,
         max_size: int = 1000,
         ttl_seconds: int = 3600,
-        enable_persistence: bool = False
+        enable_persistence: bool = False,
+        spill: bool = False,
+        spill_directory: Optional[str] = None,
+        max_spill_bytes: Optional[int] = None
     ):
         """Initialize hash cache.
 
@@ -48,6 +61,10 @@ class HashCache:
             max_size: Maximum number of entries in cache
             ttl_seconds: Time-to-live in seconds for cache entries
             enable_persistence: Enable persistent storage (future)
+            spill: Keep entries evicted from memory in a disk tier
+            spill_directory: Directory for disk tier segments (default: a
+                temporary directory)
+            max_spill_bytes: Maximum bytes of disk tier files (None for no limit)
         """
         self.max_size = max_size
         self.ttl_seconds = ttl_seconds
@@ -60,9 +77,46 @@ class HashCache:
             'hits': 0,
             'misses': 0,
             'evictions': 0,
-            'insertions': 0
+            'insertions': 0,
+            'memory_hits': 0,
+            'memory_misses': 0,
+            'disk_hits': 0,
+            'disk_misses': 0,
+            'spills': 0,
+            'promotions': 0
         }
 
+        self._spill = None
+        if spill:
+            from nodupe.tools.databases.segment_store import SegmentStore
+            self._spill = SegmentStore(spill_directory, max_bytes=max_spill_bytes)
+
+    def _evict_oldest(self) -> None:
+        """Drop the least recently set entry, spilling it to disk if enabled."""
+        path_str, (hash_value, mtime, timestamp) = self._cache.popitem(last=False)
+        if self._spill is not None:
+            self._spill.put(path_str.encode('utf-8'),
+                            _SPILL_HEADER.pack(mtime, timestamp) + hash_value.encode('utf-8'))
+            self._stats['spills'] += 1
+        self._stats['evictions'] += 1
+
+    def _promote(self, path_str: str) -> Optional[Tuple[str, float, float]]:
+        """Move an entry from the disk tier back into memory."""
+        if self._spill is None:
+            return None
+        value = self._spill.pop(path_str.encode('utf-8'))
+        if value is None:
+            self._stats['disk_misses'] += 1
+            return None
+        mtime, timestamp = _SPILL_HEADER.unpack_from(value)
+        entry = (value[_SPILL_HEADER.size:].decode('utf-8'), mtime, timestamp)
+        if len(self._cache) >= self.max_size:
+            self._evict_oldest()
+        self._cache[path_str] = entry
+        self._stats['disk_hits'] += 1
+        self._stats['promotions'] += 1
+        return entry
+
     def get_hash(self, file_path: Path) -> Optional[str]:
         """Get cached hash for a file.
 
@@ -75,11 +129,17 @@ class HashCache:
         with self._lock:
             path_str = str(file_path)
 
-            if path_str not in self._cache:
-                self._stats['misses'] += 1
-                return None
+            entry = self._cache.get(path_str)
+            if entry is None:
+                self._stats['memory_misses'] += 1
+                entry = self._promote(path_str)
+                if entry is None:
+                    self._stats['misses'] += 1
+                    return None
+            else:
+                self._stats['memory_hits'] += 1
 
-            hash_value, stored_mtime, timestamp = self._cache[path_str]
+            hash_value, stored_mtime, timestamp = entry
 
             # Check if entry is expired
             if time.monotonic() - timestamp > self.ttl_seconds:
@@ -120,9 +180,11 @@ class HashCache:
                 return
 
             # Remove oldest entry if at max size
-            if len(self._cache) >= self.max_size:
-                self._cache.popitem(last=False)
-                self._stats['evictions'] += 1
+            if path_str not in self._cache:
+                if len(self._cache) >= self.max_size:
+                    self._evict_oldest()
+                if self._spill is not None:
+                    self._spill.delete(path_str.encode('utf-8'))
 
             # Store with current timestamp
             timestamp = time.monotonic()
@@ -147,7 +209,7 @@ class HashCache:
             if path_str in self._cache:
                 del self._cache[path_str]
                 return True
-            return False
+            return self._spill is not None and self._spill.delete(path_str.encode('utf-8'))
 
     def invalidate_all(self) -> None:
         """Invalidate all cache entries."""
@@ -155,11 +217,16 @@ class HashCache:
             # Count the number of entries being cleared
             num_entries = len(self._cache)
             self._cache.clear()
+            if self._spill is not None:
+                num_entries += len(self._spill)
+                self._spill.clear()
             # Increment evictions by the number of entries that were cleared
             self._stats['evictions'] += num_entries
 
     def validate_cache(self) -> int:
-        """Validate all cache entries and remove stale ones.
+        """Validate all in-memory cache entries and remove stale ones.
+
+        Stale entries in the disk tier are dropped when looked up.
 
         Returns:
             Number of entries removed
@@ -203,6 +270,11 @@ class HashCache:
             stats = self._stats.copy()
             stats['size'] = len(self._cache)
             stats['capacity'] = self.max_size
+            if self._spill is not None:
+                disk = self._spill.get_stats()
+                stats['disk_size'] = disk['entries']
+                stats['disk_bytes'] = disk['file_bytes']
+                stats['disk_compactions'] = disk['compactions']
             stats['hit_rate'] = (
                 stats['hits'] / (stats['hits'] + stats['misses'])
                 if (stats['hits'] + stats['misses']) > 0
@@ -249,8 +321,7 @@ class HashCache:
 
             # Remove excess entries from the beginning (LRU)
             while len(self._cache) > self.max_size:
-                self._cache.popitem(last=False)
-                self._stats['evictions'] += 1
+                self._evict_oldest()
 
     def get_memory_usage(self) -> int:
         """Get approximate memory usage of cache.
@@ -269,6 +340,13 @@ class HashCache:
 
             return usage
 
+    def close(self) -> None:
+        """Release the disk tier, deleting its segment files."""
+        with self._lock:
+            if self._spill is not None:
+                self._spill.close()
+                self._spill = None
+
 
 def create_hash_cache(
     max_size: int = 1000,
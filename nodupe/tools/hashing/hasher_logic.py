@@ -10,7 +10,7 @@ Key Features:
     - Multiple hash algorithms (SHA256, MD5, etc.)
     - Chunked file processing for large files
     - Progress tracking
-    - Batch processing
+    - Batch processing on the executor calibrated for hashing
     - Error handling
 
 Dependencies:
@@ -21,12 +21,27 @@ Dependencies:
 
 import os
 import hashlib
+import logging
 from typing import Dict, Any, Optional, List, Callable
 try:
     from ..hasher_interface import HasherInterface
 except (ImportError, ValueError):
     from nodupe.core.hasher_interface import HasherInterface
 
+logger = logging.getLogger(__name__)
+
+# Mean file size from which a batch is hashed as the 'hash_large' task class
+LARGE_FILE_BYTES = 4 * 1024 * 1024
+
+
+def _hash_or_none(hasher: 'FileHasher', file_path: str) -> Optional[str]:
+    """Hash of a file, or None if it cannot be hashed (runs in pool workers)."""
+    try:
+        return hasher.hash_file(file_path)
+    except Exception as e:  # pylint: disable=broad-exception-caught
+        logger.warning(f"Error hashing file {file_path}: {e}")
+        return None
+
 
 class FileHasher(HasherInterface):
     """File hasher for cryptographic hashing operations.
@@ -89,13 +104,19 @@ class FileHasher(HasherInterface):
             return hasher.hexdigest()
 
         except Exception as e:
-            print(f"[ERROR] Failed to hash file {file_path}: {e}")
+            logger.error(f"Failed to hash file {file_path}: {e}")
             raise
 
     def hash_files(self, file_paths: List[str],
                    on_progress: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, str]:
         """Calculate hashes for multiple files.
 
+        Without a progress callback, files are hashed in parallel on the
+        executor calibrated for the 'hash_small' or 'hash_large' task class
+        (see nodupe.tools.parallel.calibration), or on threads if this host
+        is not calibrated. Byte-level progress needs the caller's process,
+        so with a callback files are hashed one by one.
+
         Args:
             file_paths: List of file paths
             on_progress: Optional progress callback
@@ -103,6 +124,9 @@ class FileHasher(HasherInterface):
         Returns:
             Dictionary mapping file paths to hashes
         """
+        if on_progress is None and len(file_paths) > 1:
+            return self._hash_files_parallel(file_paths)
+
         results = {}
 
         for i, file_path in enumerate(file_paths):
@@ -124,11 +148,32 @@ class FileHasher(HasherInterface):
                     on_progress(overall_progress)
 
             except Exception as e:
-                print(f"[WARNING] Error hashing file {file_path}: {e}")
+                logger.warning(f"Error hashing file {file_path}: {e}")
                 continue
 
         return results
 
+    def _hash_files_parallel(self, file_paths: List[str]) -> Dict[str, str]:
+        """Hash existing files through Parallel.smart_map."""
+        from functools import partial
+        from nodupe.tools.parallel.parallel_logic import Parallel
+
+        paths = []
+        total_size = 0
+        for path in file_paths:
+            try:
+                if os.path.isfile(path):
+                    total_size += os.path.getsize(path)
+                    paths.append(path)
+            except OSError as e:
+                logger.warning(f"Error hashing file {path}: {e}")
+        if not paths:
+            return {}
+        task_class = 'hash_large' if total_size / len(paths) >= LARGE_FILE_BYTES else 'hash_small'
+        hashes = Parallel.smart_map(partial(_hash_or_none, self), paths,
+                                    task_type='io', task_class=task_class)
+        return {path: file_hash for path, file_hash in zip(paths, hashes) if file_hash is not None}
+
     def hash_string(self, data: str) -> str:
         """Calculate hash of a string.
 
@@ -143,7 +188,7 @@ class FileHasher(HasherInterface):
             hasher.update(data.encode('utf-8'))
             return hasher.hexdigest()
         except Exception as e:
-            print(f"[ERROR] Failed to hash string: {e}")
+            logger.error(f"Failed to hash string: {e}")
             raise
 
     def hash_bytes(self, data: bytes) -> str:
@@ -160,7 +205,7 @@ class FileHasher(HasherInterface):
             hasher.update(data)
             return hasher.hexdigest()
         except Exception as e:
-            print(f"[ERROR] Failed to hash bytes: {e}")
+            logger.error(f"Failed to hash bytes: {e}")
             raise
 
     def verify_hash(self, file_path: str, expected_hash: str) -> bool:
@@ -177,7 +222,7 @@ class FileHasher(HasherInterface):
             actual_hash = self.hash_file(file_path)
             return actual_hash == expected_hash
         except Exception as e:
-            print(f"[ERROR] Failed to verify hash for {file_path}: {e}")
+            logger.error(f"Failed to verify hash for {file_path}: {e}")
             return False
 
     def set_algorithm(self, algorithm: str) -> None:
@@ -0,0 +1,3 @@
+from .image_tool import register_tool
+
+__all__ = ['register_tool']
@@ -0,0 +1,310 @@
+# SPDX-License-Identifier: Apache-2.0
+# Copyright (c) 2025 Allaun
+
+"""Perceptual fingerprints for images.
+
+Images are decoded straight to small grayscale thumbnails: Pillow's
+draft() lets libjpeg decode JPEGs at 1/2, 1/4 or 1/8 scale, so a full
+size JPEG is never materialized, and other formats are shrunk with
+Pillow's reducing resize. Decoding runs on a thread pool (Pillow releases
+the GIL while decoding); the hashes are then computed for a whole stack
+of 32x32 thumbnails at once with a few matrix products:
+
+    pHash  low-frequency 8x8 block of the 2-D DCT, D8 @ T @ D8.T with a
+           precomputed 8x32 DCT-II matrix, thresholded at its median
+    dHash  the thumbnail area-resampled to 8x9 with precomputed
+           resampling matrices, then horizontal gradient signs
+
+Both hashes are 64-bit integers whose Hamming distance measures visual
+difference (see nodupe.tools.similarity.hamming).
+
+Key Features:
+    - JPEG draft-mode decoding at reduced resolution
+    - Batched pHash/dHash with precomputed DCT and resampling matrices
+    - Thread pool decoding with a bounded number of batches in flight
+    - Incremental fingerprinting of the files table
+
+Dependencies:
+    - numpy (required for hashing)
+    - Pillow (optional, required for decoding image files)
+    - concurrent.futures (standard library only)
+"""
+
+import logging
+import os
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Any, Iterable, Iterator, List, Optional, Tuple
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    np = None
+    NUMPY_AVAILABLE = False
+
+try:
+    from PIL import Image
+    PIL_AVAILABLE = True
+except ImportError:
+    Image = None
+    PIL_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# Side of the grayscale thumbnail the hashes are computed from
+THUMBNAIL_SIZE = 32
+# Side of the hash grid (8x8 = 64-bit hashes)
+HASH_SIZE = 8
+# Thumbnails hashed per batch
+DEFAULT_BATCH_SIZE = 256
+
+
+class ImageFingerprintError(Exception):
+    """Image fingerprint error"""
+
+
+@lru_cache(maxsize=None)
+def dct_matrix(size: int) -> Any:
+    """Orthonormal DCT-II matrix; dct_matrix(n) @ x is the DCT of x.
+
+    Args:
+        size: Transform length
+
+    Returns:
+        (size, size) float32 array
+    """
+    k = np.arange(size)[:, None]
+    i = np.arange(size)[None, :]
+    matrix = np.cos(np.pi * (2 * i + 1) * k / (2 * size)) * np.sqrt(2.0 / size)
+    matrix[0] /= np.sqrt(2.0)
+    return matrix.astype(np.float32)
+
+
+@lru_cache(maxsize=None)
+def area_resample_matrix(source: int, target: int) -> Any:
+    """Matrix averaging source samples into target equal-width cells.
+
+    Args:
+        source: Input length
+        target: Output length
+
+    Returns:
+        (target, source) float32 array whose rows sum to one
+    """
+    edges = np.arange(target + 1) * (source / target)
+    pixels = np.arange(source)
+    # Overlap of pixel [p, p + 1) with cell [edges[j], edges[j + 1])
+    overlap = (np.minimum(pixels[None, :] + 1, edges[1:, None])
+               - np.maximum(pixels[None, :], edges[:-1, None]))
+    weights = np.clip(overlap, 0, None)
+    return (weights / weights.sum(axis=1, keepdims=True)).astype(np.float32)
+
+
+def _pack_hashes(bits: Any) -> Any:
+    """Pack (n, 64) booleans into n big-endian uint64 hashes."""
+    return np.packbits(bits, axis=1).view('>u8').ravel().astype(np.uint64)
+
+
+def _as_stack(thumbnails: Any) -> Any:
+    """Validate thumbnails as an (n, 32, 32) float32 stack."""
+    stack = np.asarray(thumbnails, dtype=np.float32)
+    if stack.ndim == 2:
+        stack = stack[None]
+    if stack.ndim != 3 or stack.shape[1:] != (THUMBNAIL_SIZE, THUMBNAIL_SIZE):
+        raise ImageFingerprintError(
+            f"Expected {THUMBNAIL_SIZE}x{THUMBNAIL_SIZE} thumbnails, got shape {stack.shape}")
+    return stack
+
+
+def phash_batch(thumbnails: Any) -> Any:
+    """DCT perceptual hashes of a stack of thumbnails.
+
+    Args:
+        thumbnails: (n, 32, 32) grayscale thumbnails
+
+    Returns:
+        (n,) uint64 array of hashes
+    """
+    stack = _as_stack(thumbnails)
+    low = dct_matrix(THUMBNAIL_SIZE)[:HASH_SIZE]
+    coefficients = (low @ stack @ low.T).reshape(len(stack), HASH_SIZE * HASH_SIZE)
+    median = np.median(coefficients, axis=1, keepdims=True)
+    return _pack_hashes(coefficients > median)
+
+
+def dhash_batch(thumbnails: Any) -> Any:
+    """Difference hashes of a stack of thumbnails.
+
+    Args:
+        thumbnails: (n, 32, 32) grayscale thumbnails
+
+    Returns:
+        (n,) uint64 array of hashes
+    """
+    stack = _as_stack(thumbnails)
+    rows = area_resample_matrix(THUMBNAIL_SIZE, HASH_SIZE)
+    cols = area_resample_matrix(THUMBNAIL_SIZE, HASH_SIZE + 1).T
+    small = rows @ stack @ cols
+    bits = small[:, :, 1:] > small[:, :, :-1]
+    return _pack_hashes(bits.reshape(len(stack), HASH_SIZE * HASH_SIZE))
+
+
+def load_thumbnail(path: str, size: int = THUMBNAIL_SIZE) -> Optional[Any]:
+    """Decode an image file to a small grayscale thumbnail.
+
+    Args:
+        path: Image file path
+        size: Thumbnail side
+
+    Returns:
+        (size, size) float32 array, or None if the file cannot be decoded
+    """
+    if not PIL_AVAILABLE:
+        raise ImageFingerprintError("Pillow is required to decode images")
+    try:
+        with Image.open(path) as image:
+            # JPEG only: decode at the smallest DCT scale still >= size
+            image.draft('L', (size, size))
+            if image.mode != 'L':
+                image = image.convert('L')
+            thumbnail = image.resize((size, size), Image.BOX, reducing_gap=2.0)
+            return np.asarray(thumbnail, dtype=np.float32)
+    except Exception as e:  # pylint: disable=broad-exception-caught
+        logger.debug(f"Cannot decode image {path}: {e}")
+        return None
+
+
+def is_image_path(path: str) -> bool:
+    """Whether a path looks like an image by its extension."""
+    from nodupe.tools.mime.mime_logic import MIMEDetection
+    try:
+        return MIMEDetection.is_image(MIMEDetection.detect_mime_type(path, use_magic=False))
+    except Exception:  # pylint: disable=broad-exception-caught
+        return False
+
+
+class ImageFingerprinter:
+    """Compute pHash/dHash fingerprints for many images."""
+
+    def __init__(self, max_workers: Optional[int] = None,
+                 batch_size: int = DEFAULT_BATCH_SIZE):
+        """Initialize the fingerprinter.
+
+        Args:
+            max_workers: Decoding threads (default: CPU count)
+            batch_size: Thumbnails hashed together
+        """
+        if not NUMPY_AVAILABLE:
+            raise ImageFingerprintError("NumPy is required for image fingerprints")
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.batch_size = max(1, batch_size)
+
+    @staticmethod
+    def fingerprint_arrays(thumbnails: Any) -> List[Tuple[int, int]]:
+        """Hash a stack of 32x32 grayscale thumbnails.
+
+        Args:
+            thumbnails: (n, 32, 32) array
+
+        Returns:
+            List of (phash, dhash) integer pairs
+        """
+        stack = _as_stack(thumbnails)
+        return list(zip(phash_batch(stack).tolist(), dhash_batch(stack).tolist()))
+
+    def fingerprint_file(self, path: str) -> Optional[Tuple[int, int]]:
+        """Hash one image file.
+
+        Returns:
+            (phash, dhash), or None if the file cannot be decoded
+        """
+        thumbnail = load_thumbnail(path)
+        if thumbnail is None:
+            return None
+        return self.fingerprint_arrays(thumbnail)[0]
+
+    def _hash_batch(self, paths: List[str],
+                    thumbnails: List[Optional[Any]]) -> Iterator[Tuple[str, Optional[int], Optional[int]]]:
+        """Hash the decoded thumbnails of one batch, in input order."""
+        decoded = [thumbnail for thumbnail in thumbnails if thumbnail is not None]
+        hashes = iter(self.fingerprint_arrays(np.stack(decoded)) if decoded else [])
+        for path, thumbnail in zip(paths, thumbnails):
+            if thumbnail is None:
+                yield path, None, None
+            else:
+                phash, dhash = next(hashes)
+                yield path, phash, dhash
+
+    def fingerprint_files(self, paths: Iterable[str]) -> Iterator[Tuple[str, Optional[int], Optional[int]]]:
+        """Stream fingerprints of image files.
+
+        The next batch is decoding while the current one is hashed, and
+        at most two batches are in flight, so arbitrarily long path
+        streams run in bounded memory.
+
+        Args:
+            paths: Image file paths
+
+        Yields:
+            (path, phash, dhash) in input order; hashes are None for files
+            that cannot be decoded
+        """
+        if not PIL_AVAILABLE:
+            raise ImageFingerprintError("Pillow is required to decode images")
+
+        with ThreadPoolExecutor(max_workers=self.max_workers,
+                                thread_name_prefix='image-decode') as executor:
+            pending: deque = deque()
+            batch: List[str] = []
+            for path in paths:
+                batch.append(path)
+                if len(batch) == self.batch_size:
+                    pending.append((batch, [executor.submit(load_thumbnail, p) for p in batch]))
+                    batch = []
+                    if len(pending) > 1:
+                        done_paths, futures = pending.popleft()
+                        yield from self._hash_batch(done_paths, [f.result() for f in futures])
+            if batch:
+                pending.append((batch, [executor.submit(load_thumbnail, p) for p in batch]))
+            while pending:
+                done_paths, futures = pending.popleft()
+                yield from self._hash_batch(done_paths, [f.result() for f in futures])
+
+    def fingerprint_database(self, db: Any, page_size: int = 10000) -> int:
+        """Fingerprint image files in the files table that have no phash yet.
+
+        Files that are not images by extension, or fail to decode, are
+        skipped and left NULL.
+
+        Args:
+            db: DatabaseConnection
+            page_size: Rows read and committed per page
+
+        Returns:
+            Number of files fingerprinted
+        """
+        from nodupe.tools.databases.files import FileRepository
+
+        repository = FileRepository(db)
+        updated = 0
+        last_id = 0
+        while True:
+            rows = db.execute(
+                'SELECT id, path FROM files WHERE phash IS NULL AND id > ? ORDER BY id LIMIT ?',
+                (last_id, page_size)
+            ).fetchall()
+            if not rows:
+                return updated
+            last_id = rows[-1][0]
+
+            images = [(file_id, path) for file_id, path in rows if is_image_path(path)]
+            ids_by_path = {path: file_id for file_id, path in images}
+            hashes = [
+                (ids_by_path[path], phash, dhash)
+                for path, phash, dhash in self.fingerprint_files(path for _, path in images)
+                if phash is not None
+            ]
+            updated += repository.batch_update_perceptual_hashes(hashes)
+            db.commit()
@@ -0,0 +1,97 @@
+# SPDX-License-Identifier: Apache-2.0
+# Copyright (c) 2025 Allaun
+
+"""Image Fingerprint Tool for NoDupeLabs.
+
+Provides perceptual image fingerprinting (pHash/dHash) as a tool.
+"""
+
+from typing import List, Dict, Any, Callable
+from nodupe.core.tool_system.base import Tool
+from .fingerprint_logic import ImageFingerprinter, NUMPY_AVAILABLE, PIL_AVAILABLE
+
+
+class ImageFingerprintTool(Tool):
+    """Perceptual image fingerprinting tool."""
+
+    @property
+    def name(self) -> str:
+        return "image_fingerprint"
+
+    @property
+    def version(self) -> str:
+        return "1.0.0"
+
+    @property
+    def dependencies(self) -> List[str]:
+        return []
+
+    @property
+    def api_methods(self) -> Dict[str, Callable[..., Any]]:
+        return {
+            'fingerprint_file': self.fingerprinter.fingerprint_file,
+            'fingerprint_files': lambda paths: list(self.fingerprinter.fingerprint_files(paths)),
+            'fingerprint_arrays': self.fingerprinter.fingerprint_arrays,
+            'fingerprint_database': self.fingerprinter.fingerprint_database
+        }
+
+    def __init__(self):
+        """Initialize the tool."""
+        self.fingerprinter = ImageFingerprinter()
+
+    def initialize(self, container: Any) -> None:
+        """Initialize the tool and register services."""
+        container.register_service('image_fingerprinter', self.fingerprinter)
+
+    def shutdown(self) -> None:
+        """Shutdown the tool."""
+
+    def run_standalone(self, args: List[str]) -> int:
+        """Print fingerprints of image files in stand-alone mode."""
+        import argparse
+        parser = argparse.ArgumentParser(description=self.describe_usage())
+        parser.add_argument("images", nargs='*', help="Image files to fingerprint")
+
+        if not args:
+            parser.print_help()
+            return 0
+
+        parsed = parser.parse_args(args)
+        try:
+            for path, phash, dhash in self.fingerprinter.fingerprint_files(parsed.images):
+                if phash is None:
+                    print(f"{path}: could not be read as an image")
+                else:
+                    print(f"{path}: phash={phash:016x} dhash={dhash:016x}")
+            return 0
+        except Exception as e:
+            print(f"Error: {e}")
+            return 1
+
+    def describe_usage(self) -> str:
+        """Plain language description."""
+        return (
+            "This component makes a short 'visual fingerprint' of each picture. "
+            "Pictures that look alike get fingerprints that differ in only a few "
+            "places, even after resizing or re-saving, so near-copies can be found."
+        )
+
+    def get_capabilities(self) -> Dict[str, Any]:
+        """Get tool capabilities."""
+        return {
+            'hashes': ['phash', 'dhash'],
+            'hash_bits': 64,
+            'supports_decoding': PIL_AVAILABLE,
+            'supports_numpy': NUMPY_AVAILABLE
+        }
+
+
+def register_tool():
+    """Register the image fingerprint tool."""
+    return ImageFingerprintTool()
+
+
+if __name__ == "__main__":
+    import sys
+    tool = ImageFingerprintTool()
+    sys.exit(tool.run_standalone(sys.argv[1:]))
@@ -2,6 +2,7 @@
 
 from typing import Any, Callable, List, Optional
 
+from .snapshot import SnapshotManager
 from .transaction import TransactionLog
 
 
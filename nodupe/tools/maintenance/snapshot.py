@@ -2,12 +2,16 @@
 
 import hashlib
 import json
+import os
 import shutil
+import threading
 from dataclasses import asdict, dataclass
 from datetime import datetime
 from pathlib import Path
 from typing import Any, Callable, Dict, List, Optional
 
+from nodupe.tools.parallel.pipeline import Pipeline, Stage, default_io_workers
+
 # Supported hash algorithms
 HASH_ALGORITHMS = {
     "sha256": hashlib.sha256,
@@ -339,39 +343,57 @@ class SnapshotManager:
         """
         content_path = self.content_dir / file_hash
 
-        # Idempotent: only copy if not already backed up
+        # Idempotent: only copy if not already backed up. Copy to a private
+        # name and rename, so concurrent backups of equal content never
+        # leave a partial file at content_path
         if not content_path.exists():
-            shutil.copy2(filepath, content_path)
+            temp_path = self.content_dir / f".{file_hash}.{os.getpid()}.{threading.get_ident()}.tmp"
+            try:
+                shutil.copy2(filepath, temp_path)
+                os.replace(temp_path, content_path)
+            finally:
+                if temp_path.exists():
+                    temp_path.unlink()
 
         return str(content_path)
 
-    def create_snapshot(self, paths: List[str]) -> Snapshot:
+    def _snapshot_file(self, path_str: str) -> Optional[SnapshotFile]:
+        """Hash and back up one file (runs on the snapshot pipeline's pool)."""
+        path = Path(path_str)
+        if not (path.exists() and path.is_file()):
+            return None
+        file_hash = self._compute_hash(path)
+        if not file_hash:
+            return None
+        # Idempotent backup of content
+        backup_path = self._backup_file_content(path, file_hash)
+        stat = path.stat()
+        return SnapshotFile(
+            path=str(path.absolute()),
+            hash=file_hash,
+            size=stat.st_size,
+            modified=datetime.fromtimestamp(stat.st_mtime).isoformat(),
+            backup_path=backup_path,
+        )
+
+    def create_snapshot(self, paths: List[str], workers: Optional[int] = None) -> Snapshot:
         """Create a snapshot of specified paths with idempotent backup.
 
         Creates content-addressable backup of file contents before
         any operations. This is idempotent - same content is only
-        stored once.
+        stored once. Files are hashed and copied on a thread pool;
+        the snapshot lists them in the order given.
+
+        Args:
+            paths: Files to capture
+            workers: Threads hashing and copying files (default: I/O pool size)
         """
         snapshot_id = hashlib.sha256(datetime.now().isoformat().encode()).hexdigest()[:16]
 
-        files = []
-        for path_str in paths:
-            path = Path(path_str)
-            if path.exists() and path.is_file():
-                file_hash = self._compute_hash(path)
-                if file_hash:
-                    # Idempotent backup of content
-                    backup_path = self._backup_file_content(path, file_hash)
-
-                    files.append(
-                        SnapshotFile(
-                            path=str(path.absolute()),
-                            hash=file_hash,
-                            size=path.stat().st_size,
-                            modified=datetime.fromtimestamp(path.stat().st_mtime).isoformat(),
-                            backup_path=backup_path,
-                        )
-                    )
+        pipeline = Pipeline([
+            Stage("snapshot", self._snapshot_file, workers=workers or default_io_workers())
+        ])
+        files = list(pipeline.run(paths))
 
         snapshot = Snapshot(
             snapshot_id=snapshot_id, timestamp=datetime.now().isoformat(), files=files
@@ -6,7 +6,7 @@
 Provides MIME type detection capabilities as a tool.
 """
 
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Callable
 from nodupe.core.tool_system.base import Tool
 from .mime_logic import MIMEDetection
 
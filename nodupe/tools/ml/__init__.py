@@ -22,8 +22,12 @@ class MLBackend(ABC):
         """Check if this backend is available"""
 
     @abstractmethod
-    def generate_embeddings(self, data: List[Any]) -> List[List[float]]:
-        """Generate embeddings for input data"""
+    def generate_embeddings(self, data: List[Any]) -> List[Optional[List[float]]]:
+        """Generate embeddings for input data
+
+        Inputs that could not be embedded give None, so callers storing
+        the results must skip them.
+        """
 
     @abstractmethod
     def get_embedding_dimensions(self) -> int:
@@ -43,52 +47,97 @@ class CPUBackend(MLBackend):
 
     def generate_embeddings(self, data: List[Any]) -> List[List[float]]:
         """
-        Generate simple embeddings using NumPy
-        This is a placeholder implementation that creates random embeddings
+        Generate deterministic content embeddings using NumPy
+
+        Text and bytes are embedded by feature hashing of their word
+        shingles: each shingle adds +1 or -1 to one of self.dimensions
+        buckets and the result is L2-normalized, so items sharing passages
+        get a high cosine similarity. Arrays are embedded from their raw
+        bytes in the same way.
         """
         try:
-            # Create random embeddings for demonstration
+            from nodupe.tools.similarity.minhash import byte_shingles, word_shingles
+
             embeddings = []
-            for _ in data:
-                # Simple hash-based embedding for demonstration
-                if isinstance(item, str):
-                    # Convert string to numerical representation
-                    embedding = np.random.randn(self.dimensions).tolist()
+            for item in data:
+                if isinstance(item, (str, bytes)):
+                    shingles = word_shingles(item, 3)
+                    if len(shingles) == 0:
+                        # No words (binary or punctuation only): use bytes
+                        shingles = byte_shingles(item, 4)
                 elif isinstance(item, (list, np.ndarray)):
-                    # For array-like data, create embedding based on content
-                    embedding = np.random.randn(self.dimensions).tolist()
+                    shingles = byte_shingles(np.ascontiguousarray(item).tobytes(), 8)
                 else:
-                    # Fallback for other types
-                    embedding = np.random.randn(self.dimensions).tolist()
-                embeddings.append(embedding)
+                    shingles = byte_shingles(repr(item), 4)
+                embeddings.append(self._hash_features(shingles).tolist())
             return embeddings
         except Exception as e:
             logger.error(f"Error generating embeddings with CPU backend: {e}")
             # Return empty embeddings on error
             return [[] for _ in data]
 
+    def _hash_features(self, shingles: np.ndarray) -> np.ndarray:
+        """Signed feature-hashing vector of 64-bit shingle hashes."""
+        vector = np.zeros(self.dimensions, dtype=np.float64)
+        if len(shingles):
+            buckets = (shingles % np.uint64(self.dimensions)).astype(np.intp)
+            signs = np.where(shingles >> np.uint64(63), -1.0, 1.0)
+            np.add.at(vector, buckets, signs)
+            norm = np.linalg.norm(vector)
+            if norm > 0:
+                vector /= norm
+        return vector
+
     def get_embedding_dimensions(self) -> int:
         """Get embedding dimensionality"""
         return self.dimensions
 
 
 class ONNXBackend(MLBackend):
-    """ONNX Runtime backend for ML inference"""
+    """ONNX Runtime backend for ML inference
 
-    def __init__(self, model_path: Optional[str] = None):
-        """TODO: Document __init__."""
+    Inference goes through an EmbeddingEngine (see engine.py): inputs are
+    preprocessed on producer threads and run through one shared, thread-
+    tuned InferenceSession in dynamically sized batches.
+    """
+
+    def __init__(self, model_path: Optional[str] = None,
+                 intra_op_threads: Optional[int] = None,
+                 inter_op_threads: int = 1,
+                 batch_size: int = 32,
+                 max_latency: float = 0.05):
+        """
+        Load an ONNX model
+
+        Args:
+            model_path: Path to the .onnx model
+            intra_op_threads: Threads inside an operator (default: cores - 1)
+            inter_op_threads: Threads running independent operators
+            batch_size: Maximum inputs per inference call
+            max_latency: Seconds a batch may wait for more inputs
+        """
         self.dimensions = 128
         self.model_path = model_path
         self._available = False
         self._model = None
+        self._engine = None
 
         try:
-            # Try to import ONNX runtime
-            import onnxruntime as ort
+            from .engine import (
+                ONNXRUNTIME_AVAILABLE, EmbeddingEngine, get_inference_session, session_runner
+            )
+            if not ONNXRUNTIME_AVAILABLE:
+                raise ImportError("onnxruntime")
 
             # Try to load model if path provided
             if model_path:
-                self._model = ort.InferenceSession(model_path)
+                self._model = get_inference_session(model_path, intra_op_threads, inter_op_threads)
+                output_shape = self._model.get_outputs()[0].shape
+                if output_shape and isinstance(output_shape[-1], int):
+                    self.dimensions = output_shape[-1]
+                self._engine = EmbeddingEngine(session_runner(self._model),
+                                               batch_size=batch_size,
+                                               max_latency=max_latency)
                 self._available = True
                 logger.info(f"ONNX backend loaded model from {model_path}")
             else:
@@ -102,22 +151,20 @@ class ONNXBackend(MLBackend):
         """Check if ONNX backend is available"""
         return self._available
 
-    def generate_embeddings(self, data: List[Any]) -> List[List[float]]:
-        """Generate embeddings using ONNX model"""
+    def generate_embeddings(self, data: List[Any]) -> List[Optional[List[float]]]:
+        """Generate embeddings using ONNX model
+
+        Inputs that fail to preprocess give None rather than a placeholder
+        vector, which would look like a real embedding once stored.
+        """
         if not self.is_available():
             logger.warning("ONNX backend not available, using CPU fallback")
             cpu_backend = CPUBackend()
             return cpu_backend.generate_embeddings(data)
 
         try:
-            # Placeholder: actual implementation would use ONNX model
-            embeddings = []
-            for _ in data:
-                # Convert data to format expected by ONNX model
-                # This is a placeholder - actual implementation would preprocess data
-                embedding = np.random.randn(self.dimensions).tolist()
-                embeddings.append(embedding)
-            return embeddings
+            return [None if embedding is None else embedding.tolist()
+                    for _, embedding in self._engine.embed(data)]
         except Exception as e:
             logger.error(f"Error generating embeddings with ONNX backend: {e}")
             # Fallback to CPU backend
@@ -145,7 +192,7 @@ def create_ml_backend(backend_type: str = "auto", **kwargs) -> MLBackend:
     if backend_type == "auto":
         # Try ONNX first, fallback to CPU
         try:
-            onnx_backend = ONNXBackend(kwargs.get('model_path'))
+            onnx_backend = ONNXBackend(**kwargs)
             if onnx_backend.is_available():
                 logger.info("Using ONNX backend")
                 return onnx_backend
@@ -157,7 +204,7 @@ def create_ml_backend(backend_type: str = "auto", **kwargs) -> MLBackend:
         return CPUBackend()
 
     elif backend_type == "onnx":
-        return ONNXBackend(kwargs.get('model_path'))
+        return ONNXBackend(**kwargs)
 
     elif backend_type == "cpu":
         return CPUBackend()
@@ -1,45 +1,132 @@
 """Embedding Cache Module.
 
-Embedding vector caching using standard library only.
+Embedding vector caching in compact float32 slabs.
+
+Embeddings are stored as rows of a preallocated float32 matrix (one slab
+per dimensionality) instead of as Python lists: a 768-dimensional vector
+takes 3 KB as a slab row versus about 24 KB as a list of floats. A
+key -> row index locates entries, rows freed by eviction or invalidation
+go on a free-list and are reused, and row norms are kept alongside so
+similarity queries are a single matrix-vector product over the slab.
+
+With spilling enabled, entries evicted from memory are written to a disk
+tier of mmap'd segment files (see nodupe.tools.databases.segment_store)
+instead of being dropped, and are promoted back into memory when looked
+up, so a miss in memory costs a disk read rather than a model inference.
 
 Key Features:
     - In-memory embedding vector caching with TTL
-    - Vector similarity and distance calculations
+    - Slab-allocated float32 storage with free-list reuse
+    - Entry-count and byte-based capacity limits
+    - Optional disk tier for evicted entries, promoted back on hit
+    - Vectorized top-k and pairwise cosine similarity
     - Thread-safe operations
-    - Cache size limits and eviction policies
     - Vector dimension validation
-    - Standard library only (no external dependencies)
 
 Dependencies:
+    - numpy (required for slab storage)
+    - nodupe.tools.databases.segment_store (disk tier, when spilling)
+    - struct (standard library)
     - threading (standard library)
     - time (standard library)
-    - typing (standard library)
-    - hashlib (standard library)
-    - array (standard library)
 """
 
+import struct
 import threading
 import time
-from typing import Optional, Dict, Any, Tuple, List
 from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Rows allocated when a slab is created; slabs double when full
+INITIAL_SLAB_ROWS = 64
+# Disk tier value header: entry timestamp
+_SPILL_HEADER = struct.Struct('<d')
 
 
 class EmbeddingCacheError(Exception):
     """Embedding cache operation error"""
 
 
+class _Slab:
+    """Rows of equal-dimension embeddings in one float32 matrix."""
+
+    def __init__(self, dimensions: int, capacity: int = INITIAL_SLAB_ROWS):
+        self.dimensions = dimensions
+        self.vectors = np.zeros((capacity, dimensions), dtype=np.float32)
+        self.norms = np.zeros(capacity, dtype=np.float32)
+        self.stamps = np.zeros(capacity, dtype=np.float64)
+        self.live = np.zeros(capacity, dtype=bool)
+        self.keys: List[Optional[str]] = [None] * capacity
+        self.free: List[int] = []
+        self.high_water = 0
+
+    @property
+    def row_bytes(self) -> int:
+        """Bytes held per live row (vector plus norm)."""
+        return self.dimensions * 4 + 4
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes allocated by the slab arrays."""
+        return self.vectors.nbytes + self.norms.nbytes + self.stamps.nbytes + self.live.nbytes
+
+    def allocate(self, key: str, vector: Any, stamp: float) -> int:
+        """Store a vector in a free row, growing the slab if needed."""
+        if self.free:
+            row = self.free.pop()
+        else:
+            if self.high_water == len(self.live):
+                self._grow(2 * len(self.live))
+            row = self.high_water
+            self.high_water += 1
+        self.write(row, vector, stamp)
+        self.keys[row] = key
+        self.live[row] = True
+        return row
+
+    def write(self, row: int, vector: Any, stamp: float) -> None:
+        """Overwrite a row."""
+        self.vectors[row] = vector
+        self.norms[row] = np.linalg.norm(self.vectors[row])
+        self.stamps[row] = stamp
+
+    def release(self, row: int) -> None:
+        """Return a row to the free-list."""
+        self.live[row] = False
+        self.keys[row] = None
+        self.free.append(row)
+
+    def _grow(self, capacity: int) -> None:
+        """Reallocate the arrays with room for capacity rows."""
+        old = len(self.live)
+        vectors = np.zeros((capacity, self.dimensions), dtype=np.float32)
+        vectors[:old] = self.vectors
+        self.vectors = vectors
+        self.norms = np.concatenate([self.norms, np.zeros(capacity - old, dtype=np.float32)])
+        self.stamps = np.concatenate([self.stamps, np.zeros(capacity - old, dtype=np.float64)])
+        self.live = np.concatenate([self.live, np.zeros(capacity - old, dtype=bool)])
+        self.keys.extend([None] * (capacity - old))
+
+
 class EmbeddingCache:
     """Handle embedding vector caching operations.
 
     Provides caching of embedding vectors with validation, TTL expiration,
-    and configurable cache size limits.
+    and configurable entry-count and byte limits. Vectors are stored as
+    float32, so values read back are float32-rounded.
     """
 
     def __init__(
         self,
         max_size: int = 1000,
         ttl_seconds: int = 3600,
-        max_dimensions: int = 1024
+        max_dimensions: int = 1024,
+        max_bytes: Optional[int] = None,
+        spill: bool = False,
+        spill_directory: Optional[str] = None,
+        max_spill_bytes: Optional[int] = None
     ):
         """Initialize embedding cache.
 
@@ -47,21 +134,114 @@ class EmbeddingCache:
             max_size: Maximum number of entries in cache
             ttl_seconds: Time-to-live in seconds for cache entries
             max_dimensions: Maximum vector dimensions allowed
+            max_bytes: Maximum bytes of embedding data held (None for no limit)
+            spill: Keep entries evicted from memory in a disk tier
+            spill_directory: Directory for disk tier segments (default: a
+                temporary directory)
+            max_spill_bytes: Maximum bytes of disk tier files (None for no limit)
         """
         self.max_size = max_size
         self.ttl_seconds = ttl_seconds
         self.max_dimensions = max_dimensions
+        self.max_bytes = max_bytes
 
-        # Cache storage: key -> (embedding_vector, timestamp)
-        self._cache: OrderedDict[str, Tuple[List[float], float]] = OrderedDict()
+        # key -> (dimensions, row), oldest first
+        self._index: OrderedDict[str, Tuple[int, int]] = OrderedDict()
+        self._slabs: Dict[int, _Slab] = {}
+        self._bytes = 0
         self._lock = threading.RLock()
         self._stats = {
             'hits': 0,
             'misses': 0,
             'evictions': 0,
-            'insertions': 0
+            'insertions': 0,
+            'memory_hits': 0,
+            'memory_misses': 0,
+            'disk_hits': 0,
+            'disk_misses': 0,
+            'spills': 0,
+            'promotions': 0
         }
 
+        self._spill = None
+        if spill:
+            from nodupe.tools.databases.segment_store import SegmentStore
+            self._spill = SegmentStore(spill_directory, max_bytes=max_spill_bytes)
+
+    def _locate(self, key: str) -> Optional[Tuple[_Slab, int]]:
+        """Find the live, unexpired row of a key, dropping it if expired.
+
+        Keys missing from memory are looked up in the disk tier and
+        promoted back into memory when found.
+        """
+        entry = self._index.get(key)
+        if entry is None:
+            self._stats['memory_misses'] += 1
+            return self._promote(key)
+        slab = self._slabs[entry[0]]
+        row = entry[1]
+        if time.monotonic() - slab.stamps[row] > self.ttl_seconds:
+            self._remove(key)
+            self._stats['memory_misses'] += 1
+            return None
+        self._stats['memory_hits'] += 1
+        return slab, row
+
+    def _promote(self, key: str) -> Optional[Tuple[_Slab, int]]:
+        """Move a key from the disk tier back into memory."""
+        if self._spill is None:
+            return None
+        value = self._spill.pop(key.encode('utf-8'))
+        if value is None:
+            self._stats['disk_misses'] += 1
+            return None
+        (timestamp,) = _SPILL_HEADER.unpack_from(value)
+        if time.monotonic() - timestamp > self.ttl_seconds:
+            self._stats['disk_misses'] += 1
+            return None
+        vector = np.frombuffer(value, dtype=np.float32, offset=_SPILL_HEADER.size)
+        self._insert(key, vector, timestamp)
+        self._stats['disk_hits'] += 1
+        self._stats['promotions'] += 1
+        dimensions, row = self._index[key]
+        return self._slabs[dimensions], row
+
+    def _remove(self, key: str) -> None:
+        """Drop a key and free its row."""
+        dimensions, row = self._index.pop(key)
+        slab = self._slabs[dimensions]
+        slab.release(row)
+        self._bytes -= slab.row_bytes
+
+    def _evict_oldest(self) -> None:
+        """Drop the least recently set entry, spilling it to disk if enabled."""
+        key = next(iter(self._index))
+        if self._spill is not None:
+            dimensions, row = self._index[key]
+            slab = self._slabs[dimensions]
+            self._spill.put(key.encode('utf-8'),
+                            _SPILL_HEADER.pack(slab.stamps[row]) + slab.vectors[row].tobytes())
+            self._stats['spills'] += 1
+        self._remove(key)
+        self._stats['evictions'] += 1
+
+    def _insert(self, key: str, vector: Any, timestamp: float) -> None:
+        """Store a vector for a key not in memory, evicting as needed."""
+        # Remove oldest entry if at max size
+        while self._index and len(self._index) >= self.max_size:
+            self._evict_oldest()
+
+        dimensions = len(vector)
+        slab = self._slabs.get(dimensions)
+        if slab is None:
+            slab = self._slabs[dimensions] = _Slab(dimensions)
+        self._index[key] = (dimensions, slab.allocate(key, vector, timestamp))
+        self._bytes += slab.row_bytes
+
+        # Keep within the byte budget, never evicting the new entry
+        while self.max_bytes is not None and self._bytes > self.max_bytes and len(self._index) > 1:
+            self._evict_oldest()
+
     def get_embedding(self, key: str) -> Optional[List[float]]:
         """Get cached embedding vector.
 
@@ -72,46 +252,64 @@ class EmbeddingCache:
             Cached embedding vector or None if not found/cached
         """
         with self._lock:
-            if key not in self._cache:
+            located = self._locate(key)
+            if located is None:
                 self._stats['misses'] += 1
                 return None
 
-            embedding, timestamp = self._cache[key]
+            self._stats['hits'] += 1
+            slab, row = located
+            return slab.vectors[row].tolist()
+
+    def get_vector(self, key: str) -> Optional[Any]:
+        """Get a cached embedding as a float32 array (a copy of its row).
 
-            # Check if entry is expired
-            if time.monotonic() - timestamp > self.ttl_seconds:
-                del self._cache[key]
+        Args:
+            key: Cache key
+
+        Returns:
+            1-D float32 array or None if not found/cached
+        """
+        with self._lock:
+            located = self._locate(key)
+            if located is None:
                 self._stats['misses'] += 1
                 return None
 
             self._stats['hits'] += 1
-            return embedding
+            slab, row = located
+            return slab.vectors[row].copy()
 
-    def set_embedding(self, key: str, embedding: List[float]) -> None:
+    def set_embedding(self, key: str, embedding: Sequence[float]) -> None:
         """Set embedding vector in cache.
 
         Args:
             key: Cache key
             embedding: Embedding vector to cache
         """
+        vector = np.asarray(embedding, dtype=np.float32)
+        if vector.ndim != 1:
+            raise EmbeddingCacheError(f"Embedding must be one-dimensional, got shape {vector.shape}")
+
         with self._lock:
             # Validate embedding dimensions
-            if len(embedding) > self.max_dimensions:
+            if len(vector) > self.max_dimensions:
                 raise EmbeddingCacheError(
-                    f"Embedding dimensions {len(embedding)} exceed maximum {self.max_dimensions}"
+                    f"Embedding dimensions {len(vector)} exceed maximum {self.max_dimensions}"
                 )
 
-            # Remove oldest entry if at max size
-            if len(self._cache) >= self.max_size:
-                self._cache.popitem(last=False)
-                self._stats['evictions'] += 1
-
-            # Store with current timestamp
             timestamp = time.monotonic()
-            self._cache[key] = (embedding, timestamp)
-
-            # Move to end to mark as most recently used
-            self._cache.move_to_end(key, last=True)
+            entry = self._index.get(key)
+            if entry is not None and entry[0] == len(vector):
+                # Same shape: overwrite the row in place
+                self._slabs[entry[0]].write(entry[1], vector, timestamp)
+                self._index.move_to_end(key, last=True)
+            else:
+                if entry is not None:
+                    self._remove(key)
+                elif self._spill is not None:
+                    self._spill.delete(key.encode('utf-8'))
+                self._insert(key, vector, timestamp)
 
             self._stats['insertions'] += 1
 
@@ -125,14 +323,95 @@ class EmbeddingCache:
         Returns:
             Cosine similarity (0.0 to 1.0) or None if either not cached
         """
-        emb1 = self.get_embedding(key1)
-        emb2 = self.get_embedding(key2)
+        emb1 = self.get_vector(key1)
+        emb2 = self.get_vector(key2)
 
         if emb1 is None or emb2 is None:
             return None
 
         return self._cosine_similarity(emb1, emb2)
 
+    def _scores(self, key: str) -> Optional[Tuple[_Slab, Any, int]]:
+        """Cosine similarity of a key's embedding to every row of its slab.
+
+        Free and expired rows score -inf. Must be called with the lock held.
+
+        Returns:
+            (slab, scores over the slab's used rows, row of the key) or None
+        """
+        located = self._locate(key)
+        if located is None:
+            return None
+        slab, row = located
+        used = slab.high_water
+        with np.errstate(divide='ignore', invalid='ignore'):
+            scores = (slab.vectors[:used] @ slab.vectors[row]) / (slab.norms[:used] * slab.norms[row])
+        scores = np.clip(np.nan_to_num(scores, nan=0.0), 0.0, 1.0)
+        valid = slab.live[:used] & (time.monotonic() - slab.stamps[:used] <= self.ttl_seconds)
+        valid[row] = False
+        scores[~valid] = -np.inf
+        return slab, scores, row
+
+    def top_k_similar(self, key: str, k: int = 10) -> List[Tuple[str, float]]:
+        """Find the k cached embeddings most similar to a cached embedding.
+
+        Only embeddings of the same dimensionality are compared.
+
+        Args:
+            key: Reference embedding key
+            k: Number of results
+
+        Returns:
+            List of (key, similarity) tuples sorted by similarity descending
+        """
+        with self._lock:
+            scored = self._scores(key)
+            if scored is None or k <= 0:
+                return []
+            slab, scores, _ = scored
+            candidates = int(np.count_nonzero(np.isfinite(scores)))
+            k = min(k, candidates)
+            if k == 0:
+                return []
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top], kind='stable')]
+            return [(slab.keys[row], float(scores[row])) for row in top]
+
+    def similarity_matrix(self, keys: Sequence[str]) -> Any:
+        """Pairwise cosine similarities of cached embeddings.
+
+        Args:
+            keys: Cache keys, all cached and of equal dimensionality
+
+        Returns:
+            (n, n) float32 array of similarities (0.0 to 1.0)
+
+        Raises:
+            EmbeddingCacheError: If a key is not cached or dimensions differ
+        """
+        with self._lock:
+            # Copy each row out as soon as it is found: promoting a later
+            # key from the disk tier can evict an earlier one and reuse its row
+            vectors = []
+            norms = []
+            for key in keys:
+                entry = self._locate(key)
+                if entry is None:
+                    raise EmbeddingCacheError(f"Embedding not cached: {key}")
+                slab, row = entry
+                if vectors and slab.dimensions != len(vectors[0]):
+                    raise EmbeddingCacheError("Embeddings must have equal dimensions")
+                vectors.append(slab.vectors[row].copy())
+                norms.append(slab.norms[row])
+            if not vectors:
+                return np.zeros((0, 0), dtype=np.float32)
+            vectors = np.stack(vectors)
+            norms = np.array(norms, dtype=np.float32)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            matrix = (vectors @ vectors.T) / np.outer(norms, norms)
+        return np.clip(np.nan_to_num(matrix, nan=0.0), 0.0, 1.0).astype(np.float32)
+
     def invalidate(self, key: str) -> bool:
         """Invalidate cache entry.
 
@@ -143,43 +422,47 @@ class EmbeddingCache:
             True if entry was invalidated, False if not found
         """
         with self._lock:
-            if key in self._cache:
-                del self._cache[key]
+            if key in self._index:
+                self._remove(key)
                 return True
-            return False
+            return self._spill is not None and self._spill.delete(key.encode('utf-8'))
 
     def invalidate_all(self) -> None:
         """Invalidate all cache entries."""
         with self._lock:
             # Count the number of entries being cleared
-            num_entries = len(self._cache)
-            self._cache.clear()
+            num_entries = len(self._index)
+            self._index.clear()
+            self._slabs.clear()
+            self._bytes = 0
+            if self._spill is not None:
+                num_entries += len(self._spill)
+                self._spill.clear()
             # Increment evictions by the number of entries that were cleared
             self._stats['evictions'] += num_entries
 
     def validate_cache(self) -> int:
-        """Validate all cache entries and remove stale ones.
+        """Validate all in-memory cache entries and remove stale ones.
+
+        Expired entries in the disk tier are dropped when looked up.
 
         Returns:
             Number of entries removed
         """
         with self._lock:
-            removed_count = 0
             current_time = time.monotonic()
 
             # Collect keys to remove
-            keys_to_remove = []
-            for cache_key, (_embedding, _timestamp) in self._cache.items():
-                # Check TTL expiration
-                if current_time - _timestamp > self.ttl_seconds:
-                    keys_to_remove.append(cache_key)
+            keys_to_remove = [
+                cache_key for cache_key, (dimensions, row) in self._index.items()
+                if current_time - self._slabs[dimensions].stamps[row] > self.ttl_seconds
+            ]
 
             # Remove stale entries
             for cache_key in keys_to_remove:
-                del self._cache[cache_key]
-                removed_count += 1
+                self._remove(cache_key)
 
-            return removed_count
+            return len(keys_to_remove)
 
     def get_stats(self) -> Dict[str, Any]:
         """Get cache statistics.
@@ -189,8 +472,15 @@ class EmbeddingCache:
         """
         with self._lock:
             stats = self._stats.copy()
-            stats['size'] = len(self._cache)
+            stats['size'] = len(self._index)
             stats['capacity'] = self.max_size
+            stats['bytes'] = self._bytes
+            stats['max_bytes'] = self.max_bytes
+            if self._spill is not None:
+                disk = self._spill.get_stats()
+                stats['disk_size'] = disk['entries']
+                stats['disk_bytes'] = disk['file_bytes']
+                stats['disk_compactions'] = disk['compactions']
             stats['hit_rate'] = (
                 stats['hits'] / (stats['hits'] + stats['misses'])
                 if (stats['hits'] + stats['misses']) > 0
@@ -202,10 +492,10 @@ class EmbeddingCache:
         """Get current cache size.
 
         Returns:
-            Number of entries in cache
+            Number of entries in memory
         """
         with self._lock:
-            return len(self._cache)
+            return len(self._index)
 
     def is_cached(self, key: str) -> bool:
         """Check if an embedding is cached and valid.
@@ -216,7 +506,8 @@ class EmbeddingCache:
         Returns:
             True if embedding is cached and valid
         """
-        return self.get_embedding(key) is not None
+        with self._lock:
+            return self._locate(key) is not None
 
     def cleanup_expired(self) -> int:
         """Remove expired entries from cache.
@@ -236,28 +527,24 @@ class EmbeddingCache:
             self.max_size = new_max_size
 
             # Remove excess entries from the beginning (LRU)
-            while len(self._cache) > self.max_size:
-                self._cache.popitem(last=False)
-                self._stats['evictions'] += 1
+            while len(self._index) > self.max_size:
+                self._evict_oldest()
 
     def get_memory_usage(self) -> int:
         """Get approximate memory usage of cache.
 
         Returns:
-            Approximate memory usage in bytes
+            Approximate memory usage in bytes (slab arrays, including free
+            rows, plus keys and index overhead)
         """
         with self._lock:
-            # Rough estimate: key string + embedding array + timestamp + overhead
-            usage = 0
-            for key, (embedding, timestamp) in self._cache.items():
+            usage = sum(slab.nbytes for slab in self._slabs.values())
+            for key in self._index:
                 usage += len(key.encode('utf-8'))  # Key
-                usage += len(embedding) * 8  # Float array (8 bytes per float)
-                usage += 8  # Timestamp (float)
-                usage += 50  # Overhead per entry
-
+                usage += 50  # Index entry overhead
             return usage
 
-    def _cosine_similarity(self, vec1: List[float], vec2: List[float]) -> float:
+    def _cosine_similarity(self, vec1: Sequence[float], vec2: Sequence[float]) -> float:
         """Calculate cosine similarity between two vectors.
 
         Args:
@@ -267,24 +554,19 @@ class EmbeddingCache:
         Returns:
             Cosine similarity (0.0 to 1.0)
         """
-        if len(vec1) != len(vec2):
+        a = np.asarray(vec1, dtype=np.float64)
+        b = np.asarray(vec2, dtype=np.float64)
+        if a.shape != b.shape:
             raise EmbeddingCacheError("Vector dimensions must match for similarity calculation")
 
-        # Calculate dot product
-        dot_product = sum(a * b for a, b in zip(vec1, vec2))
-
-        # Calculate magnitudes
-        mag1 = sum(a * a for a in vec1) ** 0.5
-        mag2 = sum(b * b for b in vec2) ** 0.5
+        mag1 = np.linalg.norm(a)
+        mag2 = np.linalg.norm(b)
 
         if mag1 == 0 or mag2 == 0:
             return 0.0
 
-        # Calculate cosine similarity
-        similarity = dot_product / (mag1 * mag2)
-
         # Clamp to [0, 1] range (handle floating point precision issues)
-        return max(0.0, min(1.0, similarity))
+        return float(min(1.0, max(0.0, np.dot(a, b) / (mag1 * mag2))))
 
     def find_similar(
         self,
@@ -302,23 +584,11 @@ class EmbeddingCache:
         Returns:
             List of (key, similarity) tuples sorted by similarity descending
         """
-        reference_embedding = self.get_embedding(key)
-        if reference_embedding is None:
-            return []
-
-        similarities = []
-        with self._lock:
-            for cache_key, (embedding, _) in self._cache.items():
-                if cache_key == key:
-                    continue  # Skip self
-
-                similarity = self._cosine_similarity(reference_embedding, embedding)
-                if similarity >= threshold:
-                    similarities.append((cache_key, similarity))
-
-        # Sort by similarity descending and return top results
-        similarities.sort(key=lambda x: x[1], reverse=True)
-        return similarities[:max_results]
+        return [
+            (cache_key, similarity)
+            for cache_key, similarity in self.top_k_similar(key, max_results)
+            if similarity >= threshold
+        ]
 
     def get_average_embedding(self, keys: List[str]) -> Optional[List[float]]:
         """Get average embedding from multiple cached embeddings.
@@ -331,28 +601,14 @@ class EmbeddingCache:
         """
         embeddings = []
         for key in keys:
-            embedding = self.get_embedding(key)
+            embedding = self.get_vector(key)
             if embedding is not None:
                 embeddings.append(embedding)
 
         if not embeddings:
             return None
 
-        # Calculate average
-        avg_embedding = []
-        num_embeddings = len(embeddings)
-
-        # Get dimension from first embedding
-        if not embeddings:
-            return None
-
-        dim = len(embeddings[0])
-
-        for i in range(dim):
-            avg_value = sum(embedding[i] for embedding in embeddings) / num_embeddings
-            avg_embedding.append(avg_value)
-
-        return avg_embedding
+        return np.mean(np.stack(embeddings), axis=0, dtype=np.float64).tolist()
 
     def clear_by_pattern(self, pattern: str) -> int:
         """Clear cache entries that match a pattern.
@@ -364,31 +620,44 @@ class EmbeddingCache:
             Number of entries cleared
         """
         with self._lock:
-            keys_to_remove = []
-            for key in self._cache.keys():
-                if pattern.lower() in key.lower():
-                    keys_to_remove.append(key)
+            keys_to_remove = [key for key in self._index if pattern.lower() in key.lower()]
 
             for key in keys_to_remove:
-                del self._cache[key]
+                self._remove(key)
                 self._stats['evictions'] += 1
 
+            if self._spill is not None:
+                spilled = [key for key in self._spill.keys()
+                           if pattern.lower() in key.decode('utf-8').lower()]
+                for key in spilled:
+                    self._spill.delete(key)
+                    self._stats['evictions'] += 1
+                return len(keys_to_remove) + len(spilled)
+
             return len(keys_to_remove)
 
     def get_cached_keys(self) -> List[str]:
         """Get list of all cached keys.
 
         Returns:
-            List of cached keys
+            List of keys held in memory
         """
         with self._lock:
-            return list(self._cache.keys())
+            return list(self._index.keys())
+
+    def close(self) -> None:
+        """Release the disk tier, deleting its segment files."""
+        with self._lock:
+            if self._spill is not None:
+                self._spill.close()
+                self._spill = None
 
 
 def create_embedding_cache(
     max_size: int = 1000,
     ttl_seconds: int = 3600,
-    max_dims: int = 1024
+    max_dims: int = 1024,
+    max_bytes: Optional[int] = None
 ) -> EmbeddingCache:
     """Create an embedding cache instance.
 
@@ -396,8 +665,9 @@ def create_embedding_cache(
         max_size: Maximum number of entries
         ttl_seconds: Time-to-live in seconds
         max_dims: Maximum vector dimensions
+        max_bytes: Maximum bytes of embedding data
 
     Returns:
         EmbeddingCache instance
     """
-    return EmbeddingCache(max_size, ttl_seconds, max_dims)
+    return EmbeddingCache(max_size, ttl_seconds, max_dims, max_bytes)
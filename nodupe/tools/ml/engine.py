@@ -0,0 +1,303 @@
+"""Batched embedding inference with input prefetching.
+
+An EmbeddingEngine keeps a model busy: a pool of producer threads decodes
+and preprocesses upcoming inputs while the current batch runs, and a
+dynamic batcher closes a batch when it is full or when the oldest input
+in it has waited longer than the latency budget, whichever comes first.
+Results come back in input order and can be written to the embeddings
+table in bulk.
+
+ONNX models run in one InferenceSession per (model, thread settings),
+created once and shared by every backend and engine in the process, with
+intra-op and inter-op thread counts set explicitly instead of left to
+the runtime's defaults.
+
+Key Features:
+    - Dynamic batching bounded by batch size and latency budget
+    - Prefetching producer thread pool with bounded lookahead
+    - Shared, thread-tuned ONNX Runtime sessions
+    - Bulk writes through EmbeddingRepository
+
+Dependencies:
+    - numpy (required by this module)
+    - onnxruntime (optional, for ONNX models)
+    - concurrent.futures, threading (standard library only)
+"""
+
+import logging
+import os
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+try:
+    import onnxruntime as ort
+    ONNXRUNTIME_AVAILABLE = True
+except ImportError:
+    ort = None
+    ONNXRUNTIME_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# Inputs per inference call
+DEFAULT_BATCH_SIZE = 32
+# Seconds the first input of a batch may wait for the batch to fill
+DEFAULT_MAX_LATENCY = 0.05
+# Embeddings per bulk database write
+DEFAULT_WRITE_BATCH = 1000
+
+# Queue markers for the end of the inputs and a failing input source
+_DONE = object()
+_FAILED = object()
+
+_SESSIONS: Dict[Tuple[str, int, int], Any] = {}
+_SESSIONS_LOCK = threading.Lock()
+
+
+class EmbeddingEngineError(Exception):
+    """Embedding engine error"""
+
+
+def default_intra_op_threads() -> int:
+    """Threads for parallelism inside one operator: all cores but one.
+
+    One core is left for the producer threads that prepare the next batch.
+    """
+    return max(1, (os.cpu_count() or 2) - 1)
+
+
+def get_inference_session(model_path: str, intra_op_threads: Optional[int] = None,
+                          inter_op_threads: int = 1) -> Any:
+    """Get the shared ONNX Runtime session for a model.
+
+    Args:
+        model_path: Path to the .onnx model
+        intra_op_threads: Threads inside an operator (default: cores - 1)
+        inter_op_threads: Threads running independent operators; 1 runs the
+            graph sequentially, which suits the mostly-serial embedding models
+
+    Returns:
+        onnxruntime.InferenceSession
+
+    Raises:
+        EmbeddingEngineError: If onnxruntime is not installed
+    """
+    if not ONNXRUNTIME_AVAILABLE:
+        raise EmbeddingEngineError("onnxruntime is required for ONNX models")
+    intra_op_threads = intra_op_threads or default_intra_op_threads()
+    key = (os.path.abspath(model_path), intra_op_threads, inter_op_threads)
+    with _SESSIONS_LOCK:
+        session = _SESSIONS.get(key)
+        if session is None:
+            options = ort.SessionOptions()
+            options.intra_op_num_threads = intra_op_threads
+            options.inter_op_num_threads = inter_op_threads
+            options.execution_mode = (ort.ExecutionMode.ORT_SEQUENTIAL if inter_op_threads == 1
+                                      else ort.ExecutionMode.ORT_PARALLEL)
+            options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+            session = ort.InferenceSession(model_path, sess_options=options,
+                                           providers=['CPUExecutionProvider'])
+            _SESSIONS[key] = session
+        return session
+
+
+def session_runner(session: Any) -> Callable[[Any], Any]:
+    """Wrap a single-input, single-output session as a batch function."""
+    input_name = session.get_inputs()[0].name
+    output_name = session.get_outputs()[0].name
+
+    def run_batch(batch: Any) -> Any:
+        return session.run([output_name], {input_name: batch})[0]
+
+    return run_batch
+
+
+def _to_float32(item: Any) -> Any:
+    """Default preprocessing: the item as a float32 array."""
+    return np.asarray(item, dtype=np.float32)
+
+
+class EmbeddingEngine:
+    """Run a batch model over a stream of inputs with prefetching."""
+
+    def __init__(self, run_batch: Callable[[Any], Any],
+                 preprocess: Optional[Callable[[Any], Any]] = None,
+                 batch_size: int = DEFAULT_BATCH_SIZE,
+                 max_latency: float = DEFAULT_MAX_LATENCY,
+                 prefetch_workers: Optional[int] = None,
+                 prefetch_depth: Optional[int] = None):
+        """Initialize the engine.
+
+        Args:
+            run_batch: Maps a stacked (n, ...) input array to (n, dimensions)
+            preprocess: Decodes one input into a model-ready array (runs on
+                the producer threads; default converts to float32)
+            batch_size: Maximum inputs per run_batch call
+            max_latency: Seconds a batch may wait for more inputs
+            prefetch_workers: Producer threads (default: min(4, cores))
+            prefetch_depth: Inputs submitted ahead (default: 2 batches)
+        """
+        if batch_size <= 0:
+            raise EmbeddingEngineError(f"batch_size must be positive, got {batch_size}")
+        self.run_batch = run_batch
+        self.preprocess = preprocess or _to_float32
+        self.batch_size = batch_size
+        self.max_latency = max_latency
+        self.prefetch_workers = prefetch_workers or min(4, os.cpu_count() or 1)
+        self.prefetch_depth = prefetch_depth or 2 * batch_size
+        self.batches_run = 0
+
+    def _feed(self, items: Iterable[Any], pool: ThreadPoolExecutor,
+              pending: 'queue.Queue', stop: threading.Event) -> None:
+        """Pull inputs and submit their preprocessing (runs on a feeder thread).
+
+        The bounded queue limits how far ahead of inference the feeder runs.
+        """
+        def put(entry: Tuple[Any, Any]) -> bool:
+            while not stop.is_set():
+                try:
+                    pending.put(entry, timeout=0.1)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        try:
+            for item in items:
+                if not put((item, pool.submit(self.preprocess, item))):
+                    return
+            put((_DONE, None))
+        except Exception as e:  # pylint: disable=broad-exception-caught
+            put((_FAILED, e))
+
+    def _batches(self, items: Iterable[Any]) -> Iterator[List[Tuple[Any, Any]]]:
+        """Group preprocessed inputs into batches, in input order.
+
+        A batch is closed when it holds batch_size inputs or when its first
+        input has waited max_latency seconds, whether the wait is for a slow
+        input source or slow preprocessing. Failed preprocessing yields
+        (item, None) entries, which are not sent to the model.
+        """
+        pending: queue.Queue = queue.Queue(maxsize=self.prefetch_depth)
+        stop = threading.Event()
+        pool = ThreadPoolExecutor(max_workers=self.prefetch_workers,
+                                  thread_name_prefix='embedding-prefetch')
+        feeder = threading.Thread(target=self._feed, args=(items, pool, pending, stop),
+                                  name='embedding-feeder', daemon=True)
+        feeder.start()
+        try:
+            batch: List[Tuple[Any, Any]] = []
+            deadline = 0.0
+            head = None
+            while True:
+                timeout = max(0.0, deadline - time.monotonic()) if batch else None
+                if head is None:
+                    try:
+                        head = pending.get(timeout=timeout)
+                    except queue.Empty:
+                        # Latency budget spent waiting for input: run what we have
+                        yield batch
+                        batch = []
+                        continue
+                item, future = head
+                if item is _DONE:
+                    break
+                if item is _FAILED:
+                    raise EmbeddingEngineError(f"Failed to read inputs: {future}") from future
+
+                try:
+                    value = future.result(timeout=timeout)
+                except FutureTimeoutError:
+                    # Latency budget spent waiting for preprocessing
+                    yield batch
+                    batch = []
+                    continue
+                except Exception as e:  # pylint: disable=broad-exception-caught
+                    logger.warning(f"Failed to preprocess {item!r}: {e}")
+                    value = None
+                head = None
+
+                if not batch:
+                    deadline = time.monotonic() + self.max_latency
+                batch.append((item, value))
+                if len(batch) >= self.batch_size:
+                    yield batch
+                    batch = []
+            if batch:
+                yield batch
+        finally:
+            stop.set()
+            feeder.join()
+            pool.shutdown(wait=True, cancel_futures=True)
+
+    def embed(self, items: Iterable[Any]) -> Iterator[Tuple[Any, Optional[Any]]]:
+        """Stream embeddings of inputs.
+
+        Args:
+            items: Inputs accepted by the preprocess function
+
+        Yields:
+            (item, embedding) in input order; embedding is None for inputs
+            that failed to preprocess
+        """
+        for batch in self._batches(items):
+            ready = [value for _, value in batch if value is not None]
+            outputs = iter(())
+            if ready:
+                try:
+                    stacked = np.stack(ready)
+                except ValueError as e:
+                    raise EmbeddingEngineError(f"Preprocessed inputs differ in shape: {e}") from e
+                result = np.asarray(self.run_batch(stacked), dtype=np.float32)
+                if len(result) != len(ready):
+                    raise EmbeddingEngineError(
+                        f"Model returned {len(result)} rows for a batch of {len(ready)}")
+                outputs = iter(result.reshape(len(ready), -1))
+                self.batches_run += 1
+            for item, value in batch:
+                yield item, (next(outputs) if value is not None else None)
+
+    def embed_to_repository(self, items: Iterable[Tuple[int, Any]], repository: Any,
+                            model_version: str, write_batch: int = DEFAULT_WRITE_BATCH) -> int:
+        """Embed (file_id, input) pairs and store them in bulk.
+
+        Args:
+            items: (file_id, input) pairs
+            repository: EmbeddingRepository
+            model_version: Model version recorded with each embedding
+            write_batch: Embeddings per batch_add_embeddings call
+
+        Returns:
+            Number of embeddings stored
+        """
+        pairs = iter(items)
+        file_ids: deque = deque()
+
+        def inputs() -> Iterator[Any]:
+            for file_id, item in pairs:
+                file_ids.append(file_id)
+                yield item
+
+        created_time = int(time.time())
+        stored = 0
+        rows: List[Dict[str, Any]] = []
+        for _, embedding in self.embed(inputs()):
+            file_id = file_ids.popleft()
+            if embedding is None:
+                continue
+            rows.append({'file_id': file_id, 'embedding': embedding,
+                         'model_version': model_version, 'created_time': created_time})
+            if len(rows) >= write_batch:
+                stored += repository.batch_add_embeddings(rows)
+                repository.db.commit()
+                rows = []
+        if rows:
+            stored += repository.batch_add_embeddings(rows)
+            repository.db.commit()
+        return stored
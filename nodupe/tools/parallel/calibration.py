@@ -0,0 +1,318 @@
+"""Calibration Module.
+
+Measure which executor is fastest for each kind of work on this host.
+
+Whether threads, processes or subinterpreters win depends on the
+interpreter as much as on the task: on a GIL build, CPU-bound pure-Python
+work needs processes, a free-threaded build runs the same work on
+threads without pickling, NumPy releases the GIL for most of its
+kernels, and hashing large files is limited by I/O whatever runs it.
+ExecutorCalibrator runs representative workloads on every executor
+available to the running interpreter and stores the winner per task
+class under a key naming the host, interpreter version and build, with
+the pool size and chunking it was measured with.
+Parallel.smart_map(task_class=...) then routes to the stored winner using
+the same settings.
+
+Task classes:
+    - hash_small: SHA-256 of many small files
+    - hash_large: SHA-256 of a few large files
+    - phash: DCT perceptual hashes of thumbnail batches (NumPy)
+    - minhash: MinHash signatures of text documents (NumPy)
+
+Key Features:
+    - Micro-benchmarks of thread, process and interpreter pools
+    - Results keyed per host and interpreter build (3.11, 3.13t, 3.14, ...)
+    - JSON persistence shared by every interpreter on the host
+    - Executors that fail a workload are recorded, never chosen
+
+Dependencies:
+    - concurrent.futures (standard library)
+    - json (standard library)
+    - numpy (optional, for the phash and minhash workloads)
+"""
+
+import hashlib
+import json
+import logging
+import os
+import platform
+import sys
+import tempfile
+import threading
+import time
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .parallel_logic import Parallel
+
+logger = logging.getLogger(__name__)
+
+EXECUTOR_THREAD = 'thread'
+EXECUTOR_PROCESS = 'process'
+EXECUTOR_INTERPRETER = 'interpreter'
+
+TASK_CLASSES = ('hash_small', 'hash_large', 'phash', 'minhash')
+
+# Environment variable overriding the calibration file location
+CALIBRATION_FILE_ENV = 'NODUPE_CALIBRATION_FILE'
+
+# Chunks each worker gets when mapping over a process or interpreter pool
+CHUNKS_PER_WORKER = 4
+
+_HASH_CHUNK = 1024 * 1024
+_STORE_LOCK = threading.Lock()
+_LOADED: Dict[str, Tuple[float, Dict[str, Any]]] = {}
+
+
+class CalibrationError(Exception):
+    """Executor calibration error"""
+
+
+def default_calibration_path() -> Path:
+    """Calibration file: $NODUPE_CALIBRATION_FILE or ~/.nodupe/executor_calibration.json."""
+    override = os.environ.get(CALIBRATION_FILE_ENV)
+    if override:
+        return Path(override)
+    return Path.home() / '.nodupe' / 'executor_calibration.json'
+
+
+def host_key() -> str:
+    """Key naming this host and interpreter build.
+
+    Interpreters on one host share the calibration file but not results:
+    3.13 and 3.13t (free-threaded) are calibrated separately.
+    """
+    build = 't' if Parallel.is_free_threaded() else ''
+    version = f"{platform.python_implementation()}-{sys.version_info.major}.{sys.version_info.minor}{build}"
+    return f"{platform.node()}|{platform.machine()}|{version}|cpus={Parallel.get_cpu_count()}"
+
+
+def available_executors() -> List[str]:
+    """Executor kinds the running interpreter can use."""
+    executors = [EXECUTOR_THREAD, EXECUTOR_PROCESS]
+    if Parallel.supports_interpreter_pool():
+        try:
+            from concurrent.futures import InterpreterPoolExecutor  # noqa: F401
+            executors.append(EXECUTOR_INTERPRETER)
+        except ImportError:
+            pass
+    return executors
+
+
+def load_calibration(path: Optional[Path] = None) -> Dict[str, Any]:
+    """Read all stored calibrations (cached until the file changes).
+
+    Returns:
+        Dictionary of host key -> task class -> calibration record
+    """
+    path = Path(path or default_calibration_path())
+    try:
+        mtime = path.stat().st_mtime
+    except OSError:
+        return {}
+    cached = _LOADED.get(str(path))
+    if cached and cached[0] == mtime:
+        return cached[1]
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, ValueError) as e:
+        logger.warning(f"Ignoring unreadable calibration file {path}: {e}")
+        return {}
+    _LOADED[str(path)] = (mtime, data)
+    return data
+
+
+def get_calibration(task_class: str, path: Optional[Path] = None) -> Optional[Dict[str, Any]]:
+    """Stored calibration record for a task class on this host.
+
+    Returns:
+        Record with the winning executor, workers and chunks_per_worker, or
+        None if the task class is not calibrated or its winner cannot run
+        in this interpreter
+    """
+    record = load_calibration(path).get(host_key(), {}).get(task_class)
+    if not record or record.get('winner') not in available_executors():
+        return None
+    return record
+
+
+def get_calibrated_executor(task_class: str, path: Optional[Path] = None) -> Optional[str]:
+    """Stored winning executor for a task class on this host, if calibrated."""
+    record = get_calibration(task_class, path)
+    return record['winner'] if record else None
+
+
+def chunk_size_for(item_count: int, workers: int,
+                   chunks_per_worker: int = CHUNKS_PER_WORKER) -> int:
+    """Items per chunk when splitting item_count items over workers."""
+    return max(1, item_count // (max(1, workers) * max(1, chunks_per_worker)))
+
+
+def _save_records(records: Dict[str, Any], path: Path) -> None:
+    """Merge this host's records into the calibration file atomically."""
+    with _STORE_LOCK:
+        data = dict(load_calibration(path))
+        data.setdefault(host_key(), {}).update(records)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=str(path.parent), prefix='.calibration-')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(data, f, indent=2, sort_keys=True)
+            os.replace(temp_path, path)
+        finally:
+            if os.path.exists(temp_path):
+                os.unlink(temp_path)
+        _LOADED.pop(str(path), None)
+
+
+# Workloads. Top-level so that process and interpreter pools can run them.
+
+def hash_file_workload(path: str) -> str:
+    """SHA-256 of a file."""
+    hasher = hashlib.sha256()
+    with open(path, 'rb') as f:
+        while chunk := f.read(_HASH_CHUNK):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+def phash_workload(seed: int) -> int:
+    """Perceptual hashes of a batch of random thumbnails."""
+    import numpy as np
+    from nodupe.tools.image.fingerprint_logic import phash_batch
+    thumbnails = np.random.default_rng(seed).random((16, 32, 32), dtype=np.float32)
+    return int(phash_batch(thumbnails)[0])
+
+
+@lru_cache(maxsize=1)
+def _minhasher() -> Any:
+    from nodupe.tools.similarity.minhash import MinHasher
+    return MinHasher(num_perm=128)
+
+
+def minhash_workload(document: str) -> int:
+    """MinHash signature of a text document."""
+    return int(_minhasher().signature(document)[0])
+
+
+class ExecutorCalibrator:
+    """Benchmark executors on representative workloads and store the winners."""
+
+    def __init__(self, path: Optional[Path] = None, workers: Optional[int] = None,
+                 scale: float = 1.0, repeats: int = 2,
+                 executors: Optional[List[str]] = None):
+        """Initialize the calibrator.
+
+        Args:
+            path: Calibration file (default: default_calibration_path())
+            workers: Pool size used for every executor (default: CPU count)
+            scale: Multiplier for workload sizes (lower for quick runs)
+            repeats: Runs per executor; the fastest counts
+            executors: Executors to compare (default: all available)
+        """
+        self.path = Path(path or default_calibration_path())
+        self.workers = workers or Parallel.get_cpu_count()
+        self.scale = scale
+        self.repeats = max(1, repeats)
+        self.executors = executors or available_executors()
+
+    def _workload(self, task_class: str, directory: str) -> Tuple[Callable[[Any], Any], List[Any]]:
+        """Function and inputs of a task class, creating any files needed."""
+        if task_class in ('hash_small', 'hash_large'):
+            if task_class == 'hash_small':
+                count, size = max(8, int(512 * self.scale)), 16 * 1024
+            else:
+                count, size = max(2, self.workers), max(1024 * 1024, int(32 * 1024 * 1024 * self.scale))
+            paths = []
+            for index in range(count):
+                path = os.path.join(directory, f'{task_class}-{index}.bin')
+                with open(path, 'wb') as f:
+                    f.write(os.urandom(size))
+                paths.append(path)
+            return hash_file_workload, paths
+        if task_class == 'phash':
+            return phash_workload, list(range(max(8, int(256 * self.scale))))
+        if task_class == 'minhash':
+            words = [f'word{index % 997}' for index in range(4000)]
+            documents = [' '.join(words[offset:] + words[:offset])
+                         for offset in range(max(8, int(128 * self.scale)))]
+            return minhash_workload, documents
+        raise CalibrationError(f"Unknown task class: {task_class}")
+
+    def _time(self, executor: str, func: Callable[[Any], Any], items: List[Any]) -> float:
+        """Fastest wall time of mapping func over items with an executor."""
+        best = float('inf')
+        for _ in range(self.repeats):
+            start = time.perf_counter()
+            Parallel.map_parallel(
+                func, items, workers=self.workers,
+                use_processes=executor == EXECUTOR_PROCESS,
+                use_interpreters=executor == EXECUTOR_INTERPRETER,
+                chunk_size=chunk_size_for(len(items), self.workers))
+            best = min(best, time.perf_counter() - start)
+        return best
+
+    def benchmark(self, task_class: str) -> Dict[str, Any]:
+        """Benchmark every executor on one task class.
+
+        Returns:
+            Calibration record: winner, items per second per executor
+            (None for executors that failed), the workers and
+            chunks_per_worker used, and when it was measured
+        """
+        with tempfile.TemporaryDirectory(prefix='nodupe-calibration-') as directory:
+            func, items = self._workload(task_class, directory)
+            rates: Dict[str, Optional[float]] = {}
+            for executor in self.executors:
+                try:
+                    elapsed = self._time(executor, func, items)
+                    rates[executor] = len(items) / elapsed if elapsed > 0 else float('inf')
+                except Exception as e:  # pylint: disable=broad-exception-caught
+                    logger.info(f"Executor {executor} cannot run {task_class}: {e}")
+                    rates[executor] = None
+        measured = {name: rate for name, rate in rates.items() if rate is not None}
+        if not measured:
+            raise CalibrationError(f"No executor could run {task_class}")
+        return {
+            'winner': max(measured, key=measured.get),
+            'items_per_second': rates,
+            'workers': self.workers,
+            'chunks_per_worker': CHUNKS_PER_WORKER,
+            'calibrated_at': time.time(),
+        }
+
+    def calibrate(self, task_classes: Optional[List[str]] = None) -> Dict[str, Any]:
+        """Benchmark task classes and persist the results for this host.
+
+        Task classes whose workload needs a missing optional dependency
+        (NumPy for phash and minhash) are skipped.
+
+        Args:
+            task_classes: Task classes to calibrate (default: all)
+
+        Returns:
+            Dictionary of task class -> calibration record
+        """
+        records = {}
+        for task_class in task_classes or TASK_CLASSES:
+            try:
+                records[task_class] = self.benchmark(task_class)
+            except CalibrationError as e:
+                logger.warning(f"Skipping calibration of {task_class}: {e}")
+                continue
+            logger.info(f"Calibrated {task_class}: {records[task_class]['winner']}")
+        if records:
+            _save_records(records, self.path)
+        return records
+
+
+def calibrate_executors(task_classes: Optional[List[str]] = None, **options: Any) -> Dict[str, Any]:
+    """Calibrate executors for this host (see ExecutorCalibrator).
+
+    Returns:
+        Dictionary of task class -> calibration record
+    """
+    return ExecutorCalibrator(**options).calibrate(task_classes)
@@ -0,0 +1,250 @@
+"""Controller Module.
+
+Adaptive worker-count control using standard library only.
+
+The right number of workers for I/O-bound work such as hashing depends on
+the storage underneath: an NVMe drive keeps improving up to dozens of
+concurrent reads, a spinning disk is fastest with one or two, and network
+filesystems sit somewhere else again. Instead of guessing from the CPU
+count, a ConcurrencyController measures throughput (bytes or tasks per
+second) and task latency over short windows and moves the worker limit.
+When bytes are measured, latency is compared per byte, so a window of
+large files is not mistaken for a saturated device:
+
+    - Additive increase while throughput keeps improving (hill climbing)
+    - Direction reversal when a step made throughput worse
+    - A step back when an added worker brought no gain
+    - Multiplicative decrease when latency balloons without a throughput
+      gain, the sign of a saturated device
+    - Hold on a plateau
+
+Pools ask the controller for its current limit and report each finished
+task to it. Every change is recorded as a ControllerDecision, which
+callers can show in progress output.
+
+Key Features:
+    - AIMD / hill-climbing concurrency control
+    - Byte or task throughput measurement
+    - Thread-safe task reporting
+    - Decision log and callback for progress output
+    - Standard library only (no external dependencies)
+
+Dependencies:
+    - threading (standard library)
+    - time (standard library)
+"""
+
+import os
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional
+
+
+# Decisions kept for reporting; older ones are dropped
+DECISION_HISTORY = 1000
+
+
+class ControllerError(Exception):
+    """Concurrency controller error"""
+
+
+@dataclass
+class ControllerDecision:
+    """One adjustment (or deliberate hold) of the worker limit."""
+
+    timestamp: float
+    previous: int
+    workers: int
+    throughput: float
+    latency: float
+    unit: str
+    reason: str
+
+    def describe(self) -> str:
+        """Short human-readable summary for progress output."""
+        if self.unit == 'bytes':
+            rate = f"{self.throughput / (1024 * 1024):.1f} MiB/s"
+        else:
+            rate = f"{self.throughput:.1f} tasks/s"
+        change = (f"{self.previous} -> {self.workers}" if self.workers != self.previous
+                  else f"{self.workers}")
+        return f"workers {change} ({self.reason}, {rate}, {self.latency * 1000:.1f} ms/task)"
+
+
+class ConcurrencyController:
+    """Adjust a worker limit from measured throughput and latency."""
+
+    def __init__(
+        self,
+        min_workers: int = 1,
+        max_workers: Optional[int] = None,
+        initial_workers: Optional[int] = None,
+        sample_interval: float = 0.5,
+        min_samples: int = 8,
+        tolerance: float = 0.05,
+        latency_factor: float = 2.0,
+        backoff: float = 0.5,
+        on_decision: Optional[Callable[[ControllerDecision], None]] = None,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        """Initialize the controller.
+
+        Args:
+            min_workers: Lowest limit
+            max_workers: Highest limit (default: min(64, 4 * CPU count))
+            initial_workers: Starting limit (default: min(4, max_workers))
+            sample_interval: Minimum seconds per measurement window
+            min_samples: Minimum finished tasks per measurement window
+            tolerance: Relative throughput change treated as noise
+            latency_factor: Latency growth over the best window that,
+                without a throughput gain, triggers a multiplicative decrease
+                (busy seconds per byte when bytes are measured, else per task)
+            backoff: Factor applied to the limit on a multiplicative decrease
+            on_decision: Called with each ControllerDecision
+            clock: Monotonic time source
+        """
+        max_workers = max_workers or min(64, 4 * (os.cpu_count() or 1))
+        if not 1 <= min_workers <= max_workers:
+            raise ControllerError(
+                f"Invalid worker range: min {min_workers}, max {max_workers}")
+        if not 0 < backoff < 1:
+            raise ControllerError(f"backoff must be between 0 and 1, got {backoff}")
+        self.min_workers = min_workers
+        self.max_workers = max_workers
+        self.sample_interval = sample_interval
+        self.min_samples = min_samples
+        self.tolerance = tolerance
+        self.latency_factor = latency_factor
+        self.backoff = backoff
+        self.on_decision = on_decision
+        self._clock = clock
+
+        initial = initial_workers or min(4, max_workers)
+        self._limit = max(min_workers, min(max_workers, initial))
+        self._direction = 1
+        self._previous_throughput: Optional[float] = None
+        self._best_cost: Optional[float] = None
+        self._cost_unit: Optional[str] = None
+        self._decisions: deque = deque(maxlen=DECISION_HISTORY)
+        self._decision_count = 0
+        self._lock = threading.Lock()
+        self._reset_window(clock())
+
+    def _reset_window(self, now: float) -> None:
+        """Start a new measurement window."""
+        self._window_start = now
+        self._window_tasks = 0
+        self._window_bytes = 0
+        self._window_busy = 0.0
+
+    @property
+    def limit(self) -> int:
+        """Current worker limit."""
+        return self._limit
+
+    @property
+    def decisions(self) -> List[ControllerDecision]:
+        """The last DECISION_HISTORY decisions, oldest first."""
+        with self._lock:
+            return list(self._decisions)
+
+    @property
+    def last_decision(self) -> Optional[ControllerDecision]:
+        """Most recent decision, if any."""
+        with self._lock:
+            return self._decisions[-1] if self._decisions else None
+
+    def record(self, elapsed: float, size: int = 0) -> None:
+        """Report one finished task.
+
+        Args:
+            elapsed: Seconds the task took
+            size: Bytes the task processed (0 to measure tasks per second)
+        """
+        decision = None
+        with self._lock:
+            self._window_tasks += 1
+            self._window_bytes += size
+            self._window_busy += elapsed
+            now = self._clock()
+            if (self._window_tasks >= self.min_samples
+                    and now - self._window_start >= self.sample_interval):
+                decision = self._decide(now)
+                self._reset_window(now)
+        if decision is not None and self.on_decision:
+            self.on_decision(decision)
+
+    def _decide(self, now: float) -> ControllerDecision:
+        """Close the window and pick the next limit (called with the lock held)."""
+        duration = now - self._window_start
+        unit = 'bytes' if self._window_bytes else 'tasks'
+        amount = self._window_bytes if self._window_bytes else self._window_tasks
+        throughput = amount / duration
+        latency = self._window_busy / self._window_tasks
+        # Per-task latency rises with file size; per-byte cost only with load
+        cost = self._window_busy / amount
+        if unit != self._cost_unit:
+            self._best_cost = None
+            self._cost_unit = unit
+        previous_throughput = self._previous_throughput
+        previous = self._limit
+
+        gained = (previous_throughput is not None
+                  and throughput > previous_throughput * (1 + self.tolerance))
+        lost = (previous_throughput is not None
+                and throughput < previous_throughput * (1 - self.tolerance))
+
+        if (self._best_cost is not None and not gained
+                and cost > self._best_cost * self.latency_factor):
+            reason = 'latency backoff'
+            self._limit = int(self._limit * self.backoff)
+            self._direction = 1
+        elif previous_throughput is None:
+            reason = 'probe'
+            self._limit += self._direction
+        elif gained:
+            reason = 'throughput up'
+            self._limit += self._direction
+        elif lost:
+            reason = 'throughput down, reversing'
+            self._direction = -self._direction
+            self._limit += self._direction
+        elif self._direction > 0 and self._limit > self.min_workers:
+            # The last worker added bought nothing: give it back
+            reason = 'no gain, reclaiming'
+            self._direction = -1
+            self._limit -= 1
+        else:
+            reason = 'plateau'
+
+        self._limit = max(self.min_workers, min(self.max_workers, self._limit))
+        if self._limit == previous and reason != 'plateau':
+            # Pinned at a bound: explore the other way next time
+            self._direction = -1 if self._limit >= self.max_workers else 1
+        self._previous_throughput = throughput
+        if self._best_cost is None or cost < self._best_cost:
+            self._best_cost = cost
+
+        decision = ControllerDecision(
+            timestamp=time.time(), previous=previous, workers=self._limit,
+            throughput=throughput, latency=latency, unit=unit, reason=reason)
+        self._decisions.append(decision)
+        self._decision_count += 1
+        return decision
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Controller state for reporting.
+
+        Returns:
+            Dictionary with the current limit, range and decision count
+        """
+        last = self.last_decision
+        return {
+            'workers': self._limit,
+            'min_workers': self.min_workers,
+            'max_workers': self.max_workers,
+            'decisions': self._decision_count,
+            'last_decision': last.describe() if last else None,
+        }
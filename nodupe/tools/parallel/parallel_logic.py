@@ -7,6 +7,8 @@ Key Features:
     - Thread pool for I/O-bound tasks
     - Interpreter pool for Python 3.14+ free-threaded tasks
     - Parallel map operations
+    - Shared-memory transport for fixed-width process pool results
+    - Executor choice from per-host calibration (smart_map)
     - Progress tracking
     - Error handling in parallel tasks
     - Standard library only (no external dependencies)
@@ -28,6 +30,8 @@ import time
 import logging
 import os
 
+from .shared_results import shared_map
+
 
 def _process_batch_worker(func_and_batch):
     """Worker that processes a batch of items with a provided function.
@@ -97,7 +101,8 @@ class Parallel:
         workers: Optional[int] = None,
         use_processes: bool = False,
         use_interpreters: bool = False,
-        timeout: Optional[float] = None
+        timeout: Optional[float] = None,
+        result_size: Optional[int] = None
     ) -> List[Any]:
         """Process items in parallel.
 
@@ -108,6 +113,9 @@ class Parallel:
             use_processes: Use processes instead of threads
             use_interpreters: Use interpreters instead of threads/processes (Python 3.14+)
             timeout: Maximum time per task in seconds
+            result_size: With use_processes, func returns exactly this many
+                bytes per item (digests, vectors); results come back through
+                shared memory instead of being pickled (timeout is not applied)
 
         Returns:
             List of results in same order as items
@@ -115,6 +123,9 @@ class Parallel:
         Raises:
             ParallelError: If parallel processing fails
         """
+        if use_processes and result_size:
+            return Parallel._shared_map(func, items, workers, result_size)
+
         try:
             # Determine number of workers
             if workers is None:
@@ -171,7 +182,8 @@ class Parallel:
         workers: Optional[int] = None,
         use_processes: bool = False,
         use_interpreters: bool = False,
-        chunk_size: int = 1
+        chunk_size: int = 1,
+        result_size: Optional[int] = None
     ) -> List[Any]:
         """Map function over items in parallel.
 
@@ -182,6 +194,8 @@ class Parallel:
             use_processes: Use processes instead of threads
             use_interpreters: Use interpreters instead of threads/processes (Python 3.14+)
             chunk_size: Items per chunk for process pool
+            result_size: With use_processes, func returns exactly this many
+                bytes per item; results come back through shared memory
 
         Returns:
             List of results
@@ -189,6 +203,10 @@ class Parallel:
         Raises:
             ParallelError: If mapping fails
         """
+        if use_processes and result_size:
+            return Parallel._shared_map(func, items, workers, result_size,
+                                        chunk_size if chunk_size > 1 else None)
+
         try:
             # Determine number of workers
             if workers is None:
@@ -219,6 +237,15 @@ class Parallel:
         except Exception as e:
             raise ParallelError(f"Parallel map failed: {e}") from e
 
+    @staticmethod
+    def _shared_map(func: Callable, items: List[Any], workers: Optional[int],
+                    result_size: int, chunk_size: Optional[int] = None) -> List[Any]:
+        """Run func on a process pool with results in shared memory."""
+        try:
+            return shared_map(func, items, result_size, workers=workers, chunk_size=chunk_size)
+        except Exception as e:
+            raise ParallelError(f"Parallel processing failed: {e}") from e
+
     @staticmethod
     def map_parallel_unordered(
         func: Callable,
@@ -372,16 +399,23 @@ class Parallel:
         items: List[Any],
         task_type: str = 'auto',
         workers: Optional[int] = None,
-        timeout: Optional[float] = None
+        timeout: Optional[float] = None,
+        task_class: Optional[str] = None
     ) -> List[Any]:
         """Smart map that automatically chooses the best executor based on Python version and task type.
 
+        When task_class names a workload calibrated on this host (see
+        nodupe.tools.parallel.calibration), the measured winner is used;
+        otherwise the executor is chosen from task_type.
+
         Args:
             func: Function to map
             items: Items to map over
             task_type: 'cpu', 'io', or 'auto' - type of task
             workers: Number of workers (None = auto-detect)
             timeout: Maximum time per task
+            task_class: Calibrated task class, e.g. 'hash_small', 'hash_large',
+                'phash' or 'minhash'
 
         Returns:
             List of results
@@ -389,6 +423,21 @@ class Parallel:
         Raises:
             ParallelError: If mapping fails
         """
+        if task_class is not None:
+            from .calibration import (
+                EXECUTOR_INTERPRETER, EXECUTOR_PROCESS, CHUNKS_PER_WORKER, chunk_size_for, get_calibration
+            )
+            record = get_calibration(task_class)
+            if record is not None:
+                # Run with the pool size and chunking the winner was measured with
+                workers = workers or record.get('workers') or Parallel.get_cpu_count()
+                return Parallel._dispatch(
+                    func, items, workers, timeout,
+                    use_processes=record['winner'] == EXECUTOR_PROCESS,
+                    use_interpreters=record['winner'] == EXECUTOR_INTERPRETER,
+                    chunk_size=chunk_size_for(len(items), workers,
+                                              record.get('chunks_per_worker', CHUNKS_PER_WORKER)))
+
         # Auto-detect task type if needed
         if task_type == 'auto':
             # For now, assume CPU-bound if not specified
@@ -401,36 +450,43 @@ class Parallel:
         if task_type == 'cpu':
             if Parallel.supports_interpreter_pool():
                 # Use InterpreterPoolExecutor for Python 3.14+
-                return Parallel.map_parallel(
-                    func=func,
-                    items=items,
-                    workers=workers,
-                    use_interpreters=True
-                )
+                return Parallel._dispatch(func, items, workers, timeout, use_interpreters=True)
             elif Parallel.is_free_threaded():
                 # Use threads in free-threaded mode
-                return Parallel.map_parallel(
-                    func=func,
-                    items=items,
-                    workers=workers,
-                    use_processes=False
-                )
+                return Parallel._dispatch(func, items, workers, timeout)
             else:
                 # Use processes for traditional GIL-locked Python
-                return Parallel.map_parallel(
-                    func=func,
-                    items=items,
-                    workers=workers,
-                    use_processes=True
-                )
+                return Parallel._dispatch(func, items, workers, timeout, use_processes=True)
         else:  # I/O-bound
             # Always use threads for I/O-bound tasks
-            return Parallel.map_parallel(
+            return Parallel._dispatch(func, items, workers, timeout)
+
+    @staticmethod
+    def _dispatch(func: Callable, items: List[Any], workers: Optional[int],
+                  timeout: Optional[float], use_processes: bool = False,
+                  use_interpreters: bool = False, chunk_size: int = 1) -> List[Any]:
+        """Run smart_map's chosen executor.
+
+        A per-task timeout needs one future per item, so with a timeout
+        items are submitted individually and chunk_size is not used.
+        """
+        if timeout is not None:
+            return Parallel.process_in_parallel(
                 func=func,
                 items=items,
                 workers=workers,
-                use_processes=False
+                use_processes=use_processes,
+                use_interpreters=use_interpreters,
+                timeout=timeout
             )
+        return Parallel.map_parallel(
+            func=func,
+            items=items,
+            workers=workers,
+            use_processes=use_processes,
+            use_interpreters=use_interpreters,
+            chunk_size=chunk_size
+        )
 
     @staticmethod
     def get_optimal_workers(task_type: str = 'cpu') -> int:
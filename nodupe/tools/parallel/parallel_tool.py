@@ -10,6 +10,7 @@ Compliant with IEEE Std 1003.1 (POSIX) threading models.
 from typing import List, Dict, Any, Optional, Callable
 from nodupe.core.tool_system.base import Tool, ToolMetadata
 from .parallel_logic import Parallel
+from .calibration import calibrate_executors
 
 class ParallelTool(Tool):
     """Parallel processing tool (POSIX & ISO 25010 compliant)."""
@@ -45,7 +46,8 @@ class ParallelTool(Tool):
         return {
             'map': Parallel.map_parallel,
             'smart_map': Parallel.smart_map,
-            'get_workers': Parallel.get_optimal_workers
+            'get_workers': Parallel.get_optimal_workers,
+            'calibrate': calibrate_executors
         }
 
     def initialize(self, container: Any) -> None:
@@ -59,7 +61,17 @@ class ParallelTool(Tool):
         pass
 
     def run_standalone(self, args: List[str]) -> int:
-        """Execute demonstration in stand-alone mode."""
+        """Execute demonstration in stand-alone mode.
+
+        With 'calibrate' as the first argument, benchmark executors for the
+        given task classes (default: all) and store the winners for this host.
+        """
+        if args and args[0] == 'calibrate':
+            for task_class, record in calibrate_executors(args[1:] or None).items():
+                rates = ', '.join(f"{name}={rate:.1f}/s" if rate is not None else f"{name}=failed"
+                                  for name, rate in record['items_per_second'].items())
+                print(f"{task_class}: {record['winner']} ({rates})")
+            return 0
         print("Parallel Tool: Self-test mode.")
         print("Demonstrating 4-way parallel mapping of math functions...")
         results = Parallel.map_parallel(lambda x: x*x, range(10), workers=4)
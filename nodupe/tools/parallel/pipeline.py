@@ -0,0 +1,486 @@
+"""Pipeline Module.
+
+Streaming stage-graph pipelines using standard library only.
+
+A Pipeline is a chain of stages (for example walk -> probe -> hash ->
+database write) joined by bounded queues. Each stage has its own pool of
+threads, processes or subinterpreters and a dispatcher that keeps at most
+a few tasks per worker in flight, so a slow stage fills its input queue
+and blocks the stages upstream of it instead of letting work pile up in
+memory. Items stream through: the source is consumed lazily and results
+are yielded as they leave the last stage, so millions of items never
+exist as futures or lists at once.
+
+A stage function returns one result per item; returning None drops the
+item. Fan-out stages return an iterable whose elements are passed on
+individually. Stages deliver results in input order by default, or as
+they complete when ordered=False. A stage given a ConcurrencyController
+runs as many tasks at once as the controller currently allows and reports
+each task's latency (and size, via size_of) back to it.
+
+Key Features:
+    - Bounded queues between stages (backpressure)
+    - Per-stage thread, process or interpreter pools
+    - Ordered or unordered delivery per stage
+    - Adaptive per-stage concurrency via ConcurrencyController
+    - Source throttling under a MemoryGovernor budget
+    - Per-stage throughput, latency and queue-depth metrics
+    - Cancellation from the consumer or on the first error
+    - Standard library only (no external dependencies)
+
+Dependencies:
+    - concurrent.futures (standard library)
+    - queue (standard library)
+    - threading (standard library)
+"""
+
+import logging
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .controller import ConcurrencyController
+from .parallel_logic import Parallel
+
+logger = logging.getLogger(__name__)
+
+EXECUTOR_THREAD = 'thread'
+EXECUTOR_PROCESS = 'process'
+EXECUTOR_INTERPRETER = 'interpreter'
+EXECUTORS = (EXECUTOR_THREAD, EXECUTOR_PROCESS, EXECUTOR_INTERPRETER)
+
+# Seconds between cancellation checks while blocked on a queue
+_POLL_INTERVAL = 0.1
+
+# End of stream marker passed between stages
+_END = object()
+
+
+class PipelineError(Exception):
+    """Pipeline processing error"""
+
+
+def _call_stage(func: Callable[[Any], Any], fan_out: bool, item: Any) -> Tuple[float, Any]:
+    """Run a stage function on one item, timing it.
+
+    Top-level so that it can be pickled for process pools.
+    """
+    start = time.perf_counter()
+    result = func(item)
+    if fan_out and result is not None:
+        result = list(result)
+    return time.perf_counter() - start, result
+
+
+class _Limit:
+    """Counting gate whose capacity is read from a callable on each acquire."""
+
+    def __init__(self, capacity: Callable[[], int]):
+        self._capacity = capacity
+        self._used = 0
+        self._condition = threading.Condition()
+
+    def acquire(self, timeout: float) -> bool:
+        """Take a unit if the current capacity allows, waiting up to timeout."""
+        with self._condition:
+            if self._used >= self._capacity():
+                self._condition.wait(timeout)
+                if self._used >= self._capacity():
+                    return False
+            self._used += 1
+            return True
+
+    def release(self) -> None:
+        """Return a unit."""
+        with self._condition:
+            self._used -= 1
+            self._condition.notify()
+
+
+class StageMetrics:
+    """Counters for one stage, updated by the stage's own threads."""
+
+    def __init__(self, name: str):
+        """Initialize stage metrics.
+
+        Args:
+            name: Stage name
+        """
+        self.name = name
+        self.items_in = 0
+        self.items_out = 0
+        self.dropped = 0
+        self.errors = 0
+        self.busy_seconds = 0.0
+        self.max_queue_depth = 0
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+
+    def snapshot(self, queue_depth: int, workers: int) -> Dict[str, Any]:
+        """Current metrics as a dictionary.
+
+        Args:
+            queue_depth: Items currently waiting in the stage's input queue
+            workers: Tasks the stage currently runs at once
+
+        Returns:
+            Dictionary of stage metrics
+        """
+        elapsed = 0.0
+        if self.started_at is not None:
+            elapsed = (self.finished_at or time.monotonic()) - self.started_at
+        completed = self.items_in - self.errors
+        return {
+            'items_in': self.items_in,
+            'items_out': self.items_out,
+            'dropped': self.dropped,
+            'errors': self.errors,
+            'queue_depth': queue_depth,
+            'workers': workers,
+            'max_queue_depth': self.max_queue_depth,
+            'elapsed_seconds': elapsed,
+            'items_per_second': self.items_in / elapsed if elapsed > 0 else 0.0,
+            'mean_task_seconds': self.busy_seconds / completed if completed > 0 else 0.0,
+        }
+
+
+class Stage:
+    """One step of a pipeline and the pool that runs it."""
+
+    def __init__(
+        self,
+        name: str,
+        func: Callable[[Any], Any],
+        workers: int = 1,
+        executor: str = EXECUTOR_THREAD,
+        queue_size: Optional[int] = None,
+        ordered: bool = True,
+        fan_out: bool = False,
+        controller: Optional[ConcurrencyController] = None,
+        size_of: Optional[Callable[[Any], int]] = None
+    ):
+        """Initialize a stage.
+
+        Args:
+            name: Stage name, used in metrics and thread names
+            func: Function applied to each item; None results are dropped
+            workers: Pool size for this stage
+            executor: 'thread', 'process' or 'interpreter' (process and
+                interpreter stages need a picklable, top-level func)
+            queue_size: Capacity of the stage's input queue (default:
+                four items per worker, at least 16)
+            ordered: Deliver results in input order
+            fan_out: func returns an iterable of results per item
+            controller: Adjusts how many tasks run at once; the pool is
+                sized to the controller's max_workers and workers is ignored
+            size_of: Bytes an input item represents, reported to the
+                controller so it can measure bytes per second
+        """
+        if workers < 1:
+            raise PipelineError(f"Stage {name}: workers must be at least 1, got {workers}")
+        if executor not in EXECUTORS:
+            raise PipelineError(f"Stage {name}: unknown executor {executor!r}")
+        if controller is not None:
+            workers = controller.max_workers
+        self.name = name
+        self.func = func
+        self.workers = workers
+        self.controller = controller
+        self.size_of = size_of
+        self.executor = executor
+        self.queue_size = queue_size or max(16, 4 * workers)
+        self.ordered = ordered
+        self.fan_out = fan_out
+
+    def concurrency(self) -> int:
+        """Tasks the stage may run at once right now."""
+        return self.controller.limit if self.controller is not None else self.workers
+
+    def create_executor(self) -> Any:
+        """Create the pool for this stage."""
+        prefix = f'pipeline-{self.name}'
+        if self.executor == EXECUTOR_PROCESS:
+            return ProcessPoolExecutor(max_workers=self.workers)
+        if self.executor == EXECUTOR_INTERPRETER and Parallel.supports_interpreter_pool():
+            try:
+                from concurrent.futures import InterpreterPoolExecutor
+                return InterpreterPoolExecutor(max_workers=self.workers)
+            except ImportError:
+                pass
+        return ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix=prefix)
+
+
+class Pipeline:
+    """Chain of stages connected by bounded queues."""
+
+    def __init__(self, stages: Optional[List[Stage]] = None, on_error: str = 'skip',
+                 governor: Optional[Any] = None):
+        """Initialize a pipeline.
+
+        Args:
+            stages: Stages in processing order (more can be added with add_stage)
+            on_error: 'skip' to log and drop items whose stage function
+                raises, 'raise' to cancel the pipeline on the first error
+            governor: Optional MemoryGovernor (nodupe.core.limits); the source
+                is not read while memory is over its high-water mark
+        """
+        if on_error not in ('skip', 'raise'):
+            raise PipelineError(f"on_error must be 'skip' or 'raise', got {on_error!r}")
+        self.stages: List[Stage] = list(stages or [])
+        self.on_error = on_error
+        self.governor = governor
+        self._metrics: List[StageMetrics] = []
+        self._queues: List[queue.Queue] = []
+        self._threads: List[threading.Thread] = []
+        self._cancelled = threading.Event()
+        self._error: Optional[BaseException] = None
+        self._error_lock = threading.Lock()
+        self._started = False
+
+    def add_stage(self, name: str, func: Callable[[Any], Any], **options: Any) -> 'Pipeline':
+        """Append a stage.
+
+        Args:
+            name: Stage name
+            func: Stage function
+            **options: Stage options (workers, executor, queue_size, ordered, fan_out)
+
+        Returns:
+            The pipeline, for chaining
+        """
+        if self._started:
+            raise PipelineError("Cannot add stages to a running pipeline")
+        self.stages.append(Stage(name, func, **options))
+        return self
+
+    def cancel(self) -> None:
+        """Stop all stages; run() finishes without yielding further results."""
+        self._cancelled.set()
+
+    @property
+    def cancelled(self) -> bool:
+        """Whether the pipeline was cancelled."""
+        return self._cancelled.is_set()
+
+    def metrics(self) -> Dict[str, Dict[str, Any]]:
+        """Per-stage metrics.
+
+        Returns:
+            Dictionary of stage name -> metrics dictionary
+        """
+        return {
+            metrics.name: metrics.snapshot(self._queues[index].qsize() if self._queues else 0,
+                                           self.stages[index].concurrency())
+            for index, metrics in enumerate(self._metrics)
+        }
+
+    def _fail(self, error: BaseException) -> None:
+        """Record the first fatal error and cancel the pipeline."""
+        with self._error_lock:
+            if self._error is None:
+                self._error = error
+        self.cancel()
+
+    def _put(self, target: queue.Queue, item: Any, metrics: Optional[StageMetrics] = None) -> bool:
+        """Put an item, blocking while the queue is full.
+
+        Returns:
+            False if the pipeline was cancelled first
+        """
+        while not self._cancelled.is_set():
+            try:
+                target.put(item, timeout=_POLL_INTERVAL)
+            except queue.Full:
+                continue
+            if metrics is not None:
+                metrics.max_queue_depth = max(metrics.max_queue_depth, target.qsize())
+            return True
+        return False
+
+    def _get(self, source: queue.Queue) -> Any:
+        """Get an item, blocking while the queue is empty.
+
+        Returns:
+            The item, or _END if the pipeline was cancelled first
+        """
+        while not self._cancelled.is_set():
+            try:
+                return source.get(timeout=_POLL_INTERVAL)
+            except queue.Empty:
+                continue
+        return _END
+
+    def _feed(self, source: Iterable[Any]) -> None:
+        """Pull the source into the first stage's queue."""
+        try:
+            for item in source:
+                if self.governor is not None:
+                    self.governor.throttle()
+                if not self._put(self._queues[0], item, self._metrics[0]):
+                    return
+            self._put(self._queues[0], _END)
+        except Exception as e:  # pylint: disable=broad-exception-caught
+            self._fail(PipelineError(f"Pipeline source failed: {e}"))
+
+    def _submit(self, index: int, executor: Any, slots: '_Limit', running: '_Limit',
+                completions: queue.Queue) -> None:
+        """Dispatcher: submit queued items to the stage's pool.
+
+        A task needs a slot, released once its result has been collected,
+        and a running permit, released as soon as it finishes.
+        """
+        stage = self.stages[index]
+        metrics = self._metrics[index]
+        submitted = 0
+        try:
+            while True:
+                item = self._get(self._queues[index])
+                if item is _END:
+                    break
+                for limit in (slots, running):
+                    while not limit.acquire(timeout=_POLL_INTERVAL):
+                        if self._cancelled.is_set():
+                            return
+                future = executor.submit(_call_stage, stage.func, stage.fan_out, item)
+                future.item = item
+                future.add_done_callback(lambda _: running.release())
+                submitted += 1
+                metrics.items_in += 1
+                if stage.ordered:
+                    completions.put(future)
+                else:
+                    future.add_done_callback(completions.put)
+        except Exception as e:  # pylint: disable=broad-exception-caught
+            self._fail(PipelineError(f"Stage {stage.name} failed to submit work: {e}"))
+        finally:
+            completions.put((_END, submitted))
+
+    def _collect(self, index: int, slots: '_Limit', completions: queue.Queue) -> None:
+        """Collector: pass finished results to the next queue."""
+        stage = self.stages[index]
+        metrics = self._metrics[index]
+        target = self._queues[index + 1]
+        next_metrics = self._metrics[index + 1] if index + 1 < len(self._metrics) else None
+        processed = 0
+        expected = None
+        while expected is None or processed < expected:
+            entry = self._get(completions)
+            if entry is _END:
+                return
+            if isinstance(entry, tuple):
+                expected = entry[1]
+                continue
+            future: Future = entry
+            processed += 1
+            slots.release()
+            try:
+                elapsed, result = future.result()
+            except Exception as e:  # pylint: disable=broad-exception-caught
+                metrics.errors += 1
+                if self.on_error == 'raise':
+                    self._fail(PipelineError(f"Stage {stage.name} failed on {future.item!r}: {e}"))
+                    return
+                logger.warning(f"Pipeline stage {stage.name} failed on {future.item!r}: {e}")
+                continue
+            metrics.busy_seconds += elapsed
+            if stage.controller is not None:
+                stage.controller.record(elapsed, stage.size_of(future.item) if stage.size_of else 0)
+            if result is None:
+                metrics.dropped += 1
+                continue
+            for output in (result if stage.fan_out else (result,)):
+                if not self._put(target, output, next_metrics):
+                    return
+                metrics.items_out += 1
+        metrics.finished_at = time.monotonic()
+        self._put(target, _END)
+
+    def _start_stage(self, index: int) -> Any:
+        """Start the dispatcher and collector threads of a stage."""
+        stage = self.stages[index]
+        executor = stage.create_executor()
+        # At most two tasks per running worker in flight, so queues do the buffering
+        slots = _Limit(lambda: 2 * stage.concurrency())
+        running = _Limit(stage.concurrency)
+        completions: queue.Queue = queue.Queue()
+        self._metrics[index].started_at = time.monotonic()
+        for role, target in (('submit', self._submit), ('collect', self._collect)):
+            args = ((index, executor, slots, running, completions) if role == 'submit'
+                    else (index, slots, completions))
+            thread = threading.Thread(target=target, args=args, daemon=True,
+                                      name=f'pipeline-{stage.name}-{role}')
+            thread.start()
+            self._threads.append(thread)
+        return executor
+
+    def run(self, source: Iterable[Any]) -> Iterator[Any]:
+        """Stream items through the pipeline.
+
+        Args:
+            source: Input items, consumed lazily
+
+        Yields:
+            Results of the last stage
+
+        Raises:
+            PipelineError: If the source fails, or a stage fails with on_error='raise'
+        """
+        if self._started:
+            raise PipelineError("A pipeline can only be run once")
+        if not self.stages:
+            raise PipelineError("Pipeline has no stages")
+        self._started = True
+
+        self._metrics = [StageMetrics(stage.name) for stage in self.stages]
+        self._queues = [queue.Queue(maxsize=stage.queue_size) for stage in self.stages]
+        self._queues.append(queue.Queue(maxsize=self.stages[-1].queue_size))
+
+        executors = []
+        feeder = threading.Thread(target=self._feed, args=(source,), daemon=True,
+                                  name='pipeline-source')
+        try:
+            for index in range(len(self.stages)):
+                executors.append(self._start_stage(index))
+            feeder.start()
+            while True:
+                item = self._get(self._queues[-1])
+                if item is _END:
+                    break
+                yield item
+        finally:
+            if not self._cancelled.is_set():
+                # Either finished or abandoned by the consumer
+                self.cancel()
+            for executor in executors:
+                executor.shutdown(wait=True, cancel_futures=True)
+            for thread in self._threads:
+                thread.join()
+            if feeder.is_alive():
+                # The source is blocked in its own iteration; it sees the
+                # cancellation on its next put
+                feeder.join(timeout=_POLL_INTERVAL)
+
+        if self._error is not None:
+            raise self._error
+
+
+def run_pipeline(source: Iterable[Any], stages: List[Stage], on_error: str = 'skip') -> List[Any]:
+    """Run a pipeline to completion and collect its results.
+
+    Args:
+        source: Input items
+        stages: Stages in processing order
+        on_error: 'skip' or 'raise' (see Pipeline)
+
+    Returns:
+        List of results of the last stage
+    """
+    return list(Pipeline(stages, on_error=on_error).run(source))
+
+
+def default_io_workers() -> int:
+    """Pool size for I/O-bound stages such as hashing files."""
+    return min(32, (os.cpu_count() or 1) + 4)
@@ -4,6 +4,7 @@ Resource pooling utilities using standard library only.
 
 Key Features:
     - Thread pool for concurrent tasks
+    - Adaptive worker count via ConcurrencyController
     - Connection pool for database connections
     - Object pool for resource reuse
     - Pool lifecycle management
@@ -25,6 +26,8 @@ from contextlib import contextmanager
 import time
 import sys
 
+from .controller import ConcurrencyController
+
 
 class PoolError(Exception):
     """Pool operation error"""
@@ -389,22 +392,32 @@ class ConnectionPool:
         return self._pool.active
 
 
+# Seconds a parked or idle worker waits before re-checking the limit
+_PARK_POLL = 0.05
+
+
 class WorkerPool:
     """Worker pool for task execution.
 
     Maintains a pool of worker threads for executing tasks.
     Free-threading compatible with appropriate locking.
+    With a controller, threads are started up to the controller's
+    max_workers and those above its current limit stay parked.
     """
 
-    def __init__(self, workers: int = 4, queue_size: int = 100):
+    def __init__(self, workers: int = 4, queue_size: int = 100,
+                 controller: Optional[ConcurrencyController] = None):
         """Initialize worker pool.
 
         Args:
-            workers: Number of worker threads
+            workers: Number of worker threads (ignored with a controller)
             queue_size: Maximum queue size (0 = unlimited)
+            controller: Optional ConcurrencyController adjusting how many
+                workers take tasks, from measured task throughput
         """
         self._is_free_threaded = _is_free_threaded()
-        self.workers = workers
+        self.controller = controller
+        self.workers = controller.max_workers if controller is not None else workers
         self.queue_size = queue_size
 
         if queue_size > 0:
@@ -455,40 +468,70 @@ class WorkerPool:
             # Get optimal number of workers based on Python version
             optimal_workers = self.get_optimal_workers()
 
+            if self.controller is not None:
+                # The controller decides how many of these take tasks
+                optimal_workers = self.controller.max_workers
+
             # Create and start worker threads
             for i in range(optimal_workers):
                 thread = threading.Thread(
                     target=self._worker,
+                    args=(i,),
                     name=f"Worker-{i}",
                     daemon=True
                 )
                 thread.start()
                 self._threads.append(thread)
 
-    def _worker(self) -> None:
-        """Worker thread main loop."""
-        while self._running:
-            try:
-                # Get task from queue (blocking to avoid polling)
-                task = self._queue.get()
+    def _worker(self, index: int = 0) -> None:
+        """Worker thread main loop.
 
-                if task is None:  # Poison pill
+        Args:
+            index: Worker number; with a controller, workers numbered at or
+                above its current limit wait instead of taking tasks (all
+                workers help drain the queue once shutdown starts)
+        """
+        while True:
+            if self._running and self._parked(index):
+                time.sleep(_PARK_POLL)
+                continue
+            try:
+                # Timed get, so a worker waiting on an empty queue notices
+                # when the controller lowers the limit below it
+                task = self._queue.get(timeout=_PARK_POLL)
+            except queue.Empty:
+                if not self._running:
                     break
+                continue
 
-                # Execute task
-                func, args, kwargs = task
-                try:
-                    func(*args, **kwargs)
-                except Exception:
-                    # Ignore task errors (could log here)
-                    pass
-                finally:
-                    self._queue.task_done()
+            if task is None:  # Poison pill
+                self._queue.task_done()
+                break
 
-            except queue.Empty:
-                # This shouldn't happen with blocking get, but handle gracefully
+            if self._running and self._parked(index):
+                # The limit dropped while this worker was waiting: hand the
+                # task back for a worker below the limit
+                self._queue.put(task)
+                self._queue.task_done()
                 continue
 
+            # Execute task
+            func, args, kwargs = task
+            start = time.perf_counter()
+            try:
+                func(*args, **kwargs)
+            except Exception:
+                # Ignore task errors (could log here)
+                pass
+            finally:
+                if self.controller is not None:
+                    self.controller.record(time.perf_counter() - start)
+                self._queue.task_done()
+
+    def _parked(self, index: int) -> bool:
+        """Whether worker index is at or above the controller's limit."""
+        return self.controller is not None and index >= self.controller.limit
+
     def submit(
         self,
         func: Callable,
@@ -687,18 +730,20 @@ class Pools:
     @staticmethod
     def create_worker_pool(
         workers: int = 4,
-        queue_size: int = 100
+        queue_size: int = 100,
+        controller: Optional[ConcurrencyController] = None
     ) -> WorkerPool:
         """Create a worker pool.
 
         Args:
             workers: Number of worker threads
             queue_size: Maximum queue size
+            controller: Optional ConcurrencyController for an adaptive worker count
 
         Returns:
             WorkerPool instance
         """
-        return WorkerPool(workers=workers, queue_size=queue_size)
+        return WorkerPool(workers=workers, queue_size=queue_size, controller=controller)
 
     @staticmethod
     def create_worker_pool_optimized(
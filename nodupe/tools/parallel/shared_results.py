@@ -0,0 +1,329 @@
+"""Shared Results Module.
+
+Shared-memory result transport for process pools.
+
+Process pools pickle every result back to the parent, which costs more
+than the work itself for bulk fixed-width output such as digests,
+perceptual hashes and embedding vectors. A SharedResultBuffer is one
+preallocated multiprocessing.shared_memory segment holding `count`
+records of `record_size` bytes plus one status byte per record. Workers
+attach to it by name, write each result straight into its slot and
+return only the indices that failed; the parent reads the records in
+place or copies them out in one step.
+
+Segments never outlive their run:
+    - The owner closes and unlinks the segment when the run ends,
+      including when a worker crashes and breaks the pool
+    - Segments still open at interpreter exit are unlinked by an atexit
+      hook
+    - If the owner itself is killed, multiprocessing's resource tracker
+      unlinks its segments; segments left by processes that are no
+      longer running are also swept on the next run (Linux)
+
+Key Features:
+    - Fixed-width records in preallocated shared memory
+    - Only indices cross the process boundary
+    - Guaranteed unlink on normal exit, errors and crashes
+    - Optional NumPy views of records (embeddings, hash vectors)
+
+Dependencies:
+    - multiprocessing.shared_memory (standard library)
+    - concurrent.futures (standard library)
+    - numpy (optional, for array views)
+"""
+
+import atexit
+import logging
+import os
+import secrets
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    np = None
+    NUMPY_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# Segment names are "<prefix><owner pid>-<token>"
+SEGMENT_PREFIX = 'nodupe-'
+_SHM_DIR = '/dev/shm'
+
+# Per-record status bytes
+STATUS_EMPTY = 0
+STATUS_WRITTEN = 1
+STATUS_FAILED = 2
+
+_OPEN_SEGMENTS: Dict[str, 'SharedResultBuffer'] = {}
+_OPEN_SEGMENTS_LOCK = threading.Lock()
+
+
+class SharedResultError(Exception):
+    """Shared result transport error"""
+
+
+def _unlink_open_segments() -> None:
+    """Unlink every segment this process still owns (atexit hook)."""
+    with _OPEN_SEGMENTS_LOCK:
+        buffers = list(_OPEN_SEGMENTS.values())
+    for buffer in buffers:
+        # A forked child inherits the registry but must not unlink the owner's segments
+        if buffer.owner_pid == os.getpid():
+            buffer.release()
+
+
+atexit.register(_unlink_open_segments)
+
+
+def _attach(name: str) -> shared_memory.SharedMemory:
+    """Attach to an existing segment without taking ownership of it."""
+    try:
+        # Python 3.13+: keep the worker's resource tracker out of it
+        return shared_memory.SharedMemory(name=name, track=False)  # type: ignore[call-arg]
+    except TypeError:
+        return shared_memory.SharedMemory(name=name)
+
+
+def _pid_running(pid: int) -> bool:
+    """Whether a process with this pid exists."""
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def cleanup_stale_segments() -> int:
+    """Unlink segments left behind by processes that are no longer running.
+
+    Returns:
+        Number of segments removed
+    """
+    if not os.path.isdir(_SHM_DIR):
+        return 0
+    removed = 0
+    for entry in os.listdir(_SHM_DIR):
+        if not entry.startswith(SEGMENT_PREFIX):
+            continue
+        try:
+            pid = int(entry[len(SEGMENT_PREFIX):].split('-', 1)[0])
+        except ValueError:
+            continue
+        if pid == os.getpid() or _pid_running(pid):
+            continue
+        try:
+            os.unlink(os.path.join(_SHM_DIR, entry))
+            removed += 1
+        except OSError:
+            continue
+    if removed:
+        logger.info(f"Removed {removed} stale shared result segments")
+    return removed
+
+
+def _to_record(result: Any, record_size: int) -> bytes:
+    """Convert a worker result to exactly record_size bytes."""
+    if hasattr(result, 'tobytes'):
+        data = result.tobytes()
+    elif isinstance(result, (bytes, bytearray, memoryview)):
+        data = bytes(result)
+    else:
+        raise SharedResultError(
+            f"Result of type {type(result).__name__} is not bytes-like")
+    if len(data) != record_size:
+        raise SharedResultError(f"Result is {len(data)} bytes, expected {record_size}")
+    return data
+
+
+class SharedResultBuffer:
+    """Fixed-width result records in one shared memory segment."""
+
+    def __init__(self, count: int, record_size: int):
+        """Create a segment for count records of record_size bytes.
+
+        Args:
+            count: Number of records
+            record_size: Bytes per record
+        """
+        if count < 0 or record_size <= 0:
+            raise SharedResultError(
+                f"Invalid buffer shape: {count} records of {record_size} bytes")
+        self.count = count
+        self.record_size = record_size
+        self.owner_pid = os.getpid()
+        self.name = f"{SEGMENT_PREFIX}{self.owner_pid}-{secrets.token_hex(6)}"
+        # SharedMemory rejects size 0; status bytes follow the records
+        size = max(1, count * record_size + count)
+        self._shm: Optional[shared_memory.SharedMemory] = shared_memory.SharedMemory(
+            name=self.name, create=True, size=size)
+        with _OPEN_SEGMENTS_LOCK:
+            _OPEN_SEGMENTS[self.name] = self
+
+    @property
+    def _buf(self) -> memoryview:
+        if self._shm is None:
+            raise SharedResultError(f"Shared buffer {self.name} is released")
+        return self._shm.buf
+
+    def write(self, index: int, data: bytes) -> None:
+        """Write one record (owner side; workers use write_records)."""
+        _write(self._buf, self.count, self.record_size, index, data)
+
+    def read(self, index: int) -> Optional[bytes]:
+        """Read one record.
+
+        Returns:
+            Record bytes, or None if it was not written
+        """
+        if not 0 <= index < self.count:
+            raise IndexError(index)
+        buf = self._buf
+        if buf[self.count * self.record_size + index] != STATUS_WRITTEN:
+            return None
+        offset = index * self.record_size
+        return bytes(buf[offset:offset + self.record_size])
+
+    def status(self, index: int) -> int:
+        """Status byte of a record (STATUS_EMPTY, STATUS_WRITTEN or STATUS_FAILED)."""
+        return self._buf[self.count * self.record_size + index]
+
+    def records(self) -> List[Optional[bytes]]:
+        """Copy out every record (None for records not written)."""
+        return [self.read(index) for index in range(self.count)]
+
+    def to_array(self, dtype: str) -> Any:
+        """Copy the records out as a (count, record_size / itemsize) array.
+
+        Rows of records that were not written are zero.
+        """
+        if not NUMPY_AVAILABLE:
+            raise SharedResultError("numpy is required for array results")
+        itemsize = np.dtype(dtype).itemsize
+        if self.record_size % itemsize:
+            raise SharedResultError(
+                f"record_size {self.record_size} is not a multiple of {dtype} size")
+        flat = np.frombuffer(self._buf, dtype=np.uint8, count=self.count * self.record_size)
+        array = flat.view(dtype).reshape(self.count, self.record_size // itemsize).copy()
+        written = np.frombuffer(self._buf, dtype=np.uint8, count=self.count,
+                                offset=self.count * self.record_size) == STATUS_WRITTEN
+        array[~written] = 0
+        del flat
+        return array
+
+    def release(self) -> None:
+        """Close and unlink the segment (idempotent)."""
+        with _OPEN_SEGMENTS_LOCK:
+            _OPEN_SEGMENTS.pop(self.name, None)
+        shm, self._shm = self._shm, None
+        if shm is None:
+            return
+        try:
+            shm.close()
+        except BufferError:
+            # Something still holds a view; unlinking still frees the name
+            logger.warning(f"Shared buffer {self.name} released with live views")
+        try:
+            shm.unlink()
+        except FileNotFoundError:
+            pass
+
+    def __enter__(self) -> 'SharedResultBuffer':
+        return self
+
+    def __exit__(self, exc_type: Any, exc_val: Any, exc_tb: Any) -> bool:
+        self.release()
+        return False
+
+
+def _write(buf: memoryview, count: int, record_size: int, index: int, data: bytes) -> None:
+    """Write a record and mark it written."""
+    if not 0 <= index < count:
+        raise IndexError(index)
+    offset = index * record_size
+    buf[offset:offset + record_size] = data
+    buf[count * record_size + index] = STATUS_WRITTEN
+
+
+def write_records(task: Tuple[Callable[[Any], Any], str, int, int, int, Sequence[Any]]
+                  ) -> List[Tuple[int, str]]:
+    """Process-pool worker: compute results for a chunk and write them in place.
+
+    Args:
+        task: (func, segment name, count, record_size, first index, items)
+
+    Returns:
+        (index, error message) for each item that failed; nothing else is
+        sent back to the parent
+    """
+    func, name, count, record_size, start, items = task
+    failures: List[Tuple[int, str]] = []
+    shm = _attach(name)
+    try:
+        buf = shm.buf
+        for offset, item in enumerate(items):
+            index = start + offset
+            try:
+                _write(buf, count, record_size, index, _to_record(func(item), record_size))
+            except Exception as e:  # pylint: disable=broad-exception-caught
+                buf[count * record_size + index] = STATUS_FAILED
+                failures.append((index, str(e)))
+        del buf
+    finally:
+        shm.close()
+    return failures
+
+
+def shared_map(
+    func: Callable[[Any], Any],
+    items: Sequence[Any],
+    record_size: int,
+    workers: Optional[int] = None,
+    chunk_size: Optional[int] = None,
+    dtype: Optional[str] = None
+) -> Any:
+    """Map func over items on a process pool, returning results through shared memory.
+
+    Args:
+        func: Picklable function returning record_size bytes per item
+            (bytes-like, or an array with tobytes())
+        items: Items to process (sent to workers in chunks)
+        record_size: Bytes per result
+        workers: Worker processes (default: CPU count)
+        chunk_size: Items per task (default: spreads items over 4 tasks per worker)
+        dtype: If given, return a (len(items), record_size / itemsize) NumPy
+            array of this dtype instead of a list of bytes
+
+    Returns:
+        List of result bytes, or an array when dtype is given, in item order
+
+    Raises:
+        SharedResultError: If any item fails; the segment is unlinked either way
+    """
+    items = list(items)
+    workers = workers or os.cpu_count() or 1
+    chunk_size = chunk_size or max(1, -(-len(items) // (workers * 4)))
+    cleanup_stale_segments()
+
+    with SharedResultBuffer(len(items), record_size) as buffer:
+        failures: List[Tuple[int, str]] = []
+        if items:
+            tasks = [(func, buffer.name, len(items), record_size, start,
+                      items[start:start + chunk_size])
+                     for start in range(0, len(items), chunk_size)]
+            with ProcessPoolExecutor(max_workers=min(workers, len(tasks))) as executor:
+                for chunk_failures in executor.map(write_records, tasks):
+                    failures.extend(chunk_failures)
+        if failures:
+            index, message = failures[0]
+            raise SharedResultError(
+                f"{len(failures)} of {len(items)} items failed; item {index}: {message}")
+        if dtype is not None:
+            return buffer.to_array(dtype)
+        return buffer.records()
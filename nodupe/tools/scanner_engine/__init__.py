@@ -12,6 +12,7 @@ Key Features:
     - Cryptographic hashing
     - Progress tracking
     - Incremental scanning
+    - External merge-sort duplicate grouping
 
 Dependencies:
     - Standard library only
@@ -22,6 +23,7 @@ from .processor import FileProcessor, create_file_processor
 from .progress import ProgressTracker
 from .file_info import FileInfo
 from .incremental import Incremental
+from .external_sort import ExternalDuplicateGrouper, DuplicateGroup
 
 __all__ = [
     'FileWalker',
@@ -31,4 +33,6 @@ __all__ = [
     'ProgressTracker',
     'FileInfo',
     'Incremental',
+    'ExternalDuplicateGrouper',
+    'DuplicateGroup',
 ]
@@ -0,0 +1,209 @@
+# SPDX-License-Identifier: Apache-2.0
+# Copyright (c) 2025 Allaun
+
+"""Columnar duplicate analysis with NumPy.
+
+For inventories that fit in memory, grouping a list of per-file dicts in
+Python costs far more than the data needs. This engine loads only the
+columns duplicate analysis uses - id, size, modification time, path
+length, the duplicate flag and the first 64 bits of the hash - into NumPy
+arrays (37 bytes per file). One np.lexsort orders files by size,
+hash prefix and the keeper strategy's key; np.diff finds where
+(size, hash prefix) changes, which delimits the groups, and the first
+file of every group is its keeper.
+
+A 64-bit hash prefix can collide where full hashes differ, so callers
+that act on a group compare the full hashes of its members (see
+split_by_full_hash).
+
+Key Features:
+    - Columns streamed from SQLite in batches
+    - Group detection with np.lexsort and np.diff
+    - Vectorized keeper strategies: newest, oldest, shortest path
+    - Results as parallel id arrays, no per-file Python objects
+
+Dependencies:
+    - numpy (optional, required by this engine)
+"""
+
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, List, Tuple
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    np = None
+    NUMPY_AVAILABLE = False
+
+# Hex digits of the hash kept in the prefix column
+PREFIX_HEX_DIGITS = 16
+# In-memory cost of one file in the columns and the sort, in bytes
+COLUMNAR_BYTES_PER_FILE = 96
+# Rows fetched from SQLite per round trip
+_FETCH_ROWS = 100_000
+
+# Keeper strategies
+STRATEGIES = ('newest', 'oldest', 'shortest')
+
+
+class ColumnarError(Exception):
+    """Columnar analysis error"""
+
+
+@dataclass
+class FileColumns:
+    """Duplicate-analysis columns of hashed files (parallel arrays)."""
+
+    ids: Any
+    sizes: Any
+    mtimes: Any
+    path_lengths: Any
+    is_duplicate: Any
+    hash_prefixes: Any
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+
+@dataclass
+class DuplicateAssignment:
+    """Keeper and duplicates of every group (parallel arrays).
+
+    group_starts indexes duplicate_ids: the duplicates of group g are
+    duplicate_ids[group_starts[g]:group_starts[g + 1]] and their keeper is
+    keeper_ids[g].
+    """
+
+    keeper_ids: Any
+    duplicate_ids: Any
+    duplicate_keeper_ids: Any
+    group_starts: Any
+    reassigned_ids: Any
+
+    @property
+    def group_count(self) -> int:
+        """Number of duplicate groups."""
+        return len(self.keeper_ids)
+
+    def groups(self) -> Iterator[Tuple[int, List[int]]]:
+        """Yield (keeper_id, duplicate_ids) per group."""
+        bounds = self.group_starts.tolist() + [len(self.duplicate_ids)]
+        duplicates = self.duplicate_ids.tolist()
+        for index, keeper in enumerate(self.keeper_ids.tolist()):
+            yield keeper, duplicates[bounds[index]:bounds[index + 1]]
+
+
+def _require_numpy() -> None:
+    if not NUMPY_AVAILABLE:
+        raise ColumnarError("numpy is required for the columnar engine")
+
+
+def load_file_columns(db: Any, batch_size: int = _FETCH_ROWS) -> FileColumns:
+    """Load the analysis columns of every hashed file.
+
+    Args:
+        db: DatabaseConnection
+        batch_size: Rows fetched per round trip
+
+    Returns:
+        FileColumns
+    """
+    _require_numpy()
+    cursor = db.execute(
+        'SELECT id, size, modified_time, length(path), is_duplicate, '
+        f'substr(hash, 1, {PREFIX_HEX_DIGITS}) FROM files '
+        f'WHERE hash IS NOT NULL AND length(hash) >= {PREFIX_HEX_DIGITS}'
+    )
+    chunks: List[List[Any]] = [[] for _ in range(6)]
+    while True:
+        rows = cursor.fetchmany(batch_size)
+        if not rows:
+            break
+        ids, sizes, mtimes, lengths, flags, prefixes = zip(*rows)
+        chunks[0].append(np.fromiter(ids, dtype=np.int64, count=len(rows)))
+        chunks[1].append(np.fromiter(sizes, dtype=np.int64, count=len(rows)))
+        chunks[2].append(np.fromiter(mtimes, dtype=np.int64, count=len(rows)))
+        chunks[3].append(np.fromiter(lengths, dtype=np.int32, count=len(rows)))
+        chunks[4].append(np.fromiter(flags, dtype=bool, count=len(rows)))
+        try:
+            raw = bytes.fromhex(''.join(prefixes))
+        except ValueError as e:
+            raise ColumnarError(f"Hashes are not hexadecimal: {e}") from e
+        chunks[5].append(np.frombuffer(raw, dtype='>u8').astype(np.uint64))
+    dtypes = (np.int64, np.int64, np.int64, np.int32, bool, np.uint64)
+    columns = [np.concatenate(parts) if parts else np.empty(0, dtype=dtype)
+               for parts, dtype in zip(chunks, dtypes)]
+    return FileColumns(*columns)
+
+
+def assign_duplicates(columns: FileColumns, strategy: str = 'newest') -> DuplicateAssignment:
+    """Group files by (size, hash prefix) and pick a keeper per group.
+
+    Args:
+        columns: Loaded columns
+        strategy: 'newest' (latest mtime), 'oldest' (earliest mtime) or
+            'shortest' (shortest path); ties go to the lowest id
+
+    Returns:
+        DuplicateAssignment of the groups with two or more files
+    """
+    _require_numpy()
+    if strategy == 'newest':
+        rank = -columns.mtimes
+    elif strategy == 'oldest':
+        rank = columns.mtimes
+    elif strategy == 'shortest':
+        rank = columns.path_lengths
+    else:
+        raise ColumnarError(f"Unknown keeper strategy: {strategy}")
+
+    count = len(columns)
+    if count == 0:
+        empty = np.empty(0, dtype=np.int64)
+        return DuplicateAssignment(empty, empty, empty, empty, empty)
+
+    # Last key sorts first: size, then hash prefix, then the strategy, then id
+    order = np.lexsort((columns.ids, rank, columns.hash_prefixes, columns.sizes))
+    sizes = columns.sizes[order]
+    prefixes = columns.hash_prefixes[order]
+    changes = (np.diff(sizes) != 0) | (np.diff(prefixes) != 0)
+    starts = np.concatenate(([0], np.flatnonzero(changes) + 1))
+    lengths = np.diff(np.append(starts, count))
+
+    is_group = lengths > 1
+    group_starts_sorted = starts[is_group]
+    group_lengths = lengths[is_group]
+    keeper_positions = order[group_starts_sorted]
+
+    # Every position of a group except its first is a duplicate
+    in_group = np.repeat(is_group, lengths)
+    is_first = np.zeros(count, dtype=bool)
+    is_first[starts] = True
+    duplicate_positions = order[in_group & ~is_first]
+    group_index = np.repeat(np.arange(len(group_lengths)), group_lengths - 1)
+
+    keeper_ids = columns.ids[keeper_positions]
+    group_starts = np.cumsum(group_lengths - 1) - (group_lengths - 1)
+    return DuplicateAssignment(
+        keeper_ids=keeper_ids,
+        duplicate_ids=columns.ids[duplicate_positions],
+        duplicate_keeper_ids=keeper_ids[group_index],
+        group_starts=group_starts.astype(np.int64),
+        reassigned_ids=keeper_ids[columns.is_duplicate[keeper_positions]],
+    )
+
+
+def split_by_full_hash(files: List[Dict[str, Any]]) -> List[List[Dict[str, Any]]]:
+    """Split a group whose members share a hash prefix by their full hash.
+
+    Args:
+        files: File dicts of one group, keeper first
+
+    Returns:
+        Groups with identical full hashes, each in the given order
+    """
+    groups: Dict[str, List[Dict[str, Any]]] = {}
+    for file_info in files:
+        groups.setdefault(file_info['hash'], []).append(file_info)
+    return list(groups.values())
@@ -0,0 +1,389 @@
+# SPDX-License-Identifier: Apache-2.0
+# Copyright (c) 2025 Allaun
+
+"""External merge-sort duplicate grouping.
+
+Grouping by hash with a dict of hash -> list of files needs the whole
+inventory in memory. ExternalDuplicateGrouper holds one run at a time:
+each (size, hash, hash length, file_id) is packed into a fixed-width
+big-endian record, so comparing records as bytes orders them by size, then
+hash, then id. Digests shorter than the record width are zero-padded and
+their length kept, so they come back unpadded; digests wider than it are
+keyed by a BLAKE2b digest of the record width.
+Records are buffered, sorted and written out as run files; reading the
+groups back k-way merges the runs with heapq.merge and emits every run
+of equal (size, hash) keys as a duplicate group, one at a time.
+
+Key Features:
+    - Fixed-width binary records, compared as raw bytes
+    - Sorted runs cut at a record limit or under memory pressure
+    - Intermediate merge passes bound the number of open run files
+    - Streaming duplicate groups from scan output or the database
+
+Dependencies:
+    - heapq (standard library)
+    - struct (standard library)
+    - tempfile (standard library)
+    - nodupe.core.limits (MemoryGovernor)
+"""
+
+import hashlib
+import heapq
+import logging
+import os
+import struct
+import tempfile
+import threading
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from nodupe.core.limits import MemoryGovernor
+
+logger = logging.getLogger(__name__)
+
+# SHA-256 digest width; the default hash algorithm
+DEFAULT_HASH_BYTES = 32
+# Widest key BLAKE2b can produce for digests wider than the record
+_MAX_KEY_BYTES = 64
+# Records held in memory before a run is written
+DEFAULT_RUN_RECORDS = 500_000
+# Runs merged at once; more are first merged into longer runs
+DEFAULT_MERGE_WIDTH = 64
+# Adds between memory checks
+_CHECK_EVERY = 4096
+# Records read from a run file per read() call
+_READ_RECORDS = 8192
+# Rough in-memory cost of one file in a dict-of-lists grouping
+MEMORY_BYTES_PER_FILE = 1024
+
+
+class ExternalSortError(Exception):
+    """External sort error"""
+
+
+@dataclass
+class DuplicateGroup:
+    """Files sharing a size and hash."""
+
+    size: int
+    hash: Optional[str]
+    file_ids: List[int]
+
+
+class ExternalDuplicateGrouper:
+    """Group (size, hash, file_id) records by external merge sort.
+
+    Example:
+        >>> with ExternalDuplicateGrouper() as grouper:
+        ...     for file_id, size, file_hash in records:
+        ...         grouper.add(size, file_hash, file_id)
+        ...     for group in grouper.groups():
+        ...         print(group.hash, group.file_ids)
+    """
+
+    def __init__(self, hash_bytes: int = DEFAULT_HASH_BYTES,
+                 directory: Optional[str] = None,
+                 run_records: int = DEFAULT_RUN_RECORDS,
+                 merge_width: int = DEFAULT_MERGE_WIDTH,
+                 governor: Optional[MemoryGovernor] = None):
+        """Initialize the grouper.
+
+        Args:
+            hash_bytes: Digest width in bytes; shorter digests are
+                zero-padded, wider ones are keyed by a hash of the digest
+                (their groups report hash None), 0 groups by size alone
+            directory: Directory for run files (default: system temp dir)
+            run_records: Records buffered before a run is written
+            merge_width: Most runs merged in one pass
+            governor: Memory governor; a run is also written when it reports
+                the high-water mark or asks registered structures to spill
+        """
+        if hash_bytes < 0:
+            raise ExternalSortError(f"hash_bytes must not be negative, got {hash_bytes}")
+        if run_records < 1 or merge_width < 2:
+            raise ExternalSortError("run_records must be positive and merge_width at least 2")
+        self.hash_bytes = hash_bytes
+        self.directory = directory
+        self.run_records = run_records
+        self.merge_width = merge_width
+        self.governor = governor
+        self._struct = struct.Struct(f'>Q{hash_bytes}sHQ')
+        self.record_size = self._struct.size
+        # size, digest and digest length
+        self._key_size = 8 + hash_bytes + 2
+        self._buffer: List[bytes] = []
+        self._runs: List[str] = []
+        self._lock = threading.RLock()
+        self._since_check = 0
+        self._closed = False
+        self.total_records = 0
+        self.runs_written = 0
+        self.merge_passes = 0
+        if governor is not None:
+            governor.register_spill(self.spill)
+
+    def _digest(self, file_hash: Optional[str]) -> Tuple[bytes, int]:
+        """Hex hash string -> (fixed-width key, digest length)."""
+        if not self.hash_bytes:
+            return b'', 0
+        if not file_hash:
+            raise ExternalSortError("Record has no hash")
+        try:
+            digest = bytes.fromhex(file_hash)
+        except ValueError as e:
+            raise ExternalSortError(f"Hash is not hexadecimal: {file_hash!r}") from e
+        length = min(len(digest), 0xFFFF)
+        if length > self.hash_bytes:
+            digest = hashlib.blake2b(digest, digest_size=min(self.hash_bytes, _MAX_KEY_BYTES)).digest()
+        return digest.ljust(self.hash_bytes, b'\0'), length
+
+    def add(self, size: int, file_hash: Optional[str], file_id: int) -> None:
+        """Add one file.
+
+        Args:
+            size: File size in bytes
+            file_hash: Hex digest (ignored when hash_bytes is 0)
+            file_id: Identifier returned in the groups
+        """
+        record = self._struct.pack(size, *self._digest(file_hash), file_id)
+        with self._lock:
+            if self._closed:
+                raise ExternalSortError("Grouper is closed")
+            self._buffer.append(record)
+            self.total_records += 1
+            self._since_check += 1
+            if len(self._buffer) >= self.run_records:
+                self.spill()
+            elif self._since_check >= _CHECK_EVERY:
+                self._since_check = 0
+                if self.governor is not None and self.governor.over_budget():
+                    self.spill()
+
+    def add_many(self, records: Iterable[Tuple[int, int, Optional[str]]]) -> int:
+        """Add (file_id, size, hash) tuples, as FileRepository.iter_hash_records yields.
+
+        Returns:
+            Number of records added
+        """
+        count = 0
+        for file_id, size, file_hash in records:
+            self.add(size, file_hash, file_id)
+            count += 1
+        return count
+
+    def _write_run(self, records: Iterable[bytes]) -> str:
+        """Write sorted records to a new run file."""
+        fd, path = tempfile.mkstemp(prefix='nodupe-sort-', suffix='.run', dir=self.directory)
+        try:
+            with os.fdopen(fd, 'wb', buffering=self.record_size * _READ_RECORDS) as f:
+                for record in records:
+                    f.write(record)
+        except Exception as e:
+            os.unlink(path)
+            raise ExternalSortError(f"Failed to write run file: {e}") from e
+        return path
+
+    def _read_run(self, path: str) -> Iterator[bytes]:
+        """Stream the records of a run file."""
+        size = self.record_size
+        with open(path, 'rb') as f:
+            while True:
+                block = f.read(size * _READ_RECORDS)
+                if not block:
+                    return
+                for offset in range(0, len(block), size):
+                    yield block[offset:offset + size]
+
+    def spill(self) -> bool:
+        """Sort the buffered records and write them out as a run.
+
+        Returns:
+            True if anything was written
+        """
+        with self._lock:
+            if not self._buffer:
+                return False
+            self._buffer.sort()
+            self._runs.append(self._write_run(self._buffer))
+            self.runs_written += 1
+            logger.debug(f"Wrote run of {len(self._buffer)} records")
+            self._buffer = []
+            if len(self._runs) >= self.merge_width:
+                self._merge_runs()
+            return True
+
+    def _merge_runs(self) -> None:
+        """Merge the current runs into one longer run."""
+        runs, self._runs = self._runs, []
+        merged = self._write_run(heapq.merge(*(self._read_run(path) for path in runs)))
+        for path in runs:
+            os.unlink(path)
+        self._runs.append(merged)
+        self.merge_passes += 1
+
+    def records(self) -> Iterator[Tuple[int, bytes, int, int]]:
+        """All records in (size, digest, digest length, file_id) order."""
+        with self._lock:
+            self._buffer.sort()
+            memory = list(self._buffer)
+            sources = [self._read_run(path) for path in self._runs]
+        for record in heapq.merge(*sources, memory):
+            yield self._struct.unpack(record)
+
+    def groups(self, min_size: int = 2) -> Iterator[DuplicateGroup]:
+        """Stream groups of files sharing size and hash, in size order.
+
+        Args:
+            min_size: Smallest group emitted (1 yields every file)
+
+        Yields:
+            DuplicateGroup per (size, hash)
+        """
+        with self._lock:
+            self._buffer.sort()
+            memory = list(self._buffer)
+            sources = [self._read_run(path) for path in self._runs]
+        key_size = self._key_size
+        current: Optional[bytes] = None
+        ids: List[int] = []
+        for record in heapq.merge(*sources, memory):
+            key = record[:key_size]
+            if key != current:
+                if current is not None and len(ids) >= min_size:
+                    yield self._group(current, ids)
+                current, ids = key, []
+            ids.append(int.from_bytes(record[key_size:], 'big'))
+        if current is not None and len(ids) >= min_size:
+            yield self._group(current, ids)
+
+    def _group(self, key: bytes, ids: List[int]) -> DuplicateGroup:
+        """Build a group from a record key."""
+        size = int.from_bytes(key[:8], 'big')
+        length = int.from_bytes(key[-2:], 'big')
+        if not self.hash_bytes or length > self.hash_bytes:
+            file_hash = None
+        else:
+            file_hash = key[8:8 + length].hex()
+        return DuplicateGroup(size=size, hash=file_hash, file_ids=ids)
+
+    @property
+    def run_count(self) -> int:
+        """Run files currently on disk."""
+        return len(self._runs)
+
+    def __len__(self) -> int:
+        return self.total_records
+
+    def close(self) -> None:
+        """Delete run files and drop buffered records."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            if self.governor is not None:
+                self.governor.unregister_spill(self.spill)
+            for path in self._runs:
+                try:
+                    os.unlink(path)
+                except FileNotFoundError:
+                    pass
+            self._runs = []
+            self._buffer = []
+
+    def __enter__(self) -> 'ExternalDuplicateGrouper':
+        return self
+
+    def __exit__(self, exc_type: Any, exc_val: Any, exc_tb: Any) -> bool:
+        self.close()
+        return False
+
+
+def fits_in_memory(file_count: int, governor: Optional[MemoryGovernor] = None,
+                   bytes_per_file: int = MEMORY_BYTES_PER_FILE) -> bool:
+    """Whether an in-memory grouping of file_count files fits the memory budget.
+
+    Args:
+        file_count: Files to group
+        governor: Memory governor (default: one with the default budget)
+        bytes_per_file: Memory the grouping needs per file (default: the
+            cost of a dict-of-lists grouping)
+
+    Returns:
+        True if in-memory grouping stays under the budget's low-water mark
+    """
+    governor = governor or MemoryGovernor()
+    headroom = governor.budget_bytes * governor.low_water - governor.rss(fresh=True)
+    return file_count * bytes_per_file <= headroom
+
+
+def group_scan_results(files: Iterable[Dict[str, Any]], **options: Any) -> Iterator[List[Dict[str, Any]]]:
+    """Group FileProcessor results by size and hash.
+
+    The sort itself runs on disk, but the file dicts are not kept in it:
+    each group's files are collected on a second pass over files, so pass
+    a re-iterable (a list or a reader of saved results). A group is
+    yielded as soon as its last member is read. Memory is O(number of
+    duplicate files) for the member index, plus the dicts of groups not
+    yet complete. For a single pass over a stream use
+    ExternalDuplicateGrouper with your own file ids.
+
+    Args:
+        files: File dicts with 'size' and 'hash'
+        **options: ExternalDuplicateGrouper options
+
+    Yields:
+        Lists of at least two file dicts sharing size and hash
+    """
+    with ExternalDuplicateGrouper(**options) as grouper:
+        for index, file_info in enumerate(files):
+            if file_info.get('hash'):
+                grouper.add(file_info['size'], file_info['hash'], index)
+        wanted: Dict[int, int] = {}
+        remaining: List[int] = []
+        for group in grouper.groups():
+            for file_id in group.file_ids:
+                wanted[file_id] = len(remaining)
+            remaining.append(len(group.file_ids))
+    if not remaining:
+        return
+    members: Dict[int, List[Dict[str, Any]]] = {}
+    for index, file_info in enumerate(files):
+        slot = wanted.pop(index, None)
+        if slot is None:
+            continue
+        members.setdefault(slot, []).append(file_info)
+        remaining[slot] -= 1
+        if not remaining[slot]:
+            yield members.pop(slot)
+        if not wanted:
+            return
+
+
+def group_repository_files(repository: Any, by: str = 'hash',
+                           **options: Any) -> Iterator[List[Dict[str, Any]]]:
+    """Stream duplicate groups from the database by external merge sort.
+
+    Only (id, size, hash) is read for the sort; full rows are fetched per
+    group, so memory is bounded by the largest group.
+
+    Args:
+        repository: FileRepository
+        by: 'hash' to group by size and hash, 'size' to group by size alone
+        **options: ExternalDuplicateGrouper options
+
+    Yields:
+        Lists of at least two file dicts
+    """
+    if by not in ('hash', 'size'):
+        raise ExternalSortError(f"Cannot group by {by!r}")
+    if by == 'size':
+        options['hash_bytes'] = 0
+    else:
+        # Wide enough for the longest digest stored (sha512, blake2b, ...)
+        options.setdefault('hash_bytes', max(DEFAULT_HASH_BYTES, repository.max_hash_bytes()))
+    with ExternalDuplicateGrouper(**options) as grouper:
+        grouper.add_many(repository.iter_hash_records(hashed_only=by == 'hash'))
+        for group in grouper.groups():
+            files = repository.get_files(group.file_ids)
+            if len(files) > 1:
+                yield files
@@ -11,22 +11,30 @@ Key Features:
     - Cryptographic hashing
     - Duplicate detection
     - Batch processing
+    - Streaming walk -> hash pipeline with a bounded hashing pool
+    - Hashing concurrency tuned at runtime from measured throughput
     - Error handling
 
 Dependencies:
     - hashlib (standard library)
     - os (standard library)
     - typing (standard library)
+    - nodupe.tools.parallel.pipeline (hashing pool)
 """
 
 import os
 import hashlib
 import logging
-from typing import List, Dict, Any, Optional, Callable
+import time
+from typing import Iterable, Iterator, List, Dict, Any, Optional, Callable
 from .walker import FileWalker
-from ..container import container as global_container
-from ..hasher_interface import HasherInterface
-from ..api.codes import ActionCode
+from nodupe.core.container import container as global_container
+from nodupe.core.hasher_interface import HasherInterface
+from nodupe.core.api.codes import ActionCode
+from nodupe.core.limits import MemoryGovernor
+from nodupe.tools.hashing.hasher_logic import FileHasher
+from nodupe.tools.parallel.controller import ConcurrencyController
+from nodupe.tools.parallel.pipeline import Pipeline, Stage, default_io_workers
 
 logger = logging.getLogger(__name__)
 
@@ -42,13 +50,20 @@ class FileProcessor:
     - Support batch operations
     """
 
-    def __init__(self, file_walker: Optional[FileWalker] = None, hasher: Optional[HasherInterface] = None):
+    def __init__(self, file_walker: Optional[FileWalker] = None, hasher: Optional[HasherInterface] = None,
+                 hash_workers: Optional[int] = None, memory_governor: Optional[MemoryGovernor] = None):
         """Initialize file processor.
 
         Args:
             file_walker: Optional FileWalker instance
             hasher: Optional HasherInterface implementation. 
-                   If None, attempts to resolve from global_container.
+                   If None, attempts to resolve from global_container,
+                   falling back to FileHasher.
+            hash_workers: Threads hashing files concurrently. If None, the
+                   count is adjusted while hashing by a ConcurrencyController
+                   measuring bytes hashed per second.
+            memory_governor: Optional MemoryGovernor; the walk pauses while
+                   memory is over its budget
         """
         self.logger = logger
         self.file_walker = file_walker or FileWalker()
@@ -58,10 +73,14 @@ class FileProcessor:
             self._hasher = hasher
         else:
             # Service Location fallback for backward compatibility
-            self._hasher = global_container.get_service('hasher_service')
+            self._hasher = global_container.get_service('hasher_service') or FileHasher()
             
         self._hash_algorithm = 'sha256'
         self._hash_buffer_size = 65536  # 64KB buffer
+        self.hash_workers = hash_workers
+        self.memory_governor = memory_governor
+        self.last_pipeline: Optional[Pipeline] = None
+        self.last_controller: Optional[ConcurrencyController] = None
 
     def process_files(self, root_path: str, file_filter: Optional[Callable[[Any], bool]] = None,
                       on_progress: Optional[Callable[[Any], None]] = None) -> List[Dict[str, Any]]:
@@ -75,32 +94,85 @@ class FileProcessor:
         Returns:
             List of processed file information
         """
-        # First, walk the directory to get file list
-        files = self.file_walker.walk(root_path, file_filter, on_progress)
-
-        # Then process each file to add hashes and other metadata
-        processed_files = []
-        for i, file_info in enumerate(files):
-            try:
-                processed_file = self._process_single_file(file_info)
-
-                if processed_file:
-                    processed_files.append(processed_file)
-
-                # Update progress
-                if on_progress and (i % 10 == 0 or i == len(files) - 1):
-                    progress = {
-                        'files_processed': i + 1,
-                        'total_files': len(files),
-                        'current_file': file_info['path']
-                    }
-                    on_progress(progress)
-
-            except Exception as e:
-                self.logger.warning(f"[{ActionCode.FPT_FLS_FAIL}] Error processing file {file_info['path']}: {e}")
-                continue
+        return list(self.iter_process_files(root_path, file_filter, on_progress))
+
+    def iter_process_files(self, root_path: str, file_filter: Optional[Callable[[Any], bool]] = None,
+                           on_progress: Optional[Callable[[Any], None]] = None) -> Iterator[Dict[str, Any]]:
+        """Process files in directory, yielding each file as it is hashed.
+
+        Unlike process_files, results are not collected, so a consumer that
+        writes them out in batches keeps memory flat however large the scan.
 
-        return processed_files
+        Args:
+            root_path: Root directory to process
+            file_filter: Optional function to filter files
+            on_progress: Optional callback for progress updates
+
+        Yields:
+            Processed file information, in walk order
+        """
+        # Walk and hash concurrently: files are hashed as the walk finds them
+        files = self.file_walker.iter_walk(root_path, file_filter, on_progress)
+        return self._run_hash_pipeline(files, on_progress)
+
+    def _run_hash_pipeline(self, files: Iterable[Dict[str, Any]],
+                           on_progress: Optional[Callable[[Any], None]] = None,
+                           total_files: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+        """Hash a stream of file information dictionaries on the hashing pool.
+
+        Args:
+            files: File information dictionaries
+            on_progress: Optional callback for progress updates
+            total_files: Number of files, if known in advance
+
+        Yields:
+            Processed file information, in input order
+        """
+        if hasattr(self._hasher, 'set_buffer_size'):
+            self._hasher.set_buffer_size(self._hash_buffer_size)
+        controller = None
+        if self.hash_workers:
+            stage = Stage('hash', self._process_single_file, workers=self.hash_workers)
+        else:
+            controller = ConcurrencyController(max_workers=default_io_workers())
+            stage = Stage('hash', self._process_single_file, controller=controller,
+                          size_of=lambda file_info: file_info.get('size', 0))
+        pipeline = Pipeline([stage], governor=self.memory_governor)
+        self.last_pipeline = pipeline
+        self.last_controller = controller
+
+        count = 0
+        last_path = None
+        start_time = time.monotonic()
+        for processed_file in pipeline.run(files):
+            count += 1
+            last_path = processed_file['path']
+            yield processed_file
+
+            # Update progress
+            if on_progress and count % 10 == 0:
+                on_progress(self._hash_progress(count, total_files, last_path,
+                                                start_time, stage, controller))
+
+        if on_progress and count:
+            on_progress(self._hash_progress(count, total_files, last_path, start_time,
+                                            stage, controller))
+
+    @staticmethod
+    def _hash_progress(count: int, total_files: Optional[int], current_file: str,
+                       start_time: float, stage: Stage,
+                       controller: Optional[ConcurrencyController]) -> Dict[str, Any]:
+        """Progress update for the hashing stage."""
+        elapsed = time.monotonic() - start_time
+        last_decision = controller.last_decision if controller else None
+        return {
+            'files_processed': count,
+            'total_files': total_files if total_files is not None else count,
+            'current_file': current_file,
+            'files_per_second': count / elapsed if elapsed > 0 else 0.0,
+            'workers': stage.concurrency(),
+            'worker_decision': last_decision.describe() if last_decision else None
+        }
 
     def _process_single_file(self, file_info: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         """Process a single file and return enhanced file information.
@@ -198,33 +270,15 @@ class FileProcessor:
         Returns:
             List of processed file information
         """
-        processed_files = []
-
-        for i, file_path in enumerate(file_paths):
-            try:
-                if not os.path.isfile(file_path):
-                    continue
-
-                file_info = self._get_basic_file_info(file_path)
-                processed_file = self._process_single_file(file_info)
-
-                if processed_file:
-                    processed_files.append(processed_file)
-
-                # Update progress
-                if on_progress and (i % 10 == 0 or i == len(file_paths) - 1):
-                    progress = {
-                        'files_processed': i + 1,
-                        'total_files': len(file_paths),
-                        'current_file': file_path
-                    }
-                    on_progress(progress)
-
-            except Exception as e:
-                self.logger.warning(f"[{ActionCode.FPT_FLS_FAIL}] Error processing file {file_path}: {e}")
-                continue
+        def file_infos() -> Iterator[Dict[str, Any]]:
+            for file_path in file_paths:
+                try:
+                    if os.path.isfile(file_path):
+                        yield self._get_basic_file_info(file_path)
+                except Exception as e:
+                    self.logger.warning(f"[{ActionCode.FPT_FLS_FAIL}] Error processing file {file_path}: {e}")
 
-        return processed_files
+        return list(self._run_hash_pipeline(file_infos(), on_progress, total_files=len(file_paths)))
 
     def _get_basic_file_info(self, file_path: str) -> Dict[str, Any]:
         """Get basic file information for a single file.
@@ -313,4 +367,4 @@ if __name__ == "__main__":
     processor = FileProcessor()
     results = processor.process_files(args.path)
     for r in results:
-        print(f"{r["hash"]}  {r["path"]}")
+        print(f"{r['hash']}  {r['path']}")
@@ -21,13 +21,13 @@ Dependencies:
 
 import os
 from pathlib import Path
-from typing import List, Dict, Any, Optional, Callable
+from typing import Iterator, List, Dict, Any, Optional, Callable
 import time
 import logging
-from ..archive_interface import ArchiveHandlerInterface
+from nodupe.core.archive_interface import ArchiveHandlerInterface
 from ...tools.archive.archive_logic import ArchiveHandler as SecurityHardenedArchiveHandler
-from ..container import container as global_container
-from ..api.codes import ActionCode
+from nodupe.core.container import container as global_container
+from nodupe.core.api.codes import ActionCode
 
 logger = logging.getLogger(__name__)
 
@@ -81,11 +81,26 @@ class FileWalker:
         Returns:
             List of file information dictionaries
         """
+        return list(self.iter_walk(root_path, file_filter, on_progress))
+
+    def iter_walk(self, root_path: str, file_filter: Optional[Callable[[str], bool]] = None,
+                  on_progress: Optional[Callable[[Dict[str, Any]], None]] = None) -> Iterator[Dict[str, Any]]:
+        """Walk directory tree, yielding file information as files are found.
+
+        Lets downstream stages start hashing before the walk has finished.
+
+        Args:
+            root_path: Root directory to start walking from
+            file_filter: Optional function to filter files
+            on_progress: Optional callback for progress updates
+
+        Yields:
+            File information dictionaries
+        """
         self._reset_counters()
         self._start_time = time.monotonic()
         self._last_update = self._start_time
 
-        files = []
         root_path = str(Path(root_path).absolute())
 
         try:
@@ -100,14 +115,14 @@ class FileWalker:
                         file_info = self._get_file_info(file_path, relative_path)
 
                         if file_filter is None or file_filter(file_info):
-                            files.append(file_info)
                             self._file_count += 1
+                            yield file_info
 
                             # Check for archive files and extract contents
                             if self._enable_archive_support and self._is_archive_file(file_path):
                                 archive_files = self._process_archive_file(file_path, root_path)
-                                files.extend(archive_files)
                                 self._file_count += len(archive_files)
+                                yield from archive_files
 
                         self._check_progress_update(on_progress)
 
@@ -122,8 +137,6 @@ class FileWalker:
             self.logger.error(f"[{ActionCode.FPT_FLS_FAIL}] Failed to walk directory {root_path}: {e}")
             raise
 
-        return files
-
     def _get_file_info(self, file_path: str, relative_path: str) -> Dict[str, Any]:
         """Get file information for a single file.
 
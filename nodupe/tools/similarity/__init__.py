@@ -5,9 +5,13 @@ with multiple backend support and graceful degradation.
 
 Key Features:
     - Vector similarity search with multiple algorithms
-    - Multiple backend support (brute force, FAISS)
-    - Index management and persistence
+    - Multiple backend support (brute force, NumPy IVF, FAISS)
+    - Index management and persistence (memory-mapped matrix indexes)
+    - Incremental deletes, upserts and compaction (see updates)
     - Near-duplicate detection
+    - All-pairs near-duplicate self-join (see all_pairs)
+    - Hamming-space index for perceptual hashes (see hamming)
+    - MinHash + LSH near-duplicate text detection (see minhash)
     - Graceful degradation when optional dependencies missing
 
 Dependencies:
@@ -15,12 +19,20 @@ Dependencies:
 """
 
 import json
+import os
 import pickle
+import re
+import secrets
 import warnings
-from typing import List, Dict, Any, Optional, Tuple
+from typing import List, Dict, Any, Optional, Tuple, Callable, Iterator, Iterable, Sequence
 from abc import ABC, abstractmethod
 from pathlib import Path
 from nodupe.core.tool_system.base import Tool
+from .all_pairs import iter_pair_blocks
+from .hamming import find_hamming_pairs
+from .minhash import find_near_duplicates
+from .index_store import load_matrix_index, read_header, save_matrix_index, write_atomic
+from .updates import TombstoneIndexMixin, select_metadata
 
 try:
     import numpy as np
@@ -36,6 +48,10 @@ except ImportError:
     faiss = None
     FAISS_AVAILABLE = False
 
+# IVF metadata file name after the index name: the save's generation
+# (files without one are from before generations were used)
+_IVF_METADATA_FILE = re.compile(r'^(?:\.[0-9a-f]{12})?\.metadata$')
+
 
 class SimilarityBackend(ABC):
     """Abstract base class for similarity search backends."""
@@ -73,6 +89,47 @@ class SimilarityBackend(ABC):
             List of (metadata, similarity_score) tuples
         """
 
+    def search_batch(self, query_vectors: List[List[float]], k: int = 5, threshold: float = 0.8) -> List[List[Tuple[Dict[str, Any], float]]]:
+        """Search for several query vectors at once.
+
+        Backends that can answer many queries in one pass override this;
+        the default runs one search per query.
+
+        Args:
+            query_vectors: Query vectors
+            k: Number of results to return per query
+            threshold: Similarity threshold
+
+        Returns:
+            One list of (metadata, similarity_score) tuples per query
+        """
+        return [self.search(query, k, threshold) for query in query_vectors]
+
+    def remove_vectors(self, file_ids: Iterable[int]) -> int:
+        """Delete the vectors stored for the given files.
+
+        Args:
+            file_ids: File IDs to delete
+
+        Returns:
+            Number of vectors deleted
+        """
+        warnings.warn(f"{type(self).__name__} does not support deleting vectors")
+        return 0
+
+    def upsert_vectors(self, vectors: List[List[float]], metadata: List[Dict[str, Any]]) -> bool:
+        """Add vectors, replacing any stored for the same file_id.
+
+        Args:
+            vectors: Vectors to store
+            metadata: Metadata per vector, each with a file_id
+
+        Returns:
+            True if successful, False otherwise
+        """
+        warnings.warn(f"{type(self).__name__} does not support updating vectors")
+        return False
+
     @abstractmethod
     def save_index(self, path: str) -> bool:
         """Save index to file.
@@ -108,8 +165,19 @@ class SimilarityBackend(ABC):
         """Clear the index."""
 
 
-class BruteForceBackend(SimilarityBackend):
-    """Brute-force similarity search using NumPy or standard library."""
+class BruteForceBackend(TombstoneIndexMixin, SimilarityBackend):
+    """Brute-force similarity search using NumPy or standard library.
+
+    With NumPy the vectors live in one contiguous float32 matrix whose rows
+    are L2-normalized on insert, so cosine similarity is a single matrix
+    product. The matrix grows by doubling to keep appends amortized O(1).
+    Deleted rows are tombstoned and skipped until compaction (see updates).
+    """
+
+    # Smallest matrix allocated once the first vectors arrive
+    MIN_CAPACITY = 1024
+    # Upper bound on the (queries x vectors) score block built by search_batch
+    BATCH_SCORE_BYTES = 64 * 1024 * 1024
 
     def __init__(self, dimensions: int):
         """Initialize brute-force backend.
@@ -118,8 +186,53 @@ class BruteForceBackend(SimilarityBackend):
             dimensions: Number of dimensions for vectors
         """
         self.dimensions = dimensions
-        self.vectors: List[List[float]] = []
         self.metadata: List[Dict[str, Any]] = []
+        self._count = 0
+        if NUMPY_AVAILABLE:
+            self._matrix = np.empty((0, dimensions), dtype=np.float32)
+        else:
+            self._rows: List[List[float]] = []
+        self._init_updates()
+
+    @property
+    def vectors(self) -> Any:
+        """Stored (normalized) vectors, one row per stored item, deleted included."""
+        if NUMPY_AVAILABLE:
+            return self._matrix[:self._count]
+        return self._rows
+
+    def _search_state(self) -> Tuple[Any, Sequence[Dict[str, Any]], Any]:
+        """Consistent (vectors, metadata, deleted mask or None) for a search."""
+        with self._lock:
+            deleted = self._deleted[:self._count] if self._num_deleted else None
+            return self.vectors, self.metadata, deleted
+
+    def _reserve(self, extra: int) -> None:
+        """Grow the matrix so that extra more rows fit."""
+        needed = self._count + extra
+        capacity = self._matrix.shape[0]
+        if needed <= capacity:
+            return
+        new_capacity = max(needed, capacity * 2, self.MIN_CAPACITY)
+        grown = np.empty((new_capacity, self.dimensions), dtype=np.float32)
+        grown[:self._count] = self._matrix[:self._count]
+        self._matrix = grown
+
+    @staticmethod
+    def _normalize_rows(array: Any) -> Any:
+        """L2-normalize rows in place; zero rows stay zero."""
+        norms = np.linalg.norm(array, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        array /= norms
+        return array
+
+    @staticmethod
+    def _normalize_list(vector: List[float]) -> List[float]:
+        """L2-normalize a vector without NumPy."""
+        norm = sum(v * v for v in vector) ** 0.5
+        if norm == 0:
+            return [0.0] * len(vector)
+        return [v / norm for v in vector]
 
     def add_vectors(self, vectors: List[List[float]], metadata: List[Dict[str, Any]]) -> bool:
         """Add vectors to the index."""
@@ -134,16 +247,68 @@ class BruteForceBackend(SimilarityBackend):
                         f"Vector dimension mismatch: expected {self.dimensions}, got {len(vector)}")
                     return False
 
-            self.vectors.extend(vectors)
-            self.metadata.extend(metadata)
+            if len(vectors) == 0:
+                return True
+
+            with self._lock:
+                if NUMPY_AVAILABLE:
+                    block = np.array(vectors, dtype=np.float32).reshape(len(vectors), self.dimensions)
+                    self._reserve(len(block))
+                    self._matrix[self._count:self._count + len(block)] = self._normalize_rows(block)
+                else:
+                    self._rows.extend(self._normalize_list(list(vector)) for vector in vectors)
+
+                first_row = self._count
+                self._count += len(vectors)
+                if not isinstance(self.metadata, list):
+                    # Metadata of a loaded index is a read-only view
+                    self.metadata = list(self.metadata)
+                self.metadata.extend(metadata)
+                self._rows_added(first_row, metadata)
             return True
         except Exception as e:
             warnings.warn(f"Failed to add vectors: {e}")
             return False
 
+    def _replace_rows(self, rows: List[int], vectors: List[List[float]],
+                      metadata: List[Dict[str, Any]]) -> bool:
+        """Overwrite stored rows in place (called by upsert_vectors under the lock).
+
+        A search running at the same time may score a row mid-update.
+        """
+        if any(len(vector) != self.dimensions for vector in vectors):
+            return False
+        if NUMPY_AVAILABLE:
+            block = np.array(vectors, dtype=np.float32).reshape(len(vectors), self.dimensions)
+            if not self._matrix.flags.writeable:
+                # Vectors of a loaded index are a read-only memory map
+                self._matrix = np.array(self._matrix)
+            self._matrix[rows] = self._normalize_rows(block)
+        else:
+            for row, vector in zip(rows, vectors):
+                self._rows[row] = self._normalize_list(list(vector))
+        if isinstance(self.metadata, list) or any(set(item) != {'file_id'} for item in metadata):
+            if not isinstance(self.metadata, list):
+                self.metadata = list(self.metadata)
+            for row, item in zip(rows, metadata):
+                self.metadata[row] = item
+        return True
+
+    @staticmethod
+    def _top_k(scores: Any, metadata: Sequence[Dict[str, Any]], k: int,
+               threshold: float) -> List[Tuple[Dict[str, Any], float]]:
+        """Select the k best scores above threshold, best first."""
+        if k < len(scores):
+            candidates = np.argpartition(scores, -k)[-k:]
+        else:
+            candidates = np.arange(len(scores))
+        candidates = candidates[scores[candidates] >= threshold]
+        order = candidates[np.argsort(scores[candidates])[::-1]]
+        return [(metadata[idx], float(scores[idx])) for idx in order]
+
     def search(self, query_vector: List[float], k: int = 5, threshold: float = 0.8) -> List[Tuple[Dict[str, Any], float]]:
         """Search for similar vectors."""
-        if len(self.vectors) == 0:
+        if self._count == 0 or k <= 0:
             return []
 
         if len(query_vector) != self.dimensions:
@@ -152,61 +317,164 @@ class BruteForceBackend(SimilarityBackend):
             return []
 
         try:
+            vectors, metadata, deleted = self._search_state()
+
+            if NUMPY_AVAILABLE:
+                query = np.array(query_vector, dtype=np.float32).reshape(1, self.dimensions)
+                query = self._normalize_rows(query)[0]
+                scores = vectors @ query
+                if deleted is not None:
+                    scores[deleted] = -np.inf
+                return self._top_k(scores, metadata, k, threshold)
+
+            # Fallback to standard library
+            query = self._normalize_list(list(query_vector))
             results = []
+            for i, vector in enumerate(vectors):
+                if deleted is not None and deleted[i]:
+                    continue
+                similarity = sum(v * q for v, q in zip(vector, query))
+                if similarity >= threshold:
+                    results.append((metadata[i], similarity))
 
-            if NUMPY_AVAILABLE and np:
-                # Use NumPy for efficient computation
-                query_array = np.array(query_vector, dtype=np.float32)
-                vectors_array = np.array(self.vectors, dtype=np.float32)
+            # Sort by similarity (descending)
+            results.sort(key=lambda x: x[1], reverse=True)
+            return results[:k]
 
-                # Calculate cosine similarity
-                dot_products = np.sum(vectors_array * query_array, axis=1)
-                query_norm = np.linalg.norm(query_array)
-                vector_norms = np.linalg.norm(vectors_array, axis=1)
+        except Exception as e:
+            warnings.warn(f"Similarity search failed: {e}")
+            return []
 
-                # Avoid division by zero
-                similarities = np.where(vector_norms == 0, 0, dot_products /
-                                        (vector_norms * query_norm))
+    def search_batch(self, query_vectors: List[List[float]], k: int = 5, threshold: float = 0.8) -> List[List[Tuple[Dict[str, Any], float]]]:
+        """Search for many query vectors with one matrix product per block.
 
-                # Get top k results
-                top_indices = np.argsort(similarities)[-k:][::-1]
+        Queries are processed in blocks sized so that the score matrix
+        stays under BATCH_SCORE_BYTES.
+        """
+        if not NUMPY_AVAILABLE:
+            return super().search_batch(query_vectors, k, threshold)
 
-                for idx in top_indices:
-                    similarity = similarities[idx]
-                    if similarity >= threshold:
-                        results.append((self.metadata[idx], float(similarity)))
-            else:
-                # Fallback to standard library
-                for i, vector in enumerate(self.vectors):
-                    # Calculate cosine similarity manually
-                    dot_product = sum(v * q for v, q in zip(vector, query_vector))
-                    query_norm = sum(q*q for q in query_vector)**0.5
-                    vector_norm = sum(v*v for v in vector)**0.5
+        num_queries = len(query_vectors)
+        if self._count == 0 or k <= 0 or num_queries == 0:
+            return [[] for _ in range(num_queries)]
 
-                    if query_norm == 0 or vector_norm == 0:
-                        similarity = 0.0
-                    else:
-                        similarity = dot_product / (query_norm * vector_norm)
+        try:
+            queries = np.array(query_vectors, dtype=np.float32)
+            if queries.ndim != 2 or queries.shape[1] != self.dimensions:
+                warnings.warn(
+                    f"Query vector dimension mismatch: expected {self.dimensions}, got {queries.shape[-1]}")
+                return [[] for _ in range(num_queries)]
+            queries = self._normalize_rows(queries)
+
+            vectors, metadata, deleted = self._search_state()
+            count = len(vectors)
+            k = min(k, count)
+            block = max(1, self.BATCH_SCORE_BYTES // (4 * count))
+            results: List[List[Tuple[Dict[str, Any], float]]] = []
+
+            for start in range(0, num_queries, block):
+                scores = queries[start:start + block] @ vectors.T
+                if deleted is not None:
+                    scores[:, deleted] = -np.inf
+                if k < count:
+                    top = np.argpartition(scores, -k, axis=1)[:, -k:]
+                else:
+                    top = np.broadcast_to(np.arange(count), scores.shape)
+                top_scores = np.take_along_axis(scores, top, axis=1)
+                order = np.argsort(-top_scores, axis=1)
+                top = np.take_along_axis(top, order, axis=1)
+                top_scores = np.take_along_axis(top_scores, order, axis=1)
+
+                for row_ids, row_scores in zip(top, top_scores):
+                    keep = row_scores >= threshold
+                    results.append([
+                        (metadata[idx], float(score))
+                        for idx, score in zip(row_ids[keep], row_scores[keep])
+                    ])
 
-                    if similarity >= threshold:
-                        results.append((self.metadata[i], similarity))
+            return results
+        except Exception as e:
+            warnings.warn(f"Batch similarity search failed: {e}")
+            return [[] for _ in range(num_queries)]
 
-                # Sort by similarity (descending)
-                results.sort(key=lambda x: x[1], reverse=True)
-                results = results[:k]
+    def find_all_pairs(self, threshold: float = 0.9, **options: Any) -> Iterator[Tuple[Dict[str, Any], Dict[str, Any], float]]:
+        """Stream every pair of indexed items with similarity >= threshold.
 
-            return results
+        Args:
+            threshold: Minimum cosine similarity
+            **options: Passed to all_pairs.iter_pair_blocks
 
-        except Exception as e:
-            warnings.warn(f"Similarity search failed: {e}")
-            return []
+        Yields:
+            (metadata_a, metadata_b, similarity_score) tuples
+        """
+        if not NUMPY_AVAILABLE:
+            raise RuntimeError("NumPy is required for all-pairs search")
+        vectors, metadata, deleted = self._search_state()
+        blocks = iter_pair_blocks(vectors, threshold, normalized=True, **options)
+        for rows, cols, scores in blocks:
+            if deleted is not None:
+                live = ~(deleted[rows] | deleted[cols])
+                rows, cols, scores = rows[live], cols[live], scores[live]
+            for i, j, score in zip(rows.tolist(), cols.tolist(), scores.tolist()):
+                yield metadata[i], metadata[j], score
+
+    def _row_count(self) -> int:
+        return self._count
+
+    def _compaction_snapshot(self, rows: int) -> Any:
+        return self._matrix if NUMPY_AVAILABLE else self._rows
+
+    def _compaction_build(self, snapshot: Any, live: Any, remap: Any) -> Any:
+        if not NUMPY_AVAILABLE:
+            return [snapshot[row] for row in live]
+        capacity = max(len(live) + len(live) // 4, self.MIN_CAPACITY)
+        matrix = np.empty((capacity, self.dimensions), dtype=np.float32)
+        matrix[:len(live)] = snapshot[live]
+        return matrix
+
+    def _compaction_swap(self, built: Any, snapshot: Any, remap: Any, live_count: int,
+                         rows: int, total: int) -> None:
+        added = total - rows
+        if NUMPY_AVAILABLE:
+            if live_count + added > len(built):
+                grown = np.empty((max(live_count + added, 2 * len(built)), self.dimensions), dtype=np.float32)
+                grown[:live_count] = built[:live_count]
+                built = grown
+            built[live_count:live_count + added] = self._matrix[rows:total]
+            self._matrix = built
+        else:
+            built.extend(self._rows[rows:total])
+            self._rows = built
+        self._count = live_count + added
 
     def save_index(self, path: str) -> bool:
-        """Save index to file."""
+        """Save index to file.
+
+        With NumPy the index is written in the matrix index format (see
+        index_store): a JSON header at path, the normalized vectors as a
+        float32 .npy file and the metadata as a file_id column or JSON
+        sidecar. Without NumPy the legacy pickle format is written.
+        Deleted vectors are left out.
+        """
         try:
+            vectors, metadata, deleted = self._search_state()
+            if deleted is not None:
+                if NUMPY_AVAILABLE:
+                    live = np.flatnonzero(~deleted)
+                    vectors = vectors[live]
+                else:
+                    live = [row for row in range(len(vectors)) if not deleted[row]]
+                    vectors = [vectors[row] for row in live]
+                metadata = select_metadata(metadata, live)
+
+            if NUMPY_AVAILABLE:
+                save_matrix_index(path, vectors, metadata, normalized=True,
+                                  extra={'synced_revision': self.synced_revision})
+                return True
+
             index_data = {
-                'vectors': self.vectors,
-                'metadata': self.metadata,
+                'vectors': vectors,
+                'metadata': list(metadata),
                 'dimensions': self.dimensions
             }
 
@@ -218,9 +486,36 @@ class BruteForceBackend(SimilarityBackend):
             warnings.warn(f"Failed to save index: {e}")
             return False
 
-    def load_index(self, path: str) -> bool:
-        """Load index from file."""
+    def load_index(self, path: str, mmap: bool = True) -> bool:
+        """Load index from file.
+
+        Matrix indexes are memory-mapped read-only, so loading costs almost
+        nothing and processes sharing an index share its pages. The first
+        add_vectors() after loading copies the vectors into memory.
+
+        Args:
+            path: Path to load index from
+            mmap: Map the vector file instead of reading it
+        """
         try:
+            header = read_header(path) if NUMPY_AVAILABLE else None
+            if header is not None:
+                if header.get('dimensions') != self.dimensions:
+                    warnings.warn(
+                        f"Index dimension mismatch: expected {self.dimensions}, got {header.get('dimensions')}")
+                    return False
+                vectors, metadata, header = load_matrix_index(path, mmap=mmap)
+                if not header.get('normalized'):
+                    vectors = self._normalize_rows(np.array(vectors, dtype=np.float32))
+                with self._lock:
+                    self._matrix = vectors
+                    self._count = len(vectors)
+                    self.metadata = metadata
+                    self._reset_updates()
+                    self._deleted = np.zeros(len(vectors), dtype=bool)
+                    self.synced_revision = int(header.get('synced_revision', 0))
+                return True
+
             # First try JSON format (safer), fall back to pickle for backwards compatibility
             json_path = path + '.json'
             if Path(json_path).exists():
@@ -237,21 +532,26 @@ class BruteForceBackend(SimilarityBackend):
                     f"Index dimension mismatch: expected {self.dimensions}, got {index_data.get('dimensions')}")
                 return False
 
-            self.vectors = index_data['vectors']
-            self.metadata = index_data['metadata']
-            return True
+            self.clear_index()
+            return self.add_vectors(index_data['vectors'], index_data['metadata'])
         except Exception as e:
             warnings.warn(f"Failed to load index: {e}")
             return False
 
     def get_index_size(self) -> int:
-        """Get number of vectors in index."""
-        return len(self.vectors)
+        """Get number of live vectors in index."""
+        return self._count - self._num_deleted
 
     def clear_index(self) -> None:
         """Clear the index."""
-        self.vectors.clear()
-        self.metadata.clear()
+        with self._lock:
+            self._count = 0
+            self.metadata = []
+            if NUMPY_AVAILABLE:
+                self._matrix = np.empty((0, self.dimensions), dtype=np.float32)
+            else:
+                self._rows = []
+            self._reset_updates()
 
 
 class FaissBackend(SimilarityBackend):
@@ -382,6 +682,432 @@ class FaissBackend(SimilarityBackend):
             self.metadata.clear()
 
 
+class _InvertedList:
+    """Growable block of vectors with their row IDs.
+
+    The (vectors, ids, size) triple is replaced in one assignment after
+    rows are written, so readers never see a size larger than the arrays
+    they are given.
+    """
+
+    def __init__(self, dimensions: int):
+        self.state = (np.empty((0, dimensions), dtype=np.float32), np.empty(0, dtype=np.int64), 0)
+
+    @property
+    def size(self) -> int:
+        """Number of filled rows."""
+        return self.state[2]
+
+    def append(self, vectors: Any, ids: Any) -> None:
+        """Append rows, doubling the capacity when full."""
+        current, current_ids, size = self.state
+        needed = size + len(ids)
+        if needed > len(current_ids):
+            capacity = max(needed, 2 * len(current_ids), 16)
+            grown = np.empty((capacity, current.shape[1]), dtype=np.float32)
+            grown[:size] = current[:size]
+            grown_ids = np.empty(capacity, dtype=np.int64)
+            grown_ids[:size] = current_ids[:size]
+            current, current_ids = grown, grown_ids
+        current[size:needed] = vectors
+        current_ids[size:needed] = ids
+        self.state = (current, current_ids, needed)
+
+    def view(self) -> Tuple[Any, Any]:
+        """Filled vectors and IDs."""
+        vectors, ids, size = self.state
+        return vectors[:size], ids[:size]
+
+
+def spherical_kmeans(vectors: Any, nlist: int, iterations: int = 10, seed: int = 0) -> Any:
+    """Cluster unit vectors by cosine similarity.
+
+    Args:
+        vectors: Row-normalized float32 training vectors
+        nlist: Number of clusters
+        iterations: Lloyd iterations
+        seed: Random seed for initialization
+
+    Returns:
+        (nlist, dimensions) array of unit-length centroids
+    """
+    rng = np.random.default_rng(seed)
+    centroids = vectors[rng.choice(len(vectors), nlist, replace=False)].copy()
+
+    for _ in range(iterations):
+        assignment = _nearest_centroid(vectors, centroids)
+        order = np.argsort(assignment, kind='stable')
+        counts = np.bincount(assignment, minlength=nlist)
+        starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+
+        filled = counts > 0
+        sums = np.add.reduceat(vectors[order], starts[filled], axis=0)
+        centroids[filled] = sums
+        # Re-seed empty clusters from random training vectors
+        empty = np.flatnonzero(~filled)
+        if len(empty):
+            centroids[empty] = vectors[rng.choice(len(vectors), len(empty), replace=False)]
+
+        norms = np.linalg.norm(centroids, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        centroids /= norms
+
+    return centroids
+
+
+def _nearest_centroid(vectors: Any, centroids: Any, chunk: int = 65536) -> Any:
+    """Index of the most similar centroid for each vector."""
+    assignment = np.empty(len(vectors), dtype=np.int64)
+    for start in range(0, len(vectors), chunk):
+        assignment[start:start + chunk] = np.argmax(vectors[start:start + chunk] @ centroids.T, axis=1)
+    return assignment
+
+
+class IVFBackend(TombstoneIndexMixin, SimilarityBackend):
+    """Approximate search with an inverted-file index written in NumPy.
+
+    Vectors are partitioned by a spherical k-means coarse quantizer into
+    nlist inverted lists. A query scores the centroids, then only the
+    vectors of the nprobe closest lists, so the work per query is about
+    nlist + N * nprobe / nlist dot products instead of N. Raising nprobe
+    trades speed for recall; nprobe == nlist is an exact search.
+
+    Until min_train_size vectors have been added the index is searched
+    exactly; it then trains itself on a sample and assigns all vectors,
+    and retrains whenever it grows RETRAIN_GROWTH times past that size.
+    Deleted rows are tombstoned and skipped until compaction (see updates).
+    """
+
+    # Training vectors drawn per centroid
+    TRAIN_PER_LIST = 64
+    # Retrain once the index has grown this many times past its training size
+    RETRAIN_GROWTH = 8
+
+    def __init__(self, dimensions: int, nlist: Optional[int] = None, nprobe: int = 8,
+                 min_train_size: int = 10000):
+        """Initialize IVF backend.
+
+        Args:
+            dimensions: Number of dimensions for vectors
+            nlist: Number of inverted lists (default: 4 * sqrt(N) at training)
+            nprobe: Lists scanned per query
+            min_train_size: Vectors required before the quantizer is trained
+        """
+        if not NUMPY_AVAILABLE:
+            raise RuntimeError("NumPy is required for the IVF backend")
+
+        self.dimensions = dimensions
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.min_train_size = min_train_size
+        self.metadata: List[Dict[str, Any]] = []
+        self.centroids: Optional[Any] = None
+        self._lists: List[_InvertedList] = [_InvertedList(dimensions)]
+        self._fixed_nlist = nlist is not None
+        self._trained_size = 0
+        self._init_updates()
+
+    @property
+    def is_trained(self) -> bool:
+        """Whether the coarse quantizer has been trained."""
+        return self.centroids is not None
+
+    def set_search_params(self, nprobe: int) -> None:
+        """Set the number of lists scanned per query.
+
+        Args:
+            nprobe: Lists scanned per query (higher is slower and more accurate)
+        """
+        self.nprobe = max(1, int(nprobe))
+
+    def _all_vectors(self) -> Tuple[Any, Any]:
+        """Every stored vector and its ID, gathered from the lists."""
+        views = [inverted.view() for inverted in self._lists]
+        return np.concatenate([v for v, _ in views]), np.concatenate([i for _, i in views])
+
+    def train(self, nlist: Optional[int] = None, iterations: int = 10) -> bool:
+        """Train the coarse quantizer on the stored vectors and rebuild the lists.
+
+        Args:
+            nlist: Number of inverted lists (default: self.nlist or 4 * sqrt(N))
+            iterations: k-means iterations
+
+        Returns:
+            True if successful, False otherwise
+        """
+        try:
+            with self._lock:
+                vectors, ids = self._all_vectors()
+                # Train on live vectors only; deleted ones keep their rows
+                # until compaction
+                live = ~self._deleted[ids]
+                if not live.any():
+                    return False
+
+                if nlist is None and self._fixed_nlist:
+                    nlist = self.nlist
+                nlist = nlist or int(4 * int(live.sum()) ** 0.5)
+                nlist = max(1, min(nlist, int(live.sum())))
+                rng = np.random.default_rng(0)
+                candidates = vectors[live]
+                sample_size = min(len(candidates), nlist * self.TRAIN_PER_LIST)
+                sample = candidates[rng.choice(len(candidates), sample_size, replace=False)]
+
+                self.centroids = spherical_kmeans(sample, nlist, iterations)
+                self.nlist = nlist
+                self._lists = [_InvertedList(self.dimensions) for _ in range(nlist)]
+                self._assign(vectors, ids)
+                self._trained_size = len(vectors)
+                # Row ids are unchanged but the lists were replaced
+                self._generation += 1
+            return True
+        except Exception as e:
+            warnings.warn(f"Failed to train IVF index: {e}")
+            return False
+
+    def _assign(self, vectors: Any, ids: Any) -> None:
+        """Append vectors to the lists of their nearest centroids."""
+        assignment = _nearest_centroid(vectors, self.centroids)
+        order = np.argsort(assignment, kind='stable')
+        counts = np.bincount(assignment, minlength=len(self._lists))
+        start = 0
+        for list_id in np.flatnonzero(counts):
+            end = start + counts[list_id]
+            rows = order[start:end]
+            self._lists[list_id].append(vectors[rows], ids[rows])
+            start = end
+
+    def add_vectors(self, vectors: List[List[float]], metadata: List[Dict[str, Any]]) -> bool:
+        """Add vectors to the index."""
+        try:
+            if len(vectors) != len(metadata):
+                warnings.warn("Vectors and metadata length mismatch")
+                return False
+            if len(vectors) == 0:
+                return True
+
+            block = np.array(vectors, dtype=np.float32)
+            if block.ndim != 2 or block.shape[1] != self.dimensions:
+                warnings.warn(
+                    f"Vector dimension mismatch: expected {self.dimensions}, got {block.shape[-1]}")
+                return False
+            block = BruteForceBackend._normalize_rows(block)
+
+            with self._lock:
+                first_id = len(self.metadata)
+                ids = np.arange(first_id, first_id + len(block), dtype=np.int64)
+                self.metadata.extend(metadata)
+                self._rows_added(first_id, metadata)
+
+                if self.is_trained:
+                    self._assign(block, ids)
+                    if len(self.metadata) >= self.RETRAIN_GROWTH * self._trained_size:
+                        self.train()
+                else:
+                    self._lists[0].append(block, ids)
+                    if len(self.metadata) >= self.min_train_size:
+                        self.train()
+            return True
+        except Exception as e:
+            warnings.warn(f"Failed to add vectors: {e}")
+            return False
+
+    def _search_normalized(self, state: Tuple[Any, ...], query: Any, centroid_scores: Optional[Any],
+                           k: int, threshold: float) -> List[Tuple[Dict[str, Any], float]]:
+        """Search with a unit-length query."""
+        views, _, metadata, deleted = state
+        if centroid_scores is None:
+            probed = [0]
+        else:
+            nprobe = min(self.nprobe, len(centroid_scores))
+            probed = np.argpartition(centroid_scores, -nprobe)[-nprobe:]
+
+        scores_parts, id_parts = [], []
+        for list_id in probed:
+            vectors, ids = views[list_id]
+            if len(ids):
+                scores_parts.append(vectors @ query)
+                id_parts.append(ids)
+        if not id_parts:
+            return []
+
+        scores = np.concatenate(scores_parts)
+        ids = np.concatenate(id_parts)
+        if deleted is not None:
+            scores[deleted[ids]] = -np.inf
+        if k < len(scores):
+            top = np.argpartition(scores, -k)[-k:]
+        else:
+            top = np.arange(len(scores))
+        top = top[scores[top] >= threshold]
+        top = top[np.argsort(scores[top])[::-1]]
+        return [(metadata[ids[i]], float(scores[i])) for i in top]
+
+    def search(self, query_vector: List[float], k: int = 5, threshold: float = 0.8) -> List[Tuple[Dict[str, Any], float]]:
+        """Search for similar vectors."""
+        return self.search_batch([query_vector], k, threshold)[0]
+
+    def search_batch(self, query_vectors: List[List[float]], k: int = 5, threshold: float = 0.8) -> List[List[Tuple[Dict[str, Any], float]]]:
+        """Search for several query vectors, scoring all centroids at once."""
+        num_queries = len(query_vectors)
+        if not self.metadata or k <= 0 or num_queries == 0:
+            return [[] for _ in range(num_queries)]
+
+        try:
+            queries = np.array(query_vectors, dtype=np.float32)
+            if queries.ndim != 2 or queries.shape[1] != self.dimensions:
+                warnings.warn(
+                    f"Query vector dimension mismatch: expected {self.dimensions}, got {queries.shape[-1]}")
+                return [[] for _ in range(num_queries)]
+            queries = BruteForceBackend._normalize_rows(queries)
+
+            with self._lock:
+                # Views are taken with the bitmap, so no listed id is beyond it
+                deleted = self._deleted if self._num_deleted else None
+                views = [inverted.view() for inverted in self._lists]
+                state = (views, self.centroids, self.metadata, deleted)
+            centroids = state[1]
+            centroid_scores = queries @ centroids.T if centroids is not None else [None] * num_queries
+            return [
+                self._search_normalized(state, query, scores, k, threshold)
+                for query, scores in zip(queries, centroid_scores)
+            ]
+        except Exception as e:
+            warnings.warn(f"IVF search failed: {e}")
+            return [[] for _ in range(num_queries)]
+
+    def save_index(self, path: str) -> bool:
+        """Save index to file.
+
+        Arrays go to an uncompressed .npz file at path and metadata to
+        path + '.<generation>.metadata' as JSON. As with matrix indexes
+        (see index_store), the metadata is written first and the .npz,
+        which names it, is renamed into place last, so a crash leaves
+        the previous pair intact.
+        """
+        try:
+            with self._lock:
+                vectors, ids = self._all_vectors()
+                metadata_name = f"{os.path.basename(path)}.{secrets.token_hex(6)}.metadata"
+                metadata_path = os.path.join(os.path.dirname(os.path.abspath(path)), metadata_name)
+                payload = json.dumps(list(self.metadata)).encode('utf-8')
+                write_atomic(metadata_path, lambda f: f.write(payload))
+                write_atomic(path, lambda f: np.savez(
+                    f,
+                    dimensions=np.int64(self.dimensions),
+                    centroids=self.centroids if self.is_trained else np.empty((0, self.dimensions), np.float32),
+                    list_sizes=np.array([inverted.size for inverted in self._lists], dtype=np.int64),
+                    vectors=vectors,
+                    ids=ids,
+                    deleted=self._deleted[:len(self.metadata)],
+                    synced_revision=np.int64(self.synced_revision),
+                    metadata_file=np.str_(metadata_name)
+                ))
+            self._remove_old_metadata(path, metadata_name)
+            return True
+        except Exception as e:
+            warnings.warn(f"Failed to save IVF index: {e}")
+            return False
+
+    def load_index(self, path: str) -> bool:
+        """Load index from file."""
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                if int(data['dimensions']) != self.dimensions:
+                    warnings.warn(
+                        f"Index dimension mismatch: expected {self.dimensions}, got {int(data['dimensions'])}")
+                    return False
+                centroids = data['centroids']
+                list_sizes = data['list_sizes']
+                vectors = data['vectors']
+                ids = data['ids']
+                deleted = data['deleted'] if 'deleted' in data else np.zeros(len(ids), dtype=bool)
+                synced_revision = int(data['synced_revision']) if 'synced_revision' in data else 0
+                if 'metadata_file' in data:
+                    metadata_path = os.path.join(os.path.dirname(os.path.abspath(path)),
+                                                 str(data['metadata_file']))
+                else:
+                    metadata_path = f"{path}.metadata"
+            with open(metadata_path, 'r') as f:
+                metadata = json.load(f)
+
+            lists = []
+            start = 0
+            for size in list_sizes:
+                inverted = _InvertedList(self.dimensions)
+                inverted.append(vectors[start:start + size], ids[start:start + size])
+                lists.append(inverted)
+                start += size
+
+            with self._lock:
+                self._reset_updates()
+                self.metadata = metadata
+                self.centroids = centroids if len(centroids) else None
+                if self.centroids is not None:
+                    self.nlist = len(centroids)
+                    self._trained_size = len(metadata)
+                self._lists = lists
+                self._deleted = np.array(deleted, dtype=bool)
+                self._num_deleted = int(self._deleted.sum())
+                self.synced_revision = synced_revision
+            return True
+        except Exception as e:
+            warnings.warn(f"Failed to load IVF index: {e}")
+            return False
+
+    @staticmethod
+    def _remove_old_metadata(path: str, keep: str) -> None:
+        """Delete metadata files of earlier saves at path."""
+        directory = os.path.dirname(os.path.abspath(path))
+        base = os.path.basename(path)
+        for name in os.listdir(directory):
+            if name == keep or not name.startswith(base):
+                continue
+            if _IVF_METADATA_FILE.match(name[len(base):]):
+                try:
+                    os.remove(os.path.join(directory, name))
+                except OSError:
+                    pass
+
+    def _row_count(self) -> int:
+        return len(self.metadata)
+
+    def _compaction_snapshot(self, rows: int) -> Any:
+        return [inverted.state for inverted in self._lists]
+
+    def _compaction_build(self, snapshot: Any, live: Any, remap: Any) -> Any:
+        lists = []
+        for vectors, ids, size in snapshot:
+            new_ids = remap[ids[:size]]
+            keep = new_ids >= 0
+            inverted = _InvertedList(self.dimensions)
+            inverted.append(vectors[:size][keep], new_ids[keep])
+            lists.append(inverted)
+        return lists
+
+    def _compaction_swap(self, built: Any, snapshot: Any, remap: Any, live_count: int,
+                         rows: int, total: int) -> None:
+        # Rows added during the copy were appended past the snapshot sizes
+        for inverted, current, (_, _, size) in zip(built, self._lists, snapshot):
+            vectors, ids, current_size = current.state
+            if current_size > size:
+                inverted.append(vectors[size:current_size], ids[size:current_size] - rows + live_count)
+        self._lists = built
+
+    def get_index_size(self) -> int:
+        """Get number of live vectors in index."""
+        return len(self.metadata) - self._num_deleted
+
+    def clear_index(self) -> None:
+        """Clear the index, including the trained quantizer."""
+        with self._lock:
+            self.metadata = []
+            self.centroids = None
+            self._lists = [_InvertedList(self.dimensions)]
+            self._trained_size = 0
+            self._reset_updates()
+
+
 class SimilarityManager:
     """Manager for similarity search backends with graceful fallback."""
 
@@ -397,6 +1123,13 @@ class SimilarityManager:
         except Exception:
             pass
 
+        if NUMPY_AVAILABLE:
+            # Approximate search for large indexes on hosts without FAISS
+            try:
+                self.add_backend('ivf', IVFBackend(dimensions=512))
+            except Exception:
+                pass
+
         if FAISS_AVAILABLE:
             try:
                 self.add_backend('faiss', FaissBackend(dimensions=512))
@@ -457,6 +1190,46 @@ class SimilarityManager:
             return self.current_backend.search(query_vector, k, threshold)
         return []
 
+    def search_batch(self, query_vectors: List[List[float]], k: int = 5, threshold: float = 0.8) -> List[List[Tuple[Dict[str, Any], float]]]:
+        """Search for several query vectors at once."""
+        if self.current_backend:
+            return self.current_backend.search_batch(query_vectors, k, threshold)
+        return [[] for _ in query_vectors]
+
+    def remove_vectors(self, file_ids: Iterable[int]) -> int:
+        """Delete vectors of the given files from the current backend."""
+        if self.current_backend:
+            return self.current_backend.remove_vectors(file_ids)
+        return 0
+
+    def upsert_vectors(self, vectors: List[List[float]], metadata: List[Dict[str, Any]]) -> bool:
+        """Add or replace vectors by file_id in the current backend."""
+        if self.current_backend:
+            return self.current_backend.upsert_vectors(vectors, metadata)
+        return False
+
+    def sync_from_database(self, db: Any, model_version: str) -> Dict[str, int]:
+        """Apply file changes recorded in the database to the current backend.
+
+        Args:
+            db: DatabaseConnection
+            model_version: Embedding model version the index holds
+
+        Returns:
+            Dictionary with 'removed' and 'upserted' counts
+        """
+        sync = getattr(self.current_backend, 'sync_from_database', None)
+        if sync is None:
+            return {'removed': 0, 'upserted': 0}
+        return sync(db, model_version)
+
+    def find_all_pairs(self, threshold: float = 0.9, **options: Any) -> Iterator[Tuple[Dict[str, Any], Dict[str, Any], float]]:
+        """Stream all near-duplicate pairs from the current backend."""
+        finder = getattr(self.current_backend, 'find_all_pairs', None)
+        if finder is None:
+            return iter(())
+        return finder(threshold, **options)
+
     def save_index(self, path: str) -> bool:
         """Save current backend index."""
         if self.current_backend:
@@ -506,6 +1279,13 @@ class SimilarityBackendTool(Tool):
         return {
             'add_vectors': self.manager.add_vectors,
             'search': self.manager.search,
+            'search_batch': self.manager.search_batch,
+            'remove_vectors': self.manager.remove_vectors,
+            'upsert_vectors': self.manager.upsert_vectors,
+            'sync_from_database': self.manager.sync_from_database,
+            'find_all_pairs': lambda threshold=0.9: list(self.manager.find_all_pairs(threshold)),
+            'find_hamming_pairs': find_hamming_pairs,
+            'find_text_duplicates': find_near_duplicates,
             'save_index': self.manager.save_index,
             'load_index': self.manager.load_index,
             'get_index_size': self.manager.get_index_size
@@ -0,0 +1,194 @@
+"""All-pairs near-duplicate search for NoDupeLabs.
+
+Finds every pair of vectors whose cosine similarity reaches a threshold
+without issuing one query per vector. The normalized embedding matrix is
+cut into row blocks; each block is multiplied against the rows after it in
+column tiles, so peak memory is bounded by the tile size rather than by
+N squared. Tiles run on a thread pool (NumPy releases the GIL inside
+matrix multiplication) and only pairs above the threshold leave a worker.
+
+Key Features:
+    - Blocked upper-triangle self-join with NumPy matmul
+    - Bounded memory per worker and bounded number of tiles in flight
+    - Streaming results as index arrays or (i, j, score) tuples
+    - Optional writing of pairs as file_relationships rows
+
+Dependencies:
+    - numpy (required by this module)
+    - concurrent.futures (standard library only)
+"""
+
+import os
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Iterator, Optional, Tuple
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    np = None
+    NUMPY_AVAILABLE = False
+
+# Rows of the left operand per tile
+DEFAULT_BLOCK_ROWS = 1024
+# Upper bound on the float32 score tile computed by one worker
+DEFAULT_TILE_BYTES = 32 * 1024 * 1024
+# Relationship type recorded for vector near-duplicates
+VECTOR_RELATIONSHIP = 'vector_similar'
+
+
+class AllPairsError(Exception):
+    """All-pairs search error"""
+
+
+def normalize_matrix(matrix: Any) -> Any:
+    """Return a float32 copy of matrix with unit-length rows.
+
+    Args:
+        matrix: 2-D array of vectors
+
+    Returns:
+        Row-normalized float32 array; zero rows stay zero
+    """
+    normalized = np.array(matrix, dtype=np.float32)
+    if normalized.ndim != 2:
+        raise AllPairsError(f"Expected a 2-D matrix, got {normalized.ndim} dimensions")
+    norms = np.linalg.norm(normalized, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    normalized /= norms
+    return normalized
+
+
+def _tiles(num_rows: int, block_rows: int, tile_cols: int) -> Iterator[Tuple[int, int, int, int]]:
+    """Yield (row_start, row_end, col_start, col_end) tiles of the upper triangle."""
+    for row_start in range(0, num_rows, block_rows):
+        row_end = min(row_start + block_rows, num_rows)
+        for col_start in range(row_start, num_rows, tile_cols):
+            yield row_start, row_end, col_start, min(col_start + tile_cols, num_rows)
+
+
+def _score_tile(matrix: Any, threshold: float,
+                tile: Tuple[int, int, int, int]) -> Tuple[Any, Any, Any]:
+    """Score one tile and keep the pairs above threshold."""
+    row_start, row_end, col_start, col_end = tile
+    scores = matrix[row_start:row_end] @ matrix[col_start:col_end].T
+    rows, cols = np.nonzero(scores >= threshold)
+    rows += row_start
+    cols += col_start
+    # Tiles on the diagonal overlap themselves; keep each pair once
+    upper = cols > rows
+    rows, cols = rows[upper], cols[upper]
+    return rows, cols, scores[rows - row_start, cols - col_start]
+
+
+def iter_pair_blocks(matrix: Any, threshold: float,
+                     block_rows: int = DEFAULT_BLOCK_ROWS,
+                     tile_bytes: int = DEFAULT_TILE_BYTES,
+                     max_workers: Optional[int] = None,
+                     normalized: bool = False) -> Iterator[Tuple[Any, Any, Any]]:
+    """Stream all pairs with cosine similarity >= threshold, tile by tile.
+
+    Args:
+        matrix: 2-D array of vectors, one row per item
+        threshold: Minimum cosine similarity
+        block_rows: Rows of the left operand per tile
+        tile_bytes: Upper bound on the score tile of one worker
+        max_workers: Worker threads (default: CPU count)
+        normalized: Whether rows are already unit length
+
+    Yields:
+        (rows, cols, scores) arrays with rows < cols for every pair found
+        in one tile; tiles are yielded in order
+
+    Raises:
+        AllPairsError: If NumPy is unavailable or the input is invalid
+    """
+    if not NUMPY_AVAILABLE:
+        raise AllPairsError("NumPy is required for all-pairs search")
+    if block_rows <= 0:
+        raise AllPairsError("block_rows must be positive")
+
+    if normalized:
+        matrix = np.ascontiguousarray(matrix, dtype=np.float32)
+    else:
+        matrix = normalize_matrix(matrix)
+    num_rows = matrix.shape[0]
+    if num_rows < 2:
+        return
+
+    tile_cols = max(block_rows, tile_bytes // (4 * block_rows))
+    workers = max_workers or os.cpu_count() or 1
+    tiles = _tiles(num_rows, block_rows, tile_cols)
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        # Keep a bounded window of tiles in flight so results are consumed
+        # as fast as they are produced
+        pending: deque = deque()
+        for tile in tiles:
+            pending.append(executor.submit(_score_tile, matrix, threshold, tile))
+            if len(pending) >= workers * 2:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def find_all_pairs(matrix: Any, threshold: float, **options: Any) -> Iterator[Tuple[int, int, float]]:
+    """Stream all pairs with cosine similarity >= threshold.
+
+    Args:
+        matrix: 2-D array of vectors, one row per item
+        threshold: Minimum cosine similarity
+        **options: Passed to iter_pair_blocks
+
+    Yields:
+        (row_i, row_j, similarity) with row_i < row_j
+    """
+    for rows, cols, scores in iter_pair_blocks(matrix, threshold, **options):
+        for i, j, score in zip(rows.tolist(), cols.tolist(), scores.tolist()):
+            yield i, j, score
+
+
+def write_pairs_as_relationships(db: Any, matrix: Any, file_ids: Any, threshold: float,
+                                 relationship_type: str = VECTOR_RELATIONSHIP,
+                                 **options: Any) -> int:
+    """Find all near-duplicate pairs and store them in file_relationships.
+
+    Each tile's pairs are written with one executemany, so memory stays
+    bounded by the tile size however many pairs are found.
+
+    Args:
+        db: DatabaseConnection
+        matrix: 2-D array of embeddings
+        file_ids: File ID for each matrix row
+        threshold: Minimum cosine similarity
+        relationship_type: Relationship type to record
+        **options: Passed to iter_pair_blocks
+
+    Returns:
+        Number of pairs written
+    """
+    file_ids = np.asarray(file_ids, dtype=np.int64)
+    if len(file_ids) != len(matrix):
+        raise AllPairsError(
+            f"Got {len(file_ids)} file IDs for {len(matrix)} embeddings")
+
+    created_at = int(time.time())
+    written = 0
+    for rows, cols, scores in iter_pair_blocks(matrix, threshold, **options):
+        if len(rows) == 0:
+            continue
+        db.executemany(
+            '''INSERT OR REPLACE INTO file_relationships
+            (file1_id, file2_id, relationship_type, similarity_score, created_at)
+            VALUES (?, ?, ?, ?, ?)''',
+            [
+                (file1, file2, relationship_type, score, created_at)
+                for file1, file2, score in zip(
+                    file_ids[rows].tolist(), file_ids[cols].tolist(), scores.tolist())
+            ]
+        )
+        written += len(rows)
+    db.commit()
+    return written
@@ -0,0 +1,333 @@
+"""Hamming-space index for binary perceptual hashes.
+
+Perceptual hashes (average, difference and DCT hashes) are bit strings
+whose Hamming distance measures how different two images or video frames
+look, so near-duplicates are hashes within a small radius of each other.
+This module keeps hashes as integers (64 or 256 bits) and finds them by
+multi-index hashing: each hash is cut into m substrings, each substring
+is a key into its own table, and by the pigeonhole principle any hash
+within radius r of a query matches the query in at least one substring
+within floor(r / m) bits. Only the hashes found that way are compared in
+full, so a radius query touches a small fraction of the index.
+
+For all-pairs deduplication the hashes are packed into a uint8 matrix and
+compared block by block: XOR of two blocks, then a per-byte popcount
+table (built with np.unpackbits) summed over the bytes of each hash.
+
+Key Features:
+    - Multi-index hashing with per-substring lookup tables
+    - Radius queries with exact distance verification
+    - Blocked, vectorized all-pairs search within a radius
+    - 64-bit and 256-bit (any multiple of 8) hash lengths
+
+Dependencies:
+    - itertools (standard library only)
+    - numpy (required for all-pairs search)
+"""
+
+from itertools import combinations
+from typing import Any, Dict, Hashable, Iterable, Iterator, List, Optional, Set, Tuple
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    np = None
+    NUMPY_AVAILABLE = False
+
+# Hash length of the 8x8 average/difference/DCT hashes
+DEFAULT_HASH_BITS = 64
+# Bits per multi-index substring when the substring count is not given
+DEFAULT_SUBSTRING_BITS = 16
+# Rows of the left operand per all-pairs block
+DEFAULT_BLOCK_ROWS = 512
+# Upper bound on the XOR intermediate of one all-pairs block
+DEFAULT_BLOCK_BYTES = 16 * 1024 * 1024
+
+_POPCOUNT_TABLE: Optional[Any] = None
+
+
+class HammingError(Exception):
+    """Hamming index error"""
+
+
+def hamming_distance(a: int, b: int) -> int:
+    """Number of differing bits between two hashes.
+
+    Args:
+        a: First hash
+        b: Second hash
+
+    Returns:
+        Hamming distance
+    """
+    return bin(a ^ b).count('1')
+
+
+def _popcount_table() -> Any:
+    """Bits set in each byte value 0..255."""
+    global _POPCOUNT_TABLE
+    if _POPCOUNT_TABLE is None:
+        byte_values = np.arange(256, dtype=np.uint8)[:, None]
+        _POPCOUNT_TABLE = np.unpackbits(byte_values, axis=1).sum(axis=1).astype(np.uint8)
+    return _POPCOUNT_TABLE
+
+
+def pack_hashes(hashes: Iterable[int], bits: int = DEFAULT_HASH_BITS) -> Any:
+    """Pack integer hashes into a uint8 matrix, one big-endian row per hash.
+
+    Args:
+        hashes: Non-negative integer hashes
+        bits: Hash length in bits (a multiple of 8)
+
+    Returns:
+        (n, bits // 8) uint8 array
+
+    Raises:
+        HammingError: If NumPy is unavailable or a hash does not fit
+    """
+    if not NUMPY_AVAILABLE:
+        raise HammingError("NumPy is required for packed hashes")
+    if bits <= 0 or bits % 8:
+        raise HammingError(f"Hash length must be a positive multiple of 8, got {bits}")
+    num_bytes = bits // 8
+    try:
+        data = b''.join(int(h).to_bytes(num_bytes, 'big') for h in hashes)
+    except OverflowError as e:
+        raise HammingError(f"Hash does not fit in {bits} bits") from e
+    return np.frombuffer(data, dtype=np.uint8).reshape(-1, num_bytes)
+
+
+def pairwise_distances(left: Any, right: Any) -> Any:
+    """Hamming distances between every row of two packed hash matrices.
+
+    Args:
+        left: (a, n) uint8 packed hashes
+        right: (b, n) uint8 packed hashes
+
+    Returns:
+        (a, b) uint16 distance matrix
+    """
+    xor = np.bitwise_xor(left[:, None, :], right[None, :, :])
+    return _popcount_table()[xor].sum(axis=2, dtype=np.uint16)
+
+
+def iter_hamming_pairs(packed: Any, radius: int, block_rows: int = DEFAULT_BLOCK_ROWS,
+                       block_bytes: int = DEFAULT_BLOCK_BYTES) -> Iterator[Tuple[Any, Any, Any]]:
+    """Stream all pairs of packed hashes within radius of each other.
+
+    Args:
+        packed: (n, bytes) uint8 matrix from pack_hashes()
+        radius: Maximum Hamming distance (inclusive)
+        block_rows: Rows of the left operand per block
+        block_bytes: Upper bound on the XOR intermediate per block
+
+    Yields:
+        (rows, cols, distances) arrays with rows < cols
+    """
+    packed = np.ascontiguousarray(packed, dtype=np.uint8)
+    if packed.ndim != 2:
+        raise HammingError(f"Expected a 2-D packed hash matrix, got {packed.ndim} dimensions")
+    num_rows, num_bytes = packed.shape
+    block_rows = max(1, min(block_rows, num_rows))
+    block_cols = max(1, block_bytes // max(1, block_rows * num_bytes))
+
+    for row_start in range(0, num_rows, block_rows):
+        row_end = min(row_start + block_rows, num_rows)
+        for col_start in range(row_start, num_rows, block_cols):
+            col_end = min(col_start + block_cols, num_rows)
+            distances = pairwise_distances(packed[row_start:row_end], packed[col_start:col_end])
+            rows, cols = np.nonzero(distances <= radius)
+            found = distances[rows, cols]
+            rows += row_start
+            cols += col_start
+            # Blocks on the diagonal overlap themselves; keep each pair once
+            upper = rows < cols
+            if not upper.all():
+                rows, cols, found = rows[upper], cols[upper], found[upper]
+            if len(rows):
+                yield rows, cols, found
+
+
+def find_hamming_pairs(hashes: Iterable[int], radius: int,
+                       bits: int = DEFAULT_HASH_BITS) -> List[Tuple[int, int, int]]:
+    """All pairs of hashes within radius, as (i, j, distance) with i < j.
+
+    Args:
+        hashes: Integer hashes
+        radius: Maximum Hamming distance (inclusive)
+        bits: Hash length in bits
+
+    Returns:
+        List of (i, j, distance) tuples indexing into hashes
+    """
+    pairs: List[Tuple[int, int, int]] = []
+    for rows, cols, distances in iter_hamming_pairs(pack_hashes(hashes, bits), radius):
+        pairs.extend(zip(rows.tolist(), cols.tolist(), distances.tolist()))
+    return pairs
+
+
+class MultiIndexHashTable:
+    """Radius search over integer hashes by multi-index hashing.
+
+    Items are identified by a hashable ID (typically a file_id); adding an
+    ID that is already present replaces its hash.
+    """
+
+    def __init__(self, bits: int = DEFAULT_HASH_BITS, substrings: Optional[int] = None):
+        """Initialize an empty index.
+
+        Args:
+            bits: Hash length in bits (a multiple of 8)
+            substrings: Number of substring tables; defaults to one per
+                16 bits. More tables make larger radii cheaper to search.
+
+        Raises:
+            HammingError: If the hash length cannot be split evenly
+        """
+        if substrings is None:
+            substrings = max(1, bits // DEFAULT_SUBSTRING_BITS)
+        if bits <= 0 or bits % 8:
+            raise HammingError(f"Hash length must be a positive multiple of 8, got {bits}")
+        if substrings <= 0 or bits % substrings:
+            raise HammingError(f"Cannot split {bits}-bit hashes into {substrings} substrings")
+        self.bits = bits
+        self.substrings = substrings
+        self.substring_bits = bits // substrings
+        self._mask = (1 << self.substring_bits) - 1
+        self._tables: List[Dict[int, Set[Hashable]]] = [{} for _ in range(substrings)]
+        self._hashes: Dict[Hashable, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._hashes)
+
+    def __contains__(self, item_id: Hashable) -> bool:
+        return item_id in self._hashes
+
+    def _split(self, value: int) -> List[int]:
+        """Substrings of a hash, most significant first."""
+        width = self.substring_bits
+        return [(value >> (self.bits - (i + 1) * width)) & self._mask
+                for i in range(self.substrings)]
+
+    def _check(self, value: int) -> int:
+        """Validate a hash against the index length."""
+        value = int(value)
+        if value < 0 or value >> self.bits:
+            raise HammingError(f"Hash does not fit in {self.bits} bits")
+        return value
+
+    def get(self, item_id: Hashable) -> Optional[int]:
+        """Hash stored for an ID, or None."""
+        return self._hashes.get(item_id)
+
+    def add(self, value: int, item_id: Hashable) -> None:
+        """Add or replace the hash of an item.
+
+        Args:
+            value: Integer hash
+            item_id: Item identifier
+        """
+        value = self._check(value)
+        if item_id in self._hashes:
+            self.remove(item_id)
+        self._hashes[item_id] = value
+        for table, key in zip(self._tables, self._split(value)):
+            table.setdefault(key, set()).add(item_id)
+
+    def add_many(self, values: Iterable[int], item_ids: Iterable[Hashable]) -> int:
+        """Add or replace many hashes.
+
+        Returns:
+            Number of hashes added
+        """
+        count = 0
+        for value, item_id in zip(values, item_ids):
+            self.add(value, item_id)
+            count += 1
+        return count
+
+    def remove(self, item_id: Hashable) -> bool:
+        """Remove an item.
+
+        Returns:
+            True if the item was present
+        """
+        value = self._hashes.pop(item_id, None)
+        if value is None:
+            return False
+        for table, key in zip(self._tables, self._split(value)):
+            bucket = table[key]
+            bucket.discard(item_id)
+            if not bucket:
+                del table[key]
+        return True
+
+    def _probe_count(self, sub_radius: int) -> int:
+        """Table lookups needed to enumerate one substring neighbourhood."""
+        count = 0
+        term = 1
+        for flips in range(sub_radius + 1):
+            count += term
+            term = term * (self.substring_bits - flips) // (flips + 1)
+        return count * self.substrings
+
+    def _neighbours(self, key: int, sub_radius: int) -> Iterator[int]:
+        """Every substring value within sub_radius bits of key."""
+        yield key
+        for flips in range(1, sub_radius + 1):
+            for positions in combinations(range(self.substring_bits), flips):
+                flipped = key
+                for position in positions:
+                    flipped ^= 1 << position
+                yield flipped
+
+    def search(self, value: int, radius: int) -> List[Tuple[Hashable, int]]:
+        """Find every item within radius of a hash.
+
+        Args:
+            value: Query hash
+            radius: Maximum Hamming distance (inclusive)
+
+        Returns:
+            List of (item_id, distance) sorted by distance
+        """
+        value = self._check(value)
+        if radius < 0:
+            return []
+        sub_radius = min(radius // self.substrings, self.substring_bits)
+
+        if self._probe_count(sub_radius) >= len(self._hashes):
+            # Enumerating the neighbourhood costs more than a scan
+            candidates: Iterable[Hashable] = self._hashes
+        else:
+            found: Set[Hashable] = set()
+            for table, key in zip(self._tables, self._split(value)):
+                for neighbour in self._neighbours(key, sub_radius):
+                    bucket = table.get(neighbour)
+                    if bucket:
+                        found.update(bucket)
+            candidates = found
+
+        results = []
+        for item_id in candidates:
+            distance = hamming_distance(value, self._hashes[item_id])
+            if distance <= radius:
+                results.append((item_id, distance))
+        results.sort(key=lambda result: result[1])
+        return results
+
+    def find_all_pairs(self, radius: int) -> Iterator[Tuple[Hashable, Hashable, int]]:
+        """Stream every pair of items within radius of each other.
+
+        Args:
+            radius: Maximum Hamming distance (inclusive)
+
+        Yields:
+            (item_id, item_id, distance) tuples
+        """
+        item_ids = list(self._hashes)
+        packed = pack_hashes(self._hashes.values(), self.bits)
+        for rows, cols, distances in iter_hamming_pairs(packed, radius):
+            for row, col, distance in zip(rows.tolist(), cols.tolist(), distances.tolist()):
+                yield item_ids[row], item_ids[col], distance
@@ -0,0 +1,273 @@
+"""On-disk format for matrix similarity indexes.
+
+An index saved at ``path`` consists of:
+
+    path                      JSON header (format name, version, dimensions,
+                              row count, dtype, normalization flag and the
+                              names of the data files below)
+    path.<gen>.vectors.npy    float32 vectors, one row per item
+    path.<gen>.ids.npy        int64 file_id column (when every item has one)
+    path.<gen>.metadata.json  full metadata list (only when items carry
+                              more than a file_id)
+
+The vector file is opened with ``np.load(mmap_mode='r')``, so loading is
+close to free and processes that open the same index share its pages in
+the OS page cache.
+
+Every save writes its data files under a new generation suffix and then
+renames the header into place; readers open only the files the header
+names. A reader therefore sees either the old index or the new one,
+never new vectors paired with old ids. Older generations are deleted
+after the header is replaced; a reader that loses that race re-reads
+the header and retries.
+
+Dependencies:
+    - numpy (required by this module)
+    - json, os (standard library only)
+"""
+
+import json
+import os
+import re
+import secrets
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    np = None
+    NUMPY_AVAILABLE = False
+
+INDEX_FORMAT = 'nodupe-matrix-index'
+INDEX_FORMAT_VERSION = 2
+
+VECTORS_SUFFIX = '.vectors.npy'
+IDS_SUFFIX = '.ids.npy'
+METADATA_SUFFIX = '.metadata.json'
+
+# Header keys naming the data files of each kind
+_FILE_KINDS = {'vectors': VECTORS_SUFFIX, 'ids': IDS_SUFFIX, 'metadata': METADATA_SUFFIX}
+# Data file name after the header name: optional generation, then the kind
+# (files without a generation are from format version 1)
+_DATA_FILE = re.compile(r'^(?:\.[0-9a-f]{12})?\.(?:vectors\.npy|ids\.npy|metadata\.json)$')
+# Attempts to open a generation deleted by a concurrent save
+_LOAD_ATTEMPTS = 3
+
+
+class IndexStoreError(Exception):
+    """Index store error"""
+
+
+class FileIdMetadata(Sequence):
+    """Read-only metadata view built from a file_id column.
+
+    Items are created on access, so opening an index of millions of
+    vectors does not build millions of dictionaries.
+    """
+
+    def __init__(self, file_ids: Any):
+        self.file_ids = file_ids
+
+    def __len__(self) -> int:
+        return len(self.file_ids)
+
+    def __getitem__(self, index: Union[int, slice]) -> Any:
+        if isinstance(index, slice):
+            return [{'file_id': int(file_id)} for file_id in self.file_ids[index]]
+        return {'file_id': int(self.file_ids[index])}
+
+    def __iter__(self) -> Iterator[Dict[str, int]]:
+        for file_id in self.file_ids:
+            yield {'file_id': int(file_id)}
+
+
+def _file_id_column(metadata: Sequence[Dict[str, Any]]) -> Tuple[Optional[List[int]], bool]:
+    """Extract file IDs, and whether they are all the metadata there is."""
+    if isinstance(metadata, FileIdMetadata):
+        return metadata.file_ids, True
+    file_ids = []
+    only_ids = True
+    for item in metadata:
+        file_id = item.get('file_id') if isinstance(item, dict) else None
+        if not isinstance(file_id, int) or isinstance(file_id, bool):
+            return None, False
+        file_ids.append(file_id)
+        only_ids = only_ids and len(item) == 1
+    return file_ids, only_ids
+
+
+def write_atomic(path: str, write: Any) -> None:
+    """Write through a temporary file renamed over path."""
+    temp_path = f"{path}.tmp{os.getpid()}"
+    try:
+        with open(temp_path, 'wb') as f:
+            write(f)
+        os.replace(temp_path, path)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+
+def _remove_old_generations(path: str, keep: Dict[str, str]) -> None:
+    """Delete data files of generations other than the one in keep."""
+    directory = os.path.dirname(os.path.abspath(path))
+    base = os.path.basename(path)
+    current = set(keep.values())
+    for name in os.listdir(directory):
+        if name in current or not name.startswith(base):
+            continue
+        if _DATA_FILE.match(name[len(base):]):
+            try:
+                os.remove(os.path.join(directory, name))
+            except OSError:
+                # Still mapped by a reader on a platform that forbids removal
+                pass
+
+
+def save_matrix_index(path: str, vectors: Any, metadata: Sequence[Dict[str, Any]],
+                      normalized: bool = True,
+                      extra: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Save vectors and metadata in the matrix index format.
+
+    Args:
+        path: Header path; data files are written next to it
+        vectors: (n, dimensions) array
+        metadata: One metadata dictionary per row
+        normalized: Whether rows are unit length
+        extra: Additional JSON-serializable header fields
+
+    Returns:
+        The header written
+
+    Raises:
+        IndexStoreError: If NumPy is unavailable or the inputs disagree
+    """
+    if not NUMPY_AVAILABLE:
+        raise IndexStoreError("NumPy is required for matrix indexes")
+    vectors = np.ascontiguousarray(vectors, dtype='<f4')
+    if vectors.ndim != 2:
+        raise IndexStoreError(f"Expected a 2-D matrix, got {vectors.ndim} dimensions")
+    if len(metadata) != len(vectors):
+        raise IndexStoreError(f"Got {len(metadata)} metadata items for {len(vectors)} vectors")
+
+    file_ids, only_ids = _file_id_column(metadata)
+    generation = secrets.token_hex(6)
+    base = os.path.basename(path)
+    files = {'vectors': f'{base}.{generation}{VECTORS_SUFFIX}'}
+    if file_ids is not None:
+        files['ids'] = f'{base}.{generation}{IDS_SUFFIX}'
+    if not only_ids:
+        files['metadata'] = f'{base}.{generation}{METADATA_SUFFIX}'
+    header = dict(extra or {})
+    header.update({
+        'format': INDEX_FORMAT,
+        'version': INDEX_FORMAT_VERSION,
+        'dimensions': int(vectors.shape[1]),
+        'count': int(vectors.shape[0]),
+        'dtype': '<f4',
+        'normalized': bool(normalized),
+        'has_ids': file_ids is not None,
+        'has_metadata': not only_ids,
+        'generation': generation,
+        'files': files,
+    })
+
+    directory = os.path.dirname(os.path.abspath(path))
+    write_atomic(os.path.join(directory, files['vectors']), lambda f: np.save(f, vectors))
+    if file_ids is not None:
+        ids = np.asarray(file_ids, dtype='<i8')
+        write_atomic(os.path.join(directory, files['ids']), lambda f: np.save(f, ids))
+    if header['has_metadata']:
+        payload = json.dumps(list(metadata)).encode('utf-8')
+        write_atomic(os.path.join(directory, files['metadata']), lambda f: f.write(payload))
+    # The header goes last: replacing it switches readers to the new generation
+    write_atomic(path, lambda f: f.write(json.dumps(header, indent=2).encode('utf-8')))
+    _remove_old_generations(path, files)
+    return header
+
+
+def read_header(path: str) -> Optional[Dict[str, Any]]:
+    """Read the header of a matrix index.
+
+    Args:
+        path: Header path
+
+    Returns:
+        Header dictionary, or None if path is not a matrix index
+    """
+    try:
+        with open(path, 'rb') as f:
+            header = json.loads(f.read(64 * 1024).decode('utf-8'))
+    except (OSError, UnicodeDecodeError, ValueError):
+        return None
+    if not isinstance(header, dict) or header.get('format') != INDEX_FORMAT:
+        return None
+    return header
+
+
+def load_matrix_index(path: str, mmap: bool = True) -> Tuple[Any, Sequence[Dict[str, Any]], Dict[str, Any]]:
+    """Open a matrix index.
+
+    Args:
+        path: Header path
+        mmap: Map the vector file read-only instead of reading it
+
+    Returns:
+        Tuple of (vectors, metadata, header)
+
+    Raises:
+        IndexStoreError: If the index is missing, from a newer version or
+            inconsistent
+    """
+    if not NUMPY_AVAILABLE:
+        raise IndexStoreError("NumPy is required for matrix indexes")
+    for attempt in range(_LOAD_ATTEMPTS):
+        header = read_header(path)
+        if header is None:
+            raise IndexStoreError(f"Not a matrix index: {path}")
+        if header.get('version', 0) > INDEX_FORMAT_VERSION:
+            raise IndexStoreError(
+                f"Index version {header['version']} is newer than supported ({INDEX_FORMAT_VERSION})")
+        try:
+            vectors, metadata = _load_generation(path, header, mmap)
+        except FileNotFoundError:
+            # A concurrent save replaced the header and removed this generation
+            if attempt == _LOAD_ATTEMPTS - 1:
+                raise
+            continue
+        return vectors, metadata, header
+    raise IndexStoreError(f"Could not open {path}")
+
+
+def _data_path(path: str, header: Dict[str, Any], kind: str) -> str:
+    """Data file of a kind named by the header (legacy: fixed suffix)."""
+    files = header.get('files')
+    if files is None:
+        return path + _FILE_KINDS[kind]
+    return os.path.join(os.path.dirname(os.path.abspath(path)), files[kind])
+
+
+def _load_generation(path: str, header: Dict[str, Any],
+                     mmap: bool) -> Tuple[Any, Sequence[Dict[str, Any]]]:
+    """Open the data files one header names."""
+    vectors = np.load(_data_path(path, header, 'vectors'), mmap_mode='r' if mmap else None,
+                      allow_pickle=False)
+    expected = (header['count'], header['dimensions'])
+    if vectors.shape != expected or vectors.dtype != np.dtype(header['dtype']):
+        raise IndexStoreError(
+            f"Vector file does not match header: {vectors.shape} {vectors.dtype}, expected {expected}")
+
+    if header.get('has_metadata'):
+        with open(_data_path(path, header, 'metadata'), 'r', encoding='utf-8') as f:
+            metadata: Sequence[Dict[str, Any]] = json.load(f)
+    elif header.get('has_ids'):
+        metadata = FileIdMetadata(np.load(_data_path(path, header, 'ids'),
+                                          mmap_mode='r' if mmap else None, allow_pickle=False))
+    else:
+        metadata = [{} for _ in range(header['count'])]
+
+    if len(metadata) != header['count']:
+        raise IndexStoreError(
+            f"Metadata has {len(metadata)} items, expected {header['count']}")
+    return vectors, metadata
@@ -0,0 +1,486 @@
+"""MinHash signatures and LSH banding for near-duplicate documents.
+
+Documents are reduced to sets of shingles (runs of consecutive words, or
+of bytes for binary content), each hashed to 64 bits. A MinHash
+signature keeps, for each of num_perm universal hash functions
+h(x) = (a * x + b) mod p, the minimum over the shingle set; the fraction
+of equal signature positions estimates the Jaccard similarity of two
+sets. Signatures are computed with NumPy over chunks of shingles, and the
+hash parameters come from a fixed seed, so signatures are deterministic
+across runs and machines.
+
+Locality-sensitive hashing cuts signatures into bands of rows; documents
+sharing any whole band land in the same bucket and become candidates.
+Only candidates are compared exactly, so finding near-duplicates among
+millions of documents avoids the all-pairs comparison.
+
+Key Features:
+    - Word and byte shingling with vectorized 64-bit mixing
+    - Deterministic vectorized MinHash signatures
+    - LSH banding index with bands chosen from the similarity threshold
+    - Identical signatures collapsed; candidates streamed per bucket
+    - Exact Jaccard verification of candidate pairs
+    - Two-pass file mode that keeps only signatures in memory
+
+Dependencies:
+    - numpy (required by this module)
+    - re, zlib (standard library only)
+"""
+
+import re
+import time
+import zlib
+from collections import OrderedDict, defaultdict
+from itertools import combinations
+from typing import Any, Dict, Hashable, Iterable, Iterator, List, Optional, Sequence, Set, Tuple, Union
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    np = None
+    NUMPY_AVAILABLE = False
+
+# Signature length (hash functions)
+DEFAULT_NUM_PERM = 128
+# Words per shingle / bytes per shingle (at most 8)
+DEFAULT_WORD_SHINGLE = 5
+DEFAULT_BYTE_SHINGLE = 8
+# Modulus of the universal hash family; hash values fit in 31 bits
+MERSENNE_PRIME_31 = (1 << 31) - 1
+# Shingles hashed per NumPy chunk (bounds the num_perm x chunk temporary)
+SIGNATURE_CHUNK = 4096
+# Bytes read from each file in file mode
+DEFAULT_MAX_BYTES = 16 * 1024 * 1024
+# Bucket size past which only star pairs (first member with each other) are made
+DEFAULT_MAX_BUCKET = 1000
+# Relationship type recorded for MinHash near-duplicates
+MINHASH_RELATIONSHIP = 'minhash_similar'
+
+_WORD = re.compile(rb'\w+')
+
+Document = Union[str, bytes]
+
+
+class MinHashError(Exception):
+    """MinHash error"""
+
+
+def _mix64(values: Any) -> Any:
+    """splitmix64 finalizer applied to a uint64 array."""
+    values = values ^ (values >> np.uint64(30))
+    values = values * np.uint64(0xBF58476D1CE4E5B9)
+    values = values ^ (values >> np.uint64(27))
+    values = values * np.uint64(0x94D049BB133111EB)
+    return values ^ (values >> np.uint64(31))
+
+
+def _as_bytes(document: Document) -> bytes:
+    """Documents are hashed as UTF-8 bytes."""
+    return document.encode('utf-8', errors='surrogatepass') if isinstance(document, str) else document
+
+
+def word_shingles(document: Document, size: int = DEFAULT_WORD_SHINGLE) -> Any:
+    """Hashes of all runs of size consecutive words (case-insensitive).
+
+    Args:
+        document: Text or bytes
+        size: Words per shingle
+
+    Returns:
+        Sorted unique uint64 shingle hashes
+    """
+    words = _WORD.findall(_as_bytes(document).lower())
+    if not words:
+        return np.zeros(0, dtype=np.uint64)
+    word_hashes = np.fromiter((zlib.crc32(word) for word in words), dtype=np.uint64, count=len(words))
+    span = min(size, len(words))
+    count = len(words) - span + 1
+    shingles = np.zeros(count, dtype=np.uint64)
+    for offset in range(span):
+        shingles = _mix64(shingles ^ word_hashes[offset:offset + count])
+    return np.unique(shingles)
+
+
+def byte_shingles(document: Document, size: int = DEFAULT_BYTE_SHINGLE) -> Any:
+    """Hashes of all runs of size consecutive bytes.
+
+    Args:
+        document: Text or bytes
+        size: Bytes per shingle (1 to 8)
+
+    Returns:
+        Sorted unique uint64 shingle hashes
+    """
+    if not 1 <= size <= 8:
+        raise MinHashError(f"Byte shingles must be 1 to 8 bytes, got {size}")
+    data = np.frombuffer(_as_bytes(document), dtype=np.uint8).astype(np.uint64)
+    if len(data) == 0:
+        return np.zeros(0, dtype=np.uint64)
+    span = min(size, len(data))
+    count = len(data) - span + 1
+    packed = np.zeros(count, dtype=np.uint64)
+    for offset in range(span):
+        packed = (packed << np.uint64(8)) | data[offset:offset + count]
+    return np.unique(_mix64(packed))
+
+
+def exact_jaccard(a: Any, b: Any) -> float:
+    """Jaccard similarity of two sorted unique shingle arrays."""
+    if len(a) == 0 and len(b) == 0:
+        return 1.0
+    intersection = len(np.intersect1d(a, b, assume_unique=True))
+    return intersection / (len(a) + len(b) - intersection)
+
+
+class MinHasher:
+    """Shingle documents and compute their MinHash signatures."""
+
+    def __init__(self, num_perm: int = DEFAULT_NUM_PERM, shingle: str = 'word',
+                 shingle_size: Optional[int] = None, seed: int = 1):
+        """Initialize the hasher.
+
+        Args:
+            num_perm: Signature length
+            shingle: 'word' for text, 'byte' for arbitrary content
+            shingle_size: Words or bytes per shingle (default 5 words / 8 bytes)
+            seed: Seed of the hash parameters; signatures are only
+                comparable between hashers with equal settings
+
+        Raises:
+            MinHashError: If NumPy is unavailable or settings are invalid
+        """
+        if not NUMPY_AVAILABLE:
+            raise MinHashError("NumPy is required for MinHash signatures")
+        if shingle not in ('word', 'byte'):
+            raise MinHashError(f"Unknown shingle type: {shingle}")
+        if num_perm <= 0:
+            raise MinHashError(f"num_perm must be positive, got {num_perm}")
+        self.num_perm = num_perm
+        self.shingle = shingle
+        self.shingle_size = shingle_size or (
+            DEFAULT_WORD_SHINGLE if shingle == 'word' else DEFAULT_BYTE_SHINGLE)
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, MERSENNE_PRIME_31, num_perm, dtype=np.uint64)[:, None]
+        self._b = rng.integers(0, MERSENNE_PRIME_31, num_perm, dtype=np.uint64)[:, None]
+
+    def shingles(self, document: Document) -> Any:
+        """Sorted unique shingle hashes of a document."""
+        if self.shingle == 'word':
+            return word_shingles(document, self.shingle_size)
+        return byte_shingles(document, self.shingle_size)
+
+    def signature_from_shingles(self, shingles: Any) -> Any:
+        """MinHash signature of a shingle set.
+
+        Args:
+            shingles: uint64 shingle hashes
+
+        Returns:
+            (num_perm,) uint32 signature; an empty set gives all 2**31 - 1
+        """
+        prime = np.uint64(MERSENNE_PRIME_31)
+        signature = np.full(self.num_perm, MERSENNE_PRIME_31, dtype=np.uint64)
+        for start in range(0, len(shingles), SIGNATURE_CHUNK):
+            values = shingles[start:start + SIGNATURE_CHUNK] % prime
+            hashed = (self._a * values[None, :] + self._b) % prime
+            np.minimum(signature, hashed.min(axis=1), out=signature)
+        return signature.astype(np.uint32)
+
+    def signature(self, document: Document) -> Any:
+        """MinHash signature of a document."""
+        return self.signature_from_shingles(self.shingles(document))
+
+    def signatures(self, documents: Iterable[Document]) -> Any:
+        """(n, num_perm) signatures of many documents."""
+        rows = [self.signature(document) for document in documents]
+        if not rows:
+            return np.zeros((0, self.num_perm), dtype=np.uint32)
+        return np.stack(rows)
+
+    @staticmethod
+    def estimate_jaccard(a: Any, b: Any) -> float:
+        """Jaccard similarity estimated from two signatures."""
+        return float(np.mean(np.asarray(a) == np.asarray(b)))
+
+
+def optimal_bands(num_perm: int, threshold: float) -> Tuple[int, int]:
+    """Choose (bands, rows) so the LSH S-curve rises just below threshold.
+
+    Pairs with Jaccard similarity s become candidates with probability
+    1 - (1 - s**rows)**bands, which is steepest near (1 / bands)**(1 / rows).
+    Of the layouts using the whole signature, the one whose steep point is
+    closest to, but not above, the threshold is chosen: missing a true
+    pair costs recall, while a false candidate only costs one exact check.
+
+    Args:
+        num_perm: Signature length
+        threshold: Jaccard similarity of interest
+
+    Returns:
+        Tuple of (bands, rows)
+    """
+    best = (num_perm, 1)
+    best_gap = float('inf')
+    for rows in range(1, num_perm + 1):
+        if num_perm % rows:
+            continue
+        bands = num_perm // rows
+        steep = (1.0 / bands) ** (1.0 / rows)
+        if steep <= threshold and threshold - steep < best_gap:
+            best, best_gap = (bands, rows), threshold - steep
+    return best
+
+
+class LSHIndex:
+    """Banded LSH index over MinHash signatures.
+
+    Documents with identical signatures are collapsed: the first becomes
+    the representative stored in the buckets and the rest are paired with
+    it alone, so a thousand copies of one file cost a thousand candidates
+    rather than half a million.
+    """
+
+    def __init__(self, num_perm: int = DEFAULT_NUM_PERM, threshold: float = 0.8,
+                 bands: Optional[int] = None, max_bucket_size: int = DEFAULT_MAX_BUCKET):
+        """Initialize an empty index.
+
+        Args:
+            num_perm: Signature length
+            threshold: Jaccard similarity the banding is tuned for
+            bands: Explicit number of bands (must divide num_perm)
+            max_bucket_size: Buckets with more representatives than this
+                pair each with the bucket's first only, instead of all pairs
+        """
+        if bands is None:
+            bands, rows = optimal_bands(num_perm, threshold)
+        elif bands <= 0 or num_perm % bands:
+            raise MinHashError(f"{bands} bands do not divide a signature of {num_perm}")
+        else:
+            rows = num_perm // bands
+        if max_bucket_size < 2:
+            raise MinHashError(f"max_bucket_size must be at least 2, got {max_bucket_size}")
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = rows
+        self.max_bucket_size = max_bucket_size
+        # Buckets hold representative numbers, indexing _ids and _signatures
+        self._buckets: List[Dict[bytes, List[int]]] = [defaultdict(list) for _ in range(bands)]
+        self._ids: List[Hashable] = []
+        self._signatures = np.empty((0, num_perm), dtype=np.uint32)
+        # Hash of a full signature -> representatives with that hash
+        self._by_signature: Dict[int, List[int]] = defaultdict(list)
+        # Representative -> IDs whose signature equals its own
+        self._copies: Dict[int, List[Hashable]] = defaultdict(list)
+        self._count = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    def _check(self, signature: Any) -> Any:
+        signature = np.ascontiguousarray(signature, dtype=np.uint32)
+        if signature.shape != (self.num_perm,):
+            raise MinHashError(f"Expected a signature of {self.num_perm}, got shape {signature.shape}")
+        return signature
+
+    def _band_keys(self, signature: Any) -> List[bytes]:
+        """Bucket key of each band of a signature."""
+        signature = self._check(signature)
+        return [signature[band * self.rows:(band + 1) * self.rows].tobytes()
+                for band in range(self.bands)]
+
+    def _representative(self, signature: Any) -> Optional[int]:
+        """Representative with an identical signature, if any."""
+        for rep in self._by_signature.get(hash(signature.tobytes()), ()):
+            if np.array_equal(self._signatures[rep], signature):
+                return rep
+        return None
+
+    def add(self, item_id: Hashable, signature: Any) -> None:
+        """Add a signature; empty documents (all-sentinel signatures) are skipped."""
+        signature = self._check(signature)
+        if np.all(signature == MERSENNE_PRIME_31):
+            return
+        self._count += 1
+        rep = self._representative(signature)
+        if rep is not None:
+            self._copies[rep].append(item_id)
+            return
+
+        rep = len(self._ids)
+        if rep == len(self._signatures):
+            grown = np.empty((max(2 * rep, 64), self.num_perm), dtype=np.uint32)
+            grown[:rep] = self._signatures
+            self._signatures = grown
+        self._signatures[rep] = signature
+        self._ids.append(item_id)
+        self._by_signature[hash(signature.tobytes())].append(rep)
+        for buckets, key in zip(self._buckets, self._band_keys(signature)):
+            buckets[key].append(rep)
+
+    def query(self, signature: Any) -> Set[Hashable]:
+        """IDs sharing at least one band with a signature."""
+        found: Set[Hashable] = set()
+        for buckets, key in zip(self._buckets, self._band_keys(signature)):
+            for rep in buckets.get(key, ()):
+                found.add(self._ids[rep])
+                found.update(self._copies.get(rep, ()))
+        return found
+
+    def _bucket_pairs(self, band: int, bucket: List[int]) -> Iterator[Tuple[int, int]]:
+        """Representative pairs of one bucket not already sharing an earlier band."""
+        if len(bucket) > self.max_bucket_size:
+            # Usually boilerplate shared by many documents
+            first = bucket[0]
+            partners = [(first, rep) for rep in bucket[1:]]
+        else:
+            partners = combinations(bucket, 2)
+        if band == 0:
+            yield from partners
+            return
+        prefix = band * self.rows
+        for a, b in partners:
+            earlier = (self._signatures[a, :prefix] == self._signatures[b, :prefix]).reshape(band, self.rows)
+            if not earlier.all(axis=1).any():
+                yield a, b
+
+    def candidate_pairs(self) -> Iterator[Tuple[Hashable, Hashable]]:
+        """Stream pairs of IDs sharing at least one band, earlier-added ID first.
+
+        Each pair is yielded once, from the first band the two share.
+        Copies of a signature are paired with its representative only.
+        """
+        ids = self._ids
+        for rep, copies in self._copies.items():
+            for item_id in copies:
+                yield ids[rep], item_id
+        for band, buckets in enumerate(self._buckets):
+            for bucket in buckets.values():
+                if len(bucket) > 1:
+                    for a, b in self._bucket_pairs(band, bucket):
+                        yield ids[a], ids[b]
+
+
+def find_near_duplicates(documents: Sequence[Document], threshold: float = 0.8,
+                         hasher: Optional[MinHasher] = None) -> List[Tuple[int, int, float]]:
+    """Near-duplicate pairs among in-memory documents.
+
+    Args:
+        documents: Texts or byte strings
+        threshold: Minimum exact Jaccard similarity
+        hasher: MinHasher to use (default: word shingles, 128 permutations)
+
+    Returns:
+        Sorted list of (i, j, jaccard) with i < j
+    """
+    hasher = hasher or MinHasher()
+    shingle_sets = [hasher.shingles(document) for document in documents]
+    index = LSHIndex(hasher.num_perm, threshold)
+    for i, shingles in enumerate(shingle_sets):
+        index.add(i, hasher.signature_from_shingles(shingles))
+
+    pairs = []
+    for i, j in sorted(index.candidate_pairs()):
+        similarity = exact_jaccard(shingle_sets[i], shingle_sets[j])
+        if similarity >= threshold:
+            pairs.append((i, j, similarity))
+    return pairs
+
+
+def _read_file(path: str, max_bytes: int) -> Optional[bytes]:
+    """First max_bytes of a file, or None if it cannot be read."""
+    try:
+        with open(path, 'rb') as f:
+            return f.read(max_bytes)
+    except OSError:
+        return None
+
+
+def find_near_duplicate_files(paths: Sequence[str], threshold: float = 0.8,
+                              hasher: Optional[MinHasher] = None,
+                              max_bytes: int = DEFAULT_MAX_BYTES,
+                              cache_size: int = 1024) -> Iterator[Tuple[int, int, float]]:
+    """Stream near-duplicate pairs among files.
+
+    The first pass keeps only signatures; the second re-reads candidate
+    files for the exact check through a bounded cache of shingle sets.
+
+    Args:
+        paths: File paths
+        threshold: Minimum exact Jaccard similarity
+        hasher: MinHasher to use (default: word shingles, 128 permutations)
+        max_bytes: Bytes read from each file
+        cache_size: Shingle sets kept during verification
+
+    Yields:
+        (i, j, jaccard) indexing into paths, with i < j
+    """
+    hasher = hasher or MinHasher()
+    index = LSHIndex(hasher.num_perm, threshold)
+    for i, path in enumerate(paths):
+        data = _read_file(path, max_bytes)
+        if data is not None:
+            index.add(i, hasher.signature(data))
+
+    cache: 'OrderedDict[int, Any]' = OrderedDict()
+
+    def shingles_of(i: int) -> Any:
+        if i in cache:
+            cache.move_to_end(i)
+            return cache[i]
+        shingles = hasher.shingles(_read_file(paths[i], max_bytes) or b'')
+        cache[i] = shingles
+        if len(cache) > cache_size:
+            cache.popitem(last=False)
+        return shingles
+
+    # Candidates come bucket by bucket, so the cache sees each file's
+    # partners close together
+    for i, j in index.candidate_pairs():
+        similarity = exact_jaccard(shingles_of(i), shingles_of(j))
+        if similarity >= threshold:
+            yield i, j, similarity
+
+
+def write_minhash_relationships(db: Any, files: Sequence[Tuple[int, str]], threshold: float = 0.8,
+                                relationship_type: str = MINHASH_RELATIONSHIP,
+                                hasher: Optional[MinHasher] = None, batch_size: int = 10000) -> int:
+    """Find near-duplicate files and store them in file_relationships.
+
+    Files with identical signatures are recorded against the first of them
+    only, so a group of n copies writes n - 1 rows instead of all pairs.
+
+    Args:
+        db: DatabaseConnection
+        files: (file_id, path) tuples
+        threshold: Minimum exact Jaccard similarity
+        relationship_type: Relationship type to record
+        hasher: MinHasher to use
+        batch_size: Rows per executemany
+
+    Returns:
+        Number of pairs written
+    """
+    file_ids = [file_id for file_id, _ in files]
+    created_at = int(time.time())
+    written = 0
+    batch: List[Tuple[int, int, str, float, int]] = []
+
+    def flush() -> None:
+        db.executemany(
+            '''INSERT OR REPLACE INTO file_relationships
+            (file1_id, file2_id, relationship_type, similarity_score, created_at)
+            VALUES (?, ?, ?, ?, ?)''',
+            batch
+        )
+        batch.clear()
+
+    for i, j, similarity in find_near_duplicate_files([path for _, path in files], threshold, hasher):
+        batch.append((file_ids[i], file_ids[j], relationship_type, similarity, created_at))
+        written += 1
+        if len(batch) >= batch_size:
+            flush()
+    if batch:
+        flush()
+    db.commit()
+    return written
@@ -0,0 +1,367 @@
+"""Incremental updates for similarity indexes.
+
+Deleting a vector from a contiguous index would mean shifting every row
+after it, so deletes only set a bit in a tombstone bitmap that searches
+filter out. Upserts keyed by file_id overwrite the stored row where the
+backend supports it, otherwise they add the new vector and tombstone the
+old one. Once enough of the index is dead, a background thread compacts
+it: the live rows are copied without holding the index lock, and only the
+final swap (which also carries over rows added or deleted meanwhile)
+happens under it, so searches keep running during compaction.
+
+Key Features:
+    - Tombstone bitmap filtered at search time
+    - Upserts and deletes keyed by file_id
+    - Background compaction past a tombstone ratio
+    - Sync from the embeddings table after files change, resuming from the
+      embedding revision saved with the index
+
+Dependencies:
+    - threading (standard library only)
+    - numpy (optional)
+"""
+
+import threading
+import warnings
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+from .index_store import FileIdMetadata
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    np = None
+    NUMPY_AVAILABLE = False
+
+
+def _file_id(item: Any) -> Optional[int]:
+    """file_id of a metadata item, if it has an integer one."""
+    file_id = item.get('file_id') if isinstance(item, dict) else None
+    if isinstance(file_id, bool) or not isinstance(file_id, int):
+        return None
+    return file_id
+
+
+def select_metadata(metadata: Sequence[Dict[str, Any]], rows: Any) -> Sequence[Dict[str, Any]]:
+    """Metadata items at the given rows, keeping columnar metadata columnar.
+
+    Args:
+        metadata: Metadata sequence
+        rows: Row numbers to keep
+
+    Returns:
+        Selected metadata
+    """
+    if isinstance(metadata, FileIdMetadata):
+        return FileIdMetadata(np.asarray(metadata.file_ids)[rows])
+    rows = rows.tolist() if hasattr(rows, 'tolist') else rows
+    return [metadata[row] for row in rows]
+
+
+class TombstoneIndexMixin:
+    """Delete, upsert, compaction and DB sync support for index backends.
+
+    Rows are numbered in insertion order and row numbers index
+    self.metadata. Backends call _init_updates() in __init__,
+    _rows_added() under self._lock whenever rows are appended and
+    _reset_updates() when the index is replaced, and implement the
+    _row_count() and _compaction_* hooks.
+    """
+
+    # Compact once this fraction of rows is dead ...
+    compaction_ratio = 0.2
+    # ... and at least this many rows are dead
+    compaction_min_deleted = 1000
+    # Compact on a background thread instead of in the deleting call
+    background_compaction = True
+
+    def _init_updates(self) -> None:
+        """Set up tombstone state."""
+        self._lock = threading.RLock()
+        self._compaction_thread: Optional[threading.Thread] = None
+        self._generation = 0
+        self._reset_updates()
+
+    def _reset_updates(self) -> None:
+        """Forget all tombstones; called when the index contents are replaced."""
+        self._deleted: Any = np.zeros(0, dtype=bool) if NUMPY_AVAILABLE else bytearray()
+        self._num_deleted = 0
+        self._file_rows: Optional[Dict[int, int]] = None
+        self._generation += 1
+        # Newest embeddings revision consumed by sync_from_database; saved
+        # in the index header so a loaded index resumes from it
+        self.synced_revision = 0
+
+    # Hooks implemented by backends
+
+    def _row_count(self) -> int:
+        """Rows stored, including tombstoned ones."""
+        raise NotImplementedError
+
+    def _replace_rows(self, rows: List[int], vectors: List[List[float]],
+                      metadata: List[Dict[str, Any]]) -> bool:
+        """Overwrite live rows in place (under the lock).
+
+        Returns:
+            False if the backend cannot, in which case upserts append and
+            tombstone instead
+        """
+        return False
+
+    def _compaction_snapshot(self, rows: int) -> Any:
+        """Capture storage references for the first rows (under the lock)."""
+        raise NotImplementedError
+
+    def _compaction_build(self, snapshot: Any, live: Any, remap: Any) -> Any:
+        """Build compacted storage from a snapshot (without the lock)."""
+        raise NotImplementedError
+
+    def _compaction_swap(self, built: Any, snapshot: Any, remap: Any, live_count: int,
+                         rows: int, total: int) -> None:
+        """Install built storage plus rows rows..total added since (under the lock)."""
+        raise NotImplementedError
+
+    # Tombstones
+
+    @property
+    def tombstone_ratio(self) -> float:
+        """Fraction of stored rows that are deleted."""
+        total = self._row_count()
+        return self._num_deleted / total if total else 0.0
+
+    def _rows_added(self, first_row: int, metadata: Sequence[Dict[str, Any]]) -> None:
+        """Grow the bitmap and file_id map for newly appended rows."""
+        total = first_row + len(metadata)
+        if len(self._deleted) < total:
+            if NUMPY_AVAILABLE:
+                grown = np.zeros(max(total, 2 * len(self._deleted)), dtype=bool)
+                grown[:len(self._deleted)] = self._deleted
+                self._deleted = grown
+            else:
+                self._deleted.extend(bytes(total - len(self._deleted)))
+        if self._file_rows is not None:
+            for offset, item in enumerate(metadata):
+                file_id = _file_id(item)
+                if file_id is not None:
+                    self._file_rows[file_id] = first_row + offset
+
+    def _file_row_map(self) -> Dict[int, int]:
+        """Map of file_id to live row, built on first use."""
+        if self._file_rows is None:
+            metadata = self.metadata
+            if isinstance(metadata, FileIdMetadata):
+                rows = dict(zip(np.asarray(metadata.file_ids).tolist(), range(len(metadata))))
+            else:
+                rows = {}
+                for row, item in enumerate(metadata):
+                    file_id = _file_id(item)
+                    if file_id is not None:
+                        rows[file_id] = row
+            if self._num_deleted:
+                rows = {file_id: row for file_id, row in rows.items() if not self._deleted[row]}
+            self._file_rows = rows
+        return self._file_rows
+
+    def _tombstone(self, rows: Iterable[int]) -> int:
+        """Mark rows deleted; returns how many were live."""
+        removed = 0
+        for row in rows:
+            if not self._deleted[row]:
+                self._deleted[row] = True
+                removed += 1
+        self._num_deleted += removed
+        return removed
+
+    def remove_vectors(self, file_ids: Iterable[int]) -> int:
+        """Delete the vectors of the given files.
+
+        Args:
+            file_ids: File IDs to delete
+
+        Returns:
+            Number of vectors deleted
+        """
+        with self._lock:
+            file_rows = self._file_row_map()
+            rows = [file_rows.pop(int(file_id)) for file_id in file_ids if int(file_id) in file_rows]
+            removed = self._tombstone(rows)
+        self._maybe_compact()
+        return removed
+
+    def upsert_vectors(self, vectors: List[List[float]], metadata: List[Dict[str, Any]]) -> bool:
+        """Add vectors, replacing any stored for the same file_id.
+
+        Files already in the index are overwritten in place when the backend
+        supports it, so repeated upserts do not grow the index.
+
+        Args:
+            vectors: Vectors to store
+            metadata: Metadata per vector; each must have an integer file_id
+
+        Returns:
+            True if successful, False otherwise
+        """
+        file_ids = [_file_id(item) for item in metadata]
+        if None in file_ids:
+            warnings.warn("Upserted metadata must carry an integer file_id")
+            return False
+
+        with self._lock:
+            file_rows = self._file_row_map()
+            existing = [position for position, file_id in enumerate(file_ids) if file_id in file_rows]
+            # A file_id repeated in one batch keeps its last vector
+            if existing and len(set(file_ids)) == len(file_ids):
+                rows = [file_rows[file_ids[position]] for position in existing]
+                if self._replace_rows(rows, [vectors[position] for position in existing],
+                                      [metadata[position] for position in existing]):
+                    # A compaction copying the old rows must not install them
+                    self._generation += 1
+                    replaced = set(existing)
+                    keep = [position for position in range(len(file_ids)) if position not in replaced]
+                    vectors = [vectors[position] for position in keep]
+                    metadata = [metadata[position] for position in keep]
+                    existing = []
+            old_rows = [file_rows[file_ids[position]] for position in existing]
+            if metadata and not self.add_vectors(vectors, metadata):
+                return False
+            self._tombstone(old_rows)
+        self._maybe_compact()
+        return True
+
+    # Compaction
+
+    def _maybe_compact(self) -> None:
+        """Start compaction when enough of the index is dead."""
+        if (self._num_deleted < self.compaction_min_deleted
+                or self.tombstone_ratio < self.compaction_ratio):
+            return
+        if not self.background_compaction:
+            self.compact()
+            return
+        with self._lock:
+            if self._compaction_thread is not None and self._compaction_thread.is_alive():
+                return
+            self._compaction_thread = threading.Thread(
+                target=self.compact, name='similarity-compaction', daemon=True)
+            self._compaction_thread.start()
+
+    def wait_for_compaction(self, timeout: Optional[float] = None) -> bool:
+        """Wait for a running background compaction.
+
+        Args:
+            timeout: Seconds to wait (None waits indefinitely)
+
+        Returns:
+            True if no compaction is running any more
+        """
+        thread = self._compaction_thread
+        if thread is None:
+            return True
+        thread.join(timeout)
+        return not thread.is_alive()
+
+    def compact(self) -> bool:
+        """Drop tombstoned rows from storage.
+
+        Returns:
+            True if the index was compacted, False if there was nothing to
+            do or the index was replaced meanwhile
+        """
+        with self._lock:
+            if self._num_deleted == 0:
+                return False
+            generation = self._generation
+            rows = self._row_count()
+            snapshot = self._compaction_snapshot(rows)
+            metadata = self.metadata
+            if NUMPY_AVAILABLE:
+                live = np.flatnonzero(~self._deleted[:rows])
+            else:
+                live = [row for row in range(rows) if not self._deleted[row]]
+
+        # Row renumbering: old row -> new row, -1 for deleted rows
+        if NUMPY_AVAILABLE:
+            remap = np.full(rows, -1, dtype=np.int64)
+            remap[live] = np.arange(len(live))
+        else:
+            remap = [-1] * rows
+            for new_row, old_row in enumerate(live):
+                remap[old_row] = new_row
+        built = self._compaction_build(snapshot, live, remap)
+        live_metadata = select_metadata(metadata, live)
+        live_count = len(live)
+
+        with self._lock:
+            if generation != self._generation:
+                return False
+            total = self._row_count()
+            added = total - rows
+            self._compaction_swap(built, snapshot, remap, live_count, rows, total)
+
+            # Deletes that happened during the copy stay deleted
+            if NUMPY_AVAILABLE:
+                deleted = np.zeros(max(live_count + added, 1), dtype=bool)
+                deleted[:live_count] = self._deleted[live]
+                deleted[live_count:live_count + added] = self._deleted[rows:total]
+                num_deleted = int(deleted.sum())
+            else:
+                deleted = bytearray(self._deleted[row] for row in live)
+                deleted.extend(self._deleted[rows:total])
+                num_deleted = sum(deleted)
+
+            if added:
+                live_metadata = list(live_metadata) + list(self.metadata[rows:total])
+            if self._file_rows is not None:
+                self._file_rows = {
+                    file_id: int(remap[row]) if row < rows else live_count + row - rows
+                    for file_id, row in self._file_rows.items()
+                }
+
+            self.metadata = live_metadata
+            self._deleted = deleted
+            self._num_deleted = num_deleted
+            self._generation += 1
+        return True
+
+    # Database sync
+
+    def sync_from_database(self, db: Any, model_version: str) -> Dict[str, int]:
+        """Bring the index up to date with the embeddings table.
+
+        Files whose embeddings are gone (deleted or moved by apply) are
+        removed; embeddings added or rewritten since the last sync (by
+        revision, see EmbeddingRepository) are upserted.
+
+        Args:
+            db: DatabaseConnection
+            model_version: Embedding model version the index holds
+
+        Returns:
+            Dictionary with 'removed' and 'upserted' counts
+        """
+        from nodupe.tools.databases.embeddings import EmbeddingRepository
+
+        embeddings = EmbeddingRepository(db)
+        watermark = embeddings.max_revision(model_version)
+        current = {
+            row[0] for row in db.execute(
+                'SELECT e.file_id FROM embeddings e JOIN files f ON f.id = e.file_id '
+                'WHERE e.model_version = ?', (model_version,))
+        }
+
+        with self._lock:
+            stale = set(self._file_row_map()) - current
+        removed = self.remove_vectors(stale)
+
+        upserted = 0
+        if watermark > self.synced_revision:
+            matrix, file_ids = embeddings.load_matrix(
+                model_version, after_revision=self.synced_revision, until_revision=watermark)
+            if len(file_ids):
+                if not self.upsert_vectors(matrix, [{'file_id': file_id} for file_id in file_ids.tolist()]):
+                    raise RuntimeError("Failed to upsert embeddings into the index")
+                upserted = len(file_ids)
+            self.synced_revision = watermark
+
+        return {'removed': removed, 'upserted': upserted}
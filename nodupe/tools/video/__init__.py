@@ -2,19 +2,143 @@
 
 This module provides video processing backends with 5-tier graceful degradation
 for frame extraction, metadata analysis, and perceptual hashing.
+
+Perceptual hashes are returned as integers (64 bits for the default 8x8
+hash, 256 bits for hash_size=16) so that their Hamming distance measures
+visual difference; see nodupe.tools.similarity.hamming for searching them.
 """
 
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Iterable, Iterator, Tuple
 import logging
+import os
 import subprocess
-import hashlib
+import tempfile
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 import numpy as np
 from abc import ABC, abstractmethod
-from pathlib import Path
+from nodupe.tools.image.fingerprint_logic import area_resample_matrix
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
+# Side length of the default average hash grid (8x8 = 64 bits)
+DEFAULT_HASH_SIZE = 8
+# Size (width, height) of the grayscale frames every backend yields for hashing
+FRAME_SIZE = (256, 144)
+# ITU-R BT.601 luma weights for B, G, R (OpenCV's channel order)
+_LUMA_BGR = np.array([0.114, 0.587, 0.299], dtype=np.float32)
+
+
+def average_hash_batch(frames: Any, hash_size: int = DEFAULT_HASH_SIZE) -> List[int]:
+    """Compute the average hashes of a stack of same-sized frames.
+
+    Frames are area-resampled to the hash grid with two precomputed
+    matrices, so a whole stack is hashed with one batched matrix product.
+
+    Args:
+        frames: (N, H, W) grayscale or (N, H, W, C) color frames
+        hash_size: Side of the hash grid; hashes have hash_size ** 2 bits
+
+    Returns:
+        One integer hash per frame, first grid cell in the most significant bit
+    """
+    stack = np.asarray(frames, dtype=np.float32)
+    if stack.ndim == 4:
+        stack = stack.mean(axis=3)
+    if stack.ndim != 3:
+        raise ValueError(f"Expected a stack of frames, got shape {stack.shape}")
+    count, height, width = stack.shape
+    rows = area_resample_matrix(height, hash_size)
+    cols = area_resample_matrix(width, hash_size).T
+    cells = (rows @ stack @ cols).reshape(count, hash_size * hash_size)
+    bits = cells > cells.mean(axis=1, keepdims=True)
+    padding = -(hash_size * hash_size) % 8
+    return [int.from_bytes(row.tobytes(), 'big') >> padding for row in np.packbits(bits, axis=1)]
+
+
+def average_hash(frame: np.ndarray, hash_size: int = DEFAULT_HASH_SIZE) -> int:
+    """Compute the average hash of a frame.
+
+    Args:
+        frame: Grayscale (H, W) or color (H, W, C) image
+        hash_size: Side of the hash grid; the hash has hash_size ** 2 bits
+
+    Returns:
+        Hash as an integer, first grid cell in the most significant bit
+    """
+    return average_hash_batch(np.asarray(frame)[None], hash_size)[0]
+
+
+def to_hash_frame(frame: Any) -> np.ndarray:
+    """Reduce a decoded frame to the grayscale FRAME_SIZE image backends yield.
+
+    Color frames are taken as BGR, as OpenCV decodes them, and converted
+    to BT.601 luma; the image is then area-resampled to FRAME_SIZE. Frames
+    that already match (such as ffmpeg's) are returned unchanged, so the
+    same video hashes alike whichever backend decoded it.
+
+    Args:
+        frame: Grayscale (H, W) or color (H, W, C) image
+
+    Returns:
+        (height, width) uint8 frame of FRAME_SIZE
+    """
+    width, height = FRAME_SIZE
+    image = np.asarray(frame)
+    if image.ndim == 2 and image.shape == (height, width) and image.dtype == np.uint8:
+        return image
+    image = image.astype(np.float32)
+    if image.ndim == 3:
+        image = image[..., :3] @ _LUMA_BGR if image.shape[2] >= 3 else image.mean(axis=2)
+    rows = area_resample_matrix(image.shape[0], height)
+    cols = area_resample_matrix(image.shape[1], width).T
+    return np.clip(np.rint(rows @ image @ cols), 0, 255).astype(np.uint8)
+
+
+def sample_timestamps(duration: float, count: int) -> List[float]:
+    """Evenly spaced sampling times, each in the middle of its segment.
+
+    Args:
+        duration: Video duration in seconds
+        count: Number of samples
+
+    Returns:
+        count timestamps in seconds
+    """
+    return [duration * (i + 0.5) / count for i in range(count)]
+
+
+def parse_ffmpeg_metadata(stderr: str) -> Dict[str, Any]:
+    """Parse duration and resolution from the banner of ``ffmpeg -i``.
+
+    Args:
+        stderr: ffmpeg's standard error output
+
+    Returns:
+        Metadata dictionary (may be empty)
+    """
+    metadata: Dict[str, Any] = {}
+    for line in stderr.split('\n'):
+        if 'Duration:' in line and 'duration_seconds' not in metadata:
+            duration_part = line.split('Duration:')[1].split(',')[0].strip()
+            try:
+                h, m, sec = duration_part.split(':')
+                metadata['duration_seconds'] = float(h) * 3600 + float(m) * 60 + float(sec)
+            except ValueError:
+                # "Duration: N/A" for streams without a known length
+                continue
+        elif 'Video:' in line and 'width' not in metadata:
+            for field in line.split('Video:')[1].split(','):
+                size = field.strip().split(' ')[0]
+                width, _, height = size.partition('x')
+                if width.isdigit() and height.isdigit():
+                    metadata['width'] = int(width)
+                    metadata['height'] = int(height)
+                    break
+    return metadata
+
 
 class VideoBackend(ABC):
     """Abstract base class for video backends"""
@@ -32,8 +156,9 @@ class VideoBackend(ABC):
         """Get video metadata (duration, resolution, fps, etc.)"""
 
     @abstractmethod
-    def compute_perceptual_hash(self, frame: np.ndarray) -> str:
-        """Compute perceptual hash for video frame"""
+    def compute_perceptual_hash(self, frame: np.ndarray,
+                                hash_size: int = DEFAULT_HASH_SIZE) -> Optional[int]:
+        """Compute perceptual hash for video frame (None on failure)"""
 
     @abstractmethod
     def get_priority(self) -> int:
@@ -41,10 +166,26 @@ class VideoBackend(ABC):
 
 
 class FFmpegSubprocessBackend(VideoBackend):
-    """Tier 5: FFmpeg CLI backend (always available if ffmpeg binary exists)"""
+    """Tier 5: FFmpeg CLI backend (always available if ffmpeg binary exists)
+
+    Frames are sampled evenly across the video by seeking: one ffmpeg
+    process opens the file once per sample time with an input-side -ss,
+    keeps the first frame after each seek, scales it and pipes all of
+    them as raw grayscale bytes (-f rawvideo -pix_fmt gray) straight into
+    a preallocated NumPy buffer. Nothing is written to disk.
+    """
+
+    # Size of extracted frames (width, height): ffmpeg scales to the
+    # module-wide hash frame size itself
+    FRAME_SIZE = FRAME_SIZE
+    # Decoder threads per ffmpeg process; parallelism comes from running
+    # several processes (see VideoBackendManager.fingerprint_videos)
+    DECODER_THREADS = 1
+    # Seconds before a stuck ffmpeg process is killed
+    TIMEOUT = 120.0
 
     def __init__(self):
-        """TODO: Document __init__."""
+        """Initialize the backend and check for the ffmpeg binary."""
         self.priority = 5
         self._available = self._check_ffmpeg_available()
 
@@ -64,57 +205,85 @@ class FFmpegSubprocessBackend(VideoBackend):
         """Check if FFmpeg backend is available"""
         return self._available
 
+    def build_extract_command(self, video_path: str, timestamps: List[float],
+                              max_frames: int) -> List[str]:
+        """Build the ffmpeg command piping sampled gray frames to stdout.
+
+        Args:
+            video_path: Path to the video
+            timestamps: Seek times in seconds; empty when the duration is
+                unknown, in which case the first max_frames frames are used
+            max_frames: Number of frames to extract
+
+        Returns:
+            ffmpeg argument list
+        """
+        width, height = self.FRAME_SIZE
+        threads = ['-threads', str(self.DECODER_THREADS)]
+        cmd = ['ffmpeg', '-nostdin', '-hide_banner', '-v', 'error']
+        if not timestamps:
+            cmd += threads + ['-i', video_path,
+                              '-vf', f'scale={width}:{height},setsar=1,format=gray',
+                              '-frames:v', str(max_frames)]
+        else:
+            for timestamp in timestamps:
+                cmd += threads + ['-ss', f'{timestamp:.3f}', '-i', video_path]
+            chains = [
+                f'[{i}:v:0]trim=end_frame=1,setpts=PTS-STARTPTS,'
+                f'scale={width}:{height},setsar=1,format=gray[v{i}]'
+                for i in range(len(timestamps))
+            ]
+            inputs = ''.join(f'[v{i}]' for i in range(len(timestamps)))
+            graph = ';'.join(chains + [f'{inputs}concat=n={len(timestamps)}:v=1:a=0[out]'])
+            cmd += ['-filter_complex', graph, '-map', '[out]', '-frames:v', str(len(timestamps))]
+        # Pass frames through as decoded: no frame-rate conversion drops
+        cmd += ['-vsync', 'passthrough', '-f', 'rawvideo', '-pix_fmt', 'gray', 'pipe:1']
+        return cmd
+
+    def _read_frames(self, cmd: List[str], max_frames: int) -> np.ndarray:
+        """Run ffmpeg and read its raw frames into a (frames, H, W) buffer."""
+        width, height = self.FRAME_SIZE
+        buffer = np.empty((max_frames, height, width), dtype=np.uint8)
+        view = memoryview(buffer).cast('B')
+        filled = 0
+        # stderr goes to a file: a chatty ffmpeg cannot fill a pipe and stall
+        with tempfile.TemporaryFile() as stderr:
+            with subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=stderr) as process:
+                watchdog = threading.Timer(self.TIMEOUT, process.kill)
+                watchdog.start()
+                try:
+                    while filled < len(view):
+                        read = process.stdout.readinto(view[filled:])
+                        if not read:
+                            break
+                        filled += read
+                    process.stdout.close()
+                    returncode = process.wait()
+                finally:
+                    watchdog.cancel()
+            complete = filled // (width * height)
+            if returncode != 0 and complete == 0:
+                stderr.seek(0)
+                message = stderr.read().decode('utf-8', errors='ignore').strip()
+                raise RuntimeError(f"ffmpeg exited with {returncode}: {message}")
+        return buffer[:complete]
+
     def extract_frames(self, video_path: str, max_frames: int = 10) -> List[np.ndarray]:
-        """Extract frames using FFmpeg CLI"""
+        """Extract evenly spaced grayscale frames using FFmpeg CLI
+
+        Returns:
+            Up to max_frames (H, W) uint8 frames of FRAME_SIZE
+        """
         if not self.is_available():
             logger.error("FFmpeg not available")
             return []
 
         try:
-            # Create temporary directory for frames
-            temp_dir = Path("temp_frames")
-            temp_dir.mkdir(exist_ok=True)
-
-            # FFmpeg command to extract frames
-            output_pattern = str(temp_dir / "frame_%04d.png")
-            cmd = [
-                'ffmpeg',
-                '-i', video_path,
-                '-vf', f'fps=1/{max_frames},scale=256:144',
-                '-frames:v', str(max_frames),
-                output_pattern
-            ]
-
-            subprocess.run(cmd,
-                                    stdout=subprocess.PIPE,
-                                    stderr=subprocess.PIPE,
-                                    check=True)
-
-            # Load extracted frames
-            frames = []
-            for i in range(max_frames):
-                frame_path = temp_dir / f"frame_{i:04d}.png"
-                if frame_path.exists():
-                    try:
-                        import cv2
-                        frame = cv2.imread(str(frame_path))
-                        if frame is not None:
-                            frames.append(frame)
-                    except ImportError:
-                        # Fallback: use PIL if OpenCV not available
-                        try:
-                            from PIL import Image
-                            frame = np.array(Image.open(frame_path))
-                            frames.append(frame)
-                        except ImportError:
-                            logger.warning("Neither OpenCV nor PIL available for frame loading")
-
-            # Clean up
-            for f in temp_dir.glob("frame_*.png"):
-                f.unlink()
-            temp_dir.rmdir()
-
-            return frames
+            duration = self.get_video_metadata(video_path).get('duration_seconds', 0)
+            timestamps = sample_timestamps(duration, max_frames) if duration > 0 else []
+            frames = self._read_frames(
+                self.build_extract_command(video_path, timestamps, max_frames), max_frames)
+            return list(frames)
 
         except Exception as e:
             logger.error(f"Error extracting frames with FFmpeg: {e}")
@@ -128,59 +297,31 @@ class FFmpegSubprocessBackend(VideoBackend):
         try:
             cmd = [
                 'ffmpeg',
+                '-nostdin',
                 '-i', video_path
             ]
 
-            subprocess.run(cmd,
+            result = subprocess.run(cmd,
                                     stdout=subprocess.PIPE,
                                     stderr=subprocess.PIPE,
+                                    timeout=self.TIMEOUT,
                                     check=False)
 
-            metadata = {}
-            stderr = result.stderr.decode('utf-8', errors='ignore')
-
-            # Parse basic metadata from FFmpeg output
-            for line in stderr.split('\n'):
-                if 'Duration:' in line:
-                    # Parse duration
-                    parts = line.split(',')
-                    duration_part = parts[0].split('Duration:')[1].strip()
-                    h, m, s = duration_part.split(':')
-                    metadata['duration_seconds'] = float(h) * 3600 + float(m) * 60 + float(s)
-                elif 'Video:' in line:
-                    # Parse video resolution and fps
-                    if 'x' in line:
-                        res_part = line.split('Video:')[1].split(',')[0].strip()
-                        width, height = res_part.split('x')[:2]
-                        metadata['width'] = int(width)
-                        metadata['height'] = int(height)
-
-            return metadata
+            return parse_ffmpeg_metadata(result.stderr.decode('utf-8', errors='ignore'))
 
         except Exception as e:
             logger.error(f"Error getting video metadata: {e}")
             return {}
 
-    def compute_perceptual_hash(self, frame: np.ndarray) -> str:
+    def compute_perceptual_hash(self, frame: np.ndarray,
+                                hash_size: int = DEFAULT_HASH_SIZE) -> Optional[int]:
         """Compute simple perceptual hash (average hash)"""
         try:
-            # Convert to grayscale if needed
-            if len(frame.shape) == 3:
-                gray = np.mean(frame, axis=2).astype(np.uint8)
-            else:
-                gray = frame
-
-            # Resize to small fixed size
-            resized = cv2.resize(gray, (8, 8)) if 'cv2' in locals() else gray[:8, :8]
-
-            # Compute average and create hash
-            avg = np.mean(resized)
-            bits = ''.join(['1' if pixel > avg else '0' for pixel in resized.flatten()])
-            return hashlib.md5(bits.encode()).hexdigest()
+            return average_hash(frame, hash_size)
 
         except Exception as e:
             logger.error(f"Error computing perceptual hash: {e}")
-            return ""
+            return None
 
     def get_priority(self) -> int:
         """Get backend priority"""
@@ -198,6 +339,7 @@ class OpenCVBackend(VideoBackend):
     def _check_opencv_available(self) -> bool:
         """Check if OpenCV is available"""
         try:
+            import cv2  # noqa: F401
             return True
         except ImportError:
             logger.warning("OpenCV not available")
@@ -208,7 +350,14 @@ class OpenCVBackend(VideoBackend):
         return self._available
 
     def extract_frames(self, video_path: str, max_frames: int = 10) -> List[np.ndarray]:
-        """Extract frames using OpenCV"""
+        """Extract frames using OpenCV
+
+        Each frame is reduced with to_hash_frame() as soon as it is read,
+        so full-resolution frames are not kept.
+
+        Returns:
+            Up to max_frames (H, W) uint8 grayscale frames of FRAME_SIZE
+        """
         if not self.is_available():
             logger.error("OpenCV not available")
             return []
@@ -229,7 +378,7 @@ class OpenCVBackend(VideoBackend):
                 cap.set(cv2.CAP_PROP_POS_FRAMES, i)
                 ret, frame = cap.read()
                 if ret:
-                    frames.append(frame)
+                    frames.append(to_hash_frame(frame))
                 if len(frames) >= max_frames:
                     break
 
@@ -267,7 +416,8 @@ class OpenCVBackend(VideoBackend):
             logger.error(f"Error getting video metadata: {e}")
             return {}
 
-    def compute_perceptual_hash(self, frame: np.ndarray) -> str:
+    def compute_perceptual_hash(self, frame: np.ndarray,
+                                hash_size: int = DEFAULT_HASH_SIZE) -> Optional[int]:
         """Compute perceptual hash using OpenCV"""
         try:
             import cv2
@@ -275,15 +425,13 @@ class OpenCVBackend(VideoBackend):
             # Convert to grayscale
             gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) if len(frame.shape) == 3 else frame
 
-            # Resize and compute hash
-            resized = cv2.resize(gray, (8, 8))
-            avg = np.mean(resized)
-            bits = ''.join(['1' if pixel > avg else '0' for pixel in resized.flatten()])
-            return hashlib.md5(bits.encode()).hexdigest()
+            # Area resize in OpenCV; average_hash() then only thresholds
+            resized = cv2.resize(gray, (hash_size, hash_size), interpolation=cv2.INTER_AREA)
+            return average_hash(resized, hash_size)
 
         except Exception as e:
             logger.error(f"Error computing perceptual hash: {e}")
-            return ""
+            return None
 
     def get_priority(self) -> int:
         """Get backend priority"""
@@ -352,19 +500,66 @@ class VideoBackendManager:
         logger.error("All video backends failed to get metadata")
         return {}
 
-    def compute_perceptual_hash(self, frame: np.ndarray) -> str:
+    def compute_perceptual_hash(self, frame: np.ndarray,
+                                hash_size: int = DEFAULT_HASH_SIZE) -> Optional[int]:
         """Compute perceptual hash using the best available backend"""
         for backend in self.backends:
             try:
-                phash = backend.compute_perceptual_hash(frame)
-                if phash:
+                phash = backend.compute_perceptual_hash(frame, hash_size)
+                if phash is not None:
                     return phash
             except Exception as e:
                 logger.warning(f"Backend {backend.__class__.__name__} failed: {e}")
                 continue
 
         logger.error("All video backends failed to compute perceptual hash")
-        return ""
+        return None
+
+    def fingerprint_video(self, video_path: str, max_frames: int = 10,
+                          hash_size: int = DEFAULT_HASH_SIZE) -> List[int]:
+        """Hash evenly sampled frames of a video in one batch.
+
+        Frames pass through to_hash_frame(), so a backend yielding color
+        or differently sized frames hashes the same as ffmpeg's gray ones.
+
+        Returns:
+            One average hash per extracted frame (empty on failure)
+        """
+        frames = self.extract_frames(video_path, max_frames)
+        if not frames:
+            return []
+        return average_hash_batch(np.stack([to_hash_frame(frame) for frame in frames]), hash_size)
+
+    def fingerprint_videos(self, video_paths: Iterable[str], max_frames: int = 10,
+                           hash_size: int = DEFAULT_HASH_SIZE,
+                           max_workers: Optional[int] = None) -> Iterator[Tuple[str, List[int]]]:
+        """Fingerprint many videos with a bounded pool of extraction workers.
+
+        Each worker runs one ffmpeg (or OpenCV) extraction and hashes its
+        frames; at most 2 * max_workers videos are in flight, so long path
+        streams run in bounded memory.
+
+        Args:
+            video_paths: Video file paths
+            max_frames: Frames sampled per video
+            hash_size: Side of the hash grid
+            max_workers: Concurrent extractions (default: CPU count)
+
+        Yields:
+            (video_path, frame hashes) in input order
+        """
+        workers = max_workers or os.cpu_count() or 1
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='video-fingerprint') as executor:
+            pending: deque = deque()
+            for video_path in video_paths:
+                pending.append((video_path, executor.submit(
+                    self.fingerprint_video, video_path, max_frames, hash_size)))
+                if len(pending) >= 2 * workers:
+                    done_path, future = pending.popleft()
+                    yield done_path, future.result()
+            while pending:
+                done_path, future = pending.popleft()
+                yield done_path, future.result()
 
 
 # Module-level backend manager
@@ -384,6 +579,7 @@ get_video_backend_manager()
 
 __all__ = [
     'VideoBackend', 'FFmpegSubprocessBackend', 'OpenCVBackend',
-    'VideoBackendManager', 'get_video_backend_manager', 'register_tool'
+    'VideoBackendManager', 'get_video_backend_manager', 'average_hash', 'average_hash_batch',
+    'to_hash_frame', 'sample_timestamps', 'parse_ffmpeg_metadata', 'FRAME_SIZE', 'register_tool'
 ]
-from .video_tool import register_tool
+from .video_plugin import register_tool
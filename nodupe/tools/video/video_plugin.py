@@ -30,7 +30,10 @@ class VideoTool(Tool):
         return {
             'extract_frames': self.manager.extract_frames,
             'get_metadata': self.manager.get_video_metadata,
-            'compute_phash': self.manager.compute_perceptual_hash
+            'compute_phash': self.manager.compute_perceptual_hash,
+            'fingerprint_video': self.manager.fingerprint_video,
+            'fingerprint_videos': lambda paths, **kwargs: list(
+                self.manager.fingerprint_videos(paths, **kwargs))
         }
 
     def __init__(self):
@@ -44,6 +47,34 @@ class VideoTool(Tool):
     def shutdown(self) -> None:
         """Shutdown the tool."""
 
+    def run_standalone(self, args: List[str]) -> int:
+        """Print frame fingerprints of videos in stand-alone mode."""
+        import argparse
+        parser = argparse.ArgumentParser(description=self.describe_usage())
+        parser.add_argument("videos", nargs='*', help="Video files to fingerprint")
+        parser.add_argument("--frames", type=int, default=10, help="Frames sampled per video")
+
+        if not args:
+            parser.print_help()
+            return 0
+
+        parsed = parser.parse_args(args)
+        try:
+            for path, hashes in self.manager.fingerprint_videos(parsed.videos, parsed.frames):
+                print(f"{path}: {' '.join(f'{h:016x}' for h in hashes) or 'no frames'}")
+            return 0
+        except Exception as e:
+            print(f"Error: {e}")
+            return 1
+
+    def describe_usage(self) -> str:
+        """Plain language description."""
+        return (
+            "This component looks at a handful of still pictures spread across each video "
+            "and makes a visual fingerprint of each one, so videos that look the same can "
+            "be found even if they were re-encoded."
+        )
+
     def get_capabilities(self) -> Dict[str, Any]:
         """Get tool capabilities."""
         return {
@@ -1,6 +1,10 @@
 """Tests for embedding cache module."""
 
 import time
+
+import numpy as np
+import pytest
+
 from nodupe.tools.ml.embedding_cache import EmbeddingCache, EmbeddingCacheError
 
 
@@ -28,7 +32,7 @@ class TestEmbeddingCache:
         
         # Get the embedding back
         retrieved_embedding = cache.get_embedding(key)
-        assert retrieved_embedding == expected_embedding
+        assert retrieved_embedding == pytest.approx(expected_embedding)
 
     def test_get_nonexistent_embedding(self):
         """Test getting embedding for non-existent key."""
@@ -49,7 +53,7 @@ class TestEmbeddingCache:
         cache.set_embedding("test_key", [0.1, 0.2, 0.3])
         
         # Verify it's cached
-        assert cache.get_embedding("test_key") == [0.1, 0.2, 0.3]
+        assert cache.get_embedding("test_key") == pytest.approx([0.1, 0.2, 0.3])
         
         # Wait for TTL to expire
         time.sleep(0.2)
@@ -66,16 +70,16 @@ class TestEmbeddingCache:
         cache.set_embedding("key2", [0.3, 0.4])
         
         # Verify both are cached
-        assert cache.get_embedding("key1") == [0.1, 0.2]
-        assert cache.get_embedding("key2") == [0.3, 0.4]
+        assert cache.get_embedding("key1") == pytest.approx([0.1, 0.2])
+        assert cache.get_embedding("key2") == pytest.approx([0.3, 0.4])
         
         # Add a third embedding, which should evict the least recently used
         cache.set_embedding("key3", [0.5, 0.6])
         
         # Verify the first embedding was evicted and others remain
         assert cache.get_embedding("key1") is None  # Should be evicted
-        assert cache.get_embedding("key2") == [0.3, 0.4]  # Should still be there
-        assert cache.get_embedding("key3") == [0.5, 0.6]  # Should be added
+        assert cache.get_embedding("key2") == pytest.approx([0.3, 0.4])  # Should still be there
+        assert cache.get_embedding("key3") == pytest.approx([0.5, 0.6])  # Should be added
 
     def test_dimension_validation(self):
         """Test embedding dimension validation."""
@@ -83,7 +87,7 @@ class TestEmbeddingCache:
         
         # Valid embedding should work
         cache.set_embedding("valid", [0.1, 0.2, 0.3, 0.4, 0.5])
-        assert cache.get_embedding("valid") == [0.1, 0.2, 0.3, 0.4, 0.5]
+        assert cache.get_embedding("valid") == pytest.approx([0.1, 0.2, 0.3, 0.4, 0.5])
         
         # Invalid embedding should raise error
         try:
@@ -147,8 +151,8 @@ class TestEmbeddingCache:
         cache.set_embedding("key2", [0.3, 0.4])
         
         # Verify both are cached
-        assert cache.get_embedding("key1") == [0.1, 0.2]
-        assert cache.get_embedding("key2") == [0.3, 0.4]
+        assert cache.get_embedding("key1") == pytest.approx([0.1, 0.2])
+        assert cache.get_embedding("key2") == pytest.approx([0.3, 0.4])
         
         # Invalidate first key
         invalidated = cache.invalidate("key1")
@@ -156,7 +160,7 @@ class TestEmbeddingCache:
         
         # Verify first key is no longer cached
         assert cache.get_embedding("key1") is None
-        assert cache.get_embedding("key2") == [0.3, 0.4]
+        assert cache.get_embedding("key2") == pytest.approx([0.3, 0.4])
 
     def test_invalidate_nonexistent_entry(self):
         """Test invalidating a non-existent cache entry."""
@@ -175,8 +179,8 @@ class TestEmbeddingCache:
         cache.set_embedding("key2", [0.3, 0.4])
         
         # Verify both are cached
-        assert cache.get_embedding("key1") == [0.1, 0.2]
-        assert cache.get_embedding("key2") == [0.3, 0.4]
+        assert cache.get_embedding("key1") == pytest.approx([0.1, 0.2])
+        assert cache.get_embedding("key2") == pytest.approx([0.3, 0.4])
         
         # Invalidate all entries
         cache.invalidate_all()
@@ -209,7 +213,7 @@ class TestEmbeddingCache:
         
         # Hit - key in cache
         result = cache.get_embedding("key1")
-        assert result == [0.1, 0.2]
+        assert result == pytest.approx([0.1, 0.2])
         
         stats = cache.get_stats()
         assert stats['misses'] == 1
@@ -224,7 +228,7 @@ class TestEmbeddingCache:
         cache.set_embedding("test_key", [0.1, 0.2, 0.3])
         
         # Verify it's cached
-        assert cache.get_embedding("test_key") == [0.1, 0.2, 0.3]
+        assert cache.get_embedding("test_key") == pytest.approx([0.1, 0.2, 0.3])
         
         # Wait for TTL to expire
         time.sleep(0.2)
@@ -263,8 +267,8 @@ class TestEmbeddingCache:
         cache.set_embedding("key2", [0.3, 0.4])
         
         # Verify both are cached
-        assert cache.get_embedding("key1") == [0.1, 0.2]
-        assert cache.get_embedding("key2") == [0.3, 0.4]
+        assert cache.get_embedding("key1") == pytest.approx([0.1, 0.2])
+        assert cache.get_embedding("key2") == pytest.approx([0.3, 0.4])
         
         # Add a third embedding, which should evict one due to size limit
         cache.set_embedding("key3", [0.5, 0.6])
@@ -276,9 +280,9 @@ class TestEmbeddingCache:
         cache.set_embedding("key1", [0.1, 0.2, 0.3])  # Changed embedding
         
         # Verify all three can now be cached
-        assert cache.get_embedding("key1") == [0.1, 0.2, 0.3]  # Should have new embedding
-        assert cache.get_embedding("key2") == [0.3, 0.4]  # Should still be there
-        assert cache.get_embedding("key3") == [0.5, 0.6]  # Should still be there
+        assert cache.get_embedding("key1") == pytest.approx([0.1, 0.2, 0.3])  # Should have new embedding
+        assert cache.get_embedding("key2") == pytest.approx([0.3, 0.4])  # Should still be there
+        assert cache.get_embedding("key3") == pytest.approx([0.5, 0.6])  # Should still be there
 
     def test_cleanup_expired_method(self):
         """Test cleanup_expired method."""
@@ -288,7 +292,7 @@ class TestEmbeddingCache:
         cache.set_embedding("test_key", [0.1, 0.2, 0.3])
         
         # Verify it's cached
-        assert cache.get_embedding("test_key") == [0.1, 0.2, 0.3]
+        assert cache.get_embedding("test_key") == pytest.approx([0.1, 0.2, 0.3])
         
         # Wait for TTL to expire
         time.sleep(0.2)
@@ -437,4 +441,91 @@ class TestEmbeddingCache:
         assert len(keys) == 3
         assert "key1" in keys
         assert "key2" in keys
-        assert "key3" in keys
\ No newline at end of file
+        assert "key3" in keys
+
+class TestEmbeddingSlab:
+    """Test slab storage and vectorized similarity queries."""
+
+    def test_top_k_similar_matches_brute_force(self):
+        """Test top_k_similar against per-pair cosine similarity."""
+        rng = np.random.default_rng(5)
+        vectors = rng.standard_normal((200, 32))
+        cache = EmbeddingCache(max_size=500)
+        for i, vector in enumerate(vectors):
+            cache.set_embedding(f"k{i}", vector.tolist())
+
+        top = cache.top_k_similar("k0", k=5)
+        expected = sorted(
+            ((f"k{i}", cache._cosine_similarity(vectors[0], vectors[i])) for i in range(1, 200)),
+            key=lambda item: item[1], reverse=True)[:5]
+        assert [key for key, _ in top] == [key for key, _ in expected]
+        assert [score for _, score in top] == pytest.approx([s for _, s in expected], abs=1e-5)
+        assert cache.top_k_similar("missing") == []
+
+    def test_similarity_matrix(self):
+        """Test the pairwise similarity matrix."""
+        cache = EmbeddingCache()
+        cache.set_embedding("a", [1.0, 0.0])
+        cache.set_embedding("b", [1.0, 1.0])
+        cache.set_embedding("c", [0.0, 1.0])
+        cache.set_embedding("d", [1.0, 0.0, 0.0])
+
+        matrix = cache.similarity_matrix(["a", "b", "c"])
+        assert matrix.shape == (3, 3)
+        assert np.allclose(np.diag(matrix), 1.0)
+        assert matrix[0, 1] == pytest.approx(np.sqrt(0.5), abs=1e-6)
+        assert matrix[0, 2] == pytest.approx(0.0)
+        with pytest.raises(EmbeddingCacheError):
+            cache.similarity_matrix(["a", "d"])
+        with pytest.raises(EmbeddingCacheError):
+            cache.similarity_matrix(["a", "missing"])
+
+    def test_similarity_matrix_survives_promotion_evictions(self):
+        """Test that promoting a key mid-call does not overwrite an earlier row."""
+        cache = EmbeddingCache(max_size=2, spill=True)
+        cache.set_embedding("A", [1.0, 0.0])
+        cache.set_embedding("B", [0.0, 1.0])
+        cache.set_embedding("C", [0.0, 1.0])
+
+        matrix = cache.similarity_matrix(["B", "C", "A"])
+        assert matrix[0, 2] == pytest.approx(0.0)
+        assert matrix[0, 1] == pytest.approx(1.0)
+        cache.close()
+
+    def test_byte_budget_and_row_reuse(self):
+        """Test byte-based eviction and free-list reuse of slab rows."""
+        row_bytes = 768 * 4 + 4
+        cache = EmbeddingCache(max_size=1000, max_bytes=10 * row_bytes)
+        for i in range(15):
+            cache.set_embedding(f"k{i}", [float(i)] * 768)
+
+        assert cache.get_cache_size() == 10
+        assert cache.get_embedding("k4") is None
+        assert cache.get_embedding("k5") == [5.0] * 768
+        assert cache.get_stats()['bytes'] == 10 * row_bytes
+
+        allocated = cache.get_memory_usage()
+        cache.invalidate("k5")
+        cache.set_embedding("kx", [51.0] * 768)
+        assert cache.get_memory_usage() == allocated
+
+    def test_spill_to_disk_tier(self):
+        """Test that evicted embeddings spill to disk and are promoted back."""
+        cache = EmbeddingCache(max_size=10, spill=True)
+        for i in range(50):
+            cache.set_embedding(f"k{i}", [float(i)] * 16)
+
+        stats = cache.get_stats()
+        assert stats['size'] == 10 and stats['disk_size'] == 40
+
+        assert cache.get_embedding("k3") == [3.0] * 16
+        stats = cache.get_stats()
+        assert stats['disk_hits'] == 1 and stats['memory_misses'] == 1
+        assert "k3" in cache.get_cached_keys()
+
+        assert cache.calculate_similarity("k1", "k2") == pytest.approx(1.0)
+        assert cache.clear_by_pattern("k4") == 11
+        assert cache.get_embedding("k45") is None
+        cache.invalidate_all()
+        assert cache.get_embedding("k5") is None
+        cache.close()
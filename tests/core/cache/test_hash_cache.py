@@ -363,4 +363,30 @@ class TestHashCache:
         
         # Usage should be greater after adding entries
         new_usage = cache.get_memory_usage()
-        assert new_usage > usage
\ No newline at end of file
+        assert new_usage > usage
+
+    def test_spill_to_disk_tier(self, temp_dir):
+        """Test that evicted entries spill to disk and are promoted back."""
+        cache = HashCache(max_size=2, spill=True)
+        files = []
+        for i in range(5):
+            test_file = temp_dir / f"spill{i}.txt"
+            test_file.write_text(f"content {i}")
+            cache.set_hash(test_file, f"hash{i}")
+            files.append(test_file)
+
+        assert cache.get_cache_size() == 2
+        assert cache.get_stats()['disk_size'] == 3
+
+        # Evicted entry comes back from disk and is promoted
+        assert cache.get_hash(files[0]) == "hash0"
+        stats = cache.get_stats()
+        assert stats['disk_hits'] == 1 and stats['promotions'] == 1
+        assert stats['disk_size'] == 3  # files[2] spilled to make room
+
+        # Spilled entries are still validated against the file
+        files[1].write_text("changed content")
+        assert cache.get_hash(files[1]) is None
+        assert cache.invalidate(files[3]) is True
+        assert cache.get_hash(files[3]) is None
+        cache.close()
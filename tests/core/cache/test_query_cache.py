@@ -1,7 +1,9 @@
 """Tests for query cache module."""
 
 import time
-from nodupe.tools.databases.query_cache import QueryCache, QueryCacheError
+from nodupe.tools.databases.query_cache import (
+    QueryCache, QueryCacheError, extract_read_tables, extract_write_tables
+)
 
 
 class TestQueryCache:
@@ -352,4 +354,58 @@ class TestQueryCache:
         assert len(queries) == 3  # Each unique query pattern
         assert "select * from users where id = ?" in queries
         assert "select * from users where name = ?" in queries
-        assert "select * from orders where user_id = ?" in queries
\ No newline at end of file
+        assert "select * from orders where user_id = ?" in queries
+
+class TestQueryCacheTableInvalidation:
+    """Test table-level invalidation with generation counters."""
+
+    def test_extract_tables(self):
+        """Test read and write table extraction."""
+        assert extract_read_tables("SELECT * FROM files f JOIN embeddings e ON 1") == frozenset({"files", "embeddings"})
+        assert extract_write_tables("INSERT OR REPLACE INTO files VALUES (?)") == frozenset({"files"})
+        assert extract_write_tables("  update embeddings SET x = 1") == frozenset({"embeddings"})
+        assert extract_write_tables("SELECT * FROM files") == frozenset()
+        assert extract_write_tables("DROP TABLE files") is None
+
+    def test_write_invalidates_dependent_entries(self):
+        """Test that a write only invalidates entries reading that table."""
+        cache = QueryCache()
+        cache.set_result("SELECT * FROM files", None, [1])
+        cache.set_result("SELECT * FROM embeddings", None, [2])
+
+        assert cache.note_write("DELETE FROM files WHERE id = ?") == frozenset({"files"})
+        assert cache.get_result("SELECT * FROM files") is None
+        assert cache.get_result("SELECT * FROM embeddings") == [2]
+        assert cache.get_stats()['invalidations'] == 1
+
+    def test_get_or_compute(self):
+        """Test that results are computed once until a write."""
+        cache = QueryCache()
+        calls = []
+
+        def compute():
+            calls.append(1)
+            return len(calls)
+
+        assert cache.get_or_compute("SELECT COUNT(*) FROM files", (), compute) == 1
+        assert cache.get_or_compute("SELECT COUNT(*) FROM files", (), compute) == 1
+        cache.invalidate_tables(["files"])
+        assert cache.get_or_compute("SELECT COUNT(*) FROM files", (), compute) == 2
+
+    def test_racing_write_is_not_cached(self):
+        """Test that a result computed across a write is not stored."""
+        cache = QueryCache()
+
+        def compute():
+            cache.invalidate_tables(["files"])
+            return "stale"
+
+        assert cache.get_or_compute("SELECT * FROM files", None, compute) == "stale"
+        assert cache.get_cache_size() == 0
+
+    def test_positional_params_key(self):
+        """Test keys for positional and unhashable parameters."""
+        cache = QueryCache()
+        assert cache._generate_key("SELECT 1", (1, 2)) != cache._generate_key("SELECT 1", (2, 1))
+        cache.set_result("SELECT * FROM t WHERE x IN (?)", {"x": [1, 2]}, "ok")
+        assert cache.get_result("SELECT * FROM t WHERE x IN (?)", {"x": [1, 2]}) == "ok"
@@ -0,0 +1,70 @@
+"""Tests for the segment store disk tier."""
+
+import os
+import random
+
+from nodupe.tools.databases.segment_store import SegmentStore
+
+
+class TestSegmentStore:
+    """Test SegmentStore class."""
+
+    def test_matches_dictionary_under_random_operations(self):
+        """Test puts, pops and deletes across sealed segments and compaction."""
+        store = SegmentStore(segment_bytes=4096, background_compaction=False)
+        reference = {}
+        rng = random.Random(1)
+        for step in range(3000):
+            key = f"key{rng.randrange(500)}".encode()
+            operation = rng.random()
+            if operation < 0.6:
+                value = os.urandom(rng.randrange(1, 60))
+                store.put(key, value)
+                reference[key] = value
+            elif operation < 0.8:
+                assert store.pop(key) == reference.pop(key, None)
+            else:
+                assert store.delete(key) == (reference.pop(key, None) is not None)
+            if step % 500 == 0:
+                store.compact()
+
+        for key, value in reference.items():
+            assert store.get(key) == value
+        assert len(store) == len(reference)
+        assert sorted(store.keys()) == sorted(reference)
+        stats = store.get_stats()
+        assert stats['segments'] > 1 and stats['compactions'] > 0
+        store.close()
+
+    def test_compaction_reclaims_dead_segments(self):
+        """Test that compaction rewrites mostly-dead segments."""
+        store = SegmentStore(segment_bytes=1024, background_compaction=False)
+        for i in range(200):
+            store.put(f"k{i}".encode(), b"x" * 32)
+        for i in range(0, 200, 4):
+            store.put(f"k{i}".encode(), b"y" * 32)
+        for i in range(200):
+            if i % 4:
+                store.delete(f"k{i}".encode())
+
+        before = store.get_stats()['file_bytes']
+        assert store.compact() > 0
+        assert store.get_stats()['file_bytes'] < before
+        assert all(store.get(f"k{i}".encode()) == b"y" * 32 for i in range(0, 200, 4))
+        store.close()
+
+    def test_byte_budget_and_close(self):
+        """Test that the oldest segments are dropped and files removed on close."""
+        store = SegmentStore(segment_bytes=1024, max_bytes=4096, background_compaction=False)
+        for i in range(500):
+            store.put(f"k{i}".encode(), b"v" * 40)
+
+        stats = store.get_stats()
+        assert stats['file_bytes'] <= 4096 + 1024
+        assert stats['dropped_segments'] > 0
+        assert store.get(b"k0") is None
+        assert store.get(b"k499") == b"v" * 40
+
+        directory = store.directory
+        store.close()
+        assert not os.path.exists(directory)
@@ -596,6 +596,66 @@ class TestFileRepository:
             os.unlink(tmp.name)
 
 
+class TestFileRepositoryQueryCache:
+    """Test FileRepository reads through the connection query cache."""
+
+    def test_repeated_reads_hit_cache(self):
+        """Test that repeated list/count reads are served from the cache."""
+        with tempfile.NamedTemporaryFile(suffix='.db') as tmp:
+            db = DatabaseConnection(tmp.name)
+            _init_full_schema(db)
+            cache = db.enable_query_cache()
+            repo = FileRepository(db)
+
+            repo.add_file("a.txt", 1, 1, "h1")
+            db.commit()
+
+            assert repo.count_files() == 1
+            assert repo.count_files() == 1
+            assert cache.get_stats()['hits'] == 1
+
+            db.close()
+
+    def test_commit_invalidates_cached_reads(self):
+        """Test that committed writes invalidate dependent results."""
+        with tempfile.NamedTemporaryFile(suffix='.db') as tmp:
+            db = DatabaseConnection(tmp.name)
+            _init_full_schema(db)
+            db.enable_query_cache()
+            repo = FileRepository(db)
+
+            assert repo.get_all_files() == []
+            repo.batch_add_files([
+                {'path': 'a.txt', 'size': 1, 'modified_time': 1, 'hash': 'h1'},
+                {'path': 'b.txt', 'size': 1, 'modified_time': 1, 'hash': 'h1'},
+            ])
+            # Uncommitted writes are visible to this thread without caching them
+            assert len(repo.find_duplicates_by_hash('h1')) == 2
+            db.commit()
+            assert [f['path'] for f in repo.get_all_files()] == ['a.txt', 'b.txt']
+
+            repo.delete_file(repo.get_file_by_path('a.txt')['id'])
+            db.commit()
+            assert repo.count_files() == 1
+
+            db.close()
+
+    def test_rollback_invalidates_cached_reads(self):
+        """Test that rolled back writes do not leave stale results."""
+        with tempfile.NamedTemporaryFile(suffix='.db') as tmp:
+            db = DatabaseConnection(tmp.name)
+            _init_full_schema(db)
+            db.enable_query_cache()
+            repo = FileRepository(db)
+
+            repo.add_file("a.txt", 1, 1, "h1")
+            assert repo.count_files() == 1
+            db.rollback()
+            assert repo.count_files() == 0
+
+            db.close()
+
+
 class TestDatabaseRepository:
     """Test DatabaseRepository class functionality."""
 
@@ -0,0 +1,108 @@
+"""Tests for database maintenance scheduling and index advice."""
+
+import os
+import tempfile
+
+import pytest
+
+from nodupe.tools.databases.connection import DatabaseConnection
+from nodupe.tools.databases.files import FileRepository
+from nodupe.tools.databases.schema import DatabaseSchema
+from nodupe.tools.databases.maintenance import IndexAdvisor, _parse_select
+
+
+def _files(count):
+    """Build file rows with long paths so deletes free whole pages."""
+    return [
+        {'path': f'/data/archive/{i:08d}/' + 'x' * 120, 'size': i, 'modified_time': i % 50}
+        for i in range(count)
+    ]
+
+
+@pytest.fixture
+def db():
+    """Database connection with the full schema and maintenance enabled."""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        connection = DatabaseConnection(os.path.join(temp_dir, "maint.db"))
+        DatabaseSchema(connection.get_connection()).create_schema()
+        connection.enable_maintenance(min_interval=0, vacuum_min_pages=16)
+        yield connection
+        connection.close()
+
+
+class TestMaintenanceScheduler:
+    """Test churn tracking and automatic maintenance."""
+
+    def test_churn_is_tracked_per_table(self, db):
+        """Test that writes are counted against the tables they touch."""
+        db.maintenance.min_interval = 3600
+        db.maintenance.run_if_due()
+        FileRepository(db).batch_add_files(_files(10))
+        db.execute('DELETE FROM files WHERE size < 3')
+        assert db.maintenance.get_churn() == {'files': 13}
+
+    def test_bulk_load_triggers_analyze(self, db):
+        """Test that a bulk load refreshes planner statistics."""
+        FileRepository(db).batch_add_files(_files(2000))
+        db.commit()
+
+        history = db.maintenance.get_status()['history']
+        assert 'analyze' in history[-1]['tasks']
+        assert 'files' in history[-1]['analyzed']
+        assert db.get_connection().execute(
+            "SELECT COUNT(*) FROM sqlite_stat1 WHERE tbl = 'files'"
+        ).fetchone()[0] > 0
+        assert db.maintenance.get_churn()['files'] == 0
+
+    def test_large_delete_shrinks_file(self, db):
+        """Test that incremental vacuum returns freed pages."""
+        FileRepository(db).batch_add_files(_files(5000))
+        db.commit()
+        before = db.maintenance.get_status()['file_bytes']
+
+        db.execute('DELETE FROM files WHERE id > 100')
+        db.commit()
+
+        status = db.maintenance.get_status()
+        assert status['auto_vacuum'] == 'incremental'
+        assert 'incremental_vacuum' in status['history'][-1]['tasks']
+        assert status['file_bytes'] < before / 2
+
+    def test_skips_open_transaction(self, db):
+        """Test that maintenance never runs inside a caller's transaction."""
+        FileRepository(db).batch_add_files(_files(10))
+        assert db.maintenance.run(force=True)['tasks'] == []
+        db.commit()
+        assert 'optimize' in db.maintenance.run(force=True)['tasks']
+
+
+class TestIndexAdvisor:
+    """Test covering index advice from query statistics."""
+
+    def test_parse_select(self):
+        """Test extraction of index key and selected columns."""
+        assert _parse_select(
+            "select path, size from files where modified_time = ? and size > ? order by size"
+        ) == ('files', ['modified_time', 'size'], ['path', 'size'])
+        assert _parse_select("select * from files where hash in (?+)") == ('files', ['hash'], [])
+        assert _parse_select("select * from files where size = ? or hash = ?") is None
+        assert _parse_select("select * from files f join embeddings e on 1") is None
+
+    def test_advise_and_apply(self, db):
+        """Test that a scanning statement gets a covering index."""
+        FileRepository(db).batch_add_files(_files(200))
+        db.commit()
+        statistics = db.enable_statistics(slow_query_ms=1000.0)
+        query = 'SELECT path FROM files WHERE modified_time = ?'
+        db.execute(query, (3,)).fetchall()
+
+        advisor = IndexAdvisor(db, statistics)
+        proposals = advisor.advise(min_total_ms=0.0)
+        assert len(proposals) == 1
+        assert proposals[0]['where_columns'] == ['modified_time']
+        assert proposals[0]['select_columns'] == ['path']
+
+        assert advisor.apply(proposals) == [proposals[0]['index_name']]
+        plan = db.get_connection().execute(f'EXPLAIN QUERY PLAN {query}', (3,)).fetchall()
+        assert 'COVERING INDEX' in plan[0][3]
+        assert advisor.advise(min_total_ms=0.0) == []
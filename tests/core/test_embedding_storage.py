@@ -0,0 +1,101 @@
+"""Tests for raw float32 embedding storage and bulk matrix loading."""
+
+import os
+import pickle
+import tempfile
+
+import numpy as np
+import pytest
+
+from nodupe.tools.databases.connection import DatabaseConnection
+from nodupe.tools.databases.embeddings import (
+    EmbeddingRepository, decode_embedding, encode_embedding
+)
+from nodupe.tools.databases.files import FileRepository
+from nodupe.tools.databases.schema import DatabaseSchema
+
+
+@pytest.fixture
+def repo():
+    """Embedding repository over the full schema with ten files."""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        connection = DatabaseConnection(os.path.join(temp_dir, "emb.db"))
+        DatabaseSchema(connection.get_connection()).create_schema()
+        FileRepository(connection).batch_add_files([
+            {'path': f'/data/{i}.jpg', 'size': i, 'modified_time': i} for i in range(10)
+        ])
+        yield EmbeddingRepository(connection)
+        connection.close()
+
+
+def test_encode_is_raw_little_endian_float32():
+    """Test that embeddings are stored as 4 bytes per dimension."""
+    blob, dims = encode_embedding([1.0, -2.5, 0.25])
+    assert dims == 3
+    assert blob == np.array([1.0, -2.5, 0.25], dtype='<f4').tobytes()
+    assert encode_embedding(np.array([1.0, -2.5, 0.25])) == (blob, 3)
+    assert decode_embedding(blob, dims) == [1.0, -2.5, 0.25]
+
+
+def test_add_records_dimensions(repo):
+    """Test that single and batch inserts fill the dimensions column."""
+    repo.add_embedding(1, [0.5] * 8, 'clip', 1)
+    repo.batch_add_embeddings([
+        {'file_id': 2, 'embedding': np.ones(8), 'model_version': 'clip', 'created_time': 1}
+    ])
+
+    rows = repo.db.execute('SELECT dimensions, length(embedding) FROM embeddings').fetchall()
+    assert rows == [(8, 32), (8, 32)]
+    assert repo.get_embedding_by_file(2, 'clip')['embedding'] == [1.0] * 8
+
+
+def test_load_matrix_aligns_rows_with_file_ids(repo):
+    """Test bulk loading into a single float32 matrix ordered by file ID."""
+    vectors = {file_id: np.random.rand(16).astype(np.float32) for file_id in (7, 3, 5)}
+    for file_id, vector in vectors.items():
+        repo.add_embedding(file_id, vector, 'clip', 1)
+    repo.add_embedding(4, [0.0] * 4, 'other', 1)
+
+    matrix, file_ids = repo.load_matrix('clip')
+
+    assert matrix.dtype == np.float32 and matrix.shape == (3, 16)
+    assert file_ids.tolist() == [3, 5, 7]
+    for row, file_id in zip(matrix, file_ids):
+        np.testing.assert_array_equal(row, vectors[int(file_id)])
+
+    empty, empty_ids = repo.load_matrix('missing')
+    assert empty.shape[0] == 0 and empty_ids.shape == (0,)
+
+
+def test_legacy_pickled_rows_are_migrated(repo):
+    """Test that rows written before raw storage remain readable."""
+    repo.db.execute(
+        'INSERT INTO embeddings (file_id, embedding, model_version, created_time, dimensions) '
+        'VALUES (?, ?, ?, ?, 0)',
+        (1, pickle.dumps([1.0, 2.0]), 'clip', 1)
+    )
+    repo.add_embedding(2, [3.0, 4.0], 'clip', 1)
+
+    assert repo.get_embedding_by_file(1, 'clip')['embedding'] == [1.0, 2.0]
+    with pytest.raises(ValueError):
+        repo.load_matrix('clip')
+
+    assert repo.migrate_legacy_embeddings() == 1
+    matrix, file_ids = repo.load_matrix('clip')
+    assert matrix.tolist() == [[1.0, 2.0], [3.0, 4.0]]
+    assert file_ids.tolist() == [1, 2]
+
+
+def test_revisions_track_inserts_and_rewrites(repo):
+    """Test that every insert and rewrite gets a newer revision."""
+    first = repo.add_embedding(1, [1.0, 0.0], 'clip', 1)
+    repo.add_embedding(2, [0.0, 1.0], 'clip', 1)
+    assert repo.max_revision('clip') == 2
+    assert repo.max_revision('missing') == 0
+
+    repo.update_embedding(first, [0.5, 0.5])
+    assert repo.max_revision('clip') == 3
+    matrix, file_ids = repo.load_matrix('clip', after_revision=2)
+    assert file_ids.tolist() == [1]
+    assert matrix.tolist() == [[0.5, 0.5]]
+    assert repo.load_matrix('clip', after_revision=3)[1].shape == (0,)
@@ -10,6 +10,7 @@ from nodupe.core.limits import (
     RateLimiter,
     SizeLimit,
     CountLimit,
+    MemoryGovernor,
 )
 
 
@@ -236,3 +237,77 @@ class TestCountLimit:
         
         limit.increment(5)
         assert limit.used == 5
+
+
+class TestMemoryGovernor:
+    """Test MemoryGovernor class."""
+
+    def test_resident_memory_reported(self):
+        """Test that current RSS is non-zero on Linux."""
+        if not Path('/proc/self/statm').exists():
+            pytest.skip('needs /proc')
+        assert Limits.get_memory_usage() > 0
+        assert Limits.get_total_memory() > Limits.get_memory_usage()
+
+    def test_throttle_spills_and_waits_for_low_water(self):
+        """Test that throttling relieves memory and resumes under low water."""
+        readings = iter([90, 90, 80, 60])
+        spilled = []
+        governor = MemoryGovernor(100, sample_interval=0, max_wait=5,
+                                  reader=lambda: next(readings, 60))
+        governor.register_spill(lambda: spilled.append(True))
+
+        assert governor.throttle() is True
+        assert spilled == [True]
+        assert governor.throttle_events == 1
+        assert governor.get_stats()['peak_rss_bytes'] == 90
+        assert governor.throttle() is True
+        assert governor.throttle_events == 1
+
+    def test_throttle_gives_up_after_timeout(self):
+        """Test that producers resume when RSS never drops."""
+        governor = MemoryGovernor(100, sample_interval=0.01, reader=lambda: 95)
+        start = time.monotonic()
+        assert governor.throttle(timeout=0.05) is False
+        assert time.monotonic() - start < 1.0
+        assert governor.throttled_seconds > 0
+
+    def test_throttle_backs_off_while_rss_stays_high(self):
+        """Test that a timed-out wait is not repeated for every item."""
+        rss = [95]
+        spilled = []
+        governor = MemoryGovernor(100, sample_interval=0.05, max_wait=0.2,
+                                  reader=lambda: rss[0])
+        governor.register_spill(lambda: spilled.append(True))
+
+        start = time.monotonic()
+        assert governor.throttle() is False
+        # Relief is limited to one per sample interval while backing off
+        governor.sample_interval = 60
+        assert [governor.throttle() for _ in range(3)] == [False] * 3
+        assert time.monotonic() - start < 0.6
+        assert governor.throttle_events == 1
+        assert spilled == [True]
+        governor.sample_interval = 0.05
+
+        # Growing further past the settled level waits again
+        rss[0] = 101
+        time.sleep(0.06)
+        assert governor.throttle() is False
+        assert governor.throttle_events == 2
+
+        # Dropping under the high-water mark clears the back-off
+        rss[0] = 50
+        time.sleep(0.06)
+        assert governor.throttle() is True
+        rss[0] = 101
+        time.sleep(0.06)
+        governor.throttle(timeout=0.01)
+        assert governor.throttle_events == 3
+
+    def test_invalid_settings(self):
+        """Test budget and water mark validation."""
+        with pytest.raises(LimitsError):
+            MemoryGovernor(0)
+        with pytest.raises(LimitsError):
+            MemoryGovernor(100, high_water=0.5, low_water=0.8)
@@ -509,7 +509,7 @@ class TestBootstrapFunction:
 
     def test_bootstrap(self):
         """Test bootstrap function."""
-        with patch('nodupe.core.loader.logging.basicConfig') as mock_basic_config, \
+        with patch('nodupe.core.loader.Logging.setup_logging') as mock_setup_logging, \
                 patch('nodupe.core.loader.CoreLoader') as mock_core_loader:
 
             # Mock CoreLoader
@@ -521,7 +521,8 @@ class TestBootstrapFunction:
             result = bootstrap()
 
             # Verify
-            mock_basic_config.assert_called_once()
+            mock_setup_logging.assert_called_once()
+            assert mock_setup_logging.call_args.kwargs['asynchronous'] is True
             mock_loader_instance.initialize.assert_called_once()
             assert result is mock_loader_instance
 
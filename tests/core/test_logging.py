@@ -2,12 +2,16 @@
 
 import pytest
 import tempfile
+import json
 import logging
+import logging.handlers
 from pathlib import Path
 from unittest.mock import patch, MagicMock
 from nodupe.core.logging_system import (
+    JsonFormatter,
     Logging,
     LoggingError,
+    RateLimitFilter,
     get_logger,
     setup_logging
 )
@@ -394,3 +398,83 @@ class TestLoggingIntegration:
         # Should complete in reasonable time
         duration = end_time - start_time
         assert duration < 1.0  # Less than 1 second for 1000 messages
+
+
+class TestAsynchronousLogging:
+    """Test queue-based output, rate limiting and JSON lines."""
+
+    def teardown_method(self):
+        """Stop any listener and restore a plain configuration."""
+        Logging.shutdown()
+        Logging.setup_logging()
+
+    def test_queued_records_flushed_on_shutdown(self, tmp_path):
+        """Test that every queued record reaches the file after shutdown."""
+        log_file = tmp_path / "async.log"
+        Logging.setup_logging(log_file=log_file, console_output=False, asynchronous=True,
+                              log_format="%(message)s")
+        root_logger = logging.getLogger()
+        assert len(root_logger.handlers) == 1
+        assert isinstance(root_logger.handlers[0], logging.handlers.QueueHandler)
+
+        logger = logging.getLogger("async_test")
+        for i in range(500):
+            logger.info("record %d", i)
+        try:
+            raise ValueError("boom")
+        except ValueError:
+            logger.exception("failed")
+        Logging.shutdown()
+
+        lines = log_file.read_text().splitlines()
+        assert lines[:500] == [f"record {i}" for i in range(500)]
+        assert "ValueError: boom" in log_file.read_text()
+        # Later records are written directly
+        logger.info("after shutdown")
+        assert log_file.read_text().splitlines()[-1] == "after shutdown"
+
+    def test_rate_limit_suppresses_and_samples(self, tmp_path):
+        """Test burst, sampling and the suppressed count of one call site."""
+        log_file = tmp_path / "limited.log"
+        rate_limit = RateLimitFilter(burst=3, interval=60, sample_every=10)
+        Logging.setup_logging(log_file=log_file, console_output=False, asynchronous=True,
+                              log_format="%(message)s", rate_limit=rate_limit)
+        logger = logging.getLogger("limited")
+        for i in range(100):
+            logger.warning(f"Permission denied: /data/{i}")
+        logger.critical("disk failed")
+        Logging.shutdown()
+
+        lines = log_file.read_text().splitlines()
+        # 3 burst records, then every 10th of the remaining 97
+        assert lines[:4] == ["Permission denied: /data/0", "Permission denied: /data/1",
+                             "Permission denied: /data/2",
+                             "Permission denied: /data/12 [9 similar messages suppressed]"]
+        assert len(lines) == 3 + 9 + 1
+        assert lines[-1] == "disk failed"
+        assert rate_limit.suppressed_total == 100 - 12
+
+    def test_rate_limit_counts_once_across_handlers(self, tmp_path):
+        """Test that a record reaching two synchronous handlers counts once."""
+        rate_limit = RateLimitFilter(burst=2, interval=60, sample_every=0)
+        Logging.setup_logging(log_file=tmp_path / "sync.log", rate_limit=rate_limit)
+        logger = logging.getLogger("sync_limited")
+        for _ in range(5):
+            logger.warning("again")
+        assert rate_limit.suppressed_total == 3
+
+    def test_json_lines_with_context(self, tmp_path):
+        """Test JSON output including context fields."""
+        log_file = tmp_path / "json.log"
+        Logging.setup_logging(log_file=log_file, console_output=False, asynchronous=True,
+                              json_output=True)
+        logger = logging.getLogger("json_test")
+        Logging.log_with_context(logger, "warning", "Skipped file", path="/x", errno=13)
+        Logging.shutdown()
+
+        entry = json.loads(log_file.read_text().splitlines()[0])
+        assert entry["level"] == "WARNING"
+        assert entry["logger"] == "json_test"
+        assert entry["message"] == "Skipped file | path=/x errno=13"
+        assert entry["path"] == "/x" and entry["errno"] == 13
+        assert isinstance(JsonFormatter().format(logging.makeLogRecord({"msg": "x"})), str)
@@ -0,0 +1,122 @@
+"""Tests for query statistics and the slow-query log."""
+
+import os
+import tempfile
+
+import pytest
+
+from nodupe.tools.databases.connection import DatabaseConnection
+from nodupe.tools.databases.files import FileRepository
+from nodupe.tools.databases.schema import DatabaseSchema
+from nodupe.tools.databases.query_stats import (
+    QueryStatistics,
+    QueryStatsError,
+    StatementStats,
+    fingerprint
+)
+
+
+@pytest.fixture
+def db():
+    """Database connection with the full schema and statistics enabled."""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        connection = DatabaseConnection(os.path.join(temp_dir, "stats.db"))
+        DatabaseSchema(connection.get_connection()).create_schema()
+        connection.enable_statistics(slow_query_ms=1000.0)
+        yield connection
+        connection.close()
+
+
+class TestFingerprint:
+    """Test statement fingerprinting."""
+
+    def test_literals_are_normalized(self):
+        """Test that literal values share one fingerprint."""
+        assert fingerprint("SELECT * FROM files WHERE size = 10") == \
+            fingerprint("select *   from files where size = 99")
+        assert fingerprint("SELECT * FROM files WHERE path = 'a'") == \
+            "select * from files where path = ?"
+
+    def test_in_lists_are_collapsed(self):
+        """Test that IN-lists of any length share one fingerprint."""
+        assert fingerprint("SELECT 1 FROM t WHERE id IN (?, ?)") == \
+            fingerprint("SELECT 1 FROM t WHERE id IN (?,?,?,?)")
+
+
+class TestStatementStats:
+    """Test latency histogram percentiles."""
+
+    def test_percentiles(self):
+        """Test that p50/p99 fall in the right histogram buckets."""
+        stats = StatementStats()
+        for _ in range(98):
+            stats.add(1.0, 1)
+        stats.add(50.0, 1)
+        stats.add(400.0, 1)
+
+        assert stats.calls == 100
+        assert 1.0 <= stats.percentile(50) < 1.2
+        assert 50.0 <= stats.percentile(99) < 60.0
+        assert stats.percentile(100) == 400.0
+
+
+class TestQueryStatistics:
+    """Test statement recording through DatabaseConnection."""
+
+    def test_reads_are_recorded_after_fetch(self, db):
+        """Test that rows and calls are charged to the statement."""
+        repo = FileRepository(db)
+        repo.batch_add_files([
+            {'path': f'f{i}', 'size': i % 2, 'modified_time': 1} for i in range(10)
+        ])
+        db.commit()
+
+        repo.find_duplicates_by_size(0)
+        repo.find_duplicates_by_size(1)
+
+        stats = db.statistics.get_stats('SELECT * FROM files WHERE size = ? ORDER BY path')
+        assert stats['calls'] == 2
+        assert stats['rows'] == 10
+        insert = db.statistics.report(sort='rows')['statements'][0]
+        assert insert['fingerprint'].startswith('insert into files')
+
+    def test_slow_queries_capture_plan(self, db):
+        """Test that slow statements are logged with their query plan."""
+        db.statistics.slow_query_ms = 0.0
+        db.execute('SELECT * FROM files WHERE hash = ?', ('abc',)).fetchall()
+
+        slow = db.statistics.report()['slow_queries']
+        assert len(slow) == 1
+        assert any('idx_files_hash' in step for step in slow[0]['plan'])
+
+    def test_unconsumed_cursor_is_recorded(self, db):
+        """Test that a cursor released without fetching is still recorded."""
+        cursor = db.execute('SELECT COUNT(*) FROM files')
+        del cursor
+        assert db.statistics.get_stats('SELECT COUNT(*) FROM files')['calls'] == 1
+
+    def test_save_and_load(self, db):
+        """Test that saved statistics are merged across saves."""
+        conn = db.get_connection()
+        db.execute('SELECT COUNT(*) FROM files').fetchone()
+        db.statistics.save(conn)
+        db.execute('SELECT COUNT(*) FROM files').fetchone()
+        db.statistics.save(conn)
+
+        loaded = QueryStatistics.load(conn)
+        assert loaded.get_stats('SELECT COUNT(*) FROM files')['calls'] == 2
+        assert db.statistics.report()['statements'] == []
+
+        QueryStatistics.clear_saved(conn)
+        assert QueryStatistics.load(conn).report()['statements'] == []
+
+    def test_invalid_sort_key(self):
+        """Test that unknown sort keys are rejected."""
+        with pytest.raises(QueryStatsError):
+            QueryStatistics().report(sort='latency')
+
+    def test_format_report(self, db):
+        """Test the plain text report."""
+        db.execute('SELECT COUNT(*) FROM files').fetchall()
+        text = db.statistics.format_report()
+        assert 'select count(*) from files' in text
@@ -0,0 +1,90 @@
+"""Tests for the NumPy columnar duplicate engine."""
+
+import random
+
+import numpy as np
+import pytest
+
+from nodupe.tools.databases.connection import DatabaseConnection
+from nodupe.tools.databases.files import FileRepository
+from nodupe.tools.databases.schema import DatabaseSchema
+from nodupe.tools.scanner_engine.columnar import (
+    ColumnarError, FileColumns, assign_duplicates, load_file_columns, split_by_full_hash
+)
+
+
+def make_columns(rows):
+    """Columns from (id, size, mtime, path_length, is_duplicate, prefix) rows."""
+    ids, sizes, mtimes, lengths, flags, prefixes = zip(*rows)
+    return FileColumns(np.array(ids, dtype=np.int64), np.array(sizes, dtype=np.int64),
+                       np.array(mtimes, dtype=np.int64), np.array(lengths, dtype=np.int32),
+                       np.array(flags, dtype=bool), np.array(prefixes, dtype=np.uint64))
+
+
+def reference(rows, key):
+    """Dict-of-lists grouping with the keeper chosen by key (ties to lowest id)."""
+    groups = {}
+    for row in rows:
+        groups.setdefault((row[1], row[5]), []).append(row)
+    result = {}
+    for members in groups.values():
+        if len(members) > 1:
+            members = sorted(members, key=lambda row: (key(row), row[0]))
+            result[members[0][0]] = sorted(row[0] for row in members[1:])
+    return result
+
+
+@pytest.mark.parametrize('strategy, key', [
+    ('newest', lambda row: -row[2]),
+    ('oldest', lambda row: row[2]),
+    ('shortest', lambda row: row[3]),
+])
+def test_assignment_matches_dict_grouping(strategy, key):
+    """Test groups and keepers against a plain Python grouping."""
+    rng = random.Random(strategy)
+    rows = [(file_id, rng.choice([0, 10, 20]), rng.randrange(5), rng.randrange(4, 9),
+             rng.random() < 0.2, rng.choice([1, 2 ** 63 + 5, 2 ** 64 - 1]))
+            for file_id in range(1, 501)]
+    columns = make_columns(rows)
+    assignment = assign_duplicates(columns, strategy)
+
+    found = {keeper: sorted(duplicates) for keeper, duplicates in assignment.groups()}
+    assert found == reference(rows, key)
+    assert assignment.group_count == len(found)
+    pairs = dict(zip(assignment.duplicate_ids.tolist(), assignment.duplicate_keeper_ids.tolist()))
+    assert all(pairs[dup] == keeper for keeper, dups in found.items() for dup in dups)
+    flagged = {row[0] for row in rows if row[4]}
+    assert set(assignment.reassigned_ids.tolist()) == flagged & set(found)
+
+
+def test_edge_cases():
+    """Test empty input, no duplicates and unknown strategies."""
+    empty = make_columns([(1, 1, 1, 1, False, 1)])
+    assert assign_duplicates(empty).group_count == 0
+    assert list(assign_duplicates(empty).groups()) == []
+    with pytest.raises(ColumnarError):
+        assign_duplicates(empty, 'largest')
+
+
+def test_columns_load_and_prefix_collisions_split(tmp_path):
+    """Test loading from SQLite and splitting groups whose full hashes differ."""
+    db = DatabaseConnection(str(tmp_path / 'index.db'))
+    DatabaseSchema(db.get_connection()).create_schema()
+    repo = FileRepository(db)
+    shared = 'ab' * 8
+    repo.batch_add_files([
+        {'path': '/x/1', 'size': 7, 'modified_time': 1, 'hash': shared + '00' * 24},
+        {'path': '/x/2', 'size': 7, 'modified_time': 2, 'hash': shared + '00' * 24},
+        {'path': '/x/3', 'size': 7, 'modified_time': 3, 'hash': shared + 'ff' * 24},
+        {'path': '/x/4', 'size': 7, 'modified_time': 4},
+    ])
+
+    columns = load_file_columns(db, batch_size=2)
+    assert columns.ids.tolist() == [1, 2, 3]
+    assert columns.hash_prefixes.tolist() == [0xabababababababab] * 3
+    assert columns.path_lengths.tolist() == [4, 4, 4]
+
+    (keeper, duplicates), = assign_duplicates(columns, 'newest').groups()
+    members = repo.get_files([keeper] + duplicates)
+    assert [[f['id'] for f in group] for group in split_by_full_hash(members)] == [[3], [2, 1]]
+    db.close()
@@ -0,0 +1,120 @@
+"""Tests for the sharded database index."""
+
+import os
+import tempfile
+import pytest
+
+from nodupe.tools.database.sharding import (
+    ShardRouter,
+    ShardingError,
+    DatabaseShardingTool
+)
+
+
+def _files(entries):
+    """Build file dicts from (path, hash) pairs."""
+    return [
+        {'path': path, 'size': 10, 'modified_time': 1, 'hash': hash_value}
+        for path, hash_value in entries
+    ]
+
+
+class TestShardRouter:
+    """Test ShardRouter routing and fan-out queries."""
+
+    def test_hash_routing_is_stable(self):
+        """Test that equal hashes always map to the same shard."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            with ShardRouter(temp_dir, num_shards=4) as router:
+                assert router.shard_for("/a", "00000005") == 1
+                assert router.shard_for("/b", "00000005") == 1
+                assert router.shard_for("/c", "not-hex") == router.shard_for("/d", "not-hex")
+
+    def test_root_routing(self):
+        """Test that files are routed to the longest matching root."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            roots = [os.path.join(temp_dir, "data"), os.path.join(temp_dir, "data", "photos")]
+            with ShardRouter(os.path.join(temp_dir, "idx"), num_shards=2,
+                             strategy="root", roots=roots) as router:
+                assert router.shard_for(os.path.join(roots[0], "x.txt")) == 0
+                assert router.shard_for(os.path.join(roots[1], "y.jpg")) == 1
+
+    def test_batch_add_and_duplicate_groups(self):
+        """Test parallel writes and merged duplicate groups."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            with ShardRouter(temp_dir, num_shards=4) as router:
+                written = router.batch_add_files(_files([
+                    ("/a/1", "aa01"), ("/b/1", "aa01"),
+                    ("/a/2", "bb02"), ("/b/2", "bb02"), ("/c/2", "bb02"),
+                    ("/a/3", "cc03"),
+                ]))
+                assert sum(written.values()) == 6
+                assert router.count_files() == 6
+
+                groups = router.find_duplicate_groups()
+                assert [g['hash'] for g in groups] == ["aa01", "bb02"]
+                assert groups[1]['count'] == 3
+                assert [f['path'] for f in groups[1]['files']] == ["/a/2", "/b/2", "/c/2"]
+
+    def test_cross_shard_duplicates(self):
+        """Test that duplicates split across root shards are merged."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            roots = [os.path.join(temp_dir, "r0"), os.path.join(temp_dir, "r1")]
+            with ShardRouter(os.path.join(temp_dir, "idx"), num_shards=2,
+                             strategy="root", roots=roots) as router:
+                router.batch_add_files(_files([
+                    (os.path.join(roots[0], "a"), "ff00"),
+                    (os.path.join(roots[1], "b"), "ff00"),
+                    (os.path.join(roots[1], "c"), "ee00"),
+                ]))
+                assert router.shard_counts() == [1, 2]
+                assert list(router.iter_cross_shard_duplicates()) == [("ff00", 2)]
+
+                groups = router.find_duplicate_groups()
+                assert len(groups) == 1
+                assert {f['shard'] for f in groups[0]['files']} == {0, 1}
+
+    def test_find_duplicates_by_hash(self):
+        """Test lookup of a single hash."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            with ShardRouter(temp_dir, num_shards=3) as router:
+                router.add_file("/x", 1, 1, "abcd")
+                router.add_file("/y", 1, 1, "abcd")
+                assert [f['path'] for f in router.find_duplicates_by_hash("abcd")] == ["/x", "/y"]
+                assert router.delete_file("/x", "abcd")
+                assert router.count_files() == 1
+
+    def test_manifest_mismatch(self):
+        """Test that reopening with a different layout is rejected."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            ShardRouter(temp_dir, num_shards=2).close()
+            with pytest.raises(ShardingError):
+                ShardRouter(temp_dir, num_shards=3)
+
+    def test_invalid_strategy(self):
+        """Test that unknown strategies are rejected."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            with pytest.raises(ShardingError):
+                ShardRouter(temp_dir, strategy="range")
+
+    def test_closed_router(self):
+        """Test that a closed router refuses queries."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            router = ShardRouter(temp_dir, num_shards=2)
+            router.close()
+            with pytest.raises(ShardingError):
+                router.count_files()
+
+
+class TestDatabaseShardingToolRouter:
+    """Test the sharding tool's router integration."""
+
+    def test_get_router_registers_shards(self):
+        """Test that opening the router lists its shards."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            tool = DatabaseShardingTool({'shard_dir': temp_dir, 'num_shards': 2})
+            router = tool.get_router()
+            assert router is tool.get_router()
+            assert tool.list_shards() == ["shard_000", "shard_001"]
+            assert tool.api_methods['count_files']() == 0
+            tool.shutdown()
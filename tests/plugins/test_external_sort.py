@@ -0,0 +1,155 @@
+"""Tests for external merge-sort duplicate grouping."""
+
+import argparse
+import hashlib
+import json
+import os
+import random
+
+import pytest
+
+from nodupe.tools.commands.plan import PlanTool
+from nodupe.tools.databases.connection import DatabaseConnection
+from nodupe.tools.databases.files import FileRepository
+from nodupe.tools.databases.schema import DatabaseSchema
+from nodupe.tools.scanner_engine.external_sort import (
+    ExternalDuplicateGrouper, ExternalSortError, group_repository_files, group_scan_results
+)
+
+
+def digest(value):
+    """SHA-256 hex digest of a small integer."""
+    return hashlib.sha256(str(value).encode()).hexdigest()
+
+
+@pytest.fixture
+def repository(tmp_path):
+    """File repository with three duplicate groups and a same-size distinct file."""
+    db = DatabaseConnection(str(tmp_path / 'index.db'))
+    DatabaseSchema(db.get_connection()).create_schema()
+    repo = FileRepository(db)
+    repo.batch_add_files([
+        {'path': '/a/one', 'size': 10, 'modified_time': 1, 'hash': digest(1)},
+        {'path': '/b/one', 'size': 10, 'modified_time': 3, 'hash': digest(1)},
+        {'path': '/a/two', 'size': 20, 'modified_time': 1, 'hash': digest(2)},
+        {'path': '/b/two', 'size': 20, 'modified_time': 2, 'hash': digest(2)},
+        {'path': '/c/two', 'size': 20, 'modified_time': 5, 'hash': digest(2)},
+        {'path': '/a/other', 'size': 20, 'modified_time': 1, 'hash': digest(3)},
+        {'path': '/a/unhashed', 'size': 10, 'modified_time': 1},
+    ])
+    yield repo
+    db.close()
+
+
+def test_groups_match_in_memory_grouping(tmp_path):
+    """Test that many small runs and merge passes give the dict-of-lists result."""
+    rng = random.Random(7)
+    records = [(file_id, rng.choice([1, 2, 3]) * 100, digest(rng.randrange(40)))
+               for file_id in range(1, 2001)]
+    expected = {}
+    for file_id, size, file_hash in records:
+        expected.setdefault((size, file_hash), []).append(file_id)
+
+    with ExternalDuplicateGrouper(directory=str(tmp_path), run_records=50,
+                                  merge_width=4) as grouper:
+        assert grouper.add_many(records) == 2000
+        assert grouper.merge_passes > 0
+        assert grouper.run_count < 4
+        groups = list(grouper.groups())
+
+    assert os.listdir(tmp_path) == []
+    assert {(g.size, g.hash): g.file_ids for g in groups} == {
+        key: ids for key, ids in expected.items() if len(ids) > 1}
+    assert [g.size for g in groups] == sorted(g.size for g in groups)
+
+
+def test_record_validation():
+    """Test hash format checks."""
+    grouper = ExternalDuplicateGrouper(hash_bytes=16)
+    grouper.add(1, hashlib.md5(b'x').hexdigest(), 1)
+    with pytest.raises(ExternalSortError):
+        grouper.add(1, 'not-hex', 3)
+    grouper.close()
+    with pytest.raises(ExternalSortError):
+        grouper.add(1, hashlib.md5(b'x').hexdigest(), 4)
+
+
+def test_digest_widths():
+    """Test short digests come back unpadded and wide ones still group."""
+    md5 = hashlib.md5(b'x').hexdigest()
+    sha512 = hashlib.sha512(b'x').hexdigest()
+    other = hashlib.sha512(b'y').hexdigest()
+    with ExternalDuplicateGrouper() as grouper:
+        grouper.add_many([(1, 7, md5), (2, 7, md5), (3, 7, md5 + '00'), (4, 7, md5 + '00'),
+                          (5, 7, sha512), (6, 7, sha512), (7, 7, other)])
+        groups = {tuple(group.file_ids): group.hash for group in grouper.groups()}
+    assert groups == {(1, 2): md5, (3, 4): md5 + '00', (5, 6): None}
+
+    with ExternalDuplicateGrouper(hash_bytes=64) as grouper:
+        grouper.add_many([(5, 7, sha512), (6, 7, sha512), (7, 7, other)])
+        assert [group.hash for group in grouper.groups()] == [sha512]
+
+
+def test_scan_results_grouped(tmp_path):
+    """Test grouping FileProcessor-style dicts."""
+    files = [{'path': f'/f{i}', 'size': 5, 'hash': digest(i % 2)} for i in range(5)]
+    files.append({'path': '/empty', 'size': 0, 'hash': None})
+    groups = list(group_scan_results(files, run_records=2, directory=str(tmp_path)))
+    assert sorted(sorted(f['path'] for f in group) for group in groups) == [
+        ['/f0', '/f2', '/f4'], ['/f1', '/f3']]
+
+
+def test_scan_results_yield_when_complete(tmp_path):
+    """Test that a group is yielded once its last member has been read."""
+    files = [{'path': f'/f{i}', 'size': 5, 'hash': digest(i // 2)} for i in range(6)]
+    read = []
+
+    class Reader:
+        def __iter__(self):
+            for file_info in files:
+                read.append(file_info['path'])
+                yield file_info
+
+    groups = group_scan_results(Reader(), directory=str(tmp_path))
+    assert [f['path'] for f in next(groups)] == ['/f0', '/f1']
+    # The whole first pass, then only as far as the group's last member
+    assert read == [f['path'] for f in files] + ['/f0', '/f1']
+
+
+def test_repository_groups_wide_digests(repository):
+    """Test that the record width follows the longest stored digest."""
+    wide = hashlib.sha512(b'wide').hexdigest()
+    repository.batch_add_files([
+        {'path': '/w/1', 'size': 30, 'modified_time': 1, 'hash': wide},
+        {'path': '/w/2', 'size': 30, 'modified_time': 1, 'hash': wide},
+    ])
+    assert repository.max_hash_bytes() == 64
+    groups = [sorted(f['path'] for f in group) for group in group_repository_files(repository)]
+    assert groups[-1] == ['/w/1', '/w/2']
+
+
+def test_repository_groups(repository):
+    """Test streaming groups from the database by hash and by size."""
+    by_hash = [sorted(f['path'] for f in group) for group in group_repository_files(repository)]
+    assert by_hash == [['/a/one', '/b/one'], ['/a/two', '/b/two', '/c/two']]
+
+    by_size = [len(group) for group in group_repository_files(repository, by='size')]
+    assert by_size == [3, 4]
+
+
+def test_plan_engines_agree(repository, tmp_path):
+    """Test that plan writes the same actions with either engine."""
+    plans = {}
+    for engine in ('memory', 'external', 'columnar'):
+        output = tmp_path / f'{engine}.json'
+        args = argparse.Namespace(strategy='newest', output=str(output), engine=engine,
+                                  container=argparse.Namespace(get_service=lambda name: repository.db))
+        assert PlanTool().execute_plan(args) == 0
+        plans[engine] = json.loads(output.read_text())
+
+    memory_actions = plans['memory']['actions']
+    for engine in ('external', 'columnar'):
+        assert sorted(map(json.dumps, memory_actions)) == sorted(map(json.dumps, plans[engine]['actions']))
+    assert plans['external']['metadata']['stats']['duplicates_found'] == 3
+    keepers = {a['path'] for a in memory_actions if a['type'] == 'KEEP'}
+    assert keepers == {'/b/one', '/c/two'}
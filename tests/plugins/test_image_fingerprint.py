@@ -0,0 +1,101 @@
+"""Tests for batched pHash/dHash image fingerprints."""
+
+import os
+import tempfile
+
+import numpy as np
+import pytest
+
+from nodupe.tools.databases.connection import DatabaseConnection
+from nodupe.tools.databases.files import FileRepository
+from nodupe.tools.databases.schema import DatabaseSchema
+from nodupe.tools.image.fingerprint_logic import (
+    PIL_AVAILABLE, ImageFingerprintError, ImageFingerprinter, area_resample_matrix, dct_matrix,
+    dhash_batch, phash_batch
+)
+from nodupe.tools.similarity.hamming import hamming_distance
+
+
+def _scene(rng):
+    """Smooth random 32x32 'photo'."""
+    coarse = rng.uniform(0, 255, (4, 4))
+    return np.kron(coarse, np.ones((8, 8))) + rng.normal(0, 2, (32, 32))
+
+
+@pytest.fixture
+def thumbnails():
+    """Two unrelated scenes and a brightened, noisy copy of the first."""
+    rng = np.random.default_rng(8)
+    first, second = _scene(rng), _scene(rng)
+    edited = np.clip(first * 1.1 + 10 + rng.normal(0, 3, first.shape), 0, 255)
+    return np.stack([first, edited, second])
+
+
+def test_precomputed_matrices():
+    """Test the DCT basis is orthonormal and resampling rows average."""
+    dct = dct_matrix(32).astype(np.float64)
+    np.testing.assert_allclose(dct @ dct.T, np.eye(32), atol=1e-5)
+    resample = area_resample_matrix(32, 9)
+    np.testing.assert_allclose(resample.sum(axis=1), 1.0, rtol=1e-6)
+    np.testing.assert_allclose(resample @ np.full(32, 7.0), 7.0, rtol=1e-6)
+
+
+@pytest.mark.parametrize('hash_batch', [phash_batch, dhash_batch])
+def test_hashes_survive_edits_but_separate_scenes(thumbnails, hash_batch):
+    """Test that near-copies are close and different scenes far apart."""
+    hashes = hash_batch(thumbnails).tolist()
+    assert all(0 <= h < 2 ** 64 for h in hashes)
+    assert hamming_distance(hashes[0], hashes[1]) <= 6
+    assert hamming_distance(hashes[0], hashes[2]) >= 16
+
+
+def test_batch_matches_single_thumbnails(thumbnails):
+    """Test that stacking does not change individual results."""
+    batch = ImageFingerprinter.fingerprint_arrays(thumbnails)
+    assert batch == [ImageFingerprinter.fingerprint_arrays(t)[0] for t in thumbnails]
+    with pytest.raises(ImageFingerprintError):
+        ImageFingerprinter.fingerprint_arrays(np.zeros((2, 16, 16)))
+
+
+def test_hash_columns_round_trip_unsigned_values():
+    """Test storing 64-bit hashes above the signed INTEGER range."""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        db = DatabaseConnection(os.path.join(temp_dir, "images.db"))
+        DatabaseSchema(db.get_connection()).create_schema()
+        files = FileRepository(db)
+        files.batch_add_files([{'path': f'/img/{i}.jpg', 'size': 1, 'modified_time': 1} for i in range(3)])
+
+        assert files.batch_update_perceptual_hashes([(1, 2 ** 64 - 1, 5), (3, 2 ** 63, None)]) == 2
+        assert files.get_perceptual_hashes() == [(1, 2 ** 64 - 1), (3, 2 ** 63)]
+        assert files.get_perceptual_hashes('dhash') == [(1, 5)]
+        with pytest.raises(ValueError):
+            files.get_perceptual_hashes('hash')
+        db.close()
+
+
+@pytest.mark.skipif(not PIL_AVAILABLE, reason="Pillow is not installed")
+def test_fingerprint_database_decodes_images(tmp_path, thumbnails):
+    """Test decoding, batching and writing fingerprints to the files table."""
+    from PIL import Image
+
+    paths = []
+    for i, thumbnail in enumerate(thumbnails):
+        path = tmp_path / f"image{i}.jpg"
+        Image.fromarray(np.kron(thumbnail, np.ones((40, 40))).astype(np.uint8)).save(path, quality=90)
+        paths.append(str(path))
+    (tmp_path / "broken.png").write_bytes(b"not an image")
+    (tmp_path / "notes.txt").write_text("text")
+    paths += [str(tmp_path / "broken.png"), str(tmp_path / "notes.txt")]
+
+    db = DatabaseConnection(str(tmp_path / "images.db"))
+    DatabaseSchema(db.get_connection()).create_schema()
+    files = FileRepository(db)
+    files.batch_add_files([{'path': p, 'size': 1, 'modified_time': 1} for p in paths])
+
+    fingerprinter = ImageFingerprinter(max_workers=2, batch_size=2)
+    assert fingerprinter.fingerprint_database(db, page_size=2) == 3
+    phashes = dict(files.get_perceptual_hashes())
+    assert sorted(phashes) == [1, 2, 3]
+    assert hamming_distance(phashes[1], phashes[2]) < hamming_distance(phashes[1], phashes[3])
+    assert fingerprinter.fingerprint_database(db) == 0
+    db.close()
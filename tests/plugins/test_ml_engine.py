@@ -0,0 +1,161 @@
+"""Tests for the batched, prefetching embedding engine."""
+
+import os
+import tempfile
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from nodupe.tools.databases.connection import DatabaseConnection
+from nodupe.tools.databases.embeddings import EmbeddingRepository
+from nodupe.tools.databases.files import FileRepository
+from nodupe.tools.databases.schema import DatabaseSchema
+from nodupe.tools.ml import ONNXBackend
+from nodupe.tools.ml.engine import (
+    ONNXRUNTIME_AVAILABLE, EmbeddingEngine, EmbeddingEngineError, get_inference_session
+)
+
+PROJECTION = np.random.default_rng(3).standard_normal((16, 8)).astype(np.float32)
+
+
+class RecordingModel:
+    """Linear model that records the size of every batch it runs."""
+
+    def __init__(self):
+        self.batch_sizes = []
+
+    def __call__(self, batch):
+        self.batch_sizes.append(len(batch))
+        return batch @ PROJECTION
+
+
+def test_embed_batches_in_order():
+    """Test that results match per-item inference, in input order."""
+    model = RecordingModel()
+    engine = EmbeddingEngine(model, batch_size=8, max_latency=1.0)
+    inputs = [np.full(16, i, dtype=np.float32) for i in range(30)]
+
+    results = list(engine.embed(inputs))
+
+    assert [item[0] for item, _ in results] == list(range(30))
+    for item, embedding in results:
+        assert np.allclose(embedding, item @ PROJECTION)
+    assert model.batch_sizes == [8, 8, 8, 6]
+    assert engine.batches_run == 4
+
+
+def test_latency_budget_closes_partial_batches():
+    """Test that a slow producer does not hold back ready inputs."""
+    model = RecordingModel()
+    engine = EmbeddingEngine(model, batch_size=64, max_latency=0.01, prefetch_workers=1)
+
+    def slow_inputs():
+        for i in range(3):
+            yield np.full(16, i, dtype=np.float32)
+            time.sleep(0.1)
+
+    results = list(engine.embed(slow_inputs()))
+
+    assert len(results) == 3
+    assert len(model.batch_sizes) == 3
+
+
+def test_preprocessing_runs_ahead_on_producer_threads():
+    """Test prefetching and that failed inputs are passed through as None."""
+    threads = set()
+
+    def preprocess(item):
+        threads.add(threading.current_thread().name)
+        if item == 'bad':
+            raise ValueError('cannot decode')
+        return np.full(16, float(item), dtype=np.float32)
+
+    engine = EmbeddingEngine(RecordingModel(), preprocess=preprocess, batch_size=4)
+    results = list(engine.embed(['1', 'bad', '2', '3']))
+
+    assert [embedding is None for _, embedding in results] == [False, True, False, False]
+    assert all(name.startswith('embedding-prefetch') for name in threads)
+
+    with pytest.raises(EmbeddingEngineError):
+        EmbeddingEngine(RecordingModel(), batch_size=0)
+
+
+def test_embed_to_repository_writes_in_bulk():
+    """Test bulk storage of embeddings through EmbeddingRepository."""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        db = DatabaseConnection(os.path.join(temp_dir, 'test.db'))
+        DatabaseSchema(db.get_connection()).create_schema()
+        FileRepository(db).batch_add_files([
+            {'path': f'/data/{i}.bin', 'size': 1, 'modified_time': 0,
+             'created_time': 0, 'scanned_at': 0, 'hash': f'h{i}'}
+            for i in range(10)
+        ])
+        ids = [row[0] for row in db.execute('SELECT id FROM files ORDER BY id').fetchall()]
+
+        engine = EmbeddingEngine(RecordingModel(), batch_size=4)
+        items = [(file_id, np.full(16, file_id, dtype=np.float32)) for file_id in ids]
+        stored = engine.embed_to_repository(items, EmbeddingRepository(db), 'linear-v1',
+                                            write_batch=3)
+
+        assert stored == 10
+        matrix, file_ids = EmbeddingRepository(db).load_matrix('linear-v1')
+        assert sorted(file_ids) == ids
+        assert matrix.shape == (10, 8)
+        db.close()
+
+
+def test_onnx_backend_without_runtime_falls_back():
+    """Test that the ONNX backend degrades to the CPU backend."""
+    backend = ONNXBackend(model_path=None)
+    assert not backend.is_available()
+    assert len(backend.generate_embeddings(['some text'])[0]) == 128
+    if not ONNXRUNTIME_AVAILABLE:
+        with pytest.raises(EmbeddingEngineError):
+            get_inference_session('model.onnx')
+
+
+def test_abandoned_stream_releases_threads():
+    """Test that closing the stream early stops the feeder and the pool."""
+    engine = EmbeddingEngine(RecordingModel(), batch_size=2, prefetch_depth=4)
+    stream = engine.embed(np.zeros(16, dtype=np.float32) for _ in range(1000))
+    next(stream)
+    stream.close()
+    assert not any(t.name == 'embedding-feeder' for t in threading.enumerate())
+
+    def broken_inputs():
+        yield np.zeros(16, dtype=np.float32)
+        raise OSError('disk gone')
+
+    with pytest.raises(EmbeddingEngineError):
+        list(engine.embed(broken_inputs()))
+
+
+def test_onnx_backend_returns_none_for_failed_inputs():
+    """Test that failed inputs are not stored as placeholder vectors."""
+    def preprocess(item):
+        if item is None:
+            raise ValueError('unreadable')
+        return np.asarray(item, dtype=np.float32)
+
+    backend = ONNXBackend(model_path=None)
+    backend._engine = EmbeddingEngine(RecordingModel(), preprocess=preprocess, batch_size=2)
+    backend._available = True
+    embeddings = backend.generate_embeddings([np.ones(16), None, np.zeros(16)])
+    assert [embedding is None for embedding in embeddings] == [False, True, False]
+    assert len(embeddings[0]) == 8
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        db = DatabaseConnection(os.path.join(temp_dir, "skip.db"))
+        DatabaseSchema(db.get_connection()).create_schema()
+        FileRepository(db).batch_add_files([
+            {'path': f'/data/{i}.bin', 'size': 1, 'modified_time': 0} for i in range(3)])
+        repository = EmbeddingRepository(db)
+        stored = repository.batch_add_embeddings([
+            {'file_id': file_id, 'embedding': embedding, 'model_version': 'linear-v1',
+             'created_time': 0}
+            for file_id, embedding in zip((1, 2, 3), embeddings)])
+        assert stored == 2
+        assert repository.load_matrix('linear-v1')[1].tolist() == [1, 3]
+        db.close()
@@ -0,0 +1,119 @@
+"""Tests for executor calibration and calibrated smart_map routing."""
+
+import json
+
+import pytest
+
+from nodupe.tools.parallel import calibration
+from nodupe.tools.parallel.calibration import (
+    CalibrationError, ExecutorCalibrator, get_calibrated_executor, host_key, load_calibration
+)
+from nodupe.tools.parallel.parallel_logic import Parallel
+
+
+@pytest.fixture
+def calibration_file(tmp_path, monkeypatch):
+    """Calibration file isolated from the user's home directory."""
+    path = tmp_path / 'calibration.json'
+    monkeypatch.setenv(calibration.CALIBRATION_FILE_ENV, str(path))
+    return path
+
+
+def test_calibration_persists_winner_per_host(calibration_file):
+    """Test that calibration stores a measured winner under this host's key."""
+    calibrator = ExecutorCalibrator(workers=2, scale=0.02, repeats=1)
+    records = calibrator.calibrate(['hash_small', 'minhash'])
+
+    stored = json.loads(calibration_file.read_text())
+    assert set(stored[host_key()]) == {'hash_small', 'minhash'}
+    for task_class, record in records.items():
+        rates = record['items_per_second']
+        assert set(rates) == set(calibrator.executors)
+        assert record['winner'] == max((r, name) for name, r in rates.items() if r)[1]
+        assert get_calibrated_executor(task_class) == record['winner']
+    assert get_calibrated_executor('phash') is None
+
+    with pytest.raises(CalibrationError):
+        calibrator.benchmark('video')
+
+
+def test_other_hosts_are_kept(calibration_file):
+    """Test that calibrating one interpreter keeps other interpreters' results."""
+    calibration_file.write_text(json.dumps(
+        {'other|x86_64|CPython-3.13t|cpus=64': {'phash': {'winner': 'thread'}}}))
+
+    ExecutorCalibrator(workers=1, scale=0.02, repeats=1,
+                       executors=['thread']).calibrate(['hash_small'])
+
+    stored = load_calibration()
+    assert stored['other|x86_64|CPython-3.13t|cpus=64'] == {'phash': {'winner': 'thread'}}
+    assert stored[host_key()]['hash_small']['winner'] == 'thread'
+
+
+def test_smart_map_routes_to_calibrated_executor(calibration_file, monkeypatch):
+    """Test smart_map uses the stored winner and falls back when uncalibrated."""
+    calibration_file.write_text(json.dumps(
+        {host_key(): {'hash_large': {'winner': 'process'}}}))
+    calls = []
+    original = Parallel.map_parallel
+
+    def recording_map(func, items, workers=None, use_processes=False, **kwargs):
+        calls.append(use_processes)
+        return original(func, items, workers=workers, **kwargs)
+
+    monkeypatch.setattr(Parallel, 'map_parallel', staticmethod(recording_map))
+
+    assert Parallel.smart_map(abs, [-1, -2], task_class='hash_large') == [1, 2]
+    assert Parallel.smart_map(abs, [-3], task_type='io', task_class='phash') == [3]
+    assert calls == [True, False]
+
+
+def test_smart_map_reuses_calibrated_settings(calibration_file, monkeypatch):
+    """Test that routing uses the calibrated pool size, chunking and timeout."""
+    calibration_file.write_text(json.dumps({host_key(): {'hash_small': {
+        'winner': 'thread', 'workers': 3, 'chunks_per_worker': 2}}}))
+    mapped = []
+    submitted = []
+    original_map = Parallel.map_parallel
+    original_submit = Parallel.process_in_parallel
+
+    def recording_map(func, items, **kwargs):
+        mapped.append((kwargs['workers'], kwargs['chunk_size']))
+        return original_map(func, items, **kwargs)
+
+    def recording_submit(func, items, **kwargs):
+        submitted.append((kwargs['workers'], kwargs['timeout']))
+        return original_submit(func, items, **kwargs)
+
+    monkeypatch.setattr(Parallel, 'map_parallel', staticmethod(recording_map))
+    monkeypatch.setattr(Parallel, 'process_in_parallel', staticmethod(recording_submit))
+
+    assert Parallel.smart_map(abs, list(range(-60, 0)), task_class='hash_small') == list(range(60, 0, -1))
+    assert Parallel.smart_map(abs, [-1], timeout=5.0, task_class='hash_small') == [1]
+    assert Parallel.smart_map(abs, [-1], task_type='io', timeout=5.0) == [1]
+    assert mapped == [(3, 10)]
+    assert submitted == [(3, 5.0), (None, 5.0)]
+
+
+def test_hash_files_routes_through_calibrated_executor(calibration_file, monkeypatch, tmp_path):
+    """Test that FileHasher.hash_files uses the hashing task classes."""
+    from nodupe.tools.hashing.hasher_logic import FileHasher
+
+    paths = []
+    for index in range(3):
+        paths.append(tmp_path / f'{index}.bin')
+        paths[-1].write_bytes(bytes([index]) * 100)
+    classes = []
+    original = Parallel.smart_map
+
+    def recording_smart_map(func, items, **kwargs):
+        classes.append(kwargs.get('task_class'))
+        return original(func, items, **kwargs)
+
+    monkeypatch.setattr(Parallel, 'smart_map', staticmethod(recording_smart_map))
+    hasher = FileHasher()
+    files = [str(path) for path in paths] + [str(tmp_path / 'missing.bin')]
+    results = hasher.hash_files(files)
+
+    assert classes == ['hash_small']
+    assert results == {str(path): hasher.hash_file(str(path)) for path in paths}
@@ -0,0 +1,183 @@
+"""Tests for the adaptive worker-count controller."""
+
+import threading
+import time
+
+import pytest
+
+from nodupe.tools.parallel.controller import ConcurrencyController, ControllerError
+from nodupe.tools.parallel.pipeline import Pipeline, Stage
+from nodupe.tools.parallel.pools import WorkerPool
+
+
+class FakeClock:
+    """Manually advanced clock."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def run_window(controller, clock, throughput, latency, samples=8):
+    """Report one second of work at the given bytes/s and latency."""
+    clock.now += 1.0
+    for _ in range(samples):
+        controller.record(latency, int(throughput / samples))
+
+
+def device(workers, best=6):
+    """Storage whose throughput peaks at `best` concurrent reads."""
+    return 100e6 * min(workers, best) - 20e6 * max(0, workers - best)
+
+
+def test_hill_climbing_finds_device_optimum():
+    """Test that the limit climbs to and stays near the throughput peak."""
+    clock = FakeClock()
+    controller = ConcurrencyController(max_workers=32, initial_workers=1, clock=clock,
+                                       latency_factor=100.0)
+    for _ in range(40):
+        run_window(controller, clock, device(controller.limit), 0.01)
+
+    assert controller.limit == 6
+    reasons = [decision.reason for decision in controller.decisions]
+    assert 'throughput up' in reasons
+    assert 'no gain, reclaiming' in reasons
+    assert reasons[-1] == 'plateau'
+    assert 'MiB/s' in controller.last_decision.describe()
+
+
+def test_throughput_drop_reverses_direction():
+    """Test that a step that costs throughput is undone."""
+    clock = FakeClock()
+    controller = ConcurrencyController(max_workers=32, initial_workers=4, clock=clock)
+    run_window(controller, clock, 100e6, 0.01)
+    assert controller.limit == 5
+
+    run_window(controller, clock, 60e6, 0.01)
+
+    assert controller.last_decision.reason == 'throughput down, reversing'
+    assert controller.limit == 4
+
+
+def test_latency_blowup_backs_off_multiplicatively():
+    """Test the multiplicative decrease when latency grows without gain."""
+    clock = FakeClock()
+    controller = ConcurrencyController(max_workers=32, initial_workers=16, clock=clock)
+    run_window(controller, clock, 50e6, 0.01)
+    before = controller.limit
+
+    run_window(controller, clock, 50e6, 0.05)
+
+    assert controller.last_decision.reason == 'latency backoff'
+    assert controller.limit == before // 2
+
+    with pytest.raises(ControllerError):
+        ConcurrencyController(min_workers=4, max_workers=2)
+
+
+def test_large_files_do_not_trigger_latency_backoff():
+    """Test that latency is compared per byte when bytes are measured."""
+    clock = FakeClock()
+    controller = ConcurrencyController(max_workers=32, initial_workers=16, clock=clock)
+    for _ in range(6):
+        # Same bytes/s and busy time per byte; the large files take 8x longer each
+        run_window(controller, clock, 50e6, 0.001, samples=64)
+        run_window(controller, clock, 50e6, 0.008, samples=8)
+
+    reasons = [decision.reason for decision in controller.decisions]
+    assert 'latency backoff' not in reasons
+    assert min(decision.workers for decision in controller.decisions) >= 15
+
+
+def test_pipeline_stage_follows_controller():
+    """Test that a controlled stage runs no more tasks than the limit."""
+    active = []
+    peak = []
+    lock = threading.Lock()
+
+    def work(item):
+        with lock:
+            active.append(item)
+            peak.append(len(active))
+        time.sleep(0.002)
+        with lock:
+            active.remove(item)
+        return item
+
+    decisions = []
+    controller = ConcurrencyController(max_workers=8, initial_workers=2, min_samples=4,
+                                       sample_interval=0.01, on_decision=decisions.append)
+    pipeline = Pipeline([Stage('work', work, controller=controller, size_of=lambda item: 4096)])
+
+    assert list(pipeline.run(range(100))) == list(range(100))
+    assert decisions and decisions[0].previous == 2
+    assert max(peak[:4]) <= 2
+    assert pipeline.metrics()['work']['workers'] == controller.limit
+
+
+def test_worker_pool_parks_workers_above_limit():
+    """Test that WorkerPool only lets `limit` workers take tasks."""
+    running = []
+    peak = []
+    lock = threading.Lock()
+
+    def task():
+        with lock:
+            running.append(1)
+            peak.append(len(running))
+        time.sleep(0.005)
+        with lock:
+            running.pop()
+
+    controller = ConcurrencyController(max_workers=8, initial_workers=2, min_samples=10 ** 6)
+    pool = WorkerPool(controller=controller)
+    pool.start()
+    for _ in range(20):
+        pool.submit(task)
+    pool._queue.join()
+    pool.shutdown(wait=False)
+
+    assert len(peak) == 20
+    assert max(peak) <= 2
+
+
+def test_worker_pool_parks_idle_workers_when_limit_drops():
+    """Test that workers already waiting for tasks honour a lowered limit."""
+    running = []
+    peak = []
+    lock = threading.Lock()
+
+    def task():
+        with lock:
+            running.append(1)
+            peak.append(len(running))
+        time.sleep(0.005)
+        with lock:
+            running.pop()
+
+    controller = ConcurrencyController(max_workers=4, initial_workers=4, min_samples=10 ** 6)
+    pool = WorkerPool(controller=controller)
+    pool.start()
+    time.sleep(0.1)  # every worker is now waiting on the empty queue
+    controller._limit = 1
+    for _ in range(20):
+        pool.submit(task)
+    pool._queue.join()
+    pool.shutdown(wait=False)
+
+    assert len(peak) == 20
+    assert max(peak) == 1
+
+
+def test_decision_history_is_bounded(monkeypatch):
+    """Test that only the most recent decisions are kept."""
+    monkeypatch.setattr('nodupe.tools.parallel.controller.DECISION_HISTORY', 5)
+    clock = FakeClock()
+    controller = ConcurrencyController(max_workers=8, clock=clock)
+    for _ in range(12):
+        run_window(controller, clock, device(controller.limit), 0.01)
+
+    assert len(controller.decisions) == 5
+    assert controller.get_stats()['decisions'] == 12
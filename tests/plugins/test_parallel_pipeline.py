@@ -0,0 +1,128 @@
+"""Tests for the streaming stage pipeline."""
+
+import threading
+import time
+
+import pytest
+
+from nodupe.tools.maintenance.snapshot import SnapshotManager
+from nodupe.tools.parallel.pipeline import Pipeline, PipelineError, Stage, run_pipeline
+
+
+def square(value):
+    """Top-level stage function, picklable for process pools."""
+    return value * value
+
+
+def test_ordered_stages_with_fan_out_and_drops():
+    """Test results keep input order through fan-out and dropping stages."""
+    def jitter(value):
+        time.sleep(0.001 * (value % 3))
+        return value
+
+    pipeline = Pipeline([
+        Stage('jitter', jitter, workers=4),
+        Stage('split', lambda value: [value, value + 0.5], fan_out=True, workers=2),
+        Stage('odd', lambda value: None if value == 3 else value, workers=3),
+    ])
+
+    results = list(pipeline.run(range(10)))
+
+    expected = [x for value in range(10) for x in (value, value + 0.5) if x != 3]
+    assert results == expected
+    metrics = pipeline.metrics()
+    assert list(metrics) == ['jitter', 'split', 'odd']
+    assert metrics['split']['items_out'] == 20
+    assert metrics['odd']['dropped'] == 1
+    assert metrics['odd']['queue_depth'] == 0
+
+
+def test_unordered_and_process_stages():
+    """Test unordered delivery and a process pool stage."""
+    results = run_pipeline(range(20), [
+        Stage('square', square, workers=2, executor='process'),
+        Stage('inc', lambda value: value + 1, workers=4, ordered=False),
+    ])
+    assert sorted(results) == sorted(v * v + 1 for v in range(20))
+
+    with pytest.raises(PipelineError):
+        Stage('bad', square, executor='gpu')
+
+
+def test_slow_stage_applies_backpressure():
+    """Test that a slow stage bounds how far the source runs ahead."""
+    pulled = []
+    consumed = []
+
+    def source():
+        for value in range(200):
+            pulled.append(value)
+            yield value
+
+    pipeline = Pipeline([
+        Stage('fast', lambda value: value, workers=2, queue_size=4),
+        Stage('slow', lambda value: time.sleep(0.002) or value, workers=1, queue_size=4),
+    ])
+    for value in pipeline.run(source()):
+        consumed.append(value)
+        # Queues of 4 plus two tasks per worker in flight per stage
+        assert len(pulled) - len(consumed) <= 40
+
+    assert consumed == list(range(200))
+    assert pipeline.metrics()['slow']['max_queue_depth'] <= 4
+
+
+def test_errors_are_skipped_or_raised():
+    """Test the skip and raise error policies."""
+    def fragile(value):
+        if value == 5:
+            raise ValueError('bad item')
+        return value
+
+    pipeline = Pipeline([Stage('fragile', fragile, workers=2)])
+    assert list(pipeline.run(range(8))) == [0, 1, 2, 3, 4, 6, 7]
+    assert pipeline.metrics()['fragile']['errors'] == 1
+
+    with pytest.raises(PipelineError, match='fragile'):
+        list(Pipeline([Stage('fragile', fragile)], on_error='raise').run(range(8)))
+
+
+def test_cancellation_releases_threads():
+    """Test that abandoning the stream stops every pipeline thread."""
+    pipeline = Pipeline([Stage('identity', lambda value: value, workers=2)])
+    stream = pipeline.run(iter(range(10 ** 9)))
+    assert next(stream) == 0
+    stream.close()
+
+    assert pipeline.cancelled
+    assert not any(t.name.startswith('pipeline-') for t in threading.enumerate())
+
+
+def test_snapshot_backs_up_files_through_pipeline(tmp_path):
+    """Test concurrent snapshot creation keeps file order and deduplicates content."""
+    paths = []
+    for index in range(12):
+        path = tmp_path / f'file{index}.txt'
+        path.write_text(f'content {index % 4}')
+        paths.append(str(path))
+
+    manager = SnapshotManager(backup_dir=str(tmp_path / 'backups'))
+    snapshot = manager.create_snapshot(paths + [str(tmp_path / 'missing.txt')], workers=4)
+
+    assert [f.path for f in snapshot.files] == paths
+    assert len(list(manager.content_dir.iterdir())) == 4
+
+
+def test_pipeline_source_waits_on_governor():
+    """Test that the pipeline feeder throttles before each item."""
+    calls = []
+
+    class CountingGovernor:
+        def throttle(self):
+            calls.append(True)
+            return True
+
+    pipeline = Pipeline([Stage('double', lambda x: x * 2, workers=2)],
+                        governor=CountingGovernor())
+    assert sorted(pipeline.run(range(10))) == [i * 2 for i in range(10)]
+    assert len(calls) == 10
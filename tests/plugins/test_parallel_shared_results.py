@@ -0,0 +1,99 @@
+"""Tests for the shared-memory result transport."""
+
+import hashlib
+import os
+import subprocess
+import sys
+
+import numpy as np
+import pytest
+
+from nodupe.tools.parallel.parallel_logic import Parallel, ParallelError
+from nodupe.tools.parallel.shared_results import (
+    SEGMENT_PREFIX, SharedResultBuffer, SharedResultError, cleanup_stale_segments, shared_map
+)
+
+
+def digest(value):
+    """Top-level worker: 32-byte SHA-256 of the value."""
+    return hashlib.sha256(str(value).encode()).digest()
+
+
+def vector(value):
+    """Top-level worker: 4-element float32 vector."""
+    return np.full(4, value, dtype=np.float32)
+
+
+def fragile_digest(value):
+    """Top-level worker failing on one item."""
+    if value == 7:
+        raise ValueError('unreadable')
+    return digest(value)
+
+
+def crashing_worker(value):
+    """Top-level worker killing its process."""
+    os._exit(1)
+
+
+def own_segments():
+    """Segments in /dev/shm created by this process."""
+    if not os.path.isdir('/dev/shm'):
+        return []
+    prefix = f'{SEGMENT_PREFIX}{os.getpid()}-'
+    return [name for name in os.listdir('/dev/shm') if name.startswith(prefix)]
+
+
+def test_results_come_back_in_order():
+    """Test bytes and array results through shared memory."""
+    items = list(range(50))
+
+    assert shared_map(digest, items, 32, workers=2) == [digest(item) for item in items]
+    vectors = shared_map(vector, items, 16, workers=2, dtype='float32')
+    assert vectors.shape == (50, 4)
+    assert np.array_equal(vectors[:, 0], np.arange(50, dtype=np.float32))
+
+    assert Parallel.map_parallel(digest, items, workers=2, use_processes=True,
+                                 result_size=32) == [digest(item) for item in items]
+    assert own_segments() == []
+
+
+def test_failures_and_crashes_still_unlink():
+    """Test that failed items and dead workers never leak the segment."""
+    with pytest.raises(SharedResultError, match='item 7'):
+        shared_map(fragile_digest, range(20), 32, workers=2)
+    assert own_segments() == []
+
+    with pytest.raises(ParallelError):
+        Parallel.process_in_parallel(crashing_worker, [1, 2, 3], workers=2,
+                                     use_processes=True, result_size=32)
+    assert own_segments() == []
+
+
+def test_buffer_status_and_validation():
+    """Test record status tracking and shape checks."""
+    with SharedResultBuffer(3, 4) as buffer:
+        buffer.write(1, b'abcd')
+        assert buffer.records() == [None, b'abcd', None]
+        assert buffer.to_array('uint8')[1].tobytes() == b'abcd'
+        with pytest.raises(IndexError):
+            buffer.write(3, b'abcd')
+    with pytest.raises(SharedResultError):
+        buffer.read(0)
+    with pytest.raises(SharedResultError):
+        SharedResultBuffer(3, 0)
+
+
+@pytest.mark.skipif(not os.path.isdir('/dev/shm'), reason='needs /dev/shm')
+def test_stale_segments_of_dead_processes_are_swept():
+    """Test removal of segments whose owner process is gone."""
+    dead = subprocess.run([sys.executable, '-c', 'import os; print(os.getpid())'],
+                          capture_output=True, text=True, check=True)
+    stale = os.path.join('/dev/shm', f'{SEGMENT_PREFIX}{dead.stdout.strip()}-deadbeef')
+    with open(stale, 'wb') as handle:
+        handle.write(b'\0' * 16)
+
+    with SharedResultBuffer(1, 8):
+        assert cleanup_stale_segments() >= 1
+        assert not os.path.exists(stale)
+        assert len(own_segments()) == 1
@@ -0,0 +1,116 @@
+"""Tests for the blocked all-pairs near-duplicate search."""
+
+import argparse
+import os
+import tempfile
+from unittest import mock
+
+import numpy as np
+import pytest
+
+from nodupe.tools.commands.similarity import SimilarityCommandTool
+from nodupe.tools.databases.connection import DatabaseConnection
+from nodupe.tools.databases.embeddings import EmbeddingRepository
+from nodupe.tools.databases.files import FileRepository
+from nodupe.tools.databases.schema import DatabaseSchema
+from nodupe.tools.similarity import BruteForceBackend
+from nodupe.tools.similarity.all_pairs import (
+    AllPairsError, find_all_pairs, write_pairs_as_relationships
+)
+
+
+def _clustered(rng, clusters=40, per_cluster=5, dims=16):
+    """Vectors forming tight clusters of near-duplicates."""
+    centers = rng.standard_normal((clusters, dims))
+    noise = rng.standard_normal((clusters * per_cluster, dims)) * 0.02
+    return np.repeat(centers, per_cluster, axis=0) + noise
+
+
+def _reference_pairs(matrix, threshold):
+    """All pairs above threshold computed in one dense product."""
+    normalized = matrix / np.linalg.norm(matrix, axis=1, keepdims=True)
+    scores = normalized @ normalized.T
+    rows, cols = np.nonzero(np.triu(scores >= threshold, k=1))
+    return set(zip(rows.tolist(), cols.tolist()))
+
+
+@pytest.mark.parametrize('block_rows,tile_bytes', [(1024, 32 << 20), (7, 4 * 7 * 11)])
+def test_pairs_match_dense_reference(block_rows, tile_bytes):
+    """Test that tiling finds exactly the pairs of a dense self-join."""
+    matrix = _clustered(np.random.default_rng(3))
+
+    pairs = list(find_all_pairs(matrix, 0.95, block_rows=block_rows,
+                                tile_bytes=tile_bytes, max_workers=3))
+
+    assert {(i, j) for i, j, _ in pairs} == _reference_pairs(matrix, 0.95)
+    assert len(pairs) == len({(i, j) for i, j, _ in pairs})
+    assert all(i < j and score >= 0.95 for i, j, score in pairs)
+
+
+def test_backend_find_all_pairs_returns_metadata():
+    """Test the backend entry point over its stored matrix."""
+    backend = BruteForceBackend(dimensions=3)
+    backend.add_vectors(
+        [[1.0, 0.0, 0.0], [0.99, 0.01, 0.0], [0.0, 1.0, 0.0]],
+        [{'id': 1}, {'id': 2}, {'id': 3}]
+    )
+
+    pairs = list(backend.find_all_pairs(0.9))
+
+    assert [(a['id'], b['id']) for a, b, _ in pairs] == [(1, 2)]
+
+
+def test_single_row_and_invalid_input():
+    """Test degenerate inputs."""
+    assert list(find_all_pairs(np.ones((1, 4)), 0.5)) == []
+    with pytest.raises(AllPairsError):
+        list(find_all_pairs(np.ones(4), 0.5))
+
+
+def test_pairs_are_written_as_relationships():
+    """Test streaming pairs from stored embeddings into file_relationships."""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        db = DatabaseConnection(os.path.join(temp_dir, "pairs.db"))
+        DatabaseSchema(db.get_connection()).create_schema()
+        FileRepository(db).batch_add_files([
+            {'path': f'/img/{i}.jpg', 'size': i, 'modified_time': i} for i in range(4)
+        ])
+        embeddings = EmbeddingRepository(db)
+        for file_id, vector in zip(range(1, 5), ([1, 0], [0.98, 0.05], [0, 1], [-1, 0])):
+            embeddings.add_embedding(file_id, vector, 'clip', 1)
+
+        matrix, file_ids = embeddings.load_matrix('clip')
+        written = write_pairs_as_relationships(db, matrix, file_ids, 0.9, block_rows=1)
+
+        rows = db.execute(
+            'SELECT file1_id, file2_id, relationship_type FROM file_relationships'
+        ).fetchall()
+        assert written == 1
+        assert rows == [(1, 2, 'vector_similar')]
+        db.close()
+
+
+def test_vector_command_reads_only_embeddings(capsys):
+    """Test that the vector metric skips the file inventory and reports pairs."""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        db = DatabaseConnection(os.path.join(temp_dir, "pairs.db"))
+        DatabaseSchema(db.get_connection()).create_schema()
+        FileRepository(db).batch_add_files([
+            {'path': f'/img/{i}.jpg', 'size': i, 'modified_time': i} for i in range(4)
+        ])
+        embeddings = EmbeddingRepository(db)
+        for file_id, vector in zip(range(1, 5), ([1, 0], [0.98, 0.05], [0, 1], [-1, 0])):
+            embeddings.add_embedding(file_id, vector, 'clip', 1)
+        db.commit()
+        container = mock.Mock(get_service=mock.Mock(return_value=db))
+        args = argparse.Namespace(metric='vector', threshold=0.9, k=5, verbose=True,
+                                  container=container)
+
+        with mock.patch.object(FileRepository, 'get_all_files', side_effect=AssertionError):
+            assert SimilarityCommandTool().execute_similarity(args) == 0
+
+        output = capsys.readouterr().out
+        assert '/img/0.jpg ~ /img/1.jpg' in output
+        assert 'Found 1 near-duplicate pairs.' in output
+        assert 'Marked' not in output
+        db.close()
@@ -0,0 +1,107 @@
+"""Tests for the brute-force similarity backend."""
+
+import numpy as np
+import pytest
+
+from nodupe.tools.similarity import BruteForceBackend, SimilarityManager
+
+
+def _reference_top_k(vectors, query, k):
+    """Top-k indices by cosine similarity computed the slow way."""
+    vectors = np.asarray(vectors, dtype=np.float64)
+    query = np.asarray(query, dtype=np.float64)
+    scores = vectors @ query / (np.linalg.norm(vectors, axis=1) * np.linalg.norm(query))
+    return list(np.argsort(-scores)[:k])
+
+
+@pytest.fixture
+def backend():
+    """Backend holding 3000 random vectors with sequential ids."""
+    rng = np.random.default_rng(7)
+    vectors = rng.standard_normal((3000, 32)).astype(np.float32)
+    backend = BruteForceBackend(dimensions=32)
+    assert backend.add_vectors(vectors, [{'id': i} for i in range(len(vectors))])
+    return backend, vectors, rng
+
+
+def test_matrix_grows_by_doubling():
+    """Test that appends reuse spare capacity instead of reallocating."""
+    backend = BruteForceBackend(dimensions=4)
+    backend.add_vectors([[1.0, 0.0, 0.0, 0.0]], [{'id': 0}])
+    capacity = backend._matrix.shape[0]
+
+    backend.add_vectors([[0.0, 1.0, 0.0, 0.0]] * (capacity - 1), [{'id': 1}] * (capacity - 1))
+    assert backend._matrix.shape[0] == capacity
+
+    backend.add_vectors([[0.0, 0.0, 1.0, 0.0]], [{'id': 2}])
+    assert backend._matrix.shape[0] == capacity * 2
+    assert backend.get_index_size() == capacity + 1
+
+
+def test_rows_are_normalized_on_insert(backend):
+    """Test that stored rows are unit length."""
+    index, _, _ = backend
+    np.testing.assert_allclose(np.linalg.norm(index.vectors, axis=1), 1.0, rtol=1e-5)
+
+
+def test_search_matches_reference(backend):
+    """Test that top-k results match a full cosine ranking."""
+    index, vectors, rng = backend
+    query = rng.standard_normal(32)
+
+    results = index.search(query.tolist(), k=10, threshold=-1.0)
+
+    assert [meta['id'] for meta, _ in results] == _reference_top_k(vectors, query, 10)
+    scores = [score for _, score in results]
+    assert scores == sorted(scores, reverse=True)
+
+
+def test_search_batch_matches_single_search(backend):
+    """Test that batched queries agree with one-at-a-time search."""
+    index, _, rng = backend
+    queries = rng.standard_normal((50, 32))
+    index.BATCH_SCORE_BYTES = 4 * 3000 * 7  # force several blocks
+
+    batched = index.search_batch(queries, k=5, threshold=0.1)
+
+    assert len(batched) == 50
+    for query, results in zip(queries, batched):
+        single = index.search(query.tolist(), k=5, threshold=0.1)
+        assert [m['id'] for m, _ in results] == [m['id'] for m, _ in single]
+        np.testing.assert_allclose([s for _, s in results], [s for _, s in single], rtol=1e-5)
+
+
+def test_threshold_and_exact_match():
+    """Test thresholding and that an indexed vector finds itself first."""
+    backend = BruteForceBackend(dimensions=3)
+    backend.add_vectors(
+        [[1.0, 0.0, 0.0], [0.0, 1.0, 0.0], [0.0, 0.0, 0.0]],
+        [{'id': 1}, {'id': 2}, {'id': 3}]
+    )
+
+    results = backend.search([2.0, 0.0, 0.0], k=3, threshold=0.5)
+    assert [(m['id'], round(s, 5)) for m, s in results] == [(1, 1.0)]
+    assert backend.search_batch([[2.0, 0.0, 0.0], [0.0, 3.0, 0.0]], k=1) == [
+        [({'id': 1}, pytest.approx(1.0))], [({'id': 2}, pytest.approx(1.0))]
+    ]
+
+
+def test_save_and_load_round_trip(tmp_path, backend):
+    """Test that a saved index can be loaded into a fresh backend."""
+    index, _, rng = backend
+    path = str(tmp_path / "index.pkl")
+    assert index.save_index(path)
+
+    restored = BruteForceBackend(dimensions=32)
+    assert restored.load_index(path)
+    query = rng.standard_normal(32).tolist()
+    assert restored.get_index_size() == 3000
+    assert [m for m, _ in restored.search(query, k=5, threshold=-1)] == \
+        [m for m, _ in index.search(query, k=5, threshold=-1)]
+
+
+def test_manager_exposes_search_batch():
+    """Test that the manager forwards batched searches."""
+    manager = SimilarityManager()
+    manager.add_vectors([[1.0] + [0.0] * 511], [{'id': 1}])
+    assert manager.search_batch([[1.0] + [0.0] * 511], k=1)[0][0][0] == {'id': 1}
@@ -0,0 +1,102 @@
+"""Tests for the Hamming-space perceptual hash index."""
+
+import numpy as np
+import pytest
+
+from nodupe.tools.similarity.hamming import (
+    HammingError, MultiIndexHashTable, find_hamming_pairs, hamming_distance, pack_hashes,
+    pairwise_distances
+)
+from nodupe.tools.video import average_hash
+
+
+def _flip(value, bits, rng, count):
+    """value with count distinct random bits flipped."""
+    for position in rng.choice(bits, size=count, replace=False):
+        value ^= 1 << int(position)
+    return value
+
+
+@pytest.fixture
+def hashes():
+    """Random 64-bit hashes."""
+    rng = np.random.default_rng(3)
+    return [int(h) for h in rng.integers(0, 2 ** 63, 2000, dtype=np.int64)]
+
+
+def test_radius_search_matches_linear_scan(hashes):
+    """Test that multi-index lookups find exactly the hashes within radius."""
+    rng = np.random.default_rng(4)
+    index = MultiIndexHashTable(64)
+    index.add_many(hashes, range(len(hashes)))
+    near = {10_000 + i: _flip(hashes[0], 64, rng, i) for i in range(12)}
+    index.add_many(near.values(), near.keys())
+
+    for radius in (0, 3, 7, 11):
+        expected = sorted(
+            (item_id, hamming_distance(hashes[0], value))
+            for item_id, value in list(enumerate(hashes)) + list(near.items())
+            if hamming_distance(hashes[0], value) <= radius)
+        assert sorted(index.search(hashes[0], radius)) == expected
+    distances = [distance for _, distance in index.search(hashes[0], 11)]
+    assert distances == sorted(distances)
+
+
+def test_add_replaces_and_remove_forgets():
+    """Test upsert semantics of add and removal from every table."""
+    index = MultiIndexHashTable(64)
+    index.add(0xFFFF, 'a')
+    index.add(0xF0F0F0F0, 'a')
+    assert len(index) == 1 and index.get('a') == 0xF0F0F0F0
+    assert index.search(0xFFFF, 0) == []
+
+    assert index.remove('a') and not index.remove('a')
+    assert 'a' not in index
+    assert all(not table for table in index._tables)
+    with pytest.raises(HammingError):
+        index.add(1 << 64, 'b')
+
+
+def test_256_bit_hashes():
+    """Test an index over 256-bit hashes."""
+    rng = np.random.default_rng(5)
+    base = int.from_bytes(rng.bytes(32), 'big')
+    index = MultiIndexHashTable(256)
+    assert index.substrings == 16
+    index.add(base, 1)
+    index.add(_flip(base, 256, rng, 20), 2)
+    index.add(base ^ ((1 << 256) - 1), 3)
+    assert index.search(base, 25) == [(1, 0), (2, 20)]
+
+
+def test_vectorized_distances_and_all_pairs(hashes):
+    """Test packed popcount distances and the blocked all-pairs search."""
+    sample = hashes[:300]
+    packed = pack_hashes(sample)
+    assert packed.shape == (300, 8)
+    distances = pairwise_distances(packed[:5], packed)
+    assert distances[2, 7] == hamming_distance(sample[2], sample[7])
+
+    radius = 22
+    expected = [(i, j, hamming_distance(sample[i], sample[j]))
+                for i in range(300) for j in range(i + 1, 300)
+                if hamming_distance(sample[i], sample[j]) <= radius]
+    assert expected
+    assert sorted(find_hamming_pairs(sample, radius)) == expected
+
+    index = MultiIndexHashTable(64)
+    index.add_many(sample, [f'f{i}' for i in range(300)])
+    assert len(list(index.find_all_pairs(radius))) == len(expected)
+
+
+def test_average_hash_keeps_hamming_property():
+    """Test that video frame hashes are integers that degrade gracefully."""
+    rng = np.random.default_rng(6)
+    frame = rng.integers(0, 256, (144, 256, 3)).astype(np.uint8)
+    noisy = np.clip(frame + rng.normal(0, 8, frame.shape), 0, 255).astype(np.uint8)
+    other = rng.integers(0, 256, (144, 256, 3)).astype(np.uint8)
+
+    h = average_hash(frame)
+    assert isinstance(h, int) and 0 <= h < 2 ** 64
+    assert average_hash(frame, hash_size=16) < 2 ** 256
+    assert hamming_distance(h, average_hash(noisy)) < hamming_distance(h, average_hash(other))
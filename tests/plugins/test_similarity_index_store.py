@@ -0,0 +1,139 @@
+"""Tests for memory-mapped similarity index persistence."""
+
+import json
+import os
+import pickle
+
+import numpy as np
+import pytest
+
+from nodupe.tools.similarity import BruteForceBackend
+from nodupe.tools.similarity import index_store
+from nodupe.tools.similarity.index_store import (
+    FileIdMetadata, IndexStoreError, INDEX_FORMAT_VERSION, load_matrix_index, read_header,
+    save_matrix_index
+)
+
+
+@pytest.fixture
+def vectors():
+    """Random vectors for a 16-dimensional index."""
+    return np.random.default_rng(5).standard_normal((200, 16)).astype(np.float32)
+
+
+def test_file_id_metadata_is_stored_as_a_column(tmp_path, vectors):
+    """Test that file_id-only metadata needs no JSON sidecar."""
+    backend = BruteForceBackend(16)
+    backend.add_vectors(vectors, [{'file_id': i * 3} for i in range(200)])
+    path = str(tmp_path / "index")
+    assert backend.save_index(path)
+
+    with open(path) as f:
+        header = json.load(f)
+    assert header['version'] == INDEX_FORMAT_VERSION
+    assert header['dimensions'] == 16 and header['count'] == 200 and header['normalized']
+    assert set(header['files']) == {'vectors', 'ids'}
+    assert os.path.exists(os.path.join(tmp_path, header['files']['ids']))
+
+    loaded = BruteForceBackend(16)
+    assert loaded.load_index(path)
+    assert isinstance(loaded.vectors, np.memmap)
+    assert isinstance(loaded.metadata, FileIdMetadata)
+    assert loaded.metadata[10] == {'file_id': 30}
+    query = vectors[10].tolist()
+    assert loaded.search(query, k=3, threshold=-1) == backend.search(query, k=3, threshold=-1)
+
+
+def test_rich_metadata_uses_json_sidecar(tmp_path, vectors):
+    """Test that metadata beyond file IDs round-trips through JSON."""
+    metadata = [{'file_id': i, 'path': f'/p/{i}'} for i in range(200)]
+    path = str(tmp_path / "index")
+    save_matrix_index(path, vectors, metadata, normalized=False)
+
+    loaded = BruteForceBackend(16)
+    assert loaded.load_index(path, mmap=False)
+    assert list(loaded.metadata) == metadata
+    np.testing.assert_allclose(np.linalg.norm(loaded.vectors, axis=1), 1.0, rtol=1e-5)
+
+
+def test_adding_after_mmap_load_leaves_file_untouched(tmp_path, vectors):
+    """Test copy-on-append for a memory-mapped index."""
+    path = str(tmp_path / "index")
+    header = save_matrix_index(path, vectors, [{'file_id': i} for i in range(200)])
+    vector_file = os.path.join(tmp_path, header['files']['vectors'])
+    on_disk = np.load(vector_file).copy()
+
+    backend = BruteForceBackend(16)
+    backend.load_index(path)
+    assert backend.add_vectors(vectors[:5] * 2, [{'file_id': 1000 + i} for i in range(5)])
+
+    assert backend.get_index_size() == 205
+    assert backend.metadata[-1] == {'file_id': 1004}
+    np.testing.assert_array_equal(np.load(vector_file), on_disk)
+
+
+def test_header_validation(tmp_path, vectors):
+    """Test dimension and version checks."""
+    path = str(tmp_path / "index")
+    save_matrix_index(path, vectors, [{'file_id': i} for i in range(200)])
+
+    with pytest.warns(UserWarning, match="dimension mismatch"):
+        assert not BruteForceBackend(8).load_index(path)
+
+    with open(path) as f:
+        header = json.load(f)
+    header['version'] = INDEX_FORMAT_VERSION + 1
+    with open(path, 'w') as f:
+        json.dump(header, f)
+    with pytest.raises(IndexStoreError):
+        load_matrix_index(path)
+
+
+def test_legacy_pickle_index_still_loads(tmp_path):
+    """Test that indexes saved in the old pickle format remain readable."""
+    path = str(tmp_path / "legacy.pkl")
+    with open(path, 'wb') as f:
+        pickle.dump({'vectors': [[1.0, 0.0], [0.0, 1.0]], 'metadata': [{'id': 1}, {'id': 2}],
+                     'dimensions': 2}, f)
+
+    backend = BruteForceBackend(2)
+    assert backend.load_index(path)
+    assert backend.search([1.0, 0.1], k=1) == [({'id': 1}, pytest.approx(0.995, abs=1e-3))]
+
+
+def test_saves_switch_generations_atomically(tmp_path, vectors):
+    """Test that a reader only ever pairs vectors with the ids of the same save."""
+    path = str(tmp_path / "index")
+    save_matrix_index(path, vectors, [{'file_id': i} for i in range(200)])
+    old_header = read_header(path)
+
+    save_matrix_index(path, vectors[::-1], [{'file_id': 1000 + i} for i in range(200)])
+    new_header = read_header(path)
+    assert new_header['generation'] != old_header['generation']
+    assert sorted(os.listdir(tmp_path)) == sorted(['index'] + list(new_header['files'].values()))
+
+    # A reader holding the replaced header fails to open it instead of mixing ...
+    with pytest.raises(FileNotFoundError):
+        index_store._load_generation(path, old_header, mmap=True)
+    # ... and load_matrix_index retries with the current header
+    loaded, metadata, header = load_matrix_index(path)
+    assert header['generation'] == new_header['generation']
+    assert metadata[0] == {'file_id': 1000}
+    np.testing.assert_array_equal(loaded[0], vectors[-1])
+
+
+def test_version_1_layout_still_loads(tmp_path, vectors):
+    """Test indexes whose data files have fixed suffixes and no generation."""
+    path = str(tmp_path / "index")
+    header = save_matrix_index(path, vectors, [{'file_id': i} for i in range(200)])
+    for kind, name in header['files'].items():
+        os.replace(os.path.join(tmp_path, name), path + '.' + name.split('.', 2)[2])
+    legacy = {key: value for key, value in header.items() if key not in ('files', 'generation')}
+    legacy['version'] = 1
+    with open(path, 'w') as f:
+        json.dump(legacy, f)
+
+    loaded, metadata, _ = load_matrix_index(path)
+    assert metadata[199] == {'file_id': 199}
+    save_matrix_index(path, vectors, [{'file_id': i} for i in range(200)])
+    assert not os.path.exists(path + '.vectors.npy')
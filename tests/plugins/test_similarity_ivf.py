@@ -0,0 +1,143 @@
+"""Tests for the NumPy IVF approximate similarity backend."""
+
+import numpy as np
+import pytest
+
+from nodupe.tools.similarity import (
+    BruteForceBackend, IVFBackend, SimilarityManager, spherical_kmeans
+)
+
+
+@pytest.fixture(scope='module')
+def data():
+    """Clustered vectors, queries near them, and exact answers."""
+    rng = np.random.default_rng(11)
+    centers = rng.standard_normal((100, 24))
+    vectors = (centers[rng.integers(0, 100, 5000)]
+               + rng.standard_normal((5000, 24)) * 0.3).astype(np.float32)
+    queries = vectors[rng.integers(0, 5000, 50)] + rng.standard_normal((50, 24)) * 0.05
+    exact = BruteForceBackend(24)
+    exact.add_vectors(vectors, [{'id': i} for i in range(5000)])
+    return vectors, queries, exact.search_batch(queries, k=10, threshold=-1)
+
+
+def _recall(results, truth):
+    """Mean fraction of the exact top-k found."""
+    return np.mean([
+        len({m['id'] for m, _ in got} & {m['id'] for m, _ in want}) / len(want)
+        for got, want in zip(results, truth)
+    ])
+
+
+def test_untrained_index_is_exact(data):
+    """Test that small indexes are searched exhaustively."""
+    vectors, queries, _ = data
+    ivf = IVFBackend(24, min_train_size=10000)
+    ivf.add_vectors(vectors[:500], [{'id': i} for i in range(500)])
+
+    exact = BruteForceBackend(24)
+    exact.add_vectors(vectors[:500], [{'id': i} for i in range(500)])
+    assert not ivf.is_trained
+    assert ivf.search(queries[0], k=5, threshold=-1) == exact.search(queries[0].tolist(), k=5, threshold=-1)
+
+
+def test_trained_index_recall_grows_with_nprobe(data):
+    """Test that nprobe trades speed for recall and nprobe == nlist is exact."""
+    vectors, queries, truth = data
+    ivf = IVFBackend(24, nlist=64, min_train_size=1000)
+    ivf.add_vectors(vectors, [{'id': i} for i in range(5000)])
+    assert ivf.is_trained and ivf.nlist == 64
+    assert sum(inverted.size for inverted in ivf._lists) == 5000
+
+    ivf.set_search_params(nprobe=1)
+    low = _recall(ivf.search_batch(queries, k=10, threshold=-1), truth)
+    ivf.set_search_params(nprobe=8)
+    high = _recall(ivf.search_batch(queries, k=10, threshold=-1), truth)
+    ivf.set_search_params(nprobe=64)
+    full = _recall(ivf.search_batch(queries, k=10, threshold=-1), truth)
+
+    assert low <= high <= full == 1.0
+    assert high >= 0.9
+
+
+def test_incremental_adds_trigger_training_and_retraining(data):
+    """Test automatic training and retraining as the index grows."""
+    vectors, _, _ = data
+    ivf = IVFBackend(24, min_train_size=200)
+    for start in range(0, 2000, 100):
+        ivf.add_vectors(vectors[start:start + 100], [{'id': i} for i in range(start, start + 100)])
+
+    assert ivf.is_trained
+    assert ivf._trained_size == 1600
+    assert ivf.nlist == int(4 * 1600 ** 0.5)
+    assert ivf.get_index_size() == 2000
+
+
+def test_save_and_load_round_trip(tmp_path, data):
+    """Test persistence of the quantizer, lists and metadata."""
+    vectors, queries, _ = data
+    ivf = IVFBackend(24, nlist=32, nprobe=4, min_train_size=1000)
+    ivf.add_vectors(vectors[:3000], [{'id': i} for i in range(3000)])
+    path = str(tmp_path / "ivf.npz")
+    assert ivf.save_index(path)
+
+    restored = IVFBackend(24, nprobe=4)
+    assert restored.load_index(path)
+    assert restored.nlist == 32 and restored.get_index_size() == 3000
+    assert restored.search(queries[0], k=5) == ivf.search(queries[0], k=5)
+    assert not IVFBackend(8).load_index(path)
+
+
+def test_interrupted_save_keeps_previous_index(tmp_path, data, monkeypatch):
+    """Test that a save failing after the metadata is written changes nothing."""
+    vectors, _, _ = data
+    path = str(tmp_path / "ivf.npz")
+    ivf = IVFBackend(24, min_train_size=10000)
+    ivf.add_vectors(vectors[:100], [{'id': i} for i in range(100)])
+    assert ivf.save_index(path)
+
+    ivf.add_vectors(vectors[100:200], [{'id': i} for i in range(100, 200)])
+    with monkeypatch.context() as patched:
+        patched.setattr(np, 'savez', lambda *args, **kwargs: 1 / 0)
+        with pytest.warns(UserWarning):
+            assert not ivf.save_index(path)
+
+    restored = IVFBackend(24)
+    assert restored.load_index(path)
+    assert restored.get_index_size() == 100
+
+    assert ivf.save_index(path)
+    assert len([p for p in tmp_path.iterdir() if p.name.endswith('.metadata')]) == 1
+
+
+def test_search_ignores_rows_added_after_it_started(data):
+    """Test that rows published during a search are not checked against an old bitmap."""
+    vectors, _, _ = data
+    ivf = IVFBackend(24, min_train_size=10000)
+    ivf.add_vectors(vectors[:100], [{'file_id': i} for i in range(100)])
+    assert ivf.remove_vectors([0]) == 1
+    search = ivf._search_normalized
+
+    def add_then_search(*args):
+        ivf.add_vectors(vectors[100:1100], [{'file_id': i} for i in range(100, 1100)])
+        return search(*args)
+
+    ivf._search_normalized = add_then_search
+    results = ivf.search(vectors[5], k=1)
+    assert [meta['file_id'] for meta, _ in results] == [5]
+
+
+def test_kmeans_centroids_are_unit_length(data):
+    """Test the spherical k-means quantizer."""
+    vectors, _, _ = data
+    normalized = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    centroids = spherical_kmeans(normalized, 16, iterations=5)
+    assert centroids.shape == (16, 24)
+    np.testing.assert_allclose(np.linalg.norm(centroids, axis=1), 1.0, rtol=1e-5)
+
+
+def test_manager_registers_ivf_backend():
+    """Test that the manager offers the IVF backend."""
+    manager = SimilarityManager()
+    assert manager.set_backend('ivf')
+    assert isinstance(manager.get_current_backend(), IVFBackend)
@@ -0,0 +1,136 @@
+"""Tests for MinHash signatures and LSH near-duplicate detection."""
+
+import os
+import tempfile
+
+import numpy as np
+import pytest
+
+from nodupe.tools.databases.connection import DatabaseConnection
+from nodupe.tools.databases.files import FileRepository
+from nodupe.tools.databases.schema import DatabaseSchema
+from nodupe.tools.ml import CPUBackend
+from nodupe.tools.similarity.minhash import (
+    LSHIndex, MinHashError, MinHasher, byte_shingles, exact_jaccard, find_near_duplicates,
+    optimal_bands, word_shingles, write_minhash_relationships
+)
+
+
+@pytest.fixture(scope='module')
+def corpus():
+    """400 random documents plus two edited copies of document 0."""
+    rng = np.random.default_rng(9)
+    vocab = [f'word{i}' for i in range(3000)]
+    documents = [' '.join(rng.choice(vocab, 200)) for _ in range(400)]
+    words = documents[0].split()
+    documents.append(' '.join(words[:-5] + ['edited'] * 5))
+    documents.append(' '.join(words[:100]))
+    return documents
+
+
+def test_shingles_are_deterministic_sets():
+    """Test word and byte shingling."""
+    assert np.array_equal(word_shingles("A b c d e f"), word_shingles("a B c d e f"))
+    assert len(word_shingles("a b c d e f")) == 2
+    assert len(word_shingles("a b")) == 1 and len(word_shingles("")) == 0
+    assert len(byte_shingles(b"abcdefghij", 8)) == 3
+    with pytest.raises(MinHashError):
+        byte_shingles(b"abc", 9)
+
+
+def test_signatures_estimate_jaccard(corpus):
+    """Test signature determinism and the Jaccard estimate."""
+    first, second = MinHasher(num_perm=256), MinHasher(num_perm=256)
+    assert np.array_equal(first.signature(corpus[0]), second.signature(corpus[0]))
+
+    a, b = first.shingles(corpus[0]), first.shingles(corpus[400])
+    estimate = MinHasher.estimate_jaccard(first.signature_from_shingles(a),
+                                          first.signature_from_shingles(b))
+    assert estimate == pytest.approx(exact_jaccard(a, b), abs=0.08)
+    assert first.signatures(corpus[:3]).shape == (3, 256)
+
+
+def test_optimal_bands_tracks_threshold():
+    """Test that the banding's steep point sits just below the threshold."""
+    for threshold in (0.5, 0.8, 0.9):
+        bands, rows = optimal_bands(128, threshold)
+        assert bands * rows == 128
+        assert (1 / bands) ** (1 / rows) <= threshold
+    assert optimal_bands(128, 0.8) == (16, 8)
+
+
+def test_lsh_finds_near_duplicates_without_all_pairs(corpus):
+    """Test candidate generation plus exact verification."""
+    pairs = find_near_duplicates(corpus, threshold=0.8)
+    assert [(i, j) for i, j, _ in pairs] == [(0, 400)]
+    assert pairs[0][2] >= 0.8
+
+    hasher = MinHasher()
+    index = LSHIndex(threshold=0.8)
+    for i, document in enumerate(corpus):
+        index.add(i, hasher.signature(document))
+    index.add('empty', hasher.signature(''))
+    assert len(index) == len(corpus)
+    assert len(list(index.candidate_pairs())) < 50
+    assert {0, 400} <= index.query(hasher.signature(corpus[0]))
+
+
+def test_identical_documents_collapse_to_one_representative():
+    """Test that copies give linear candidates and every pair comes once."""
+    hasher = MinHasher()
+    text = ' '.join(f'word{i}' for i in range(300))
+    near = text.replace('word150 ', 'other ')
+    signature = hasher.signature(text)
+    index = LSHIndex(threshold=0.5)
+    for i in range(3000):
+        index.add(i, signature)
+    index.add('near', hasher.signature(near))
+
+    pairs = list(index.candidate_pairs())
+    assert len(pairs) == len(set(pairs)) == 3000
+    assert ('near' in index.query(signature)) and len(index) == 3001
+    assert (0, 'near') in pairs and (0, 2999) in pairs
+
+
+def test_oversized_buckets_pair_with_first_member():
+    """Test that a bucket past max_bucket_size yields star pairs."""
+    index = LSHIndex(num_perm=4, bands=2, max_bucket_size=3)
+    for i in range(10):
+        index.add(i, np.array([1, 1, i, i], dtype=np.uint32))
+    assert sorted(index.candidate_pairs()) == [(0, i) for i in range(1, 10)]
+
+
+def test_write_minhash_relationships():
+    """Test the file mode storing pairs in file_relationships."""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        text = ' '.join(f'line {i} of the application log' for i in range(200))
+        contents = [text, text.replace('line 7 ', 'row 7 '), 'something else entirely ' * 20]
+        paths = []
+        for i, content in enumerate(contents):
+            paths.append(os.path.join(temp_dir, f'f{i}.log'))
+            with open(paths[-1], 'w') as f:
+                f.write(content)
+        paths.append(os.path.join(temp_dir, 'missing.log'))
+
+        db = DatabaseConnection(os.path.join(temp_dir, "minhash.db"))
+        DatabaseSchema(db.get_connection()).create_schema()
+        FileRepository(db).batch_add_files([{'path': p, 'size': 1, 'modified_time': 1} for p in paths])
+        files = db.execute('SELECT id, path FROM files ORDER BY id').fetchall()
+
+        assert write_minhash_relationships(db, files, threshold=0.9) == 1
+        row = db.execute('SELECT file1_id, file2_id, relationship_type, similarity_score '
+                         'FROM file_relationships').fetchone()
+        assert row[:3] == (1, 2, 'minhash_similar') and row[3] >= 0.9
+        db.close()
+
+
+def test_cpu_backend_embeddings_are_deterministic_and_content_based():
+    """Test the CPU backend no longer returns random vectors."""
+    backend = CPUBackend()
+    texts = ['the quick brown fox jumps over the lazy dog',
+             'the quick brown fox jumps over the lazy cat',
+             'quarterly tax filing deadlines for small businesses']
+    first = np.array(backend.generate_embeddings(texts + [b'\x00\x01', [1.0, 2.0], 7]))
+    assert first.shape == (6, 128)
+    assert np.array_equal(first, np.array(backend.generate_embeddings(texts + [b'\x00\x01', [1.0, 2.0], 7])))
+    assert first[0] @ first[1] > 0.5 > abs(first[0] @ first[2])
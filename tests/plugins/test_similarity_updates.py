@@ -0,0 +1,180 @@
+"""Tests for similarity index deletes, upserts, compaction and DB sync."""
+
+import os
+import tempfile
+
+import numpy as np
+import pytest
+
+from nodupe.tools.databases.connection import DatabaseConnection
+from nodupe.tools.databases.embeddings import EmbeddingRepository
+from nodupe.tools.databases.files import FileRepository
+from nodupe.tools.databases.schema import DatabaseSchema
+from nodupe.tools.similarity import BruteForceBackend, IVFBackend
+
+
+def _ids(results):
+    """file_ids of search results."""
+    return [meta['file_id'] for meta, _ in results]
+
+
+@pytest.fixture(params=['bruteforce', 'ivf'])
+def backend(request):
+    """Each mutable backend holding 400 random vectors keyed by file_id."""
+    if request.param == 'bruteforce':
+        index = BruteForceBackend(8)
+    else:
+        index = IVFBackend(8, nlist=8, nprobe=8, min_train_size=100)
+    index.compaction_min_deleted = 10
+    index.background_compaction = False
+    vectors = np.random.default_rng(2).standard_normal((400, 8)).astype(np.float32)
+    index.add_vectors(vectors, [{'file_id': i} for i in range(400)])
+    return index, vectors
+
+
+def test_removed_vectors_are_not_returned(backend):
+    """Test that tombstoned rows are filtered from every search path."""
+    index, vectors = backend
+    assert _ids(index.search(vectors[5], k=1)) == [5]
+
+    assert index.remove_vectors([5, 6, 12345]) == 2
+    assert index.get_index_size() == 398
+    assert 5 not in _ids(index.search(vectors[5], k=10, threshold=-1))
+    assert all(5 not in _ids(results) for results in index.search_batch(vectors[:10], k=5, threshold=-1))
+    assert index.remove_vectors([5]) == 0
+
+
+def test_upsert_replaces_vector_for_file_id(backend):
+    """Test that an upsert supersedes the previous vector of a file."""
+    index, vectors = backend
+    assert index.upsert_vectors([vectors[300]], [{'file_id': 7}])
+
+    results = index.search(vectors[300], k=2, threshold=0.99)
+    assert sorted(_ids(results)) == [7, 300]
+    assert 7 not in _ids(index.search(vectors[7], k=3, threshold=0.99))
+    assert index.get_index_size() == 400
+    assert not index.upsert_vectors([vectors[0]], [{'path': '/no/id'}])
+
+
+def test_compaction_drops_dead_rows_and_keeps_results(backend):
+    """Test compaction once the tombstone ratio crosses the threshold."""
+    index, vectors = backend
+    index.compaction_min_deleted = 1000
+    index.remove_vectors(range(0, 100))
+    assert index.tombstone_ratio == 0.25
+
+    index.compaction_min_deleted = 10
+    index.remove_vectors([100])
+
+    assert index.tombstone_ratio == 0
+    assert index._row_count() == 299
+    reference = BruteForceBackend(8)
+    reference.add_vectors(vectors[101:], [{'file_id': i} for i in range(101, 400)])
+    queries = vectors[200:210]
+    assert [_ids(r) for r in index.search_batch(queries, k=5, threshold=-1)] == \
+        [_ids(r) for r in reference.search_batch(queries, k=5, threshold=-1)]
+    assert index.remove_vectors([150]) == 1
+    assert index.upsert_vectors([vectors[0]], [{'file_id': 0}])
+    assert _ids(index.search(vectors[0], k=1)) == [0]
+
+
+def test_background_compaction_carries_concurrent_changes():
+    """Test that rows added and deleted during compaction survive the swap."""
+    index = BruteForceBackend(4)
+    vectors = np.eye(4, dtype=np.float32)[np.arange(40) % 4] + np.arange(40)[:, None] * 1e-3
+    index.add_vectors(vectors, [{'file_id': i} for i in range(40)])
+    index.remove_vectors(range(20))
+
+    original_build = index._compaction_build
+
+    def build_while_writing(snapshot, live, remap):
+        built = original_build(snapshot, live, remap)
+        index.add_vectors([[0.0, 0.0, 0.0, 5.0]], [{'file_id': 99}])
+        index.remove_vectors([21])
+        return built
+
+    index._compaction_build = build_while_writing
+    assert index.compact()
+
+    assert index._row_count() == 21
+    assert index.get_index_size() == 20
+    assert index._file_row_map()[99] == 20
+    assert 21 not in _ids(index.search([0.0, 1.0, 0.0, 0.0], k=40, threshold=-1))
+    assert _ids(index.search([0.0, 0.0, 0.0, 1.0], k=1)) == [99]
+
+
+def test_sync_from_database():
+    """Test that sync removes deleted files and picks up new embeddings."""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        db = DatabaseConnection(os.path.join(temp_dir, "sync.db"))
+        DatabaseSchema(db.get_connection()).create_schema()
+        files = FileRepository(db)
+        files.batch_add_files([{'path': f'/f/{i}', 'size': i, 'modified_time': i} for i in range(4)])
+        embeddings = EmbeddingRepository(db)
+        for file_id, vector in zip(range(1, 4), ([1, 0, 0], [0, 1, 0], [0, 0, 1])):
+            embeddings.add_embedding(file_id, vector, 'clip', 100)
+
+        index = BruteForceBackend(3)
+        assert index.sync_from_database(db, 'clip') == {'removed': 0, 'upserted': 3}
+
+        files.delete_file(2)
+        embeddings.add_embedding(4, [1, 1, 0], 'clip', 200)
+        result = index.sync_from_database(db, 'clip')
+
+        assert result['removed'] == 1
+        assert index.get_index_size() == 3
+        assert sorted(_ids(index.search([1, 1, 1], k=10, threshold=-1))) == [1, 3, 4]
+        db.close()
+
+
+@pytest.mark.parametrize('backend_class', [BruteForceBackend, IVFBackend])
+def test_sync_resumes_from_saved_revision(backend_class):
+    """Test that unchanged embeddings are not re-added, across save and load."""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        db = DatabaseConnection(os.path.join(temp_dir, "sync.db"))
+        DatabaseSchema(db.get_connection()).create_schema()
+        FileRepository(db).batch_add_files(
+            [{'path': f'/f/{i}', 'size': i, 'modified_time': i} for i in range(5)])
+        embeddings = EmbeddingRepository(db)
+        for file_id in range(1, 6):
+            embeddings.add_embedding(file_id, np.eye(5)[file_id - 1], 'clip', 100)
+
+        index = backend_class(5)
+        assert index.sync_from_database(db, 'clip') == {'removed': 0, 'upserted': 5}
+        path = os.path.join(temp_dir, 'index')
+        assert index.save_index(path)
+
+        index = backend_class(5)
+        assert index.load_index(path)
+        for _ in range(3):
+            assert index.sync_from_database(db, 'clip') == {'removed': 0, 'upserted': 0}
+        assert index.get_index_size() == 5
+
+        # A rewritten embedding is picked up and replaces the old vector
+        embedding_id = embeddings.get_embedding_by_file(2, 'clip')['id']
+        embeddings.update_embedding(embedding_id, [1.0, 0.0, 0.0, 0.0, 0.0])
+        assert index.sync_from_database(db, 'clip') == {'removed': 0, 'upserted': 1}
+        assert index.get_index_size() == 5
+        assert sorted(_ids(index.search([1, 0, 0, 0, 0], k=5, threshold=0.9))) == [1, 2]
+        db.close()
+
+
+def test_sync_after_deleting_newest_revision():
+    """Test that a revision freed by a delete is not handed out again."""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        db = DatabaseConnection(os.path.join(temp_dir, "sync.db"))
+        DatabaseSchema(db.get_connection()).create_schema()
+        files = FileRepository(db)
+        files.batch_add_files([{'path': f'/f/{i}', 'size': i, 'modified_time': i} for i in range(3)])
+        embeddings = EmbeddingRepository(db)
+        embeddings.add_embedding(1, [1, 0, 0], 'clip', 100)
+        embeddings.add_embedding(2, [0, 1, 0], 'clip', 100)
+
+        index = BruteForceBackend(3)
+        assert index.sync_from_database(db, 'clip') == {'removed': 0, 'upserted': 2}
+
+        files.delete_file(2)
+        embeddings.add_embedding(3, [0, 0, 1], 'clip', 200)
+        assert index.sync_from_database(db, 'clip') == {'removed': 1, 'upserted': 1}
+        assert _ids(index.search([0, 0, 1], k=1)) == [3]
+        db.close()
@@ -0,0 +1,175 @@
+"""Tests for piped FFmpeg frame extraction and batched video fingerprints."""
+
+import shutil
+import subprocess
+import sys
+import threading
+import time
+import types
+
+import numpy as np
+import pytest
+
+from nodupe.tools.video import (
+    FRAME_SIZE, FFmpegSubprocessBackend, OpenCVBackend, VideoBackend, VideoBackendManager,
+    average_hash, average_hash_batch, parse_ffmpeg_metadata, sample_timestamps
+)
+
+BANNER = """Input #0, mov,mp4,m4a,3gp,3g2,mj2, from 'clip.mp4':
+  Duration: 00:01:30.50, start: 0.000000, bitrate: 49 kb/s
+  Stream #0:0[0x1](und): Video: h264 (High) (avc1 / 0x31637661), yuv420p(progressive), 640x360 [SAR 1:1 DAR 16:9], 25 fps
+"""
+
+
+class FakeBackend(VideoBackend):
+    """Backend returning synthetic frames and tracking concurrency."""
+
+    def __init__(self):
+        self.active = 0
+        self.peak = 0
+        self.lock = threading.Lock()
+
+    def is_available(self):
+        return True
+
+    def extract_frames(self, video_path, max_frames=10):
+        with self.lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        time.sleep(0.01)
+        with self.lock:
+            self.active -= 1
+        if 'broken' in video_path:
+            return []
+        seed = int(video_path.rsplit('-', 1)[1])
+        return list(np.random.default_rng(seed).integers(0, 256, (max_frames, 36, 64), dtype=np.uint8))
+
+    def get_video_metadata(self, video_path):
+        return {}
+
+    def compute_perceptual_hash(self, frame, hash_size=8):
+        return average_hash(frame, hash_size)
+
+    def get_priority(self):
+        return 1
+
+
+def test_sample_timestamps_cover_the_duration_evenly():
+    """Test seek times sit in the middle of equal segments."""
+    assert sample_timestamps(100.0, 4) == [12.5, 37.5, 62.5, 87.5]
+
+
+def test_parse_ffmpeg_metadata():
+    """Test parsing of the ffmpeg -i banner, including unknown durations."""
+    assert parse_ffmpeg_metadata(BANNER) == {'duration_seconds': 90.5, 'width': 640, 'height': 360}
+    assert parse_ffmpeg_metadata("  Duration: N/A, bitrate: N/A\n") == {}
+
+
+def test_extract_command_pipes_seeked_gray_frames():
+    """Test one ffmpeg process with one seeked input per sample and a raw gray pipe."""
+    backend = FFmpegSubprocessBackend.__new__(FFmpegSubprocessBackend)
+    cmd = backend.build_extract_command('clip.mp4', [1.0, 2.0, 3.0], 3)
+
+    assert cmd.count('-i') == 3 and cmd.count('-ss') == 3
+    assert cmd[cmd.index('-ss') + 1] == '1.000'
+    assert 'concat=n=3:v=1:a=0[out]' in cmd[cmd.index('-filter_complex') + 1]
+    assert cmd[-7:] == ['-vsync', 'passthrough', '-f', 'rawvideo', '-pix_fmt', 'gray', 'pipe:1']
+
+    unknown = backend.build_extract_command('clip.mp4', [], 5)
+    assert unknown.count('-i') == 1 and unknown[unknown.index('-frames:v') + 1] == '5'
+
+
+def test_average_hash_batch_matches_single_frames():
+    """Test the vectorized hash against per-frame hashing, gray and color."""
+    frames = np.random.default_rng(1).integers(0, 256, (6, 144, 256, 3), dtype=np.uint8)
+    assert average_hash_batch(frames) == [average_hash(frame) for frame in frames]
+    assert average_hash_batch(frames[..., 0], hash_size=16) == \
+        [average_hash(frame[..., 0], 16) for frame in frames]
+    assert average_hash(np.zeros((4, 4))) == 0
+
+
+def test_fingerprint_videos_is_ordered_and_bounded():
+    """Test that the worker pool keeps input order and bounds concurrency."""
+    manager = VideoBackendManager.__new__(VideoBackendManager)
+    backend = FakeBackend()
+    manager.backends = [backend]
+    paths = [f'video-{i}' for i in range(20)] + ['broken-0']
+
+    results = list(manager.fingerprint_videos(paths, max_frames=4, max_workers=3))
+
+    assert [path for path, _ in results] == paths
+    assert results[-1][1] == []
+    assert results[5][1] == manager.fingerprint_video('video-5', max_frames=4)
+    assert all(len(hashes) == 4 for _, hashes in results[:-1])
+    assert backend.peak <= 3
+
+
+def _fake_cv2(frames):
+    """Minimal cv2 module whose VideoCapture decodes the given BGR frames."""
+    cv2 = types.ModuleType('cv2')
+    cv2.CAP_PROP_FRAME_COUNT, cv2.CAP_PROP_POS_FRAMES = 7, 1
+
+    class VideoCapture:
+        def __init__(self, path):
+            self.position = 0
+
+        def isOpened(self):
+            return True
+
+        def get(self, prop):
+            return len(frames)
+
+        def set(self, prop, value):
+            self.position = int(value)
+
+        def read(self):
+            return True, frames[self.position].copy()
+
+        def release(self):
+            pass
+
+    cv2.VideoCapture = VideoCapture
+    return cv2
+
+
+def test_backends_hash_the_same_frames_alike(monkeypatch):
+    """Test that OpenCV's full-size color frames hash like ffmpeg's scaled gray ones."""
+    width, height = FRAME_SIZE
+    rng = np.random.default_rng(3)
+    # Blocks of 32x32 pixels in a 2x FRAME_SIZE BGR video: every resample is exact
+    luma = rng.integers(0, 64, (4, height // 16, width // 16)).astype(np.uint8) * 4
+    color = np.repeat(np.repeat(luma, 32, axis=1), 32, axis=2)[..., None].repeat(3, axis=3)
+    gray = np.repeat(np.repeat(luma, 16, axis=1), 16, axis=2)
+
+    monkeypatch.setitem(sys.modules, 'cv2', _fake_cv2(list(color)))
+    opencv = OpenCVBackend()
+    frames = opencv.extract_frames('clip.mp4', max_frames=4)
+    assert all(frame.shape == (height, width) and frame.dtype == np.uint8 for frame in frames)
+
+    ffmpeg = FFmpegSubprocessBackend.__new__(FFmpegSubprocessBackend)
+    ffmpeg._available = True
+    monkeypatch.setattr(ffmpeg, 'get_video_metadata', lambda path: {'duration_seconds': 4.0})
+    monkeypatch.setattr(ffmpeg, '_read_frames', lambda cmd, max_frames: gray)
+
+    hashes = []
+    for backend in (opencv, ffmpeg):
+        manager = VideoBackendManager.__new__(VideoBackendManager)
+        manager.backends = [backend]
+        hashes.append(manager.fingerprint_video('clip.mp4', max_frames=4))
+    assert len(hashes[0]) == 4
+    assert hashes[0] == hashes[1]
+
+
+@pytest.mark.skipif(shutil.which('ffmpeg') is None, reason="ffmpeg is not installed")
+def test_ffmpeg_extracts_evenly_sampled_frames(tmp_path):
+    """Test real extraction through the rawvideo pipe."""
+    video = str(tmp_path / "clip.mp4")
+    subprocess.run(['ffmpeg', '-v', 'error', '-f', 'lavfi', '-i', 'testsrc=duration=8:size=320x240:rate=25',
+                    '-pix_fmt', 'yuv420p', video], check=True)
+    backend = FFmpegSubprocessBackend()
+
+    assert backend.get_video_metadata(video)['duration_seconds'] == pytest.approx(8.0, abs=0.1)
+    frames = backend.extract_frames(video, max_frames=6)
+    assert len(frames) == 6
+    assert frames[0].shape == (144, 256) and frames[0].dtype == np.uint8
+    assert not (tmp_path / "temp_frames").exists()